@@ -0,0 +1,179 @@
+import threading
+import time
+from typing import Dict, Iterable, List
+
+from placement import RESOURCES
+
+
+def utilization(capacity: Dict[str, float], used: Dict[str, float]) -> Dict[str, float]:
+    """Used share of each resource as a fraction (0 where there is no capacity)."""
+    return {key: (used[key] / capacity[key]) if capacity[key] > 0 else 0 for key in RESOURCES}
+
+
+class _Totals:
+    """Capacity and usage summed over a set of VMs."""
+
+    def __init__(self):
+        self.vms = 0
+        self.cloudlets = 0  # Allocations currently held on these VMs
+        self.capacity = dict.fromkeys(RESOURCES, 0)
+        self.used = dict.fromkeys(RESOURCES, 0)
+
+    def add_vm(self, vm, sign):
+        self.vms += sign
+        self.cloudlets += sign * len(vm.cloudlets)
+        for key in RESOURCES:
+            self.capacity[key] += sign * getattr(vm, f'{key}_capacity')
+            self.used[key] += sign * getattr(vm, f'{key}_used')
+
+    def add_usage(self, delta, count_delta):
+        self.cloudlets += count_delta
+        for key, value in zip(RESOURCES, delta):
+            self.used[key] += value
+
+    def to_dict(self) -> dict:
+        return {'vms': self.vms, 'cloudlets': self.cloudlets,
+                'capacity': dict(self.capacity), 'used': dict(self.used)}
+
+
+class FleetAccounting:
+    """
+    Running capacity and usage totals of the VMs in the fleet, overall and
+    per flavor and isolation level.
+
+    The ResourceManager registers VMs as they join and leave the fleet, and
+    the accounting follows every allocate/deallocate through the VM usage
+    listeners, so utilization reads are O(1) instead of a sum over all VMs.
+    audit() recomputes the totals from the VMs themselves, reports any drift
+    (a missed or doubled delta) and resets the totals to the recomputed ones.
+    """
+
+    def __init__(self):
+        self.total = _Totals()
+        self.by_flavor: Dict[str, _Totals] = {}
+        self.by_isolation: Dict[str, _Totals] = {}
+        self.members = set()  # IDs of the VMs being counted
+        self.lock = threading.Lock()
+        self.audit_stats = {'audits': 0, 'drifts': 0, 'last_audit': None, 'last_drift': None}
+
+    def _buckets(self, vm) -> List[_Totals]:
+        return [self.total,
+                self.by_flavor.setdefault(vm.flavor, _Totals()),
+                self.by_isolation.setdefault(vm.isolation_level, _Totals())]
+
+    def add_vm(self, vm) -> None:
+        with self.lock:
+            if vm.id in self.members:
+                return
+            self.members.add(vm.id)
+            for bucket in self._buckets(vm):
+                bucket.add_vm(vm, 1)
+        vm.usage_listeners.append(self.on_usage)
+
+    def remove_vm(self, vm) -> None:
+        if self.on_usage in vm.usage_listeners:
+            vm.usage_listeners.remove(self.on_usage)
+        with self.lock:
+            if vm.id not in self.members:
+                return
+            self.members.discard(vm.id)
+            for bucket in self._buckets(vm):
+                bucket.add_vm(vm, -1)
+            # Drop breakdown entries once their last VM is gone
+            for table, key in ((self.by_flavor, vm.flavor), (self.by_isolation, vm.isolation_level)):
+                if table[key].vms == 0:
+                    del table[key]
+
+    def on_usage(self, vm, delta, count_delta) -> None:
+        """VM usage listener: apply an allocate/deallocate delta to the VM's totals."""
+        with self.lock:
+            if vm.id not in self.members:
+                return
+            for bucket in self._buckets(vm):
+                bucket.add_usage(delta, count_delta)
+
+    def totals(self):
+        """(capacity, used) per resource over the whole fleet."""
+        with self.lock:
+            return dict(self.total.capacity), dict(self.total.used)
+
+    def utilization(self) -> Dict[str, float]:
+        capacity, used = self.totals()
+        return utilization(capacity, used)
+
+    def audit(self, vms: Iterable, tolerance: float = 1e-6) -> List[str]:
+        """
+        Recompute every total from vms and replace the running ones (callers
+        hold the scheduler lock, so no allocation lands in between). Returns a
+        description of each total that had drifted (empty when consistent).
+        """
+        vms = list(vms)
+        total, by_flavor, by_isolation = _Totals(), {}, {}
+        for vm in vms:
+            # Usage is read under the VM lock so no allocation is seen half-applied
+            with vm.lock:
+                for bucket in (total, by_flavor.setdefault(vm.flavor, _Totals()),
+                               by_isolation.setdefault(vm.isolation_level, _Totals())):
+                    bucket.add_vm(vm, 1)
+        with self.lock:
+            pairs = [('total', total, self.total)]
+            for label, fresh, table in (('flavor', by_flavor, self.by_flavor),
+                                        ('isolation', by_isolation, self.by_isolation)):
+                pairs += [(f'{label}={key}', bucket, table.get(key) or _Totals()) for key, bucket in fresh.items()]
+                pairs += [(f'{label}={key}', _Totals(), table[key]) for key in table if key not in fresh]
+            drift = []
+            for name, expected, running in pairs:
+                if (expected.vms, expected.cloudlets) != (running.vms, running.cloudlets):
+                    drift.append(f"{name}: {running.vms} VMs/{running.cloudlets} cloudlets counted, "
+                                 f"{expected.vms}/{expected.cloudlets} actual")
+                for kind in ('capacity', 'used'):
+                    for key in RESOURCES:
+                        have, want = getattr(running, kind)[key], getattr(expected, kind)[key]
+                        if abs(have - want) > tolerance:
+                            drift.append(f"{name}: {key} {kind} {have:g} counted, {want:g} actual")
+            self.total, self.by_flavor, self.by_isolation = total, by_flavor, by_isolation
+            self.members = {vm.id for vm in vms}
+            self.audit_stats['audits'] += 1
+            self.audit_stats['last_audit'] = time.time()
+            if drift:
+                self.audit_stats['drifts'] += 1
+                self.audit_stats['last_drift'] = time.time()
+        for vm in vms:
+            if self.on_usage not in vm.usage_listeners:
+                vm.usage_listeners.append(self.on_usage)
+        return drift
+
+    def metrics(self) -> dict:
+        with self.lock:
+            return {
+                **self.total.to_dict(),
+                'by_flavor': {name: bucket.to_dict() for name, bucket in self.by_flavor.items()},
+                'by_isolation': {name: bucket.to_dict() for name, bucket in self.by_isolation.items()},
+                'audit': dict(self.audit_stats),
+            }
+
+
+def merge_metrics(parts: Iterable[dict]) -> dict:
+    """Sum FleetAccounting.metrics() of several partitions into one."""
+    merged = _Totals().to_dict()
+    merged.update({'by_flavor': {}, 'by_isolation': {},
+                   'audit': {'audits': 0, 'drifts': 0, 'last_audit': None, 'last_drift': None}})
+
+    def add(into, part):
+        into['vms'] += part['vms']
+        into['cloudlets'] += part['cloudlets']
+        for kind in ('capacity', 'used'):
+            for key in RESOURCES:
+                into[kind][key] += part[kind][key]
+
+    for part in parts:
+        add(merged, part)
+        for table in ('by_flavor', 'by_isolation'):
+            for name, bucket in part[table].items():
+                add(merged[table].setdefault(name, _Totals().to_dict()), bucket)
+        for key in ('audits', 'drifts'):
+            merged['audit'][key] += part['audit'][key]
+        for key in ('last_audit', 'last_drift'):
+            if part['audit'][key] is not None:
+                merged['audit'][key] = max(merged['audit'][key] or 0, part['audit'][key])
+    return merged
@@ -0,0 +1,260 @@
+import heapq
+import math
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from placement import demand_vector
+
+ADMISSION_MODES = ('off', 'flag', 'reject')
+# Per-partition settings reported alongside the counters
+SETTINGS = ('mode', 'max_pending', 'pending_ram_budget')
+
+
+class AdmissionError(RuntimeError):
+    """
+    A submission turned away at the door: status 429 when the pending queue is
+    over its depth or memory budget (retry_after says when to come back), 422
+    when the cloudlet cannot meet its deadline behind the current backlog.
+    """
+
+    def __init__(self, message: str, status: int = 429, retry_after: Optional[int] = None,
+                 predicted_start: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.predicted_start = predicted_start
+
+    def to_dict(self) -> dict:
+        return {'error': str(self), 'status': self.status, 'retry_after': self.retry_after,
+                'predicted_start': self.predicted_start}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'AdmissionError':
+        return cls(data['error'], data['status'], data.get('retry_after'), data.get('predicted_start'))
+
+
+class Backlog:
+    """
+    RAM asked for by the waiting cloudlets, which is what a pending-memory
+    budget is checked against. The ResourceManager keeps it current from
+    _record(), like the victim index, so admission never sums the queue.
+    """
+
+    def __init__(self):
+        self.ram = 0.0
+        self.waiting: Dict[str, float] = {}  # Cloudlet ID -> RAM it will need
+
+    def update(self, cloudlet) -> None:
+        if cloudlet.status.name in ('WAITING', 'PENDING'):
+            self.ram += cloudlet.ram - self.waiting.get(cloudlet.id, 0.0)
+            self.waiting[cloudlet.id] = cloudlet.ram
+        else:
+            self.remove(cloudlet.id)
+
+    def remove(self, cloudlet_id: str) -> None:
+        self.ram -= self.waiting.pop(cloudlet_id, 0.0)
+
+
+class Replay:
+    """
+    The greedy scheduler played forward on a copy of the VMs' free capacity:
+    each cloudlet added starts, in order, on the first VM with room once the
+    completions scheduled so far have freed enough of it.
+    """
+
+    def __init__(self, free: np.ndarray, strict: np.ndarray, busy: np.ndarray,
+                 running: List[Tuple[Optional[float], int, np.ndarray]], now: float):
+        self.free = free
+        self.strict = strict
+        self.busy = busy
+        self.capacity = free.copy()  # Free capacity with the VMs empty
+        for _, row, used in running:
+            self.capacity[row] += used
+        # (completion time, tie-breaker, VM row, demand freed) of work with a known runtime
+        self.events = [(now + left, i, row, used) for i, (left, row, used) in enumerate(running)
+                       if left is not None]
+        heapq.heapify(self.events)
+        self.seq = len(running)
+        self.clock = now  # When the last cloudlet added starts
+        self.fluid = np.zeros(free.shape[1])  # Demand x seconds of queued work past the horizon
+        self.blocked = False  # A cloudlet added never starts, so neither does any after it
+
+    def _room(self, need: np.ndarray) -> Optional[int]:
+        # Let completions happen until a VM has room for need; its row, or None if none ever will
+        while True:
+            mask = np.all(self.free >= need, axis=1) & ~(self.strict & (self.busy > 0))
+            if mask.any():
+                return int(np.argmax(mask))
+            if not self.events:
+                return None
+            at, _, row, used = heapq.heappop(self.events)
+            self.clock = max(self.clock, at)
+            self.free[row] += used
+            self.busy[row] -= 1
+
+    def add(self, need: np.ndarray, runtime: Optional[float]) -> Optional[float]:
+        """Queue a cloudlet behind those added so far; when it starts, or None if it never does."""
+        row = self._room(need) if not self.blocked else None
+        if row is None:
+            self.blocked = True
+            return None
+        self.free[row] -= need
+        self.busy[row] += 1
+        if runtime is not None:
+            heapq.heappush(self.events, (self.clock + runtime, self.seq, row, need))
+            self.seq += 1
+        return self.clock
+
+
+class AdmissionController:
+    """
+    Admission control for new cloudlets: backpressure on the pending queue
+    and deadline feasibility.
+
+    Backpressure turns submissions away with a 429 while the queue holds
+    max_pending cloudlets or pending_ram_budget GB of RAM demand. Retry-After
+    is the time the recent completion rate needs to drain the excess.
+
+    Feasibility predicts the queue wait by replaying the greedy scheduler on
+    a copy of the VMs' free capacity: running cloudlets free their demand when
+    their learned runtime estimate runs out, and the cloudlets ahead in the
+    queue start, in order, on the first VM they fit as soon as it has room.
+    The first horizon cloudlets ahead are replayed exactly and the rest
+    added as fluid work spread over the whole fleet. Fragmentation between
+    cloudlets of different shapes is ignored, so the prediction is a lower
+    bound and a cloudlet that misses its deadline even so cannot make it.
+    Waits that hinge on work without a runtime (or on VMs not provisioned
+    yet) are unknown and never make a cloudlet infeasible. Under FIFO a new
+    cloudlet only ever joins the back, so the replay is kept and extended by
+    the next prediction as long as nothing else changed in between.
+    """
+
+    def __init__(self, horizon: int = 512, window: int = 128):
+        self.horizon = horizon
+        self.backlog = Backlog()
+        self.completions = deque(maxlen=window)  # Recent completion times, for the drain rate
+        self.DEFAULT_RETRY_AFTER = 5  # Seconds, before any completion was seen
+        self.MAX_RETRY_AFTER = 300
+        self._cached = None  # (key, Replay) of the queue including the last cloudlet admitted
+        self.stats = {'accepted': 0, 'predicted': 0, 'flagged': 0, 'rejected': 0, 'throttled': 0,
+                      'wait_seconds': 0.0}
+
+    def record_completion(self, now: float) -> None:
+        self.completions.append(now)
+
+    def drain_rate(self, now: float) -> Optional[float]:
+        """Completions per second over the recent window, or None before two were seen."""
+        if len(self.completions) < 2:
+            return None
+        span = now - self.completions[0]
+        return len(self.completions) / span if span > 0 else None
+
+    def retry_after(self, excess: float, now: float) -> int:
+        """Whole seconds until about excess more cloudlets have completed."""
+        rate = self.drain_rate(now)
+        if rate is None:
+            return self.DEFAULT_RETRY_AFTER
+        return int(min(self.MAX_RETRY_AFTER, max(1, math.ceil(excess / rate))))
+
+    def throttle(self, cloudlet, pending: int, max_pending: Optional[int],
+                 ram_budget: Optional[float], now: float) -> None:
+        """Raise a 429 AdmissionError if queueing the cloudlet would overrun either limit."""
+        excess, reason = 0.0, None
+        if max_pending is not None and pending >= max_pending:
+            excess, reason = pending - max_pending + 1, f"{pending} cloudlets pending (limit {max_pending})"
+        if ram_budget is not None and pending and self.backlog.ram + cloudlet.ram > ram_budget:
+            # Express the RAM overrun in cloudlets of the queue's average size
+            over = (self.backlog.ram + cloudlet.ram - ram_budget) / (self.backlog.ram / pending)
+            if over > excess:
+                excess = over
+                reason = f"{self.backlog.ram:.0f}GB RAM pending (budget {ram_budget:.0f}GB)"
+        if reason is not None:
+            self.stats['throttled'] += 1
+            raise AdmissionError(f"Pending queue full: {reason}", 429, self.retry_after(excess, now))
+
+    def cached(self, key) -> Optional['Replay']:
+        """The replay left by the previous prediction, if it was made for this key."""
+        return self._cached[1] if self._cached is not None and self._cached[0] == key else None
+
+    def replay(self, free: np.ndarray, strict: np.ndarray, busy: np.ndarray,
+               running: List[Tuple[Optional[float], int, np.ndarray]],
+               ahead: List[Tuple[Optional[float], object]], now: float) -> 'Replay':
+        """
+        Replay the running work and the queue ahead of a new cloudlet. free is a (VMs x 5) copy of the free capacity,
+        strict flags the strict-isolation VMs and busy is a copy of the
+        cloudlet counts per VM; running holds (seconds left or None, VM row,
+        demand) and ahead (estimated runtime or None, cloudlet) in queue order.
+        """
+        replay = Replay(free, strict, busy, running, now)
+        for n, (runtime, other) in enumerate(ahead):
+            need = demand_vector(other)
+            if n >= self.horizon:
+                if runtime is not None:
+                    replay.fluid += need * runtime
+            elif replay.add(need, runtime) is None:
+                break
+        return replay
+
+    def predict_wait(self, cloudlet, replay: 'Replay', runtime: Optional[float], now: float,
+                     keep=None) -> Optional[float]:
+        """
+        Seconds until the cloudlet can start behind the replayed queue, or None
+        if unknown. The cloudlet joins the replay, which is kept for the next
+        prediction under keep (if given) while it is still exact.
+        """
+        demand = demand_vector(cloudlet)
+        if not np.all(replay.capacity >= demand, axis=1).any():
+            replay.blocked = True  # Fits no VM until a scale-up, and holds up the queue behind it
+        start = replay.add(demand, runtime)
+        self._cached = (keep, replay) if keep is not None and not replay.fluid.any() else None
+        if start is None:
+            return None  # Behind work without a runtime or a scale-up
+        total = replay.capacity.sum(axis=0)
+        spread = np.divide(replay.fluid, total, out=np.zeros_like(total), where=total > 0)
+        return max(0.0, start - now) + float(spread.max(initial=0.0))
+
+    def admit(self, cloudlet, wait: Optional[float], runtime: Optional[float], mode: str, now: float) -> None:
+        """
+        Set the cloudlet's predicted start and admission verdict; raise a 422
+        AdmissionError instead in 'reject' mode when it cannot meet its deadline.
+        """
+        cloudlet.predicted_start = now + wait if wait is not None else None
+        infeasible = wait is not None and now + wait + (runtime or 0.0) > cloudlet.deadline
+        if infeasible and mode == 'reject':
+            self._cached = None  # The replay counts it as queued
+            self.stats['rejected'] += 1
+            raise AdmissionError(
+                f"Cannot meet its deadline: predicted to start in {wait:.1f}s and run "
+                f"{runtime or 0.0:.1f}s with {cloudlet.deadline - now:.1f}s left", 422,
+                predicted_start=cloudlet.predicted_start)
+        self.stats['accepted'] += 1
+        if wait is not None:
+            self.stats['predicted'] += 1
+            self.stats['wait_seconds'] += wait
+        if infeasible:
+            self.stats['flagged'] += 1
+        cloudlet.admission = 'infeasible' if infeasible else 'accepted'
+
+    def metrics(self, now: float) -> dict:
+        return summarize({**self.stats, 'pending_ram': self.backlog.ram,
+                          'drain_rate': self.drain_rate(now) or 0.0})
+
+
+def summarize(stats: dict) -> dict:
+    """Add the mean predicted wait to the summed counters (shared with the partition routers)."""
+    stats['mean_wait'] = stats['wait_seconds'] / stats['predicted'] if stats['predicted'] else 0.0
+    return stats
+
+
+def merge_metrics(parts: Iterable[dict]) -> dict:
+    """Sum the admission metrics of several partitions into one."""
+    merged = {}
+    for part in parts:
+        for key, value in part.items():
+            if key in SETTINGS:
+                merged.setdefault(key, value)  # Broadcast to every partition alike
+            elif key != 'mean_wait':
+                merged[key] = merged.get(key, 0) + value
+    return summarize(merged) if merged else merged
@@ -1,6 +1,6 @@
-from flask import Flask, request, jsonify, render_template, redirect, url_for
+from flask import Flask, Response, request, jsonify, render_template, redirect, url_for
 from core import ResourceManager, VM, Cloudlet
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
 from prometheus_client import make_wsgi_app, Gauge, Histogram
 from werkzeug.middleware.dispatcher import DispatcherMiddleware
 import threading
@@ -12,13 +12,61 @@ import os
 from pathlib import Path
 import time
 from predictive_scaling_worker import PredictiveScaler
+from state_store import StateStore
+from sharding import ShardedResourceManager
+from cluster import ClusterCoordinator
+from serialization import SnapshotCache, PacketJSON, client_format
+from query import QueryError
+from admission import AdmissionError
+from fairshare import DEFAULT_TENANT
+import atexit
 
 # Initialize Flask and SocketIO
 app = Flask(__name__)
-socketio = SocketIO(app)
+# Pre-encoded metrics payloads are spliced into packets instead of re-serialized per emit
+socketio = SocketIO(app, json=PacketJSON)
+
+# Durable scheduler state; set CLOUDFLASH_STATE_DB to an empty string to run in memory only
+STATE_DB = os.environ.get('CLOUDFLASH_STATE_DB', str(Path(__file__).parent / 'cloudflash_state.db'))
+# CLOUDFLASH_SHARDS > 1 runs that many ResourceManager shards in worker processes
+SHARDS = int(os.environ.get('CLOUDFLASH_SHARDS', '1'))
+# CLOUDFLASH_CLUSTER=ip:port,ip:port schedules across those host agents (see cluster.py)
+CLUSTER = [a for a in os.environ.get('CLOUDFLASH_CLUSTER', '').split(',') if a.strip()]
+# CLOUDFLASH_MEMORY_OVERCOMMIT > 1 lets VMs reserve that multiple of host memory (single manager only)
+MEMORY_OVERCOMMIT = float(os.environ.get('CLOUDFLASH_MEMORY_OVERCOMMIT', '1.0'))
+# CLOUDFLASH_NUMA_NODES > 1 splits host memory and vCPUs into that many NUMA nodes (single manager only)
+NUMA_NODES = int(os.environ.get('CLOUDFLASH_NUMA_NODES', '1'))
+# CLOUDFLASH_CPU_OVERCOMMIT / CLOUDFLASH_GPU_OVERCOMMIT > 1 let cloudlet demand on a VM exceed its
+# cores / GPUs by that ratio, time-sliced (default for new VMs; POST /api/vms may override per VM)
+CPU_OVERCOMMIT = float(os.environ.get('CLOUDFLASH_CPU_OVERCOMMIT', '1.0'))
+GPU_OVERCOMMIT = float(os.environ.get('CLOUDFLASH_GPU_OVERCOMMIT', '1.0'))
+# CLOUDFLASH_ADMISSION is off, flag or reject for cloudlets predicted to miss their deadline;
+# CLOUDFLASH_MAX_PENDING / CLOUDFLASH_PENDING_RAM_BUDGET (GB) answer 429 once the pending
+# queue (of each shard or host) reaches that depth / RAM demand
+ADMISSION_MODE = os.environ.get('CLOUDFLASH_ADMISSION', 'flag')
+MAX_PENDING = int(os.environ['CLOUDFLASH_MAX_PENDING']) if os.environ.get('CLOUDFLASH_MAX_PENDING') else None
+PENDING_RAM_BUDGET = (float(os.environ['CLOUDFLASH_PENDING_RAM_BUDGET'])
+                      if os.environ.get('CLOUDFLASH_PENDING_RAM_BUDGET') else None)
 
 # Initialize resource manager
-manager = ResourceManager()
+if CLUSTER:
+    manager = ClusterCoordinator(CLUSTER)
+    atexit.register(manager.close)
+elif SHARDS > 1:
+    manager = ShardedResourceManager(SHARDS, state_path=STATE_DB or None)
+    atexit.register(manager.close)
+else:
+    state_store = StateStore(STATE_DB) if STATE_DB else None
+    if state_store:
+        # Commit whatever the group-commit writer has not flushed yet
+        atexit.register(state_store.flush)
+    manager = ResourceManager(state_store=state_store, memory_overcommit=MEMORY_OVERCOMMIT, numa_nodes=NUMA_NODES,
+                              cpu_overcommit=CPU_OVERCOMMIT, gpu_overcommit=GPU_OVERCOMMIT)
+manager.admission_mode = ADMISSION_MODE
+manager.max_pending = MAX_PENDING
+manager.pending_ram_budget = PENDING_RAM_BUDGET
+# Metrics snapshot per state version, encoded once and shared by every transport
+snapshots = SnapshotCache(manager)
 predictive_scaler = PredictiveScaler(manager)
 predictive_scaler.start()
 
@@ -38,6 +86,24 @@ GPU_USAGE = Gauge('gpu_usage_percent', 'GPU usage percentage', ['vm_id'])
 MEMORY_PAGES_TOTAL = Gauge('memory_pages_total', 'Total memory pages')
 MEMORY_PAGES_FREE = Gauge('memory_pages_free', 'Free memory pages')
 FRAGMENTATION_PERCENT = Gauge('fragmentation_percent', 'Memory fragmentation percentage')
+MEMORY_RECLAIM_RATE = Gauge('memory_reclaim_pages_per_second', 'Pages reclaimed to swap per second')
+MEMORY_WORKING_SET = Gauge('memory_working_set_pages', 'Resident pages touched within the working-set window')
+MEMORY_SWAPPED = Gauge('memory_swapped_pages', 'Allocated pages currently on swap')
+MEMORY_STALL_SECONDS = Gauge('memory_swap_stall_seconds', 'Total seconds cloudlets stalled on swap reads')
+NUMA_LOCALITY = Gauge('numa_locality_ratio', "Share of cloudlet pages on their VM's home NUMA node", ['node'])
+CPU_DENSITY = Gauge('cpu_overcommit_density', 'Cloudlet vCPU demand per VM core across the fleet')
+RUNTIME_ERRORS = Gauge('runtime_estimate_error_bucket',
+                       'Completed cloudlets by relative runtime estimation error (cumulative, Prometheus histogram layout)',
+                       ['source', 'le'])
+RUNTIME_AT_RISK = Gauge('runtime_deadline_at_risk', 'Pending cloudlets whose estimated runtime no longer fits before their deadline')
+ADMISSION_DECISIONS = Gauge('admission_decisions', 'Cloudlet submissions by admission outcome', ['outcome'])
+ADMISSION_PREDICTED_WAIT = Gauge('admission_predicted_wait_seconds', 'Mean predicted queue wait of admitted cloudlets')
+TENANT_DOMINANT_SHARE = Gauge('tenant_dominant_share', "Largest fraction of any fleet resource a tenant's running cloudlets hold", ['tenant'])
+TENANT_USAGE = Gauge('tenant_resource_usage', "Resources held by a tenant's running cloudlets", ['tenant', 'resource'])
+TIMESLICE_SLOWDOWN = Gauge('timeslice_slowdown_ratio', 'Runtime of completed cloudlets over their execution time, from CPU/GPU time slicing')
+WARM_POOL_SIZE = Gauge('warm_pool_vms', 'Idle pre-provisioned VMs in the warm pool', ['flavor'])
+WARM_POOL_HIT_RATE = Gauge('warm_pool_hit_rate', 'Fraction of scale-up VMs claimed from the warm pool')
+WARM_POOL_REFILL_LATENCY = Gauge('warm_pool_refill_latency_ms', 'Average warm pool refill latency in milliseconds')
 REQUEST_TIME = Histogram('request_latency_seconds', 'Request latency in seconds', ['endpoint', 'method'])
 
 # Add prometheus wsgi middleware to route /metrics requests
@@ -46,10 +112,7 @@ app.wsgi_app = DispatcherMiddleware(app.wsgi_app, {
 })
 
 # Set up metrics callback
-manager.set_metrics_callback(lambda log=None: (
-    socketio.emit('metrics_update', manager.get_metrics()),
-    socketio.emit('system_log', {'log': log}) if log else None
-))
+manager.set_metrics_callback(lambda log=None: broadcast_metrics(log))
 
 # Paths
 BASE_DIR = Path(__file__).parent.parent
@@ -159,7 +222,7 @@ def stop_monitoring():
 
 def update_prometheus_metrics():
     """Update Prometheus metrics with current resource usage"""
-    metrics = manager.get_metrics()
+    metrics = snapshots.snapshot()
     VM_GAUGE.set(len(metrics.get('vms', [])))
     CLOUDLET_GAUGE.set(len([cl for cl in metrics.get('cloudlets', []) if cl['status'] == 'ACTIVE']))
     
@@ -177,6 +240,48 @@ def update_prometheus_metrics():
         MEMORY_PAGES_TOTAL.set(metrics['memory'].get('total_pages', 0))
         MEMORY_PAGES_FREE.set(metrics['memory'].get('free_pages', 0))
         FRAGMENTATION_PERCENT.set(metrics['memory'].get('fragmentation', 0))
+        reclaim = metrics['memory'].get('reclaim')
+        if reclaim:
+            MEMORY_RECLAIM_RATE.set(reclaim['reclaim_rate'])
+            MEMORY_WORKING_SET.set(reclaim['working_set_pages'])
+            MEMORY_SWAPPED.set(reclaim['swapped_pages'])
+            MEMORY_STALL_SECONDS.set(reclaim['stall_seconds'])
+        numa = metrics['memory'].get('numa')
+        if numa:
+            for node in numa['nodes']:
+                NUMA_LOCALITY.labels(node=str(node['id'])).set(node['locality'])
+
+    if 'timeslice' in metrics:
+        CPU_DENSITY.set(metrics['timeslice']['cpu_density'])
+        TIMESLICE_SLOWDOWN.set(metrics['timeslice']['slowdown'])
+
+    if 'runtime' in metrics:
+        runtime = metrics['runtime']
+        RUNTIME_AT_RISK.set(runtime['at_risk'])
+        for source, histogram in runtime['errors'].items():
+            count = 0
+            for bound, n in zip(runtime['bounds'], histogram['buckets']):
+                count += n
+                RUNTIME_ERRORS.labels(source=source, le=bound).set(count)
+
+    if 'tenants' in metrics:
+        for tenant, stats in metrics['tenants']['tenants'].items():
+            TENANT_DOMINANT_SHARE.labels(tenant=tenant).set(stats['dominant_share'])
+            for resource, amount in stats['usage'].items():
+                TENANT_USAGE.labels(tenant=tenant, resource=resource).set(amount)
+
+    if 'admission' in metrics:
+        admission = metrics['admission']
+        for outcome in ('accepted', 'flagged', 'rejected', 'throttled'):
+            ADMISSION_DECISIONS.labels(outcome=outcome).set(admission[outcome])
+        ADMISSION_PREDICTED_WAIT.set(admission['mean_wait'])
+
+    if 'warm_pool' in metrics:
+        pool = metrics['warm_pool']
+        for flavor, count in pool.get('pooled', {}).items():
+            WARM_POOL_SIZE.labels(flavor=flavor).set(count)
+        WARM_POOL_HIT_RATE.set(pool.get('hit_rate', 0))
+        WARM_POOL_REFILL_LATENCY.set(pool.get('refill_latency_ms_avg', 0))
 
 # Update metrics every 5 seconds
 def metrics_updater():
@@ -190,11 +295,18 @@ metrics_thread.start()
 
 # --- Helper to broadcast metrics ---
 def broadcast_metrics(log=None):
-    metrics = manager.get_metrics()
-    socketio.emit('metrics_update', metrics)
+    """Push the current snapshot to every dashboard in the encoding it asked for on connect."""
+    socketio.emit('metrics_update', snapshots.payload('json'), to='json')
+    if 'msgpack' in socketio.server.manager.rooms.get('/', {}):
+        socketio.emit('metrics_update', snapshots.payload('msgpack'), to='msgpack')
     if log:
         socketio.emit('system_log', {'log': log})
 
+@socketio.on('connect')
+def handle_connect(auth=None):
+    # Clients may pass auth={'encoding': 'msgpack'} to get binary metrics_update payloads
+    join_room(client_format(auth))
+
 @app.route('/')
 def index():
     # Ensure monitoring stack is running
@@ -202,7 +314,7 @@ def index():
         start_monitoring_stack()
     return render_template('index.html', 
                          vms=manager.get_vms(), 
-                         metrics=manager.get_metrics())
+                         metrics=snapshots.snapshot())
 
 @app.route('/prometheus')
 def prometheus():
@@ -327,95 +439,109 @@ def prometheus():
         </html>
         """, 503
 
+def vm_from_json(data):
+    """Build a VM from a POST /api/vms body (shared with the ASGI server)."""
+    cpu = int(data.get("cpu"))
+    ram = int(data.get("ram"))
+    storage = int(data.get("storage"))
+    bandwidth = int(data.get("bandwidth", 1000))
+    gpu = int(data.get("gpu", 0))
+    firewall_enabled = bool(data.get("firewall_enabled", False))
+    isolation_level = data.get("isolation_level", "STANDARD")
+    cpu_overcommit = float(data.get("cpu_overcommit", CPU_OVERCOMMIT))
+    gpu_overcommit = float(data.get("gpu_overcommit", GPU_OVERCOMMIT))
+    if cpu_overcommit < 1 or gpu_overcommit < 1:
+        raise ValueError("cpu_overcommit and gpu_overcommit must be at least 1")
+    return VM(cpu, ram, storage, bandwidth, gpu, firewall_enabled, isolation_level,
+              cpu_overcommit=cpu_overcommit, gpu_overcommit=gpu_overcommit)
+
 @app.route("/api/vms", methods=["POST"])
 def create_vm():
     with REQUEST_TIME.labels(endpoint='/api/vms', method='POST').time():
         data = request.json
         try:
-            cpu = int(data.get("cpu"))
-            ram = int(data.get("ram"))
-            storage = int(data.get("storage"))
-            bandwidth = int(data.get("bandwidth", 1000))
-            gpu = int(data.get("gpu", 0))
-            firewall_enabled = bool(data.get("firewall_enabled", False))
-            isolation_level = data.get("isolation_level", "STANDARD")
-            
-            vm = VM(cpu, ram, storage, bandwidth, gpu, firewall_enabled, isolation_level)
+            vm = vm_from_json(data)
             if manager.add_vm(vm):
-                socketio.emit('metrics_update', manager.get_metrics())
+                broadcast_metrics()
                 return jsonify({"status": "success", "vm_id": vm.id}), 201
             return jsonify({"status": "error", "error": "Insufficient memory pages"}), 400
         except Exception as e:
             print("Error in /api/vms:", e)
             return jsonify({"status": "error", "error": str(e)}), 400
 
+def cloudlet_from_json(data):
+    """
+    Validate a POST /api/cloudlets body and build the Cloudlet (shared with
+    the ASGI server). Raises ValueError with a client-facing message.
+    """
+    # Check if required fields are present
+    required_fields = ["cpu", "ram", "storage"]
+    missing_fields = [field for field in required_fields if field not in data]
+    if missing_fields:
+        raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+
+    # Validate and convert numeric fields
+    def get_positive_int(key, default=0, min_val=0):
+        value = data.get(key, default)
+        try:
+            num = int(value)
+            if num < min_val:
+                raise ValueError(f"{key} must be at least {min_val}")
+            return num
+        except (ValueError, TypeError):
+            raise ValueError(f"Invalid value for {key}: must be a positive integer")
+
+    def get_positive_float(key, default=0.0, min_val=0.0):
+        value = data.get(key, default)
+        try:
+            num = float(value)
+            if num < min_val:
+                raise ValueError(f"{key} must be at least {min_val}")
+            return num
+        except (ValueError, TypeError):
+            raise ValueError(f"Invalid value for {key}: must be a positive number, given input {value}")
+
+    return Cloudlet(
+        cpu=get_positive_int("cpu", min_val=0),
+        ram=get_positive_float("ram", min_val=0),  # Sub-GB cloudlets get 256 MB small pages
+        storage=get_positive_int("storage", min_val=0),
+        sla_priority=get_positive_int("sla_priority", default=2, min_val=0),
+        deadline=get_positive_int("deadline", default=60, min_val=0),
+        name=data.get("name"),
+        bandwidth=get_positive_int("bandwidth", default=100, min_val=0),
+        gpu=get_positive_float("gpu", default=0, min_val=0),  # Fractional GPU slices share a GPU
+        execution_time=get_positive_float("execution_time", default=10, min_val=1),
+        tenant=get_tenant(data.get("tenant", DEFAULT_TENANT))
+    )
+
+
+def get_tenant(value):
+    """Validate a tenant name from a request body or URL."""
+    if not isinstance(value, str) or not value.strip() or len(value) > 64:
+        raise ValueError("tenant must be a non-empty string of at most 64 characters")
+    return value.strip()
+
 @app.route("/api/cloudlets", methods=["POST"])
 def submit_cloudlet():
     with REQUEST_TIME.labels(endpoint='/api/cloudlets', method='POST').time():
         data = request.json
-        
-        # Check if required fields are present
-        required_fields = ["cpu", "ram", "storage"]
-        missing_fields = [field for field in required_fields if field not in data]
-        if missing_fields:
-            return jsonify({
-                "status": "error",
-                "error": f"Missing required fields: {', '.join(missing_fields)}"
-            }), 400
-            
         try:
-            # Validate and convert numeric fields
-            def get_positive_int(key, default=0, min_val=0):
-                value = data.get(key, default)
-                try:
-                    num = int(value)
-                    if num < min_val:
-                        raise ValueError(f"{key} must be at least {min_val}")
-                    return num
-                except (ValueError, TypeError):
-                    raise ValueError(f"Invalid value for {key}: must be a positive integer")
-            
-            def get_positive_float(key, default=0.0, min_val=0.0):
-                value = data.get(key, default)
-                try:
-                    num = float(value)
-                    if num < min_val:
-                        raise ValueError(f"{key} must be at least {min_val}")
-                    return num
-                except (ValueError, TypeError):
-                    raise ValueError(f"Invalid value for {key}: must be a positive number, given input {value}")
-            
-            cpu = get_positive_int("cpu", min_val=0)
-            ram = get_positive_int("ram", min_val=0)
-            storage = get_positive_int("storage", min_val=0)
-            bandwidth = get_positive_int("bandwidth", default=100, min_val=0)
-            gpu = get_positive_int("gpu", default=0, min_val=0)
-            sla_priority = get_positive_int("sla_priority", default=2, min_val=0)
-            deadline = get_positive_int("deadline", default=60, min_val=0)
-            execution_time = get_positive_float("execution_time", default=10, min_val=1)
-            name = data.get("name")
-            
-            # Create and submit cloudlet
-            cloudlet = Cloudlet(
-                cpu=cpu, 
-                ram=ram, 
-                storage=storage, 
-                sla_priority=sla_priority, 
-                deadline=deadline, 
-                name=name, 
-                bandwidth=bandwidth, 
-                gpu=gpu,
-                execution_time=execution_time
-            )
-            
+            cloudlet = cloudlet_from_json(data)
             manager.submit_cloudlet(cloudlet)
-            socketio.emit('metrics_update', manager.get_metrics())
+            broadcast_metrics()
             return jsonify({
                 "status": "success", 
                 "cloudlet_id": cloudlet.id,
+                "predicted_start": cloudlet.predicted_start,
+                "admission": cloudlet.admission,
                 "message": f"Cloudlet {cloudlet.name} submitted successfully"
             }), 201
             
+        except AdmissionError as ae:
+            response = jsonify({"status": "error", "error": str(ae), "predicted_start": ae.predicted_start})
+            if ae.retry_after is not None:
+                response.headers['Retry-After'] = str(ae.retry_after)
+            return response, ae.status
         except ValueError as ve:
             return jsonify({"status": "error", "error": str(ve)}), 400
         except Exception as e:
@@ -431,7 +557,7 @@ def complete_cloudlet():
         data = request.json
         cloudlet_id = data.get("cloudlet_id")
         manager.complete_cloudlet(cloudlet_id)
-        socketio.emit('metrics_update', manager.get_metrics())
+        broadcast_metrics()
         return jsonify({"status": "success"})
 
 @app.route("/api/cloudlets/<cloudlet_id>", methods=["DELETE"])
@@ -439,7 +565,7 @@ def delete_cloudlet(cloudlet_id):
     with REQUEST_TIME.labels(endpoint='/api/cloudlets/<cloudlet_id>', method='DELETE').time():
         try:
             result = manager.delete_cloudlet(cloudlet_id)
-            socketio.emit('metrics_update', manager.get_metrics())
+            broadcast_metrics()
             if result:
                 return jsonify({"status": "success", "cloudlet_id": cloudlet_id}), 200
             else:
@@ -453,7 +579,7 @@ def delete_vm(vm_id):
     with REQUEST_TIME.labels(endpoint='/api/vms/<vm_id>', method='DELETE').time():
         try:
             result = manager.delete_vm(vm_id)
-            socketio.emit('metrics_update', manager.get_metrics())
+            broadcast_metrics()
             if result:
                 return jsonify({"status": "success", "vm_id": vm_id}), 200
             else:
@@ -465,59 +591,23 @@ def delete_vm(vm_id):
 @app.route("/api/metrics", methods=["GET"])
 def get_metrics():
     with REQUEST_TIME.labels(endpoint='/api/metrics', method='GET').time():
-        return jsonify(manager.get_metrics())
+        return Response(snapshots.json_bytes(), mimetype='application/json')
 
 @app.route("/api/vms", methods=["GET"])
 def list_vms():
     with REQUEST_TIME.labels(endpoint='/api/vms', method='GET').time():
-        return jsonify(manager.get_metrics()["vms"])
+        try:
+            return jsonify(manager.query_vms(request.args.to_dict()))
+        except QueryError as qe:
+            return jsonify({"status": "error", "error": str(qe)}), 400
 
 @app.route("/api/cloudlets", methods=["GET"])
 def list_cloudlets():
     with REQUEST_TIME.labels(endpoint='/api/cloudlets', method='GET').time():
-        return jsonify(manager.get_metrics()["cloudlets"])
-
-class AutoScaler:
-    def __init__(self, manager, check_interval=10, cpu_threshold=70, min_vms=1, max_vms=10, cooldown=30):
-        self.manager = manager
-        self.check_interval = check_interval
-        self.cpu_threshold = cpu_threshold
-        self.min_vms = min_vms
-        self.max_vms = max_vms
-        self.cooldown = cooldown
-        self.last_scale_time = 0
-        self.running = False
-
-    def start(self):
-        self.running = True
-        threading.Thread(target=self.run, daemon=True).start()
-
-    def run(self):
-        while self.running:
-            self.check_and_scale()
-            time.sleep(self.check_interval)
-
-    def check_and_scale(self):
-        metrics = self.manager.get_metrics()
-        avg_cpu = self.calculate_avg_cpu(metrics["vms"])
-        now = time.time()
-
-        if now - self.last_scale_time < self.cooldown:
-            return  # Cooldown period
-
-        if avg_cpu > self.cpu_threshold and len(metrics["vms"]) < self.max_vms:
-            self.manager.add_vm(VM(...))  # Add VM with desired specs
-            self.last_scale_time = now
-        elif avg_cpu < self.cpu_threshold * 0.5 and len(metrics["vms"]) > self.min_vms:
-            idle_vm = self.manager.find_idle_vm()
-            if idle_vm:
-                self.manager.delete_vm(idle_vm.id)
-                self.last_scale_time = now
-
-    def calculate_avg_cpu(self, vms):
-        if not vms:
-            return 0
-        return sum(vm["cpu_usage"] for vm in vms) / len(vms)
+        try:
+            return jsonify(manager.query_cloudlets(request.args.to_dict()))
+        except QueryError as qe:
+            return jsonify({"status": "error", "error": str(qe)}), 400
 
 @app.route('/metrics')
 def metrics():
@@ -527,7 +617,7 @@ def broadcast_metrics_loop():
     """Background thread to broadcast metrics to all connected clients."""
     while True:
         try:
-            socketio.emit('metrics_update', manager.get_metrics())
+            broadcast_metrics()
             time.sleep(1)  # Update every second
         except Exception as e:
             print(f"Error broadcasting metrics: {e}")
@@ -537,6 +627,30 @@ def broadcast_metrics_loop():
 def algorithm_settings():
     if request.method == 'POST':
         data = request.get_json()
+        placement_mode = data.get('placement_mode')
+        if placement_mode is not None:
+            if placement_mode not in manager.available_placement_modes:
+                return jsonify({'status': 'error', 'message': 'Invalid placement mode'}), 400
+            manager.placement_mode = placement_mode
+            manager.log(f"Placement mode changed to: {placement_mode}")
+            if 'algorithm' not in data:
+                return jsonify({'status': 'success', 'placement_mode': placement_mode})
+        preemption = data.get('preemption')
+        if preemption is not None:
+            if not isinstance(preemption, bool):
+                return jsonify({'status': 'error', 'message': 'preemption must be true or false'}), 400
+            manager.preemption_enabled = preemption
+            manager.log(f"Preemption {'enabled' if preemption else 'disabled'}")
+            if 'algorithm' not in data:
+                return jsonify({'status': 'success', 'preemption': preemption})
+        queue_policy = data.get('queue_policy')
+        if queue_policy is not None:
+            if queue_policy not in manager.available_queue_policies:
+                return jsonify({'status': 'error', 'message': 'Invalid queue policy'}), 400
+            manager.queue_policy = queue_policy
+            manager.log(f"Queue policy changed to: {queue_policy}")
+            if 'algorithm' not in data:
+                return jsonify({'status': 'success', 'queue_policy': queue_policy})
         algorithm = data.get('algorithm')
         if algorithm in manager.available_algorithms:
             manager.load_balancing_algorithm = algorithm
@@ -546,9 +660,72 @@ def algorithm_settings():
     else:
         return jsonify({
             'current_algorithm': manager.load_balancing_algorithm,
-            'available_algorithms': manager.available_algorithms
+            'available_algorithms': manager.available_algorithms,
+            'placement_mode': manager.placement_mode,
+            'available_placement_modes': manager.available_placement_modes,
+            'preemption': manager.preemption_enabled,
+            'queue_policy': manager.queue_policy,
+            'available_queue_policies': manager.available_queue_policies,
         })
 
+@app.route('/api/settings/admission', methods=['GET', 'POST'])
+def admission_settings():
+    if request.method == 'POST':
+        data = request.get_json()
+        mode = data.get('mode')
+        if mode is not None and mode not in manager.available_admission_modes:
+            return jsonify({'status': 'error', 'message': 'Invalid admission mode'}), 400
+        limits = {}
+        for key, kind in (('max_pending', int), ('pending_ram_budget', float)):
+            if key in data:
+                value = data[key]
+                # null lifts the limit
+                if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0):
+                    return jsonify({'status': 'error', 'message': f'{key} must be a positive number or null'}), 400
+                limits[key] = kind(value) if value is not None else None
+        if mode is not None:
+            manager.admission_mode = mode
+        for key, value in limits.items():
+            setattr(manager, key, value)
+        manager.log(f"Admission settings changed: mode={manager.admission_mode}, "
+                    f"max_pending={manager.max_pending}, pending_ram_budget={manager.pending_ram_budget}")
+    return jsonify({
+        'mode': manager.admission_mode,
+        'available_modes': manager.available_admission_modes,
+        'max_pending': manager.max_pending,
+        'pending_ram_budget': manager.pending_ram_budget,
+    })
+
+@app.route('/api/tenants', methods=['GET'])
+def list_tenants():
+    with REQUEST_TIME.labels(endpoint='/api/tenants', method='GET').time():
+        return jsonify(manager.tenant_usage())
+
+@app.route('/api/tenants/<tenant>', methods=['POST'])
+def configure_tenant(tenant):
+    with REQUEST_TIME.labels(endpoint='/api/tenants/<tenant>', method='POST').time():
+        data = request.get_json() or {}
+        try:
+            tenant = get_tenant(tenant)
+            weight = data.get('weight')
+            if weight is not None and (isinstance(weight, bool) or not isinstance(weight, (int, float))):
+                raise ValueError("weight must be a number")
+            quota = data.get('quota')
+            if quota is not None and (not isinstance(quota, dict) or any(
+                    isinstance(v, bool) or not isinstance(v, (int, float)) for v in quota.values())):
+                raise ValueError("quota must map resources to numbers")
+            settings = manager.set_tenant(tenant, weight, quota)
+        except ValueError as ve:
+            return jsonify({'status': 'error', 'error': str(ve)}), 400
+        manager.log(f"Tenant {tenant} set to weight {settings['weight']}, quota {settings['quota'] or 'none'}")
+        return jsonify({'status': 'success', **settings})
+
+@app.route('/api/scaling/decisions', methods=['GET'])
+def scaling_decisions():
+    with REQUEST_TIME.labels(endpoint='/api/scaling/decisions', method='GET').time():
+        limit = request.args.get('limit', default=50, type=int)
+        return jsonify(manager.scaling_controller.recent_decisions(limit))
+
 @app.route('/health')
 def health_check():
     return jsonify({"status": "healthy", "timestamp": time.time()})
@@ -0,0 +1,353 @@
+import argparse
+import asyncio
+import io
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import socketio
+
+from app import app as flask_app, manager, snapshots, REQUEST_TIME, cloudlet_from_json, vm_from_json
+from query import QueryError
+from admission import AdmissionError
+from serialization import FORMATS, PacketJSON, client_format, dumps
+
+
+# --- ASGI PLUMBING ---
+
+async def _read_body(receive) -> bytes:
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def _respond(send, status: int, body: bytes, content_type: bytes = b'application/json', headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type), (b'content-length', str(len(body)).encode()), *headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def _wsgi_environ(scope, body: bytes) -> dict:
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        key = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if key == 'CONTENT_LENGTH':
+            continue
+        if key != 'CONTENT_TYPE':
+            key = 'HTTP_' + key
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _call_wsgi(app, environ):
+    """Run a WSGI app to completion. Returns (status, headers, body)."""
+    response = []
+
+    def start_response(status, headers, exc_info=None):
+        response[:] = [status, headers]
+
+    result = app(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    status, headers = response
+    return int(status.split()[0]), headers, body
+
+
+# --- GATEWAY ---
+
+class AsyncGateway:
+    """
+    Serves the REST and Socket.IO API from an asyncio event loop.
+
+    Handlers never run scheduler code on the loop: every ResourceManager
+    call goes to a fixed pool of worker threads, with at most max_pending
+    calls queued so bursts wait as cheap coroutines rather than threads.
+    Metrics come from the shared SnapshotCache (built and encoded once per
+    state version) in one worker call; concurrent readers share the call
+    already in flight, and a single broadcaster task pushes each encoded
+    snapshot to every dashboard socket in the encoding it asked for (once
+    per push_interval, or sooner after a change, at most every min_push_gap
+    seconds). Routes not handled here fall through to the
+    Flask app, which runs in the same worker pool.
+    """
+
+    def __init__(self, manager, snapshots, flask_app, workers: int = 8, max_pending: int = 256,
+                 push_interval: float = 1.0, min_push_gap: float = 0.1):
+        self.manager = manager
+        self.snapshots = snapshots
+        self.flask_app = flask_app
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cloudflash-asgi')
+        self.max_pending = max_pending
+        self.push_interval = push_interval  # Seconds between periodic pushes
+        self.min_push_gap = min_push_gap  # Floor between change-driven pushes
+        self.loop = None
+        self.slots = None  # Created on the loop at startup
+        self.changed = None
+        self.logs = None
+        self.clients = 0
+        self._inflight = {}  # Format -> payload fetch in flight
+        self._tasks = []
+        self.sio = socketio.AsyncServer(async_mode='asgi', json=PacketJSON)
+        self.sio.on('connect', self._on_connect)
+        self.sio.on('disconnect', self._on_disconnect)
+        self.asgi = socketio.ASGIApp(self.sio, other_asgi_app=self._http,
+                                     on_startup=self._startup, on_shutdown=self._shutdown)
+        self.routes = {
+            ('GET', '/api/metrics'): self._get_metrics,
+            ('GET', '/api/vms'): self._list_vms,
+            ('GET', '/api/cloudlets'): self._list_cloudlets,
+            ('POST', '/api/vms'): self._create_vm,
+            ('POST', '/api/cloudlets'): self._submit_cloudlet,
+            ('POST', '/api/cloudlets/complete'): self._complete_cloudlet,
+            ('GET', '/api/scaling/decisions'): self._scaling_decisions,
+            ('GET', '/health'): self._health,
+        }
+        manager.set_metrics_callback(self._notify)
+
+    # --- LIFECYCLE ---
+
+    async def _startup(self):
+        self.loop = asyncio.get_running_loop()
+        self.slots = asyncio.Semaphore(self.max_pending)
+        self.changed = asyncio.Event()
+        self.logs = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._broadcaster()), asyncio.create_task(self._log_pump())]
+
+    async def _shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        self.executor.shutdown(wait=False)
+
+    async def _on_connect(self, sid, environ, auth=None):
+        self.clients += 1
+        fmt = client_format(auth)
+        await self.sio.enter_room(sid, fmt)
+        await self.sio.emit('metrics_update', await self.metrics_payload(fmt), to=sid)
+
+    async def _on_disconnect(self, sid, *args):
+        self.clients -= 1
+
+    # --- SCHEDULER CALLS ---
+
+    async def run(self, fn, *args):
+        """Run a blocking call in the worker pool."""
+        async with self.slots:
+            return await self.loop.run_in_executor(self.executor, fn, *args)
+
+    def _notify(self, log=None):
+        """Metrics callback of the manager; called from scheduler threads."""
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        if log:
+            loop.call_soon_threadsafe(self.logs.put_nowait, log)
+        loop.call_soon_threadsafe(self.changed.set)
+
+    async def metrics_payload(self, fmt: str = 'json'):
+        """Encoded metrics; callers arriving while a fetch is in flight share it."""
+        if fmt not in self._inflight:
+            future = asyncio.ensure_future(self.run(self.snapshots.payload, fmt))
+            future.add_done_callback(lambda _: self._inflight.pop(fmt, None))
+            self._inflight[fmt] = future
+        return await asyncio.shield(self._inflight[fmt])
+
+    # --- BROADCAST ---
+
+    async def _broadcaster(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.changed.wait(), self.push_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.changed.clear()
+            if self.clients:
+                try:
+                    rooms = self.sio.manager.rooms.get('/', {})
+                    for fmt in FORMATS:
+                        if fmt in rooms:
+                            await self.sio.emit('metrics_update', await self.metrics_payload(fmt), to=fmt)
+                except Exception as e:
+                    print(f"Error broadcasting metrics: {e}")
+            await asyncio.sleep(self.min_push_gap)
+
+    async def _log_pump(self):
+        while True:
+            log = await self.logs.get()
+            if self.clients:
+                await self.sio.emit('system_log', {'log': log})
+
+    # --- HTTP ---
+
+    async def _http(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        method, path = scope['method'], scope['path']
+        handler = self.routes.get((method, path))
+        if handler is None and method == 'DELETE':
+            for prefix, kind in (('/api/cloudlets/', 'cloudlet'), ('/api/vms/', 'vm')):
+                if path.startswith(prefix) and '/' not in path[len(prefix):]:
+                    return await self._delete(send, kind, path[len(prefix):])
+        if handler is None:
+            return await self._fallback(scope, receive, send)
+        try:
+            await handler(scope, receive, send)
+        except Exception as e:
+            print(f"Error in {method} {path}: {e}")
+            await _respond(send, 500, dumps({'status': 'error', 'error': str(e)}))
+
+    async def _json_body(self, receive):
+        body = await _read_body(receive)
+        return json.loads(body) if body else {}
+
+    async def _reply(self, send, status, obj, headers=()):
+        await _respond(send, status, dumps(obj), headers=headers)
+
+    async def _get_metrics(self, scope, receive, send):
+        with REQUEST_TIME.labels(endpoint='/api/metrics', method='GET').time():
+            payload = await self.metrics_payload()
+            await _respond(send, 200, payload.data)
+
+    async def _list_vms(self, scope, receive, send):
+        with REQUEST_TIME.labels(endpoint='/api/vms', method='GET').time():
+            await self._query(scope, send, self.manager.query_vms)
+
+    async def _list_cloudlets(self, scope, receive, send):
+        with REQUEST_TIME.labels(endpoint='/api/cloudlets', method='GET').time():
+            await self._query(scope, send, self.manager.query_cloudlets)
+
+    async def _query(self, scope, send, query):
+        params = {key: values[0] for key, values in parse_qs(scope['query_string'].decode()).items()}
+        try:
+            page = await self.run(query, params)
+        except QueryError as qe:
+            return await self._reply(send, 400, {"status": "error", "error": str(qe)})
+        await self._reply(send, 200, page)
+
+    async def _create_vm(self, scope, receive, send):
+        with REQUEST_TIME.labels(endpoint='/api/vms', method='POST').time():
+            try:
+                vm = vm_from_json(await self._json_body(receive))
+                added = await self.run(self.manager.add_vm, vm)
+            except Exception as e:
+                return await self._reply(send, 400, {"status": "error", "error": str(e)})
+            if not added:
+                return await self._reply(send, 400, {"status": "error", "error": "Insufficient memory pages"})
+            self.changed.set()
+            await self._reply(send, 201, {"status": "success", "vm_id": vm.id})
+
+    async def _submit_cloudlet(self, scope, receive, send):
+        with REQUEST_TIME.labels(endpoint='/api/cloudlets', method='POST').time():
+            try:
+                cloudlet = cloudlet_from_json(await self._json_body(receive))
+            except ValueError as ve:
+                return await self._reply(send, 400, {"status": "error", "error": str(ve)})
+            try:
+                await self.run(self.manager.submit_cloudlet, cloudlet)
+            except AdmissionError as ae:
+                headers = [(b'retry-after', str(ae.retry_after).encode())] if ae.retry_after is not None else []
+                return await self._reply(send, ae.status, {
+                    "status": "error", "error": str(ae), "predicted_start": ae.predicted_start}, headers)
+            self.changed.set()
+            await self._reply(send, 201, {
+                "status": "success",
+                "cloudlet_id": cloudlet.id,
+                "predicted_start": cloudlet.predicted_start,
+                "admission": cloudlet.admission,
+                "message": f"Cloudlet {cloudlet.name} submitted successfully"
+            })
+
+    async def _complete_cloudlet(self, scope, receive, send):
+        with REQUEST_TIME.labels(endpoint='/api/cloudlets/complete', method='POST').time():
+            data = await self._json_body(receive)
+            await self.run(self.manager.complete_cloudlet, data.get("cloudlet_id"))
+            self.changed.set()
+            await self._reply(send, 200, {"status": "success"})
+
+    async def _delete(self, send, kind, object_id):
+        endpoint = f"/api/{kind}s/<{kind}_id>"
+        with REQUEST_TIME.labels(endpoint=endpoint, method='DELETE').time():
+            delete = self.manager.delete_cloudlet if kind == 'cloudlet' else self.manager.delete_vm
+            try:
+                result = await self.run(delete, object_id)
+            except Exception as e:
+                print(f"Error in {endpoint} [DELETE]:", e)
+                return await self._reply(send, 400, {"status": "error", "error": str(e)})
+            self.changed.set()
+            if result:
+                return await self._reply(send, 200, {"status": "success", f"{kind}_id": object_id})
+            await self._reply(send, 404, {"status": "not_found", f"{kind}_id": object_id})
+
+    async def _scaling_decisions(self, scope, receive, send):
+        with REQUEST_TIME.labels(endpoint='/api/scaling/decisions', method='GET').time():
+            query = parse_qs(scope['query_string'].decode())
+            try:
+                limit = int(query.get('limit', ['50'])[0])
+            except ValueError:
+                limit = 50
+            decisions = await self.run(self.manager.scaling_controller.recent_decisions, limit)
+            await self._reply(send, 200, decisions)
+
+    async def _health(self, scope, receive, send):
+        await self._reply(send, 200, {"status": "healthy", "timestamp": time.time()})
+
+    async def _fallback(self, scope, receive, send):
+        """Serve everything else (dashboard page, static files, settings, Prometheus) through Flask."""
+        environ = _wsgi_environ(scope, await _read_body(receive))
+        status, headers, body = await self.run(_call_wsgi, self.flask_app, environ)
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+gateway = AsyncGateway(manager, snapshots, flask_app)
+application = gateway.asgi
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve CloudFlash from an asyncio event loop (ASGI)")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    print("🚀 Starting CloudFlash (ASGI)...")
+    print(f"🔗 Access the application at: http://localhost:{args.port}")
+    uvicorn.run(application, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
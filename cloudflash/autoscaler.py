@@ -0,0 +1,165 @@
+from collections import deque
+from typing import Dict, Optional
+
+from clock import system_clock
+
+
+class ScalingDecision:
+    """One controller evaluation: what to do, why, and the inputs it saw."""
+
+    def __init__(self, action, count, reason, inputs, timestamp, cooldown):
+        self.action = action  # 'scale_up', 'scale_down' or 'hold'
+        self.count = count  # Max VMs to add or remove
+        self.reason = reason
+        self.inputs = inputs
+        self.timestamp = timestamp
+        self.cooldown = cooldown
+        self.applied = 0  # VMs actually added/removed, filled in by record()
+
+    def to_dict(self) -> dict:
+        return {
+            'action': self.action,
+            'count': self.count,
+            'applied': self.applied,
+            'reason': self.reason,
+            'inputs': self.inputs,
+            'timestamp': self.timestamp,
+            'cooldown': self.cooldown,
+        }
+
+
+class ScalingController:
+    """
+    Single source of scale-up/scale-down decisions.
+
+    Combines reactive utilization, the latest predictive forecast and the
+    pending queue depth, then applies min/max fleet bounds, hysteresis
+    (a signal must persist for several consecutive ticks), an adaptive
+    cooldown and a sliding-window rate limit. Every evaluation is kept in
+    a decision log with its inputs. Time comes from `clock`, so the
+    controller can be driven by a VirtualClock.
+    """
+
+    def __init__(self, thresholds: Dict[str, Dict[str, float]], min_vms: int = 0, max_vms: int = 20,
+                 up_ticks: int = 2, down_ticks: int = 5, base_cooldown: float = 10,
+                 min_cooldown: float = 3, max_actions: int = 5, window: float = 60,
+                 forecast_ttl: float = 90, max_step: int = 5, clock=system_clock):
+        self.thresholds = thresholds
+        self.min_vms = min_vms
+        self.max_vms = max_vms
+        self.up_ticks = up_ticks
+        self.down_ticks = down_ticks
+        self.base_cooldown = base_cooldown
+        self.min_cooldown = min_cooldown
+        self.max_actions = max_actions  # Scaling actions allowed per window
+        self.window = window  # Seconds
+        self.forecast_ttl = forecast_ttl  # Forecasts older than this are ignored
+        self.max_step = max_step  # VMs per scale-up action
+        self.clock = clock
+
+        self.forecast: Optional[Dict[str, float]] = None
+        self.forecast_time = None
+        self.up_streak = 0
+        self.down_streak = 0
+        self.last_action_time = None
+        self.action_times = deque()
+        self.decisions = deque(maxlen=200)
+
+    def submit_forecast(self, predicted: Dict[str, float]) -> None:
+        """Record a utilization forecast (percent per resource) from the predictive scaler."""
+        self.forecast = dict(predicted)
+        self.forecast_time = self.clock()
+
+    def current_forecast(self) -> Optional[Dict[str, float]]:
+        if self.forecast is None or self.clock() - self.forecast_time > self.forecast_ttl:
+            return None
+        return self.forecast
+
+    def _cooldown(self, deltas: Dict[str, float]) -> float:
+        """Higher spikes = faster scaling (min_cooldown up to base_cooldown)."""
+        severity = min(max(deltas.values(), default=0), 1.0)
+        return max(self.base_cooldown * (1 - severity), self.min_cooldown)
+
+    def decide(self, utilization: Dict[str, float], vm_count: int, queue_depth: int) -> ScalingDecision:
+        """
+        Evaluate one tick. utilization holds fractions per resource; the
+        forecast (if fresh) holds percentages as produced by the predictor.
+        """
+        now = self.clock()
+        forecast = self.current_forecast()
+        spike = {k: max(0.0, utilization.get(k, 0) - t['up']) for k, t in self.thresholds.items()}
+        dip = {k: max(0.0, t['down'] - utilization.get(k, 0)) for k, t in self.thresholds.items()}
+        forecast_spike = {
+            k: max(0.0, forecast[k] / 100.0 - self.thresholds[k]['up'])
+            for k in (forecast or {}) if k in self.thresholds
+        }
+
+        up_signal = any(spike.values()) or any(forecast_spike.values()) or queue_depth > 0
+        # Every resource (measured and forecast) must be low, and nothing may be waiting
+        down_signal = (vm_count > 0 and queue_depth == 0 and all(dip.values())
+                       and not any(forecast_spike.values()))
+        self.up_streak = self.up_streak + 1 if up_signal else 0
+        self.down_streak = self.down_streak + 1 if down_signal else 0
+
+        cooldown = self._cooldown({**spike, **forecast_spike} if up_signal else dip)
+        while self.action_times and now - self.action_times[0] > self.window:
+            self.action_times.popleft()
+
+        inputs = {
+            'utilization': dict(utilization),
+            'forecast': dict(forecast) if forecast else None,
+            'queue_depth': queue_depth,
+            'vm_count': vm_count,
+            'up_streak': self.up_streak,
+            'down_streak': self.down_streak,
+        }
+
+        def decision(action, count, reason):
+            d = ScalingDecision(action, count, reason, inputs, now, cooldown)
+            self.decisions.append(d)
+            return d
+
+        # Bounds first: an empty fleet with work waiting scales up immediately
+        if vm_count < self.min_vms or (vm_count == 0 and queue_depth > 0):
+            if vm_count >= self.max_vms:
+                return decision('hold', 0, 'at max_vms')
+            count = max(self.min_vms - vm_count, 1)
+            return decision('scale_up', min(count, self.max_step, self.max_vms - vm_count), 'below minimum fleet')
+
+        if not up_signal and not down_signal:
+            return decision('hold', 0, 'within thresholds')
+        if self.last_action_time is not None and now - self.last_action_time < cooldown:
+            return decision('hold', 0, f'cooldown ({cooldown:.1f}s)')
+        if len(self.action_times) >= self.max_actions:
+            return decision('hold', 0, f'rate limited ({self.max_actions} actions per {self.window:.0f}s)')
+
+        if up_signal:
+            if self.up_streak < self.up_ticks:
+                return decision('hold', 0, f'hysteresis ({self.up_streak}/{self.up_ticks} ticks)')
+            if vm_count >= self.max_vms:
+                return decision('hold', 0, 'at max_vms')
+            if queue_depth > 0:
+                reason = f'{queue_depth} cloudlets pending'
+            elif any(spike.values()):
+                reason = 'utilization above threshold: ' + ', '.join(k for k, v in spike.items() if v)
+            else:
+                reason = 'forecast above threshold: ' + ', '.join(k for k, v in forecast_spike.items() if v)
+            return decision('scale_up', min(self.max_step, self.max_vms - vm_count), reason)
+
+        if self.down_streak < self.down_ticks:
+            return decision('hold', 0, f'hysteresis ({self.down_streak}/{self.down_ticks} ticks)')
+        if vm_count <= self.min_vms:
+            return decision('hold', 0, 'at min_vms')
+        return decision('scale_down', 1, 'utilization below thresholds')
+
+    def record(self, decision: ScalingDecision, applied: int) -> None:
+        """Report how many VMs a decision actually added or removed."""
+        decision.applied = applied
+        if applied:
+            self.last_action_time = decision.timestamp
+            self.action_times.append(decision.timestamp)
+            self.up_streak = 0
+            self.down_streak = 0
+
+    def recent_decisions(self, limit: int = 50):
+        return [d.to_dict() for d in list(self.decisions)[-limit:]]
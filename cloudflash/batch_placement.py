@@ -0,0 +1,216 @@
+import time
+from typing import Optional
+
+import numpy as np
+
+from placement import RESOURCES, demand_vector
+from flavors import FLAVOR_CATALOG, VMFlavor
+
+
+class BatchPlan:
+    """Result of a batch placement: where each cloudlet goes and which VMs to open."""
+
+    def __init__(self):
+        self.assignments = []  # (cloudlet, existing VM) pairs
+        self.new_vm_assignments = []  # (cloudlet, index into new_vms) pairs
+        self.new_vms = []  # VMFlavors to provision
+        self.unplaced = []  # Cloudlets left for a later pass
+        self.elapsed = 0.0
+        self.timed_out = False
+
+
+class BatchPlacer:
+    """
+    Places a whole set of pending cloudlets at once as a multi-dimensional
+    bin-packing problem.
+
+    Cloudlets are sorted by priority and normalized size and placed
+    first-fit-decreasing into the existing VMs, then into new VMs whose shape
+    best matches the demand still waiting to be placed. Any time left in the
+    budget is spent on a bounded local search that empties and downsizes new VMs.
+    """
+
+    def __init__(self, flavors=None, time_budget: float = 0.05, max_new_vms: int = 10):
+        self.shapes = list(flavors or FLAVOR_CATALOG)
+        self.time_budget = time_budget  # Seconds per plan() call
+        self.max_new_vms = max_new_vms
+
+    def _shape_capacity(self, shape) -> np.ndarray:
+        return shape.capacity()
+
+    def plan(self, cloudlets, engine, free_pages: int, page_size: int = 1,
+             allow_new_vms: bool = True, max_new_vms: Optional[int] = None) -> BatchPlan:
+        start = time.perf_counter()
+        max_new_vms = self.max_new_vms if max_new_vms is None else max_new_vms
+        deadline = start + self.time_budget
+        plan = BatchPlan()
+        if not cloudlets:
+            return plan
+
+        with engine.lock:
+            n = len(engine.vms)
+            free = engine.capacity[:n] - engine.used[:n]
+            scale = engine.capacity[:n].max(axis=0) if n else np.zeros(len(RESOURCES))
+            # A strict VM that is already busy cannot take anything; an idle one takes one cloudlet
+            strict = engine.strict[:n].copy()
+            closed = strict & (engine.cloudlet_count[:n] > 0)
+            vms = list(engine.vms)
+
+        shape_caps = [self._shape_capacity(s) for s in self.shapes]
+        if shape_caps:
+            scale = np.maximum(scale, np.max(shape_caps, axis=0))
+        scale = np.where(scale > 0, scale, 1.0)
+
+        demands = [demand_vector(cl) for cl in cloudlets]
+        sizes = [float((d / scale).sum()) for d in demands]
+        order = sorted(range(len(cloudlets)),
+                       key=lambda i: (-cloudlets[i].sla_priority, -sizes[i]))
+
+        # Bin state: rows 0..n-1 are existing VMs, later rows are new VMs
+        bins_free = [row for row in free]
+        bins_strict = list(strict)
+        bins_closed = list(closed)
+        bins_items = [[] for _ in range(n)]
+        new_shapes = []
+        pages_left = free_pages
+        remaining = np.sum(demands, axis=0)  # Demand not yet placed, for sizing new VMs
+
+        def pages_for(ram):
+            return int((ram + page_size - 1) // page_size)
+
+        for pos, i in enumerate(order):
+            if time.perf_counter() > deadline:
+                plan.timed_out = True
+                plan.unplaced.extend(cloudlets[j] for j in order[pos:])
+                break
+            demand = demands[i]
+            remaining = remaining - demand
+
+            target = None
+            if bins_free:
+                fits = np.all(np.asarray(bins_free) >= demand, axis=1) & ~np.asarray(bins_closed)
+                if getattr(cloudlets[i], 'new_vm_only', False):
+                    fits[:n] = False  # Forecast headroom must come from new capacity
+                hits = np.flatnonzero(fits)
+                if len(hits):
+                    target = int(hits[0])
+
+            if target is None and allow_new_vms and len(new_shapes) < max_new_vms:
+                shape = self._choose_shape(demand, remaining + demand, scale,
+                                           pages_left, page_size)
+                if shape is not None:
+                    new_shapes.append(shape)
+                    bins_free.append(self._shape_capacity(shape))
+                    bins_strict.append(False)
+                    bins_closed.append(False)
+                    bins_items.append([])
+                    pages_left -= pages_for(shape.ram)
+                    target = len(bins_free) - 1
+
+            if target is None:
+                plan.unplaced.append(cloudlets[i])
+                continue
+
+            bins_free[target] = bins_free[target] - demand
+            bins_items[target].append(i)
+            if bins_strict[target]:
+                bins_closed[target] = True
+
+        self._local_search(demands, scale, bins_free, bins_strict, bins_closed, bins_items,
+                           new_shapes, n, deadline, page_size)
+
+        # Drop new VMs that ended up empty and renumber the rest
+        new_index = {}
+        for k, shape in enumerate(new_shapes):
+            if shape is not None and bins_items[n + k]:
+                new_index[k] = len(plan.new_vms)
+                plan.new_vms.append(shape)
+        for row, items in enumerate(bins_items):
+            for i in items:
+                if row < n:
+                    plan.assignments.append((cloudlets[i], vms[row]))
+                else:
+                    plan.new_vm_assignments.append((cloudlets[i], new_index[row - n]))
+
+        plan.elapsed = time.perf_counter() - start
+        return plan
+
+    def _choose_shape(self, demand, remaining, scale, pages_left, page_size) -> Optional[VMFlavor]:
+        """
+        Shape for a new VM that must fit the demand. Shapes are scored by how
+        much of the remaining demand they would absorb minus the capacity they
+        would leave idle, so large bursts open large VMs and stragglers small ones.
+        """
+        best, best_score = None, None
+        for shape in self.shapes:
+            cap = self._shape_capacity(shape)
+            if np.any(cap < demand) or (shape.ram + page_size - 1) // page_size > pages_left:
+                continue
+            covered = np.minimum(cap, remaining)
+            score = float((covered / scale).sum() - ((cap - covered) / scale).sum())
+            if best is None or score > best_score:
+                best, best_score = shape, score
+        return best
+
+    def _smallest_shape(self, demand, scale, pages_left, page_size) -> Optional[VMFlavor]:
+        """Smallest candidate shape (by normalized size) that fits the demand and page budget."""
+        best, best_size = None, None
+        for shape in self.shapes:
+            cap = self._shape_capacity(shape)
+            if np.any(cap < demand) or (shape.ram + page_size - 1) // page_size > pages_left:
+                continue
+            size = float((cap / scale).sum())
+            if best is None or size < best_size:
+                best, best_size = shape, size
+        return best
+
+    def _local_search(self, demands, scale, bins_free, bins_strict, bins_closed, bins_items,
+                      new_shapes, n, deadline, page_size):
+        """Try to empty the least-filled new VMs, then shrink each new VM's shape."""
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            open_new = [k for k, shape in enumerate(new_shapes) if shape is not None and bins_items[n + k]]
+            open_new.sort(key=lambda k: sum(float((demands[i] / scale).sum()) for i in bins_items[n + k]))
+            for k in open_new:
+                if time.perf_counter() > deadline:
+                    return
+                row = n + k
+                trial_free = [f.copy() for f in bins_free]
+                moves = []
+                for i in bins_items[row]:
+                    dest = None
+                    for other, f in enumerate(trial_free):
+                        # Strict VMs hold a single cloudlet, so they are never move targets
+                        if other == row or bins_closed[other] or bins_strict[other]:
+                            continue
+                        if other >= n and (new_shapes[other - n] is None or not bins_items[other]):
+                            continue
+                        if np.all(f >= demands[i]):
+                            dest = other
+                            break
+                    if dest is None:
+                        moves = None
+                        break
+                    trial_free[dest] = trial_free[dest] - demands[i]
+                    moves.append((i, dest))
+                if moves is None:
+                    continue
+                for i, dest in moves:
+                    bins_items[dest].append(i)
+                bins_items[row] = []
+                for other, f in enumerate(trial_free):
+                    bins_free[other] = f
+                new_shapes[k] = None
+                improved = True
+                break
+
+        # Downsize every new VM to the smallest shape that still fits its contents
+        for k, shape in enumerate(new_shapes):
+            if shape is None or not bins_items[n + k]:
+                continue
+            load = np.sum([demands[i] for i in bins_items[n + k]], axis=0)
+            smaller = self._smallest_shape(load, scale, shape.ram, page_size)
+            if smaller is not None:
+                new_shapes[k] = smaller
+                bins_free[n + k] = self._shape_capacity(smaller) - load
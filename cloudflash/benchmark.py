@@ -0,0 +1,954 @@
+"""
+Scheduler benchmark suite for CloudFlash.
+
+Drives ResourceManager and MemoryManager directly (no Flask / Socket.IO) so that
+changes to placement, scaling or memory allocation can be measured in isolation.
+
+Usage:
+    python benchmark.py                                  # run the default matrix
+    python benchmark.py --filter wal                     # state store write/recovery only
+    python benchmark.py --filter sharding --shards 1,2,4 # router throughput per shard count
+    python benchmark.py --filter serialization           # metrics payload encoding and caching
+    python benchmark.py --filter overcommit --overcommit 1,1.5,2  # density versus swap slowdown
+    python benchmark.py --filter numa --numa-nodes 2,4  # NUMA locality, node-local versus flat layout
+    python benchmark.py --filter preemption              # critical deadline misses with and without preemption
+    python benchmark.py --filter timeslice --cpu-overcommit 1,2  # CPU/GPU density versus time-slicing slowdown
+    python benchmark.py --filter runtime                 # turnaround under FIFO, SJF and SRPT queueing
+    python benchmark.py --filter admission               # deadline goodput with and without admission control
+    python benchmark.py --filter fairshare               # per-tenant waits under FIFO and DRF
+    python benchmark.py --vms 10,100 --cloudlets 1000    # custom sizes
+    python benchmark.py --output results.json --baseline baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core import ResourceManager, MemoryManager, VM, Cloudlet, CloudletStatus
+from clock import VirtualClock
+from state_store import StateStore
+from sharding import ShardedResourceManager
+from admission import AdmissionError
+import serialization
+from serialization import SnapshotCache
+
+try:
+    import resource  # Unix only
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil is optional for the benchmark
+    psutil = None
+
+# --- WORKLOAD DEFINITIONS ---
+
+# VM shape per resource mix: (cpu, ram, storage, bandwidth, gpu, isolation_level)
+VM_SHAPES = {
+    'mixed': (8, 16, 200, 2000, 1, 'STANDARD'),
+    'gpu_only': (4, 8, 100, 1000, 4, 'STANDARD'),
+    'memory_heavy': (4, 32, 200, 1000, 0, 'STANDARD'),
+    'strict': (4, 8, 100, 1000, 1, 'STRICT'),
+}
+
+RESOURCE_MIXES = list(VM_SHAPES)
+
+# Metrics where a larger value is an improvement; everything else is "lower is better"
+HIGHER_IS_BETTER = {'placements_per_sec', 'placed', 'allocations_per_sec', 'scale_ups', 'records_per_sec',
+                    'submissions_per_sec', 'vms_hosted', 'locality', 'reservation_locality',
+                    'completed', 'peak_cpu_density', 'on_time', 'goodput_per_sec'}
+
+
+def make_cloudlet(mix, rng):
+    """Create a cloudlet whose demand follows the given resource mix."""
+    if mix == 'gpu_only':
+        cpu, ram, storage, bandwidth, gpu = 0, 0, 0, 0, 1
+    elif mix == 'memory_heavy':
+        cpu, ram, storage, bandwidth, gpu = 1, rng.randint(2, 6), 10, 50, 0
+    else:  # mixed and strict
+        cpu = rng.randint(1, 2)
+        ram = rng.randint(1, 2)
+        storage = rng.randint(5, 20)
+        bandwidth = rng.randint(50, 100)
+        gpu = 1 if rng.random() < 0.1 else 0
+    # execution_time=0 keeps cloudlets allocated without spawning completion timers
+    return Cloudlet(cpu=cpu, ram=ram, storage=storage, sla_priority=rng.randint(1, 3),
+                    deadline=3600, bandwidth=bandwidth, gpu=gpu, execution_time=0)
+
+
+def build_manager(n_vms, mix):
+    """Create a ResourceManager with a fleet of n_vms VMs shaped for the mix."""
+    cpu, ram, storage, bandwidth, gpu, isolation = VM_SHAPES[mix]
+    # Size the page pool to the fleet so page exhaustion does not dominate the result
+    manager = ResourceManager(start_monitor=False, total_memory=max(1024, n_vms * ram * 3))
+    for _ in range(n_vms):
+        vm = VM(cpu, ram, storage, bandwidth, gpu, firewall_enabled=True, isolation_level=isolation)
+        manager.add_vm(vm)
+    return manager
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def peak_rss_mb():
+    """Peak resident set size of the current process in MB."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    return 0.0
+
+def bytes_written():
+    """Bytes this process has passed to write() so far, or None where unsupported."""
+    if psutil is None:
+        return None
+    try:
+        return psutil.Process().io_counters().write_chars
+    except (AttributeError, NotImplementedError, psutil.Error):
+        return None
+
+# --- SUITES ---
+
+def bench_placement(n_vms, n_cloudlets, mix, algorithm, seed):
+    rng = random.Random(seed)
+    random.seed(seed)  # weighted_round_robin draws from the module-level RNG
+    manager = build_manager(n_vms, mix)
+    manager.load_balancing_algorithm = algorithm
+    cloudlets = [make_cloudlet(mix, rng) for _ in range(n_cloudlets)]
+
+    latencies = []
+    start = time.perf_counter()
+    for cloudlet in cloudlets:
+        t0 = time.perf_counter()
+        manager.submit_cloudlet(cloudlet)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    placed = sum(1 for cl in cloudlets if cl.status == CloudletStatus.ACTIVE)
+    metrics = manager.get_metrics()
+    return {
+        'placed': placed,
+        'pending': len(manager.pending_queue),
+        'vms_used': sum(1 for vm in manager.vms if vm.cloudlets),
+        'placements_per_sec': placed / elapsed if elapsed > 0 else 0.0,
+        'p50_latency_ms': percentile(latencies, 50) * 1000,
+        'p99_latency_ms': percentile(latencies, 99) * 1000,
+        'fragmentation_percent': metrics['memory']['fragmentation'],
+    }
+
+
+def bench_scaling(n_cloudlets, mix, seed, max_rounds=200):
+    """Burst of pending cloudlets against an empty fleet; measure the autoscaler."""
+    rng = random.Random(seed)
+    manager = ResourceManager(start_monitor=False)
+    clock = VirtualClock()
+    manager.scaling_controller.clock = clock
+    for _ in range(n_cloudlets):
+        manager.submit_cloudlet(make_cloudlet(mix, rng))
+
+    latencies = []
+    scale_ups = 0
+    rounds = 0
+    while manager.pending_queue and rounds < max_rounds:
+        vms_before = len(manager.vms)
+        pending_before = len(manager.pending_queue)
+        clock.advance(1.0)  # One monitor tick of simulated time per round
+        t0 = time.perf_counter()
+        manager._scale_vms()
+        manager._allocate_cloudlets()
+        latencies.append(time.perf_counter() - t0)
+        rounds += 1
+        if len(manager.vms) > vms_before:
+            scale_ups += 1
+        elif len(manager.pending_queue) == pending_before:
+            last = manager.scaling_controller.decisions[-1]
+            if last.reason == 'at max_vms' or (last.action == 'scale_up' and not last.applied):
+                break  # Fleet cap or memory exhausted; report what is left pending
+
+    metrics = manager.get_metrics()
+    return {
+        'scale_ups': scale_ups,
+        'rounds': rounds,
+        'vms_created': len(manager.vms),
+        'pending': len(manager.pending_queue),
+        'p50_latency_ms': percentile(latencies, 50) * 1000,
+        'p99_latency_ms': percentile(latencies, 99) * 1000,
+        'fragmentation_percent': metrics['memory']['fragmentation'],
+    }
+
+
+def bench_memory(total_memory, operations, seed):
+    """Random allocate/free churn against the page allocator."""
+    rng = random.Random(seed)
+    memory = MemoryManager(total_memory=total_memory)
+    live = []
+    latencies = []
+    failures = 0
+    start = time.perf_counter()
+    for i in range(operations):
+        if live and (rng.random() < 0.45 or failures > 0):
+            memory.deallocate_blocks(live.pop(rng.randrange(len(live))))
+            failures = 0
+            continue
+        t0 = time.perf_counter()
+        blocks = memory.allocate_blocks(rng.randint(1, 16), f'vm-{i}')
+        latencies.append(time.perf_counter() - t0)
+        if blocks:
+            live.append(blocks)
+        else:
+            failures += 1
+    elapsed = time.perf_counter() - start
+
+    metrics = memory.get_memory_metrics()
+    return {
+        'allocations_per_sec': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'p50_latency_ms': percentile(latencies, 50) * 1000,
+        'p99_latency_ms': percentile(latencies, 99) * 1000,
+        'fragmentation_percent': metrics['fragmentation'],
+        'metadata_entries': metrics['metadata_entries'],
+    }
+
+
+def bench_wal(n_cloudlets, seed, n_vms=50, active_tail=100):
+    """
+    Log a history of n_cloudlets submit/start/complete transitions, then time
+    snapshotting and recovery with and without a snapshot.
+    """
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory(prefix='cloudflash-wal-') as workdir:
+        path = os.path.join(workdir, 'state.db')
+        store = StateStore(path)
+        cpu, ram, storage, bandwidth, gpu, isolation = VM_SHAPES['mixed']
+        vms = [VM(cpu, ram, storage, bandwidth, gpu, isolation_level=isolation) for _ in range(n_vms)]
+
+        written_before = bytes_written()
+        start = time.perf_counter()
+        for vm in vms:
+            store.append('vm', vm.to_record())
+        for i in range(n_cloudlets):
+            cloudlet = make_cloudlet('mixed', rng)
+            cloudlet.execution_time = 3600.0
+            store.append('cloudlet', cloudlet.to_record())
+            cloudlet.status = CloudletStatus.ACTIVE
+            cloudlet.vm_id = vms[i % n_vms].id
+            cloudlet.start_time = time.time()
+            store.append('cloudlet', cloudlet.to_record())
+            if i < n_cloudlets - active_tail:  # The newest cloudlets are still running at the "crash"
+                cloudlet.status = CloudletStatus.COMPLETED
+                cloudlet.completion_time = time.time()
+                store.append('cloudlet', cloudlet.to_record())
+        store.flush()
+        log_elapsed = time.perf_counter() - start
+        written = bytes_written()
+        logged = store.stats['bytes_logged']
+        if written is None or written_before is None:
+            amplification = store.disk_bytes() / logged  # Falls back to on-disk size
+        else:
+            amplification = (written - written_before) / logged
+
+        t0 = time.perf_counter()
+        state, _ = store.load()
+        replay_seconds = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        snapshot_bytes = store.snapshot(state, store.seq)
+        snapshot_seconds = time.perf_counter() - t0
+
+        # A little more history after the snapshot, as after a normal snapshot interval
+        for record in list(state['cloudlets'].values())[-active_tail:]:
+            store.append('cloudlet', record)
+        store.close()
+
+        t0 = time.perf_counter()
+        reopened = StateStore(path)
+        reopened.load()
+        snapshot_recovery_seconds = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        manager = ResourceManager(start_monitor=False, state_store=reopened)
+        manager_recovery_seconds = time.perf_counter() - t0
+        resumed = sum(1 for cl in manager.cloudlets if cl.status == CloudletStatus.ACTIVE)
+        for cl in manager.cloudlets:
+            if cl._completion_timer:
+                cl._completion_timer.cancel()
+        reopened.close()
+
+        return {
+            'records': store.stats['records'],
+            'records_per_sec': store.stats['records'] / log_elapsed if log_elapsed > 0 else 0.0,
+            'write_amplification': amplification,
+            'log_replay_seconds': replay_seconds,
+            'snapshot_seconds': snapshot_seconds,
+            'snapshot_kib': snapshot_bytes / 1024,
+            'snapshot_recovery_seconds': snapshot_recovery_seconds,
+            'manager_recovery_seconds': manager_recovery_seconds,
+            'resumed': resumed,
+            'disk_mib': reopened.disk_bytes() / (1024 * 1024),
+        }
+
+
+def bench_sharding(n_shards, n_cloudlets, clients, seed):
+    """
+    Concurrent cloudlet submissions through the shard router. The fleet and
+    page space are the same for every shard count (about one VM per four
+    cloudlets), so only the partitioning changes.
+    """
+    rng = random.Random(seed)
+    cpu, ram, storage, bandwidth, gpu, isolation = VM_SHAPES['mixed']
+    n_vms = max(n_shards, n_cloudlets // 4)
+    manager = ShardedResourceManager(n_shards, total_memory=n_vms * ram * 3)
+    try:
+        for _ in range(n_vms):
+            manager.add_vm(VM(cpu, ram, storage, bandwidth, gpu, isolation_level=isolation))
+        cloudlets = [make_cloudlet('mixed', rng) for _ in range(n_cloudlets)]
+
+        def submit(cloudlet):
+            t0 = time.perf_counter()
+            manager.submit_cloudlet(cloudlet)
+            return time.perf_counter() - t0
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            latencies = list(executor.map(submit, cloudlets))
+        elapsed = time.perf_counter() - start
+        t0 = time.perf_counter()
+        metrics = manager.get_metrics()
+        metrics_ms = (time.perf_counter() - t0) * 1000
+    finally:
+        manager.close()
+    return {
+        'submissions_per_sec': n_cloudlets / elapsed if elapsed > 0 else 0.0,
+        'p50_latency_ms': percentile(latencies, 50) * 1000,
+        'p99_latency_ms': percentile(latencies, 99) * 1000,
+        'placed': sum(1 for cl in cloudlets if cl.status == CloudletStatus.ACTIVE),
+        'global_metrics_ms': metrics_ms,
+        'vms': len(metrics['vms']),
+    }
+
+
+def bench_serialization(n_vms, n_cloudlets, seed, reads=50):
+    """
+    Cost of serving the metrics payload: a fresh get_metrics() plus stdlib
+    json per read (the old path) versus one cached snapshot per state version.
+    """
+    rng = random.Random(seed)
+    manager = build_manager(n_vms, 'mixed')
+    for _ in range(n_cloudlets):
+        manager.submit_cloudlet(make_cloudlet('mixed', rng))
+    metrics = manager.get_metrics()
+
+    def timed(fn, n=reads):
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        return (time.perf_counter() - start) / n * 1000
+
+    result = {
+        'payload_kib': len(serialization.dumps(metrics)) / 1024,
+        'stdlib_encode_ms': timed(lambda: json.dumps(metrics)),
+        'fast_encode_ms': timed(lambda: serialization.dumps(metrics)),
+        'uncached_read_ms': timed(lambda: json.dumps(manager.get_metrics()).encode()),
+    }
+    snapshots = SnapshotCache(manager, max_age=60.0)
+    snapshots.json_bytes()
+    result['cached_read_us'] = timed(snapshots.json_bytes, reads * 100) * 1000
+    # A state transition per read: every read rebuilds and re-encodes
+    def transition_then_read():
+        manager.state_version += 1
+        snapshots.json_bytes()
+    result['rebuild_read_ms'] = timed(transition_then_read)
+    if serialization.msgpack is not None:
+        result['msgpack_kib'] = len(serialization.msgpack.packb(metrics, use_bin_type=True)) / 1024
+        result['msgpack_encode_ms'] = timed(lambda: serialization.msgpack.packb(metrics, use_bin_type=True))
+    return result
+
+
+def bench_overcommit(ratio, seed, host_memory=256, load=0.6, churn=0.1, ticks=120):
+    """
+    Density versus slowdown under memory overcommit: fill a host with
+    memory_heavy VMs at the given overcommit ratio, keep load of their RAM busy
+    with churning cloudlets for a number of simulated monitor ticks, and report
+    the VMs hosted against the swap stall charged to the cloudlets.
+    """
+    rng = random.Random(seed)
+    cpu, ram, storage, bandwidth, gpu, isolation = VM_SHAPES['memory_heavy']
+    manager = ResourceManager(start_monitor=False, total_memory=host_memory, memory_overcommit=ratio)
+    clock = VirtualClock(time.time())
+    manager.memory_manager.clock = clock
+    while manager.add_vm(VM(cpu, ram, storage, bandwidth, gpu, isolation_level=isolation), allocate=False):
+        pass
+    target = load * sum(vm.ram_capacity for vm in manager.vms)
+
+    active = []
+    busy_seconds = 0.0
+    latencies = []
+    for _ in range(ticks):
+        for cloudlet in rng.sample(active, int(len(active) * churn)):
+            manager.complete_cloudlet(cloudlet.id)
+        active = [cl for cl in active if cl.status == CloudletStatus.ACTIVE]
+        while sum(cl.ram for cl in active) < target:
+            cloudlet = make_cloudlet('memory_heavy', rng)
+            manager.submit_cloudlet(cloudlet)
+            if cloudlet.status != CloudletStatus.ACTIVE:
+                manager.delete_cloudlet(cloudlet.id)
+                break
+            active.append(cloudlet)
+        clock.advance(1.0)
+        t0 = time.perf_counter()
+        manager._touch_working_sets()
+        latencies.append(time.perf_counter() - t0)
+        busy_seconds += len(active)
+
+    cloudlets = [cl for cl in manager.cloudlets if cl.start_time is not None]
+    stall = sum(cl.stall_time for cl in cloudlets)
+    reclaim = manager.get_metrics()['memory']['reclaim'] or {}
+    return {
+        'vms_hosted': len(manager.vms),
+        'physical_pages': manager.memory_manager.physical_pages,
+        'slowdown': (busy_seconds + stall) / busy_seconds if busy_seconds else 1.0,
+        'stall_seconds': stall,
+        'reclaim_rate': reclaim.get('reclaim_rate', 0.0),
+        'working_set_pages': reclaim.get('working_set_pages', 0),
+        'major_faults': reclaim.get('major_faults', 0),
+        'p99_tick_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def bench_numa(nodes, layout, seed, host_memory=256, cpu_cores=64, rounds=20, load=0.6):
+    """
+    Locality under VM churn on a NUMA host: repeatedly fill the host with VMs
+    of mixed sizes and delete a third of them, then fill the survivors'
+    RAM to load with cloudlets. layout 'local' homes VMs on a node; 'flat'
+    takes pages first-fit across nodes as a NUMA-unaware allocator would.
+    """
+    rng = random.Random(seed)
+    manager = ResourceManager(start_monitor=False, total_memory=host_memory, numa_nodes=nodes)
+    topology = manager.memory_manager.topology
+    topology.set_cores(cpu_cores)
+    topology.prefer_local = layout == 'local'
+    for _ in range(rounds):
+        while manager.add_vm(VM(rng.choice((2, 4, 8)), rng.choice((8, 12, 16, 24, 40)), 200), allocate=False):
+            pass
+        for vm in rng.sample(manager.vms, len(manager.vms) // 3):
+            manager.delete_vm(vm.id)
+
+    target = load * sum(vm.ram_capacity for vm in manager.vms)
+    placed = []
+    while sum(cl.ram for cl in placed) < target:
+        cloudlet = make_cloudlet('memory_heavy', rng)
+        manager.submit_cloudlet(cloudlet)
+        if cloudlet.status != CloudletStatus.ACTIVE:
+            break
+        placed.append(cloudlet)
+
+    shares = []
+    for cloudlet in placed:
+        vm = manager.vm_index.get(cloudlet.vm_id)
+        shares.append(topology.remote_share(vm.memory.pages_of(cloudlet.id), vm.numa_node))
+    numa = manager.get_metrics()['memory']['numa']
+    reserved = [(n['reserved_local'], n['reserved_remote']) for n in numa['nodes']]
+    local, remote = sum(r[0] for r in reserved), sum(r[1] for r in reserved)
+    return {
+        'vms_hosted': len(manager.vms),
+        'locality': numa['locality'],
+        'reservation_locality': local / (local + remote) if local + remote else 1.0,
+        'slowdown': 1 + (sum(shares) / len(shares) if shares else 0.0) * topology.remote_penalty,
+    }
+
+
+def bench_preemption(enabled, seed, n_vms=4, n_critical=20, duration=4.0, tick=0.1, churn=0.02):
+    """
+    Start-deadline misses for critical work on a full fleet: fill every VM
+    with long-running priority-1 cloudlets, submit priority-3 cloudlets with
+    deadlines of 0.5-3s spread over the run, and drive _check_deadlines in
+    real time while a small share of the background work completes each tick.
+    """
+    rng = random.Random(seed)
+    cpu, ram, storage, bandwidth, gpu, isolation = VM_SHAPES['mixed']
+    manager = ResourceManager(start_monitor=False)
+    manager.preemption_enabled = enabled
+    for _ in range(n_vms):
+        manager.add_vm(VM(cpu, ram, storage, bandwidth, gpu, isolation_level=isolation), allocate=False)
+    background = []
+    while True:
+        cloudlet = make_cloudlet('mixed', rng)
+        cloudlet.sla_priority = 1
+        manager.submit_cloudlet(cloudlet)
+        if cloudlet.status != CloudletStatus.ACTIVE:
+            manager.delete_cloudlet(cloudlet.id)
+            break
+        background.append(cloudlet)
+
+    arrivals = sorted(rng.uniform(0, duration * 0.5) for _ in range(n_critical))
+    critical = []
+    latencies = []
+    start = time.time()
+    while time.time() - start < duration:
+        while arrivals and time.time() - start >= arrivals[0]:
+            arrivals.pop(0)
+            cloudlet = make_cloudlet('mixed', rng)
+            cloudlet.sla_priority = 3
+            cloudlet.deadline = time.time() + rng.uniform(0.5, 3.0)
+            manager.submit_cloudlet(cloudlet)
+            critical.append(cloudlet)
+        for cloudlet in background:
+            if cloudlet.status == CloudletStatus.ACTIVE and rng.random() < churn:
+                manager.complete_cloudlet(cloudlet.id)
+        t0 = time.perf_counter()
+        manager._check_deadlines()
+        latencies.append(time.perf_counter() - t0)
+        time.sleep(tick)
+
+    missed = sum(1 for cl in critical if cl.status == CloudletStatus.FAILED)
+    resolved = sum(1 for cl in critical if cl.status != CloudletStatus.WAITING or cl.preemptions)
+    stats = manager.preemption_stats
+    return {
+        'critical_miss_rate': missed / resolved if resolved else 0.0,
+        'preemptions': stats['preemptions'],
+        'victims': stats['victims'],
+        'p99_tick_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def bench_timeslice(ratio, seed, n_vms=4, n_cloudlets=200, min_runtime=0.1, max_runtime=0.4, timeout=60.0):
+    """
+    Density versus slowdown under CPU/GPU overcommit: submit a burst of short
+    mixed cloudlets to a fixed fleet whose VMs admit ratio times their cores
+    and GPUs, and run them to completion on real timers. Higher ratios run more
+    cloudlets at once, each stretched by time slicing, instead of queueing them.
+    """
+    rng = random.Random(seed)
+    cpu, ram, storage, bandwidth, gpu, isolation = VM_SHAPES['mixed']
+    manager = ResourceManager(start_monitor=False)
+    for _ in range(n_vms):
+        manager.add_vm(VM(cpu, ram, storage, bandwidth, gpu, isolation_level=isolation,
+                          cpu_overcommit=ratio, gpu_overcommit=ratio), allocate=False)
+    cloudlets = []
+    for _ in range(n_cloudlets):
+        cloudlet = make_cloudlet('mixed', rng)
+        cloudlet.execution_time = rng.uniform(min_runtime, max_runtime)
+        cloudlets.append(cloudlet)
+
+    start = time.time()
+    for cloudlet in cloudlets:
+        manager.submit_cloudlet(cloudlet)
+    peak_density = 0.0
+    while time.time() - start < timeout:
+        with manager.lock:
+            peak_density = max(peak_density, sum(vm.cpu_used for vm in manager.vms) / (cpu * n_vms))
+            if all(cl.status == CloudletStatus.COMPLETED for cl in cloudlets):
+                break
+        time.sleep(0.01)
+    makespan = time.time() - start
+
+    done = [cl for cl in cloudlets if cl.status == CloudletStatus.COMPLETED]
+    stats = manager.time_slicer.metrics(manager.vms)
+    return {
+        'completed': len(done),
+        'makespan_s': makespan,
+        'peak_cpu_density': peak_density,
+        'slowdown': stats['slowdown'],
+        'mean_wait_s': sum(cl.start_time - cl.creation_time for cl in done) / len(done) if done else 0.0,
+        'mean_turnaround_s': sum(cl.completion_time - cl.creation_time for cl in done) / len(done) if done else 0.0,
+    }
+
+
+def bench_runtime(policy, seed, n_vms=2, n_cloudlets=150, arrival_window=1.0, long_share=0.2,
+                  history=20, timeout=60.0):
+    """
+    Turnaround under runtime-aware queueing: a stream of open-ended cloudlets
+    (no declared runtime), mostly short 'query' jobs and some long 'batch'
+    ones, arrives at a small fleet. The driver completes each when its hidden
+    runtime has run. The estimator starts from a history of completions of
+    both kinds, and every completion in the run keeps teaching it.
+    """
+    rng = random.Random(seed)
+    cpu, ram, storage, bandwidth, gpu, isolation = VM_SHAPES['mixed']
+    manager = ResourceManager(start_monitor=False)
+    manager.queue_policy = policy
+    for _ in range(n_vms):
+        manager.add_vm(VM(cpu, ram, storage, bandwidth, gpu, isolation_level=isolation), allocate=False)
+
+    def job(kind, i):
+        cloudlet = Cloudlet(cpu=2, ram=1, storage=5, sla_priority=1, deadline=3600, bandwidth=50,
+                            name=f"{kind}-{i}", execution_time=0)
+        low, high = (0.02, 0.06) if kind == 'query' else (0.3, 0.6)
+        return cloudlet, rng.uniform(low, high)
+
+    for i in range(history):
+        for kind in ('query', 'batch'):
+            cloudlet, runtime = job(kind, i)
+            manager.runtime_estimator.observe(cloudlet, runtime)
+
+    arrivals = sorted(rng.uniform(0, arrival_window) for _ in range(n_cloudlets))
+    runtimes = {}
+    cloudlets = []
+    start = time.time()
+    last_tick = start
+    while time.time() - start < timeout:
+        now = time.time()
+        while arrivals and now - start >= arrivals[0]:
+            arrivals.pop(0)
+            cloudlet, runtime = job('batch' if rng.random() < long_share else 'query', len(cloudlets))
+            runtimes[cloudlet.id] = runtime
+            cloudlets.append(cloudlet)
+            manager.submit_cloudlet(cloudlet)
+        for cloudlet in cloudlets:
+            if (cloudlet.status == CloudletStatus.ACTIVE
+                    and cloudlet.executed + now - cloudlet.start_time >= runtimes[cloudlet.id]):
+                manager.complete_cloudlet(cloudlet.id)
+        if now - last_tick >= 0.05:
+            # The monitor's deadline pass, where SRPT preempts
+            manager._check_deadlines()
+            last_tick = now
+        if not arrivals and all(cl.status == CloudletStatus.COMPLETED for cl in cloudlets):
+            break
+        time.sleep(0.002)
+    makespan = time.time() - start
+
+    done = [cl for cl in cloudlets if cl.status == CloudletStatus.COMPLETED]
+    turnaround = [cl.completion_time - cl.creation_time for cl in done]
+    slowdown = [(cl.completion_time - cl.creation_time) / runtimes[cl.id] for cl in done]
+    errors = manager.runtime_estimator.metrics()['errors']['estimate']
+    return {
+        'completed': len(done),
+        'makespan_s': makespan,
+        'mean_turnaround_s': sum(turnaround) / len(done) if done else 0.0,
+        'p95_turnaround_s': percentile(turnaround, 95) if done else 0.0,
+        'mean_slowdown': sum(slowdown) / len(done) if done else 0.0,
+        'estimate_error': errors['mean_error'],
+        'preemptions': manager.preemption_stats['preemptions'],
+    }
+
+
+def bench_admission(mode, seed, max_pending=None, n_vms=2, n_cloudlets=200, arrival_window=2.0,
+                    min_runtime=0.05, max_runtime=0.15, min_deadline=0.3, max_deadline=1.5, timeout=60.0):
+    """
+    Deadline admission under overload: cloudlets with declared runtimes and
+    tight deadlines arrive at about twice the rate a small fleet can serve.
+    Without admission control the doomed ones queue, start late and hold
+    capacity others could have met their deadline with; 'reject' turns them
+    away at submit. max_pending adds queue-depth backpressure.
+    """
+    rng = random.Random(seed)
+    cpu, ram, storage, bandwidth, gpu, isolation = VM_SHAPES['mixed']
+    manager = ResourceManager(start_monitor=False)
+    manager.admission_mode = mode
+    manager.max_pending = max_pending
+    for _ in range(n_vms):
+        manager.add_vm(VM(cpu, ram, storage, bandwidth, gpu, isolation_level=isolation), allocate=False)
+
+    arrivals = sorted(rng.uniform(0, arrival_window) for _ in range(n_cloudlets))
+    cloudlets = []
+    turned_away = {422: 0, 429: 0}
+    start = time.time()
+    last_tick = start
+    while time.time() - start < timeout:
+        now = time.time()
+        while arrivals and now - start >= arrivals[0]:
+            arrivals.pop(0)
+            cloudlet = Cloudlet(cpu=4, ram=2, storage=5, sla_priority=1, deadline=0, bandwidth=50,
+                                execution_time=rng.uniform(min_runtime, max_runtime))
+            cloudlet.deadline = now + rng.uniform(min_deadline, max_deadline)
+            try:
+                manager.submit_cloudlet(cloudlet)
+                cloudlets.append(cloudlet)
+            except AdmissionError as e:
+                turned_away[e.status] += 1
+        for cloudlet in cloudlets:
+            if cloudlet.status == CloudletStatus.ACTIVE and cloudlet.remaining_execution_time(now) <= 0:
+                manager.complete_cloudlet(cloudlet.id)
+        if now - last_tick >= 0.05:
+            manager._check_deadlines()  # The monitor's pass that fails cloudlets past their deadline
+            last_tick = now
+        if not arrivals and all(cl.status in (CloudletStatus.COMPLETED, CloudletStatus.FAILED)
+                                for cl in cloudlets):
+            break
+        time.sleep(0.002)
+    makespan = time.time() - start
+
+    on_time = [cl for cl in cloudlets
+               if cl.status == CloudletStatus.COMPLETED and cl.completion_time <= cl.deadline]
+    errors = [abs(cl.start_time - cl.predicted_start) for cl in cloudlets
+              if cl.start_time is not None and cl.predicted_start is not None]
+    return {
+        'admitted': len(cloudlets),
+        'rejected': turned_away[422],
+        'throttled': turned_away[429],
+        'on_time': len(on_time),
+        'missed': len(cloudlets) - len(on_time),
+        'miss_rate': (len(cloudlets) - len(on_time)) / len(cloudlets) if cloudlets else 0.0,
+        'goodput_per_sec': len(on_time) / makespan,
+        'start_error_ms': sum(errors) / len(errors) * 1000 if errors else 0.0,
+    }
+
+
+def bench_fairshare(policy, seed, n_vms=4, heavy_jobs=60, light_tenants=3, light_jobs=20,
+                    arrival_window=1.0, timeout=60.0):
+    """
+    Tenants sharing a fleet: a 'render' tenant queues a burst of GPU jobs at
+    once, then smaller CPU-only tenants submit a steady trickle. Under FIFO
+    the burst holds the head of the queue, so the CPU left beside each busy
+    GPU sits idle while the other tenants wait; under DRF each placement goes
+    to the tenant with the lowest dominant share.
+    """
+    rng = random.Random(seed)
+    cpu, ram, storage, bandwidth, gpu, isolation = VM_SHAPES['mixed']
+    manager = ResourceManager(start_monitor=False)
+    manager.queue_policy = policy
+    for _ in range(n_vms):
+        manager.add_vm(VM(cpu, ram, storage, bandwidth, gpu, isolation_level=isolation), allocate=False)
+
+    arrivals = [(0.0, Cloudlet(cpu=4, ram=4, storage=10, sla_priority=1, deadline=3600, bandwidth=100, gpu=1,
+                               tenant='render', execution_time=rng.uniform(0.1, 0.2)))
+                for _ in range(heavy_jobs)]
+    for t in range(light_tenants):
+        arrivals += [(rng.uniform(0, arrival_window),
+                      Cloudlet(cpu=2, ram=2, storage=5, sla_priority=1, deadline=3600, bandwidth=50,
+                               tenant=f"team-{t}", execution_time=rng.uniform(0.05, 0.1)))
+                     for _ in range(light_jobs)]
+    arrivals.sort(key=lambda a: a[0])
+    cloudlets = []
+    submitted_at = {}
+    start = time.time()
+    while time.time() - start < timeout:
+        now = time.time()
+        while arrivals and now - start >= arrivals[0][0]:
+            _, cloudlet = arrivals.pop(0)
+            submitted_at[cloudlet.id] = now
+            cloudlets.append(cloudlet)
+            manager.submit_cloudlet(cloudlet)
+        for cloudlet in cloudlets:
+            if cloudlet.status == CloudletStatus.ACTIVE and cloudlet.remaining_execution_time(now) <= 0:
+                manager.complete_cloudlet(cloudlet.id)
+        if not arrivals and all(cl.status == CloudletStatus.COMPLETED for cl in cloudlets):
+            break
+        time.sleep(0.002)
+    makespan = time.time() - start
+
+    waits = {'render': [], 'light': []}
+    for cloudlet in cloudlets:
+        if cloudlet.start_time is not None:
+            waits['render' if cloudlet.tenant == 'render' else 'light'].append(
+                cloudlet.start_time - submitted_at[cloudlet.id])
+    return {
+        'completed': sum(1 for cl in cloudlets if cl.status == CloudletStatus.COMPLETED),
+        'makespan_s': makespan,
+        'render_mean_wait_s': sum(waits['render']) / len(waits['render']) if waits['render'] else 0.0,
+        'light_mean_wait_s': sum(waits['light']) / len(waits['light']) if waits['light'] else 0.0,
+        'light_p95_wait_s': percentile(waits['light'], 95) if waits['light'] else 0.0,
+    }
+
+
+SUITES = {
+    'placement': bench_placement,
+    'scaling': bench_scaling,
+    'memory': bench_memory,
+    'wal': bench_wal,
+    'sharding': bench_sharding,
+    'serialization': bench_serialization,
+    'overcommit': bench_overcommit,
+    'numa': bench_numa,
+    'preemption': bench_preemption,
+    'timeslice': bench_timeslice,
+    'runtime': bench_runtime,
+    'admission': bench_admission,
+    'fairshare': bench_fairshare,
+}
+
+# --- RUNNER ---
+
+def _run_in_child(suite, params, queue):
+    # Scheduler logging goes to stdout on every decision; keep it out of the timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            result = SUITES[suite](**params)
+            result['peak_rss_mb'] = peak_rss_mb()
+            queue.put(result)
+        except Exception as e:
+            queue.put({'error': f"{type(e).__name__}: {e}"})
+
+
+def run_scenario(suite, params):
+    """Run one scenario in a fresh process so peak RSS is per scenario."""
+    ctx = multiprocessing.get_context()
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_in_child, args=(suite, params, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def build_matrix(args):
+    scenarios = []
+    for n_vms in args.vms:
+        for n_cloudlets in args.cloudlets:
+            for mix in args.mixes:
+                for algorithm in args.algorithms:
+                    name = f"placement/{mix}/{algorithm}/vms={n_vms}/cloudlets={n_cloudlets}"
+                    scenarios.append((name, 'placement', {
+                        'n_vms': n_vms, 'n_cloudlets': n_cloudlets, 'mix': mix,
+                        'algorithm': algorithm, 'seed': args.seed,
+                    }))
+    for n_cloudlets in args.cloudlets:
+        for mix in args.mixes:
+            scenarios.append((f"scaling/{mix}/cloudlets={n_cloudlets}", 'scaling', {
+                'n_cloudlets': n_cloudlets, 'mix': mix, 'seed': args.seed,
+            }))
+    scenarios.append(("memory/churn", 'memory', {
+        'total_memory': 1024, 'operations': args.memory_ops, 'seed': args.seed,
+    }))
+    for n_cloudlets in args.wal_cloudlets:
+        scenarios.append((f"wal/cloudlets={n_cloudlets}", 'wal', {
+            'n_cloudlets': n_cloudlets, 'seed': args.seed,
+        }))
+    for n_shards in args.shards:
+        scenarios.append((f"sharding/shards={n_shards}/cloudlets={args.shard_cloudlets}", 'sharding', {
+            'n_shards': n_shards, 'n_cloudlets': args.shard_cloudlets,
+            'clients': args.shard_clients, 'seed': args.seed,
+        }))
+    for n_cloudlets in args.cloudlets:
+        scenarios.append((f"serialization/vms={max(args.vms)}/cloudlets={n_cloudlets}", 'serialization', {
+            'n_vms': max(args.vms), 'n_cloudlets': n_cloudlets, 'seed': args.seed,
+        }))
+    for ratio in args.overcommit:
+        scenarios.append((f"overcommit/ratio={ratio:g}", 'overcommit', {
+            'ratio': ratio, 'seed': args.seed,
+        }))
+    for nodes in args.numa_nodes:
+        for layout in ('local', 'flat'):
+            scenarios.append((f"numa/nodes={nodes}/{layout}", 'numa', {
+                'nodes': nodes, 'layout': layout, 'seed': args.seed,
+            }))
+    for enabled in (True, False):
+        scenarios.append((f"preemption/{'on' if enabled else 'off'}", 'preemption', {
+            'enabled': enabled, 'seed': args.seed,
+        }))
+    for ratio in args.cpu_overcommit:
+        scenarios.append((f"timeslice/ratio={ratio:g}", 'timeslice', {
+            'ratio': ratio, 'seed': args.seed,
+        }))
+    for policy in ('fifo', 'sjf', 'srpt'):
+        scenarios.append((f"runtime/{policy}", 'runtime', {
+            'policy': policy, 'seed': args.seed,
+        }))
+    for mode, max_pending in (('off', None), ('reject', None), ('reject', 8)):
+        scenarios.append((f"admission/{mode}" + (f"/max_pending={max_pending}" if max_pending else ''),
+                          'admission', {'mode': mode, 'max_pending': max_pending, 'seed': args.seed}))
+    for policy in ('fifo', 'drf'):
+        scenarios.append((f"fairshare/{policy}", 'fairshare', {'policy': policy, 'seed': args.seed}))
+    return [s for s in scenarios if not args.filter or args.filter in s[0]]
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of (scenario, metric, baseline, current, change) regressions."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or 'error' in current or 'error' in previous:
+            continue
+        for metric, value in current.items():
+            old = previous.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or old == 0:
+                continue
+            change = (value - old) / abs(old)
+            worse = change < -tolerance if metric in HIGHER_IS_BETTER else change > tolerance
+            if worse:
+                regressions.append((name, metric, old, value, change))
+    return regressions
+
+
+def parse_list(value, cast=str):
+    return [cast(v) for v in value.split(',') if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CloudFlash scheduler benchmarks")
+    parser.add_argument('--vms', type=lambda v: parse_list(v, int), default=[10, 100])
+    parser.add_argument('--cloudlets', type=lambda v: parse_list(v, int), default=[100, 1000])
+    parser.add_argument('--mixes', type=parse_list, default=RESOURCE_MIXES)
+    parser.add_argument('--algorithms', type=parse_list, default=None,
+                        help="Comma-separated load-balancing algorithms (default: all)")
+    parser.add_argument('--memory-ops', type=int, default=20000)
+    parser.add_argument('--wal-cloudlets', type=lambda v: parse_list(v, int), default=[100000],
+                        help="History sizes (cloudlets) for the state store benchmark")
+    parser.add_argument('--shards', type=lambda v: parse_list(v, int), default=[1, 2, 4],
+                        help="Shard counts for the sharded router benchmark")
+    parser.add_argument('--shard-cloudlets', type=int, default=5000)
+    parser.add_argument('--shard-clients', type=int, default=16, help="Concurrent submitting threads")
+    parser.add_argument('--overcommit', type=lambda v: parse_list(v, float), default=[1.0, 1.5, 2.0],
+                        help="Memory overcommit ratios for the density/slowdown benchmark")
+    parser.add_argument('--cpu-overcommit', type=lambda v: parse_list(v, float), default=[1.0, 1.5, 2.0],
+                        help="CPU/GPU overcommit ratios for the timeslice suite")
+    parser.add_argument('--numa-nodes', type=lambda v: parse_list(v, int), default=[2, 4],
+                        help="NUMA node counts for the locality benchmark")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--filter', default='', help="Only run scenarios whose name contains this")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help="Compare against a previously saved results file")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="Allowed relative change before a metric counts as a regression")
+    args = parser.parse_args(argv)
+
+    if args.algorithms is None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            args.algorithms = list(ResourceManager(start_monitor=False).available_algorithms)
+
+    results = {}
+    for name, suite, params in build_matrix(args):
+        result = run_scenario(suite, params)
+        results[name] = result
+        if 'error' in result:
+            print(f"{name:<70} ERROR {result['error']}")
+            continue
+        summary = ", ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}"
+                            for k, v in result.items())
+        print(f"{name:<70} {summary}")
+
+    report = {
+        'meta': {
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('results', {})
+        regressions = compare(results, baseline, args.tolerance)
+        if not regressions:
+            print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+            return 0
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+        for name, metric, old, new, change in regressions:
+            print(f"  {name} {metric}: {old:.3f} -> {new:.3f} ({change:+.1%})")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
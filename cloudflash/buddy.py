@@ -0,0 +1,61 @@
+from typing import List, Optional
+
+
+class BuddyAllocator:
+    """
+    Binary buddy allocator over the pages [base, base + total_pages), in
+    blocks of 2**order pages up to max_order.
+
+    A request is served from the smallest free order that fits, at its lowest
+    address, splitting larger blocks on the way down; a freed block coalesces
+    with its buddy, so large aligned blocks stay available for huge pages.
+    Block owners and locking are left to the caller (the MemoryManager).
+    """
+
+    def __init__(self, total_pages: int, max_order: int, base: int = 0):
+        self.base = base  # Block alignment is relative to the first page
+        self.total_pages = total_pages
+        self.max_order = max_order
+        self.free: List[set] = [set() for _ in range(max_order + 1)]  # Order -> first pages of free blocks
+        self.free_count = 0
+        # Seed with the largest aligned blocks that fit; a host that is not a
+        # multiple of the largest block ends in smaller ones
+        start = 0
+        while start < total_pages:
+            order = max_order
+            while start % (1 << order) or start + (1 << order) > total_pages:
+                order -= 1
+            self.free[order].add(base + start)
+            self.free_count += 1 << order
+            start += 1 << order
+
+    def take(self, order: int) -> Optional[int]:
+        """First page of a free block of 2**order pages, or None if none is left."""
+        for have in range(order, self.max_order + 1):
+            if self.free[have]:
+                break
+        else:
+            return None
+        start = min(self.free[have])
+        self.free[have].remove(start)
+        while have > order:
+            have -= 1
+            self.free[have].add(start + (1 << have))
+        self.free_count -= 1 << order
+        return start
+
+    def give(self, start: int, order: int) -> None:
+        """Free a block, merging it with its buddy for as long as the buddy is free too."""
+        self.free_count += 1 << order
+        while order < self.max_order:
+            buddy = self.base + ((start - self.base) ^ (1 << order))
+            if buddy not in self.free[order]:
+                break
+            self.free[order].remove(buddy)
+            start = min(start, buddy)
+            order += 1
+        self.free[order].add(start)
+
+    def tail_start(self) -> int:
+        """First page of the trailing partial max-order region (total_pages if there is none)."""
+        return self.base + self.total_pages - self.total_pages % (1 << self.max_order)
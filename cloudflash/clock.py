@@ -0,0 +1,23 @@
+import time
+
+
+def system_clock() -> float:
+    return time.time()
+
+
+class VirtualClock:
+    """
+    Manually advanced clock. Components that take a `clock` callable can be
+    driven with one of these so time-based behaviour (cooldowns, hysteresis,
+    forecast expiry) is deterministic in benchmarks and simulations.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> float:
+        self.now += seconds
+        return self.now
@@ -0,0 +1,522 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from core import ResourceManager, VM, Cloudlet, CloudletStatus
+from flavors import FLAVOR_CATALOG
+from placement import demand_vector
+from sharding import PartitionRouter, apply_submit_result, manager_handlers, partition_summary
+from admission import AdmissionError
+from state_store import StateStore
+
+# Per-resource scale for comparing slack across VMs of different sizes
+_SCALE = np.max([flavor.capacity() for flavor in FLAVOR_CATALOG], axis=0)
+_SCALE = np.where(_SCALE > 0, _SCALE, 1.0)
+
+
+# --- TRANSPORT ---
+# One JSON object per line in each direction over a local TCP connection:
+#   request  {"op": name, "args": [...]}
+#   reply    {"ok": true, "result": ..., "summary": {...}}  or  {"ok": false, "error": "..."}
+
+def _encode_line(obj) -> bytes:
+    return (json.dumps(obj, separators=(',', ':')) + '\n').encode()
+
+
+def parse_address(address: str):
+    host, _, port = address.rpartition(':')
+    return (host or '127.0.0.1', int(port))
+
+
+class HostError(RuntimeError):
+    """A host rejected or failed a request (the host itself is still up)."""
+
+
+class ClusterError(RuntimeError):
+    pass
+
+
+# --- HOST ---
+
+class _HostRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        host = self.server.host
+        with host.conn_lock:
+            host.connections.add(self.connection)
+        try:
+            for line in self.rfile:
+                request = json.loads(line)
+                try:
+                    result = host.handlers[request['op']](*request['args'])
+                    reply = {'ok': True, 'result': result, 'summary': host.summary()}
+                except Exception as e:
+                    reply = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+                self.wfile.write(_encode_line(reply))
+        except OSError:
+            pass
+        finally:
+            with host.conn_lock:
+                host.connections.discard(self.connection)
+
+
+class _HostServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class Host:
+    """
+    One machine of the cluster: a ResourceManager bounded by the host's
+    capacity (a MemoryManager of total_memory pages of its own, and
+    cpu_cores vCPUs that its VMs may claim in total). It keeps running its
+    monitor loop (allocation, deadlines, scaling within its capacity,
+    consolidation) and serves the coordinator over loopback TCP. Logs are
+    buffered until the coordinator's next heartbeat collects them.
+    """
+
+    def __init__(self, host_id: str, total_memory: int = 1024, cpu_cores: int = 128,
+                 address=('127.0.0.1', 0), state_path: Optional[str] = None, numa_nodes: int = 1):
+        self.id = host_id
+        self.total_memory = total_memory
+        self.cpu_cores = cpu_cores
+        self.store = StateStore(state_path) if state_path else None
+        self.manager = ResourceManager(start_monitor=False, state_store=self.store, total_memory=total_memory,
+                                       numa_nodes=numa_nodes)
+        self.manager.cpu_limit = cpu_cores
+        self.manager.memory_manager.topology.set_cores(cpu_cores)
+        self.manager.log = self._log
+        self.logs = deque(maxlen=1000)  # Not yet collected by a heartbeat
+        self.handlers = manager_handlers(self.manager)
+        self.handlers['info'] = self.info
+        self.handlers['heartbeat'] = self.heartbeat
+        self.connections = set()
+        self.conn_lock = threading.Lock()
+        self.server = _HostServer(address, _HostRequestHandler)
+        self.server.host = self
+        self.address = self.server.server_address
+
+    def _log(self, message: str):
+        print(f"[host {self.id}] {message}")
+        self.logs.append(message)
+
+    def summary(self) -> dict:
+        summary = partition_summary(self.manager)
+        with self.manager.lock:
+            summary['free_cpu'] = self.cpu_cores - self.manager.accounting.total.capacity['cpu']
+        return summary
+
+    def info(self) -> dict:
+        return {'id': self.id, 'total_memory': self.total_memory, 'cpu_cores': self.cpu_cores,
+                'pid': os.getpid()}
+
+    def heartbeat(self) -> dict:
+        """Liveness probe; also reports which cloudlets are still unfinished here and drains the logs."""
+        with self.manager.lock:
+            unfinished = [cl.id for cl in self.manager.cloudlets
+                          if cl.status not in (CloudletStatus.COMPLETED, CloudletStatus.FAILED)]
+        logs = []
+        while self.logs:
+            logs.append(self.logs.popleft())
+        return {'unfinished': unfinished, 'logs': logs}
+
+    def start(self):
+        """Serve in background threads (in-process clusters and tests)."""
+        self.manager.monitor_thread.start()
+        self.manager.warm_pool.start()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        self.manager.monitor_thread.start()
+        self.manager.warm_pool.start()
+        self.server.serve_forever()
+
+    def stop(self):
+        """Stop serving and drop every open connection, as a crashed host would."""
+        self.server.shutdown()
+        self.server.server_close()
+        with self.conn_lock:
+            for conn in list(self.connections):
+                try:
+                    conn.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        self.manager.warm_pool.stop()
+        if self.store is not None:
+            self.store.close()
+
+
+def spawn_host(host_id: str, total_memory: int = 1024, cpu_cores: int = 128, port: int = 0,
+               numa_nodes: int = 1):
+    """Start a host in its own process. Returns (process, (ip, port)) once it is listening."""
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), 'host', '--id', host_id, '--memory', str(total_memory),
+         '--cpu', str(cpu_cores), '--numa-nodes', str(numa_nodes), '--port', str(port), '--quiet'],
+        stdout=subprocess.PIPE, text=True)
+    ready = process.stdout.readline().split()  # "LISTENING <ip> <port>"
+    if len(ready) != 3:
+        process.kill()
+        raise ClusterError(f"host {host_id} failed to start")
+    return process, (ready[1], int(ready[2]))
+
+
+# --- COORDINATOR ---
+
+class _HostClient:
+    """Coordinator-side handle of one host: a persistent connection plus what the coordinator knows of it."""
+
+    def __init__(self, address, timeout: float):
+        self.address = tuple(address)
+        self.timeout = timeout
+        self.sock = None
+        self.reader = None
+        self.lock = threading.Lock()  # One request in flight per host
+        self.alive = True
+        self.last_seen = time.time()
+        self.summary = {'free': [], 'vm_ids': [], 'free_pages': 0, 'free_cpu': 0, 'pending': 0, 'vms': 0}
+        self.free = np.zeros((0, 5))
+        self.cloudlets: Dict[str, dict] = {}  # Records of cloudlets not finished on this host yet
+        self.vms: Dict[str, dict] = {}  # Records of VMs the coordinator placed here
+        info = self.call('info')
+        self.id = info['id']
+        self.total_memory = info['total_memory']
+        self.cpu_cores = info['cpu_cores']
+        self.pid = info['pid']
+        self.page_base = 0
+
+    def _disconnect(self):
+        for f in (self.reader, self.sock):
+            if f is not None:
+                try:
+                    f.close()
+                except OSError:
+                    pass
+        self.sock = self.reader = None
+
+    def call(self, op, *args):
+        """Send one request. Transport failures raise OSError; a failed request raises HostError."""
+        with self.lock:
+            try:
+                if self.sock is None:
+                    self.sock = socket.create_connection(self.address, timeout=self.timeout)
+                    self.reader = self.sock.makefile('rb')
+                self.sock.sendall(_encode_line({'op': op, 'args': args}))
+                line = self.reader.readline()
+                if not line:
+                    raise ConnectionError(f"host at {self.address[0]}:{self.address[1]} closed the connection")
+            except OSError:
+                self._disconnect()
+                raise
+            reply = json.loads(line)
+            self.last_seen = time.time()
+            if not reply['ok']:
+                raise HostError(f"host {getattr(self, 'id', self.address)}: {reply['error']}")
+            result = reply['result']
+            self.summary = reply['summary']
+            self.free = np.asarray(self.summary['free'], dtype=float).reshape(-1, 5)
+            # Kept under the lock so a heartbeat cannot overwrite a submit that raced it
+            if op == 'submit' and 'rejected' not in result:
+                self.cloudlets[args[0]['id']] = args[0]
+            elif op == 'heartbeat':
+                unfinished = set(result['unfinished'])
+                result['finished'] = [cid for cid in self.cloudlets if cid not in unfinished]
+                self.cloudlets = {cid: rec for cid, rec in self.cloudlets.items() if cid in unfinished}
+            return result
+
+    def close(self):
+        with self.lock:
+            self._disconnect()
+
+
+class ClusterCoordinator(PartitionRouter):
+    """
+    Schedules across hosts that each run their own ResourceManager.
+
+    The coordinator places VMs on hosts (the most free memory pages among
+    hosts with enough vCPUs left, which spreads them across failure domains)
+    and cloudlets on VMs (best fit on the VMs'
+    free capacity across all hosts, from the summary each host returns with
+    every reply). Cloudlets that fit nowhere are queued on the host with the
+    shortest backlog so its autoscaler provisions for them within the
+    host's capacity.
+
+    A heartbeat probes every host each heartbeat_interval seconds. A host
+    that has not answered for failure_timeout seconds is declared failed:
+    the VMs the coordinator placed on it are re-placed on the surviving
+    hosts, and every cloudlet that had not finished there is resubmitted
+    from scratch (its work is lost with the host; its deadline is kept).
+    A failed host is not re-admitted; restart it and add_host it again.
+    """
+
+    part_key = 'host'
+
+    def __init__(self, addresses, heartbeat_interval: float = 1.0, failure_timeout: float = 3.0,
+                 request_timeout: float = 5.0, metrics_ttl: float = 0.5):
+        self.hosts: List[_HostClient] = []
+        self.heartbeat_interval = heartbeat_interval
+        self.failure_timeout = failure_timeout
+        self.request_timeout = request_timeout
+        self.stats = {'failovers': 0, 'rescheduled_cloudlets': 0, 'lost_cloudlets': 0, 'replaced_vms': 0,
+                      'lost_vms': 0}
+        for address in addresses:
+            self._connect(address)
+        super().__init__(self.hosts, metrics_ttl)
+        self._stop = threading.Event()
+        threading.Thread(target=self._heartbeat, daemon=True).start()
+
+    def _connect(self, address) -> _HostClient:
+        if isinstance(address, str):
+            address = parse_address(address)
+        host = _HostClient(address, self.request_timeout)
+        host.page_base = sum(h.total_memory for h in self.hosts)
+        self.hosts.append(host)
+        return host
+
+    def add_host(self, address) -> str:
+        """Admit a (restarted) host into the cluster. Returns its ID."""
+        host = self._connect(address)
+        host.call('configure', self._settings)
+        self.log(f"[CLUSTER] Host {host.id} joined at {host.address[0]}:{host.address[1]}")
+        return host.id
+
+    def _live_parts(self):
+        return [host for host in self.hosts if host.alive]
+
+    def _broadcast(self, op, *args):
+        """Like PartitionRouter._broadcast, but unreachable hosts are skipped (the heartbeat judges them)."""
+        futures = [(host, self.pool.submit(host.call, op, *args)) for host in self._live_parts()]
+        results = []
+        for host, future in futures:
+            try:
+                results.append((host, future.result()))
+            except OSError:
+                continue
+        return results
+
+    # --- FAILURE DETECTION ---
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            hosts = self._live_parts()
+            futures = [(host, self.pool.submit(host.call, 'heartbeat')) for host in hosts]
+            for host, future in futures:
+                try:
+                    result = future.result()
+                except (OSError, ValueError):
+                    if time.time() - host.last_seen > self.failure_timeout:
+                        self._fail_host(host)
+                    continue
+                for message in result['logs']:
+                    self.log(f"[host {host.id}] {message}")
+                for cloudlet_id in result['finished']:
+                    self._forget_cloudlet(cloudlet_id, host)
+            if self.metrics_callback:
+                try:
+                    self.metrics_callback()
+                except Exception as e:
+                    print(f"Failed to emit metrics: {e}")
+
+    def _fail_host(self, host: _HostClient):
+        """Take a host out of the cluster and reschedule everything it was running."""
+        with self.lock:
+            if not host.alive:
+                return
+            host.alive = False
+        host.close()
+        with host.lock:
+            vms, cloudlets = list(host.vms.values()), list(host.cloudlets.values())
+        for record in cloudlets:
+            self._forget_cloudlet(record['id'], host)  # Owned again by wherever it is rescheduled
+        self.stats['failovers'] += 1
+        self.log(f"[CLUSTER] Host {host.id} failed (no heartbeat for {time.time() - host.last_seen:.1f}s): "
+                 f"re-placing {len(vms)} VMs and rescheduling {len(cloudlets)} cloudlets")
+        if not self._live_parts():
+            self.log("[CLUSTER] No live hosts left; work on the failed host is lost")
+            return
+        for record in vms:
+            self.vm_part.pop(record['id'], None)
+            if self.add_vm(VM.from_record(record)):
+                self.stats['replaced_vms'] += 1
+            else:
+                self.stats['lost_vms'] += 1
+        for record in sorted(cloudlets, key=lambda r: r['creation_time']):
+            cloudlet = Cloudlet.from_record(record)
+            cloudlet.vm_id = None
+            cloudlet.start_time = None
+            cloudlet.last_migration_time = None
+            try:
+                self.submit_cloudlet(cloudlet)
+            except AdmissionError as e:
+                self.stats['lost_cloudlets'] += 1
+                self.log(f"[CLUSTER] Could not reschedule {cloudlet.name}: {e}")
+                continue
+            self.stats['rescheduled_cloudlets'] += 1
+
+    # --- PLACEMENT ---
+
+    def _place(self, cloudlet, exclude=()):
+        """Pick (host, vm_id) for a cloudlet; vm_id is None when it has to queue on the host."""
+        demand = demand_vector(cloudlet)
+        with self.lock:
+            hosts = [h for h in self._live_parts() if h not in exclude]
+            if not hosts:
+                raise ClusterError("no live hosts")
+            best, best_row, best_score = None, None, None
+            for host in hosts:
+                if not len(host.free):
+                    continue
+                slack = host.free - demand
+                fits = np.all(slack >= 0, axis=1)
+                if not fits.any():
+                    continue
+                scores = np.where(fits, (slack / _SCALE).sum(axis=1), np.inf)
+                row = int(np.argmin(scores))
+                if best is None or scores[row] < best_score:
+                    best, best_row, best_score = host, row, scores[row]
+            if best is not None:
+                # Reserve the capacity locally until the host's next summary arrives
+                best.free[best_row] -= demand
+                return best, best.summary['vm_ids'][best_row]
+            host = min(hosts, key=lambda h: (h.summary['pending'], -h.summary['free_pages']))
+            host.summary['pending'] += 1
+            return host, None
+
+    # --- RESOURCE MANAGER API ---
+
+    def submit_cloudlet(self, cloudlet):
+        tried = []
+        while True:
+            host, vm_id = self._place(cloudlet, exclude=tried)
+            # Owned before the call, so the heartbeat that reports it finished still finds it
+            self.cloudlet_part[cloudlet.id] = host
+            try:
+                result = host.call('submit', cloudlet.to_record(), vm_id)
+                break
+            except Exception as e:
+                self._forget_cloudlet(cloudlet.id, host)
+                if not isinstance(e, OSError):
+                    raise
+                tried.append(host)  # Unreachable; try elsewhere while the heartbeat decides
+        try:
+            apply_submit_result(cloudlet, result)
+        except AdmissionError:
+            self._forget_cloudlet(cloudlet.id, host)
+            raise
+
+    def add_vm(self, vm, allocate=True):
+        # Hosts' MemoryManagers use 1 GB pages
+        candidates = [h for h in self._live_parts()
+                      if h.summary['free_pages'] >= vm.ram_capacity and h.summary['free_cpu'] >= vm.cpu_capacity]
+        for host in sorted(candidates, key=lambda h: -h.summary['free_pages']):
+            try:
+                if host.call('add_vm', vm.to_record()):
+                    with host.lock:
+                        host.vms[vm.id] = vm.to_record()
+                    self.vm_part[vm.id] = host
+                    return True
+            except OSError:
+                continue
+        return False
+
+    def delete_vm(self, vm_id):
+        host = self.vm_part.get(vm_id)
+        result = super().delete_vm(vm_id)
+        if result and host is not None:
+            with host.lock:
+                host.vms.pop(vm_id, None)
+        return result
+
+    def _part_info(self, host) -> dict:
+        return {'address': f"{host.address[0]}:{host.address[1]}", 'pid': host.pid, 'alive': host.alive,
+                'cpu_cores': host.cpu_cores, 'free_cpu': host.summary['free_cpu'],
+                'total_memory': host.total_memory}
+
+    def _aggregate(self, results) -> dict:
+        metrics = super()._aggregate(results)
+        metrics['hosts'] += [{'id': host.id, 'address': f"{host.address[0]}:{host.address[1]}",
+                              'alive': False} for host in self.hosts if not host.alive]
+        metrics['cluster'] = {**self.stats, 'hosts': len(self.hosts), 'live_hosts': len(self._live_parts())}
+        return metrics
+
+    def close(self):
+        self._stop.set()
+        for host in self.hosts:
+            host.close()
+        self.pool.shutdown(wait=False)
+
+
+# --- CLI ---
+
+def _demo(args):
+    """Run a local cluster in subprocesses, kill one host mid-run and watch its work move."""
+    processes = []
+    addresses = []
+    for i in range(args.hosts):
+        process, address = spawn_host(f"h{i}", args.memory, args.cpu)
+        processes.append(process)
+        addresses.append(address)
+    coordinator = ClusterCoordinator(addresses, heartbeat_interval=0.5, failure_timeout=1.5)
+    try:
+        for i in range(args.hosts):
+            coordinator.add_vm(VM(8, 16, 200, flavor='large'))
+        for i in range(args.cloudlets):
+            coordinator.submit_cloudlet(Cloudlet(2, 4, 10, 2, 120, execution_time=args.runtime))
+        time.sleep(1.0)
+        victim = coordinator.hosts[0]
+        print(f"Killing host {victim.id} (pid {victim.pid}) with {len(victim.cloudlets)} unfinished cloudlets")
+        processes[0].kill()
+        time.sleep(3.0)
+        coordinator._metrics_cache = None
+        metrics = coordinator.get_metrics()
+        statuses = {}
+        for cl in metrics['cloudlets']:
+            statuses[cl['status']] = statuses.get(cl['status'], 0) + 1
+        print(json.dumps({'cluster': metrics['cluster'], 'hosts': metrics['hosts'], 'cloudlets': statuses}, indent=2))
+    finally:
+        coordinator.close()
+        for process in processes:
+            process.kill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CloudFlash cluster host and local demo")
+    sub = parser.add_subparsers(dest='command', required=True)
+    host = sub.add_parser('host', help="Run one host agent")
+    host.add_argument('--id', required=True)
+    host.add_argument('--bind', default='127.0.0.1')
+    host.add_argument('--port', type=int, default=0)
+    host.add_argument('--memory', type=int, default=1024, help="Host memory in GB (1 GB pages)")
+    host.add_argument('--cpu', type=int, default=128, help="vCPUs available to the host's VMs")
+    host.add_argument('--numa-nodes', type=int, default=1, help="NUMA nodes the memory and vCPUs are split into")
+    host.add_argument('--state-db', default=None)
+    host.add_argument('--quiet', action='store_true', help="Do not echo logs (the coordinator still collects them)")
+    demo = sub.add_parser('demo', help="Run a cluster on this machine and fail one host")
+    demo.add_argument('--hosts', type=int, default=3)
+    demo.add_argument('--memory', type=int, default=256)
+    demo.add_argument('--cpu', type=int, default=64)
+    demo.add_argument('--cloudlets', type=int, default=30)
+    demo.add_argument('--runtime', type=float, default=20.0)
+    args = parser.parse_args(argv)
+
+    if args.command == 'demo':
+        _demo(args)
+        return
+    agent = Host(args.id, args.memory, args.cpu, (args.bind, args.port), args.state_db, args.numa_nodes)
+    print(f"LISTENING {agent.address[0]} {agent.address[1]}", flush=True)
+    if args.quiet:
+        sys.stdout = open(os.devnull, 'w')
+    agent.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
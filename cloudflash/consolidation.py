@@ -0,0 +1,144 @@
+import math
+from typing import Dict, List
+
+import numpy as np
+
+from placement import capacity_vector, demand_vector, usage_vector
+
+
+class Migration:
+    """Move of one running cloudlet from a source VM to a target VM."""
+
+    def __init__(self, cloudlet, source, target, pages):
+        self.cloudlet = cloudlet
+        self.source = source
+        self.target = target
+        self.pages = pages  # RAM pages copied by the move
+
+
+class MigrationPlan:
+    """Migrations for one consolidation cycle and the VMs they empty."""
+
+    def __init__(self):
+        self.migrations: List[Migration] = []
+        self.emptied = []  # Source VMs left with no cloudlets once the plan is applied
+        self.pages = 0
+        self.saved_vm_seconds = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'migrations': len(self.migrations),
+            'emptied_vms': [vm.id for vm in self.emptied],
+            'pages': self.pages,
+            'saved_vm_seconds': self.saved_vm_seconds,
+        }
+
+
+class ConsolidationPlanner:
+    """
+    Plans cloudlet migrations that empty whole VMs.
+
+    Each cycle, sources are ranked by the VM-seconds that emptying them
+    saves versus the cost of moving their cloudlets. The saving is how long
+    the source would otherwise stay up, minus any extra time the targets
+    now stay up. The cost is the RAM pages copied, at seconds_per_page.
+    A source is only taken if every cloudlet on it fits on already-busy
+    VMs and the plan stays within the per-cycle migration and page budget.
+    VMs that receive cloudlets are never emptied in the same plan.
+    Recently moved cloudlets stay put for a cooldown, so work cannot
+    ping-pong between VMs on consecutive ticks. Strict-isolation VMs are
+    neither sources nor targets.
+    """
+
+    def __init__(self, max_migrations: int = 4, page_budget: int = 32, cooldown: float = 30.0,
+                 seconds_per_page: float = 0.1, horizon: float = 60.0):
+        self.max_migrations = max_migrations  # Cloudlet moves per cycle
+        self.page_budget = page_budget  # RAM pages copied per cycle
+        self.cooldown = cooldown  # Seconds before a migrated cloudlet may move again
+        self.seconds_per_page = seconds_per_page  # Migration cost per RAM page
+        self.horizon = horizon  # Cap on the remaining runtime credited for open-ended cloudlets
+
+    def _remaining(self, cloudlet, now) -> float:
+        remaining = cloudlet.remaining_execution_time(now)
+        return self.horizon if remaining is None else min(remaining, self.horizon)
+
+    def plan(self, vms, cloudlets: Dict[str, object], now: float,
+             page_size: int = 1, min_vms: int = 0) -> MigrationPlan:
+        plan = MigrationPlan()
+        busy = [vm for vm in vms if vm.cloudlets and vm.isolation_level != 'STRICT']
+        if len(busy) < 2:
+            return plan
+
+        free = {vm.id: capacity_vector(vm) - usage_vector(vm) for vm in busy}
+        scale = np.max([capacity_vector(vm) for vm in busy], axis=0)
+        scale = np.where(scale > 0, scale, 1.0)
+        life = {}  # VM ID -> seconds until its last cloudlet finishes
+        contents = {}
+        for vm in busy:
+            contents[vm.id] = [cloudlets[cid] for cid in vm.cloudlets if cid in cloudlets]
+            life[vm.id] = max((self._remaining(cl, now) for cl in contents[vm.id]), default=0.0)
+
+        def pages_for(cl):
+            return int(math.ceil(cl.ram / page_size)) if cl.ram > 0 else 0
+
+        def movable(cl):
+            return cl.last_migration_time is None or now - cl.last_migration_time >= self.cooldown
+
+        # Cheapest VMs to empty with the longest remaining life first
+        def rank(vm):
+            pages = sum(pages_for(cl) for cl in contents[vm.id])
+            return (len(contents[vm.id]), pages, -life[vm.id])
+
+        sources, targets = set(), set()
+        active = len([vm for vm in vms if vm.cloudlets])
+        for source in sorted(busy, key=rank):
+            if active - 1 < max(min_vms, 1):
+                break
+            if source.id in targets:
+                continue
+            cls = contents[source.id]
+            if not cls or len(cls) != len(source.cloudlets) or not all(movable(cl) for cl in cls):
+                continue
+            pages = sum(pages_for(cl) for cl in cls)
+            if (len(plan.migrations) + len(cls) > self.max_migrations
+                    or plan.pages + pages > self.page_budget):
+                continue
+
+            trial_free = {vid: f.copy() for vid, f in free.items()}
+            trial_life = dict(life)
+            moves = []
+            for cl in sorted(cls, key=lambda c: -float((demand_vector(c) / scale).sum())):
+                demand = demand_vector(cl)
+                best, best_slack = None, None
+                for target in busy:
+                    if target.id == source.id or target.id in sources:
+                        continue
+                    slack = trial_free[target.id] - demand
+                    if np.any(slack < 0):
+                        continue
+                    score = float((slack / scale).sum())  # Best fit: tightest target
+                    if best is None or score < best_slack:
+                        best, best_slack = target, score
+                if best is None:
+                    moves = None
+                    break
+                trial_free[best.id] = trial_free[best.id] - demand
+                trial_life[best.id] = max(trial_life[best.id], self._remaining(cl, now))
+                moves.append(Migration(cl, source, best, pages_for(cl)))
+            if moves is None:
+                continue
+
+            extension = sum(trial_life[vid] - life[vid] for vid in {m.target.id for m in moves})
+            saved = life[source.id] - extension
+            if saved <= pages * self.seconds_per_page:
+                continue  # Not worth the copy
+
+            free, life = trial_free, trial_life
+            plan.migrations.extend(moves)
+            plan.emptied.append(source)
+            plan.pages += pages
+            plan.saved_vm_seconds += saved
+            sources.add(source.id)
+            targets.update(m.target.id for m in moves)
+            active -= 1
+        return plan
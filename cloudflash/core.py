@@ -1,10 +1,31 @@
 import threading
 import uuid
 import time
+import math
+import random
 from enum import Enum, auto
-from collections import deque
+from collections import OrderedDict, deque
 from typing import List, Dict, Optional
 
+from placement import PlacementEngine, demand_vector
+from batch_placement import BatchPlacer
+from flavors import FLAVOR_CATALOG, SizingPlanner, forecast_demand, get_flavor, DEFAULT_FLAVOR
+from autoscaler import ScalingController
+from warm_pool import WarmPool
+from consolidation import ConsolidationPlanner
+from query import RowIndex, CLOUDLET_QUERY, VM_QUERY, run_query
+from accounting import FleetAccounting, utilization
+from vm_memory import LocalPageAllocator
+from reclaim import ReclaimEngine
+from buddy import BuddyAllocator
+from numa import Topology
+from preemption import VictimIndex, PreemptionPlanner, deadline_summary
+from timeslice import TimeSlicer
+from runtime import RuntimeEstimator
+from admission import ADMISSION_MODES, AdmissionController, AdmissionError
+from fairshare import DEFAULT_TENANT, FairShareScheduler
+from clock import system_clock
+
 # --- ENUMS AND CONSTANTS ---
 
 class CloudletStatus(Enum):
@@ -14,6 +35,9 @@ class CloudletStatus(Enum):
     COMPLETED = auto()
     FAILED = auto()
 
+# States of a cloudlet that is still waiting for a VM
+QUEUED_STATES = (CloudletStatus.WAITING, CloudletStatus.PENDING)
+
 class VMStatus(Enum):
     IDLE = auto()
     RUNNING = auto()
@@ -22,106 +46,257 @@ class VMStatus(Enum):
 
 # --- MEMORY MANAGER ---
 class MemoryManager:
-    def __init__(self, total_memory: int = 1024):  # Total memory in GB
-        self.PAGE_SIZE = 1  # 1GB per page
-        self.total_pages = total_memory // self.PAGE_SIZE
-        self.pages = [False] * self.total_pages  # False = free, True = allocated
-        self.page_to_vm: Dict[int, str] = {}  # Map page index to VM ID
-        self.page_last_used = [time.time()] * self.total_pages  # Track last use
+    def __init__(self, total_memory: int = 1024,  # Total memory in GB
+                 overcommit_ratio: float = 1.0, clock=system_clock, numa_nodes: int = 1):
+        self.PAGE_SIZE = 1  # 1GB base pages; cloudlets split them into small pages (see vm_memory)
+        self.HUGE_PAGE_ORDER = 4  # 16GB huge pages (2**4 base pages) for VM reservations
+        self.clock = clock
+        self.physical_pages = total_memory // self.PAGE_SIZE
+        # With overcommit the page space VMs reserve from is larger than physical
+        # memory; the reclaim engine keeps the hottest pages in the physical frames
+        self.overcommit_ratio = max(1.0, float(overcommit_ratio))
+        self.total_pages = int(self.physical_pages * self.overcommit_ratio)
+        # Each NUMA node owns a page range with a buddy allocator of its own
+        self.topology = Topology(self.total_pages, numa_nodes, align=1 << self.HUGE_PAGE_ORDER)
+        self.buddies = [BuddyAllocator(node.pages, self.HUGE_PAGE_ORDER, base=node.first_page)
+                        for node in self.topology.nodes]
+        self.blocks: Dict[int, tuple] = {}  # First page of each allocated block -> (order, VM ID)
+        self.page_last_used = [self.clock()] * self.total_pages  # Track last use
         self.lock = threading.Lock()
+        self.reclaim = ReclaimEngine(self, self.physical_pages) if self.overcommitted else None
+
+    @property
+    def overcommitted(self) -> bool:
+        return self.total_pages > self.physical_pages
+
+    @property
+    def free_count(self) -> int:
+        return sum(buddy.free_count for buddy in self.buddies)
+
+    def free_by_node(self) -> List[int]:
+        return [buddy.free_count for buddy in self.buddies]
 
-    def allocate_pages(self, ram_needed: int, vm_id: str) -> List[int]:
-        """Allocate pages for the given RAM requirement."""
+    def choose_node(self, ram, cpu) -> int:
+        """NUMA home node for a VM of this size (see Topology.choose_node)."""
         with self.lock:
-            pages_needed = (ram_needed + self.PAGE_SIZE - 1) // self.PAGE_SIZE
-            free_pages = [i for i, allocated in enumerate(self.pages) if not allocated]
-            
-            # Try to find contiguous pages first
-            for start in range(len(self.pages) - pages_needed + 1):
-                if all(not self.pages[start + i] for i in range(pages_needed)):
-                    for i in range(start, start + pages_needed):
-                        self.pages[i] = True
-                        self.page_to_vm[i] = vm_id
-                        self.page_last_used[i] = time.time()
-                    return list(range(start, start + pages_needed))
-            
-            # If no contiguous space, use any free pages
-            if len(free_pages) >= pages_needed:
-                allocated_pages = free_pages[:pages_needed]
-                for i in allocated_pages:
-                    self.pages[i] = True
-                    self.page_to_vm[i] = vm_id
-                    self.page_last_used[i] = time.time()
-                return allocated_pages
-            return []
+            free = self.free_by_node()
+        return self.topology.choose_node(math.ceil(ram / self.PAGE_SIZE), cpu, free)
+
+    def allocate_blocks(self, ram_needed, vm_id: str, node: Optional[int] = None) -> List[tuple]:
+        """
+        Allocate the RAM as buddy blocks: one 16GB huge page per full 16GB, then a
+        block per remaining power of two. Pages come from node (default: the node
+        with most free pages) and spill onto the other nodes only if it runs
+        short. Returns (first page, pages) per block, or [] if there is not
+        enough free memory.
+        """
+        with self.lock:
+            pages_needed = math.ceil(ram_needed / self.PAGE_SIZE)
+            if pages_needed <= 0 or pages_needed > self.free_count:
+                return []
+            if not self.topology.prefer_local:
+                order = list(self.buddies)
+            else:
+                if node is None:
+                    node = max(range(len(self.buddies)), key=lambda n: self.buddies[n].free_count)
+                order = [self.buddies[node]] + sorted((b for i, b in enumerate(self.buddies) if i != node),
+                                                      key=lambda b: -b.free_count)
+            taken = []
+            for buddy in order:
+                share = min(pages_needed, buddy.free_count)
+                if share:
+                    taken += self._take_pages(buddy, share, vm_id)
+                    pages_needed -= share
+                if not pages_needed:
+                    break
+            return sorted(taken)
+
+    def _take_pages(self, buddy: BuddyAllocator, pages: int, vm_id: str) -> List[tuple]:
+        """Take pages (at most buddy.free_count) from one node's buddy as power-of-two blocks."""
+        top = self.HUGE_PAGE_ORDER
+        pending = [top] * (pages >> top)
+        pending += [order for order in range(top - 1, -1, -1) if pages >> order & 1]
+        taken = []
+        now = self.clock()
+        while pending:
+            order = pending.pop(0)
+            start = buddy.take(order)
+            if start is None:
+                # No free block this large: take two of half the size. Enough
+                # pages are free, so single pages always succeed.
+                pending[0:0] = [order - 1, order - 1]
+                continue
+            taken.append((start, 1 << order))
+            self.blocks[start] = (order, vm_id)
+            for i in range(start, start + (1 << order)):
+                self.page_last_used[i] = now
+        return taken
+
+    def _buddy_of(self, page: int) -> BuddyAllocator:
+        return self.buddies[self.topology.node_of(page)]
+
+    def _block_at(self, page: int) -> Optional[int]:
+        """First page of the allocated block holding page, if any."""
+        base = self._buddy_of(page).base
+        for order in range(self.HUGE_PAGE_ORDER + 1):
+            start = base + ((page - base) & ~((1 << order) - 1))
+            entry = self.blocks.get(start)
+            if entry is not None and page < start + (1 << entry[0]):
+                return start
+        return None
+
+    def _free_block(self, start: int, order: int) -> None:
+        self._buddy_of(start).give(start, order)
+        now = self.clock()
+        for i in range(start, start + (1 << order)):
+            self.page_last_used[i] = now
+            if self.reclaim is not None:
+                self.reclaim.drop(i)
+
+    def _free_page(self, page: int) -> None:
+        start = self._block_at(page)
+        if start is None:
+            return
+        order, vm_id = self.blocks.pop(start)
+        # Split the block down to the page; the rest stays allocated as smaller blocks
+        while order > 0:
+            order -= 1
+            half = start + (1 << order)
+            if page >= half:
+                self.blocks[start] = (order, vm_id)
+                start = half
+            else:
+                self.blocks[half] = (order, vm_id)
+        self._free_block(page, 0)
 
     def deallocate_pages(self, page_indices: List[int]) -> None:
-        """Deallocate pages and update last used time."""
+        """Deallocate single pages, splitting the blocks they belong to."""
         with self.lock:
             for i in page_indices:
-                if i in self.page_to_vm:
-                    self.pages[i] = False
-                    del self.page_to_vm[i]
-                    self.page_last_used[i] = time.time()
+                self._free_page(i)
 
-    def consolidate(self) -> None:
-        """Consolidate fragmented memory to reduce gaps."""
+    def deallocate_blocks(self, blocks: List[tuple]) -> None:
+        """Deallocate (first page, pages) blocks as returned by allocate_blocks."""
         with self.lock:
-            allocated_pages = [i for i, allocated in enumerate(self.pages) if allocated]
-            if not allocated_pages:
-                return
-            new_allocation = 0
-            for old_page in allocated_pages[:]:
-                if old_page != new_allocation:
-                    vm_id = self.page_to_vm[old_page]
-                    self.pages[old_page] = False
-                    del self.page_to_vm[old_page]
-                    self.pages[new_allocation] = True
-                    self.page_to_vm[new_allocation] = vm_id
-                    self.page_last_used[new_allocation] = self.page_last_used[old_page]
-                new_allocation += 1
-
-    def get_memory_metrics(self, vms: List[dict]) -> dict:
-        """Calculate memory metrics including fragmentation."""
+            for start, count in blocks:
+                entry = self.blocks.get(start)
+                if entry is not None and 1 << entry[0] == count:
+                    del self.blocks[start]
+                    self._free_block(start, entry[0])
+                else:
+                    for i in range(start, start + count):
+                        self._free_page(i)
+
+    def release_owner(self, vm_id: str) -> int:
+        """Free every block a VM owns (block numbers change when memory is consolidated). Returns the pages freed."""
+        with self.lock:
+            owned = [(start, order) for start, (order, owner) in self.blocks.items() if owner == vm_id]
+            for start, order in owned:
+                del self.blocks[start]
+                self._free_block(start, order)
+            return sum(1 << order for _, order in owned)
+
+    def blocks_of(self, vm_id: str) -> List[tuple]:
+        """(first page, pages) of every block a VM owns."""
         with self.lock:
+            return sorted((start, 1 << order) for start, (order, owner) in self.blocks.items() if owner == vm_id)
+
+    def consolidate(self) -> Dict[int, int]:
+        """
+        Re-place every block, largest first, into a fresh buddy of its NUMA node
+        so free memory coalesces back into huge pages. Blocks never change node.
+        Returns the renumbered pages (old -> new).
+        """
+        moved = {}
+        with self.lock:
+            if not self.blocks:
+                return moved
+            old_blocks = sorted(self.blocks.items(), key=lambda item: (-item[1][0], item[0]))
+            last_used = list(self.page_last_used)
+            self.buddies = [BuddyAllocator(buddy.total_pages, self.HUGE_PAGE_ORDER, base=buddy.base)
+                            for buddy in self.buddies]
+            self.blocks = {}
+            for old, (order, vm_id) in old_blocks:
+                new = self._buddy_of(old).take(order)
+                self.blocks[new] = (order, vm_id)
+                if new != old:
+                    for i in range(1 << order):
+                        moved[old + i] = new + i
+                        self.page_last_used[new + i] = last_used[old + i]
+            if self.reclaim is not None:
+                self.reclaim.remap(moved)
+        return moved
+
+    def touch(self, pages: List[int]) -> float:
+        """
+        Record an access to pages that cloudlets are using. On an overcommitted
+        host this faults non-resident pages in, reclaiming cold ones to make
+        room; returns the seconds the caller stalled on swap reads.
+        """
+        if self.reclaim is None or not pages:
+            return 0.0
+        with self.lock:
+            return self.reclaim.touch(pages, self.clock())
+
+    def get_memory_metrics(self, vms: List['VM'] = ()) -> dict:
+        """Calculate memory metrics, per page class and overall, including fragmentation."""
+        small_used, small_waste, reserve_waste = 0, 0.0, 0.0
+        for vm in vms:
+            with vm.lock:
+                small_used += vm.memory.small_pages_used
+                small_waste += vm.memory.waste()
+                if vm.memory.reserved_count:
+                    reserve_waste += vm.memory.reserved_count * self.PAGE_SIZE - vm.ram_capacity
+        with self.lock:
+            top = self.HUGE_PAGE_ORDER
             total_pages = self.total_pages
-            free_pages = sum(1 for allocated in self.pages if not allocated)
-            allocated_pages = [i for i, allocated in enumerate(self.pages) if allocated]
-            
-            # Calculate external fragmentation
-            external_fragmentation = 0
-            if allocated_pages:
-                gaps = [allocated_pages[i+1] - allocated_pages[i] - 1 
-                       for i in range(len(allocated_pages)-1)]
-                external_fragmentation = sum(gaps) / total_pages if gaps else 0
-            
-            # Calculate internal fragmentation
-            internal_fragmentation = 0
-            for vm in vms:
-                pages = sum(1 for p, v in self.page_to_vm.items() if v == vm['id'])
-                allocated_ram = pages * self.PAGE_SIZE
-                internal_fragmentation += (allocated_ram - vm['ram_used']) / total_pages
-            
-            fragmentation_percent = (external_fragmentation + internal_fragmentation) * 100
-            
-            return {
-                'total_pages': total_pages,
-                'free_pages': free_pages,
-                'allocated_pages': len(allocated_pages),
-                'fragmentation': fragmentation_percent
-            }
+            free_pages = self.free_count
+            huge_free = sum(len(buddy.free[top]) for buddy in self.buddies)
+            # Free pages stranded in smaller blocks inside a partly used huge-page
+            # region; a short tail region at the end of a node never forms one
+            stranded = sum(1 << order for buddy in self.buddies for order in range(top)
+                           for start in buddy.free[order] if start < buddy.tail_start())
+            huge_used = sum(1 for order, _ in self.blocks.values() if order == top)
+            base_used = sum(1 << order for order, _ in self.blocks.values() if order < top)
+            metadata_entries = len(self.blocks)
+            reclaim = self.reclaim.metrics(self.clock()) if self.reclaim is not None else None
+            free_by_node = self.free_by_node()
+
+        wasted = stranded * self.PAGE_SIZE + small_waste + reserve_waste
+        return {
+            'total_pages': total_pages,
+            'free_pages': free_pages,
+            'allocated_pages': total_pages - free_pages,
+            'fragmentation': wasted / (total_pages * self.PAGE_SIZE) * 100 if total_pages else 0.0,
+            'metadata_entries': metadata_entries,  # Allocated blocks the host pool tracks
+            'page_classes': {
+                '256M': {'allocated': small_used, 'internal_fragmentation_gb': small_waste},
+                '1G': {'allocated': base_used, 'free': free_pages - (huge_free << top),
+                       'internal_fragmentation_gb': reserve_waste},
+                '16G': {'allocated': huge_used, 'free': huge_free,
+                        'external_fragmentation': stranded / free_pages if free_pages else 0.0},
+            },
+            'overcommit_ratio': self.overcommit_ratio,
+            'reclaim': reclaim,
+            'numa': self.topology.metrics(vms, free_by_node),
+        }
 
 # --- VM CLASS ---
 
 class VM:
     def __init__(self, cpu, ram, storage, bandwidth=1000, gpu=0, 
-                 firewall_enabled=True, isolation_level='STANDARD'):
+                 firewall_enabled=True, isolation_level='STANDARD', flavor='custom',
+                 cpu_overcommit=1.0, gpu_overcommit=1.0):
         self.id = str(uuid.uuid4())
+        self.flavor = flavor  # Catalog flavor name, or 'custom' for user-sized VMs
         self.cpu_capacity = cpu
         self.ram_capacity = ram
         self.storage_capacity = storage
         self.bandwidth_capacity = bandwidth  # Mbps
         self.gpu_capacity = gpu
+        # Cloudlet vCPU (GPU) demand may add up to this multiple of the cores (GPUs); see timeslice.py
+        self.cpu_overcommit = max(1.0, float(cpu_overcommit))
+        self.gpu_overcommit = max(1.0, float(gpu_overcommit))
         self.cpu_used = 0
         self.ram_used = 0
         self.storage_used = 0
@@ -133,40 +308,157 @@ class VM:
         self.lock = threading.Lock()
         self.last_activity = time.time()
         self.cloudlets = set()
-        self.memory_pages: List[int] = []  # Track allocated memory pages
-
-    def can_allocate(self, cpu, ram, storage, bandwidth=0, gpu=0, memory_manager=None):
-        # Only check memory pages if RAM is being requested
-        if memory_manager and ram > 0:
-            pages_needed = (ram + memory_manager.PAGE_SIZE - 1) // memory_manager.PAGE_SIZE
-            free_pages = sum(1 for allocated in memory_manager.pages if not allocated)
-            if free_pages < pages_needed:
+        self.memory = LocalPageAllocator()  # Reserved pages, sub-allocated to cloudlets
+        self.numa_node = None  # Home NUMA node, chosen when memory is reserved
+        # Called as listener(vm, delta, count_delta) after every allocate/deallocate,
+        # where delta is the signed (cpu, ram, storage, bandwidth, gpu) change
+        self.usage_listeners = []
+
+    def to_record(self) -> dict:
+        """Static configuration for the state store; usage is rebuilt from the cloudlets."""
+        return {
+            'id': self.id,
+            'flavor': self.flavor,
+            'cpu': self.cpu_capacity,
+            'ram': self.ram_capacity,
+            'storage': self.storage_capacity,
+            'bandwidth': self.bandwidth_capacity,
+            'gpu': self.gpu_capacity,
+            'firewall_enabled': self.firewall_enabled,
+            'isolation_level': self.isolation_level,
+            'cpu_overcommit': self.cpu_overcommit,
+            'gpu_overcommit': self.gpu_overcommit,
+        }
+
+    def to_dict(self) -> dict:
+        """Current state as served by the metrics and query APIs."""
+        return {
+            'id': self.id,
+            'flavor': self.flavor,
+            'cpu_capacity': self.cpu_capacity,
+            'ram_capacity': self.ram_capacity,
+            'storage_capacity': self.storage_capacity,
+            'bandwidth_capacity': self.bandwidth_capacity,
+            'gpu_capacity': self.gpu_capacity,
+            'cpu_used': self.cpu_used,
+            'ram_used': self.ram_used,
+            'storage_used': self.storage_used,
+            'bandwidth_used': self.bandwidth_used,
+            'gpu_used': self.gpu_used,
+            'cpu_overcommit': self.cpu_overcommit,
+            'gpu_overcommit': self.gpu_overcommit,
+            'status': self.status.name,
+            'last_activity': self.last_activity,
+            'memory_blocks': self.memory_blocks,
+            'numa_node': self.numa_node,
+            "firewall_enabled": self.firewall_enabled,
+            "isolation_level": self.isolation_level,
+        }
+
+    @property
+    def cpu_allocatable(self) -> float:
+        """vCPU demand the VM admits: its cores times the CPU overcommit ratio."""
+        return self.cpu_capacity * self.cpu_overcommit
+
+    @property
+    def gpu_allocatable(self) -> float:
+        return self.gpu_capacity * self.gpu_overcommit
+
+    @property
+    def memory_blocks(self) -> List[List[int]]:
+        """Global [first page, pages] blocks reserved by this VM."""
+        return [[start, count] for start, count in self.memory.blocks]
+
+    @classmethod
+    def from_record(cls, record: dict) -> 'VM':
+        vm = cls(record['cpu'], record['ram'], record['storage'], record['bandwidth'], record['gpu'],
+                 firewall_enabled=record['firewall_enabled'], isolation_level=record['isolation_level'],
+                 flavor=record['flavor'], cpu_overcommit=record.get('cpu_overcommit', 1.0),
+                 gpu_overcommit=record.get('gpu_overcommit', 1.0))
+        vm.id = record['id']
+        return vm
+
+    def _notify_usage(self, cloudlet, sign):
+        delta = (sign * cloudlet.cpu, sign * cloudlet.ram, sign * cloudlet.storage,
+                 sign * cloudlet.bandwidth, sign * cloudlet.gpu)
+        for listener in self.usage_listeners:
+            listener(self, delta, sign)
+
+    def reserve_memory(self, memory_manager) -> bool:
+        """Take the VM's RAM from the global pool (on joining the fleet or the warm pool)."""
+        topology = memory_manager.topology
+        node = memory_manager.choose_node(self.ram_capacity, self.cpu_capacity)
+        blocks = memory_manager.allocate_blocks(self.ram_capacity, self.id, node=node)
+        if not blocks:
+            return False
+        topology.bind(self.id, self.cpu_capacity, node)
+        with self.lock:
+            self.numa_node = node
+            self.memory.page_size = memory_manager.PAGE_SIZE
+            self.memory.home = topology.nodes[node].page_range
+            self.memory.reserve(blocks)
+        return True
+
+    def release_memory(self, memory_manager) -> None:
+        """Give every reserved block back to the global pool."""
+        with self.lock:
+            self.memory.clear()
+            self.numa_node = None
+        # Freed by owner, as consolidation may have renumbered the blocks
+        memory_manager.release_owner(self.id)
+        memory_manager.topology.unbind(self.id)
+
+    def resize_memory(self, ram, memory_manager) -> bool:
+        """
+        Grow or shrink the RAM capacity and the page reservation with it. This is
+        the only path after provisioning that goes back to the global pool.
+        """
+        with self.lock:
+            if ram < self.ram_used:
                 return False
+            delta = self.memory.pages_for(ram) - self.memory.reserved_count
+            if delta > 0:
+                blocks = memory_manager.allocate_blocks(delta * memory_manager.PAGE_SIZE, self.id,
+                                                        node=self.numa_node)
+                if not blocks:
+                    return False
+                self.memory.reserve(blocks)
+            elif delta < 0:
+                pages = self.memory.shrink(-delta)
+                if pages is None:
+                    return False
+                memory_manager.deallocate_pages(pages)
+                # Freeing single pages split the blocks they came from
+                self.memory.blocks = memory_manager.blocks_of(self.id)
+            self.ram_capacity = ram
+            return True
+
+    def can_allocate(self, cpu, ram, storage, bandwidth=0, gpu=0):
+        # RAM comes out of the VM's own page reservation
+        if ram > 0 and not self.memory.fits(ram):
+            return False
                 
         # Check if this is a GPU-only cloudlet (only GPU requested)
         is_gpu_only = (cpu == 0 and ram == 0 and storage == 0 and bandwidth == 0 and gpu > 0)
         
         # For GPU-only cloudlets, only check GPU capacity
         if is_gpu_only:
-            return self.gpu_capacity - self.gpu_used >= gpu
+            return self.gpu_allocatable - self.gpu_used >= gpu
             
-        # For regular cloudlets, check all resources
+        # For regular cloudlets, check all resources (CPU and GPU up to the overcommit ratio)
         return (
-            self.cpu_capacity - self.cpu_used >= cpu and
+            self.cpu_allocatable - self.cpu_used >= cpu and
             self.ram_capacity - self.ram_used >= ram and
             self.storage_capacity - self.storage_used >= storage and
             self.bandwidth_capacity - self.bandwidth_used >= bandwidth and
-            self.gpu_capacity - self.gpu_used >= gpu
+            self.gpu_allocatable - self.gpu_used >= gpu
         )
 
-    def allocate(self, cloudlet, memory_manager=None):
+    def allocate(self, cloudlet):
         with self.lock:
-            if self.can_allocate(cloudlet.cpu, cloudlet.ram, cloudlet.storage, cloudlet.bandwidth, cloudlet.gpu, memory_manager):
-                if memory_manager and cloudlet.ram > 0:
-                    pages = memory_manager.allocate_pages(cloudlet.ram, self.id)
-                    if not pages:
-                        return False
-                    self.memory_pages.extend(pages)
+            if self.can_allocate(cloudlet.cpu, cloudlet.ram, cloudlet.storage, cloudlet.bandwidth, cloudlet.gpu):
+                if self.memory.allocate(cloudlet.id, cloudlet.ram) is None:
+                    return False
                 self.cpu_used += cloudlet.cpu
                 self.ram_used += cloudlet.ram
                 self.storage_used += cloudlet.storage
@@ -175,17 +467,14 @@ class VM:
                 self.cloudlets.add(cloudlet.id)
                 self.status = VMStatus.RUNNING
                 self.last_activity = time.time()
+                self._notify_usage(cloudlet, 1)
                 return True
             return False
 
-    def deallocate(self, cloudlet, memory_manager=None):
+    def deallocate(self, cloudlet):
         with self.lock:
             if cloudlet.id in self.cloudlets:
-                if memory_manager:
-                    pages_needed = (cloudlet.ram + memory_manager.PAGE_SIZE - 1) // memory_manager.PAGE_SIZE
-                    pages_to_free = self.memory_pages[-pages_needed:] if self.memory_pages else []
-                    memory_manager.deallocate_pages(pages_to_free)
-                    self.memory_pages = self.memory_pages[:-pages_needed] if self.memory_pages else []
+                self.memory.release(cloudlet.id)
                 self.cpu_used -= cloudlet.cpu
                 self.ram_used -= cloudlet.ram
                 self.storage_used -= cloudlet.storage
@@ -195,11 +484,13 @@ class VM:
                 if not self.cloudlets:
                     self.status = VMStatus.IDLE
                 self.last_activity = time.time()
+                self._notify_usage(cloudlet, -1)
 
 # --- CLOUDLET CLASS ---
 
 class Cloudlet:
-    def __init__(self, cpu, ram, storage, sla_priority, deadline, name=None, bandwidth=100, gpu=0, execution_time=5.0):
+    def __init__(self, cpu, ram, storage, sla_priority, deadline, name=None, bandwidth=100, gpu=0, execution_time=5.0,
+                 tenant=DEFAULT_TENANT):
         self.id = str(uuid.uuid4())
         self.name = name or f"Cloudlet-{self.id[:8]}"
         self.cpu = cpu
@@ -208,6 +499,7 @@ class Cloudlet:
         self.bandwidth = bandwidth  # Mbps
         self.gpu = gpu
         self.sla_priority = int(sla_priority)
+        self.tenant = tenant  # Owner the fair-share scheduler accounts its usage to
         self.deadline = time.time() + deadline
         self.execution_time = float(execution_time)  # in seconds
         self.status = CloudletStatus.WAITING
@@ -216,20 +508,184 @@ class Cloudlet:
         self.start_time = None
         self.completion_time = None
         self._completion_timer = None
+        self.last_migration_time = None  # For the consolidation anti-thrash cooldown
+        self.migrations = 0
+        self.stall_time = 0.0  # Seconds stalled on swap reads, remote NUMA memory and time slicing; extends the runtime
+        self.slice_time = 0.0  # Part of stall_time lost to time slicing on an overcommitted VM
+        self.share = 1.0  # Current rate as a fraction of full speed (below 1 while time-sliced)
+        self.share_since = None  # When the current share took effect (None: since start_time)
+        self.executed = 0.0  # Seconds run before the last preemption
+        self.preemptions = 0
+        self.estimated_time = None  # Learned runtime estimate it was last queued or started with (see runtime.py)
+        self.predicted_start = None  # When admission control expected it to start (None: unknown)
+        self.admission = None  # 'accepted', or 'infeasible' if admitted though predicted to miss its deadline
+
+    def remaining_execution_time(self, now=None):
+        """Seconds of execution left, or None for cloudlets without a fixed runtime."""
+        if self.execution_time <= 0:
+            return None
+        left = self.execution_time + self.stall_time - self.executed
+        if self.start_time is None:
+            return max(0.0, left)
+        # Time before share_since is booked in stall_time; since then the cloudlet progresses at share
+        since = self.share_since or self.start_time
+        left -= (since - self.start_time) + self.share * ((now or time.time()) - since)
+        return max(0.0, left / self.share)
+
+    def set_share(self, share, now):
+        """Switch to a new time-slice rate, booking the runtime lost at the old one since it took effect."""
+        if self.start_time is not None and self.share < 1.0:
+            lost = (now - (self.share_since or self.start_time)) * (1.0 - self.share)
+            self.stall_time += lost
+            self.slice_time += lost
+        self.share = share
+        self.share_since = now
+
+    def to_record(self) -> dict:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'cpu': self.cpu,
+            'ram': self.ram,
+            'storage': self.storage,
+            'bandwidth': self.bandwidth,
+            'gpu': self.gpu,
+            'sla_priority': self.sla_priority,
+            'tenant': self.tenant,
+            'deadline': self.deadline,
+            'execution_time': self.execution_time,
+            'status': self.status.name,
+            'vm_id': self.vm_id,
+            'creation_time': self.creation_time,
+            'start_time': self.start_time,
+            'completion_time': self.completion_time,
+            'last_migration_time': self.last_migration_time,
+            'migrations': self.migrations,
+            'stall_time': self.stall_time,
+            'slice_time': self.slice_time,
+            'executed': self.executed,
+            'preemptions': self.preemptions,
+            'predicted_start': self.predicted_start,
+            'admission': self.admission,
+        }
+
+    def to_dict(self, now=None) -> dict:
+        """Current state as served by the metrics and query APIs."""
+        now = now or time.time()
+        return {
+            'id': self.id,
+            'name': self.name,
+            'cpu': self.cpu,
+            'ram': self.ram,
+            'storage': self.storage,
+            'bandwidth': self.bandwidth,
+            'gpu': self.gpu,
+            'sla_priority': self.sla_priority,
+            'tenant': self.tenant,
+            'deadline': self.deadline,
+            'status': self.status.name,
+            'vm_id': self.vm_id,
+            'creation_time': self.creation_time,
+            'start_time': self.start_time,
+            'completion_time': self.completion_time,
+            'execution_time': self.execution_time,
+            'stall_time': self.stall_time,
+            'slice_time': self.slice_time,
+            'share': self.share,
+            'estimated_time': self.estimated_time,
+            'predicted_start': self.predicted_start,
+            'admission': self.admission,
+            'preemptions': self.preemptions,
+            'time_critical': ((self.deadline - now) < 10) if self.status in [CloudletStatus.WAITING, CloudletStatus.PENDING, CloudletStatus.ACTIVE] else False,
+        }
+
+    @classmethod
+    def from_record(cls, record: dict) -> 'Cloudlet':
+        cloudlet = cls(record['cpu'], record['ram'], record['storage'], record['sla_priority'], 0,
+                       name=record['name'], bandwidth=record['bandwidth'], gpu=record['gpu'],
+                       execution_time=record['execution_time'],
+                       tenant=record.get('tenant', DEFAULT_TENANT))  # Absent from logs written before tenants
+        for key in ('id', 'deadline', 'vm_id', 'creation_time', 'start_time', 'completion_time',
+                    'last_migration_time', 'migrations'):
+            setattr(cloudlet, key, record[key])
+        cloudlet.stall_time = record.get('stall_time', 0.0)  # Absent from logs written before overcommit
+        cloudlet.executed = record.get('executed', 0.0)  # ...and these before preemption
+        cloudlet.preemptions = record.get('preemptions', 0)
+        cloudlet.slice_time = record.get('slice_time', 0.0)
+        cloudlet.predicted_start = record.get('predicted_start')  # ...and these before admission control
+        cloudlet.admission = record.get('admission')
+        cloudlet.status = CloudletStatus[record['status']]
+        return cloudlet
 
 # --- RESOURCE MANAGER & SCHEDULER ---
 
+class PendingQueue:
+    """
+    Cloudlets waiting for a VM, in the order they are offered one. Keyed by
+    cloudlet ID, so the fair-share, preemption and deadline paths take any
+    cloudlet out in O(1) rather than scanning a deque. Supports the deque
+    operations the scheduler uses; appending a queued cloudlet moves it.
+    """
+
+    def __init__(self, cloudlets=()):
+        self.items = OrderedDict((cl.id, cl) for cl in cloudlets)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items.values())
+
+    def __contains__(self, cloudlet):
+        return cloudlet.id in self.items
+
+    def __getitem__(self, index):
+        if not self.items:
+            raise IndexError("pending queue is empty")
+        if index == 0:
+            return next(iter(self.items.values()))
+        if index == -1:
+            return next(reversed(self.items.values()))
+        return list(self.items.values())[index]
+
+    def append(self, cloudlet):
+        self.items[cloudlet.id] = cloudlet
+        self.items.move_to_end(cloudlet.id)
+
+    def appendleft(self, cloudlet):
+        self.items[cloudlet.id] = cloudlet
+        self.items.move_to_end(cloudlet.id, last=False)
+
+    def extendleft(self, cloudlets):
+        for cloudlet in cloudlets:
+            self.appendleft(cloudlet)
+
+    def popleft(self):
+        if not self.items:
+            raise IndexError("pending queue is empty")
+        return self.items.popitem(last=False)[1]
+
+    def remove(self, cloudlet):
+        if self.items.pop(cloudlet.id, None) is None:
+            raise ValueError(f"{cloudlet.name} is not pending")
+
+    def discard(self, cloudlet):
+        self.items.pop(cloudlet.id, None)
+
+
 class ResourceManager:
-    def __init__(self):
+    def __init__(self, start_monitor=True, state_store=None, total_memory=1024, memory_overcommit=1.0,
+                 numa_nodes=1, cpu_overcommit=1.0, gpu_overcommit=1.0):
         # Auto-scaling configuration
         self.SCALING_UP_THRESHOLD = 0.8  # Scale up when utilization exceeds 80%
         self.SCALING_DOWN_THRESHOLD = 0.2  # Scale down when utilization is below 20%
         self.IDLE_TIME_THRESHOLD = 40  # 40 seconds in seconds
-        self.SCALING_COOLDOWN = 10  # 10 seconds cooldown between scaling operations
         
         # Base cooldown in seconds
         self.BASE_COOLDOWN = 10
         self.last_scaling_time = 0
+        self.last_adaptive_cooldown = self.BASE_COOLDOWN
+        self.MAX_VMS_PER_SCALE = 5  # Upper bound on VMs provisioned by one scaling action
 
         # Load balancing algorithm (default: round_robin)
         self.load_balancing_algorithm = 'round_robin'
@@ -237,8 +693,25 @@ class ResourceManager:
             'round_robin',
             'least_loaded',
             'weighted_round_robin',
-            'best_fit'
+            'best_fit',
+            'dominant_fit',
+            'cosine_alignment',
+            'weighted_slack'
         ]
+        # Vectorized VM scoring; best_fit and least_loaded map onto its policies
+        self.placement_engine = PlacementEngine()
+        # Running fleet capacity/usage totals, overall and per flavor and isolation level
+        self.accounting = FleetAccounting()
+        self.AUDIT_INTERVAL = 30  # Seconds between accounting consistency audits
+        self.last_audit_time = time.time()
+
+        # 'greedy' places cloudlets one at a time in arrival order; 'batch' packs the
+        # whole pending set at once and may open right-sized VMs on the monitor tick
+        self.placement_mode = 'greedy'
+        self.available_placement_modes = ['greedy', 'batch']
+        self.batch_placer = BatchPlacer()
+        # Sizes scale-ups from the shape of pending demand plus forecast headroom
+        self.sizing_planner = SizingPlanner(self.batch_placer)
 
         # Per-resource scale-up/down thresholds (%)
         self.THRESHOLDS = {
@@ -249,18 +722,91 @@ class ResourceManager:
             'gpu': {'up': 0.70, 'down': 0.25}
         }
 
+        # Every scale decision (reactive, predictive and queue-driven) goes through here
+        self.scaling_controller = ScalingController(
+            self.THRESHOLDS,
+            min_vms=0,
+            max_vms=20,
+            base_cooldown=self.BASE_COOLDOWN,
+            max_step=self.MAX_VMS_PER_SCALE
+        )
+
         self.vms = []
         self.cloudlets = []
-        self.pending_queue = deque()
+        self.pending_queue = PendingQueue()
+        # Live rows for the query API, kept current by _record()
+        self.vm_index = RowIndex(('flavor', 'isolation_level'))
+        self.cloudlet_index = RowIndex(('status', 'vm_id', 'sla_priority', 'tenant'))
         self.lock = threading.RLock()
-        self.memory_manager = MemoryManager(total_memory=1024)
+        # memory_overcommit > 1 lets VMs reserve that multiple of physical memory (see reclaim.py)
+        # numa_nodes > 1 splits the host into NUMA nodes that VMs are homed on (see numa.py)
+        self.memory_manager = MemoryManager(total_memory=total_memory, overcommit_ratio=memory_overcommit,
+                                            numa_nodes=numa_nodes)
+        self.cpu_limit = None  # vCPUs the VMs on this host may claim in total (None: unbounded)
+        # Overcommit ratios given to VMs provisioned from the flavor catalog; demand
+        # above a VM's cores (GPUs) is time-sliced and stretches runtimes (see timeslice.py)
+        self.cpu_overcommit = cpu_overcommit
+        self.gpu_overcommit = gpu_overcommit
+        self.time_slicer = TimeSlicer()
+        # Idle VMs kept provisioned per flavor (pages reserved) so scale-ups are instant
+        self.WARM_POOL_TARGETS = {'medium': 2, 'gpu-medium': 1}
+        self.warm_pool = WarmPool(self.memory_manager, self._new_vm, self.WARM_POOL_TARGETS)
         self.monitor_thread = threading.Thread(target=self._monitor, daemon=True)
         self.metrics_callback = None  # Will be set by Flask app if present
+        self.cloudlet_listeners = []  # Called with each cloudlet whose state change _record() logs
         self.last_scaling_time = 0  # Track last scaling operation
         self.last_consolidation_time = 0
-        self.monitor_thread.start()
+        # Plans migrations that empty whole VMs within a per-cycle budget
+        self.consolidation_planner = ConsolidationPlanner()
+        self.consolidation_stats = {'cycles': 0, 'migrations': 0, 'rollbacks': 0,
+                                    'vms_released': 0, 'pages_moved': 0, 'last_plan': None}
+        # Critical cloudlets that fit nowhere suspend lower-priority running ones
+        self.preemption_enabled = True
+        self.PREEMPT_PRIORITY = 3  # SLA priority (after escalation) that may preempt
+        self.victim_index = VictimIndex()
+        self.preemption_planner = PreemptionPlanner()
+        self.preemption_stats = {'preemptions': 0, 'victims': 0, 'promoted': 0, 'failed': 0, 'srpt': 0}
+        self.deadline_stats = {}  # SLA priority -> start deadlines met and missed
+
+        # Pending queue order: 'fifo' is arrival order; 'sjf' and 'srpt' put cloudlets short
+        # on deadline slack first, then the shortest learned runtime estimate (remaining
+        # runtime for 'srpt', which also preempts longer running work); see runtime.py.
+        # 'drf' shares the fleet between tenants by Dominant Resource Fairness (fairshare.py)
+        self.queue_policy = 'fifo'
+        self.available_queue_policies = ['fifo', 'sjf', 'srpt', 'drf']
+        self.runtime_estimator = RuntimeEstimator()
+        self.URGENT_SLACK = 5  # Seconds of deadline slack below which a cloudlet is ordered by slack
+        self.SRPT_MARGIN = 2.0  # SRPT only preempts work with this many times more estimated runtime left
+        self._estimates_version = -1
+
+        # Admission control (see admission.py): 'flag' marks new cloudlets predicted to miss
+        # their deadline behind the backlog and 'reject' turns them away (422); max_pending
+        # and pending_ram_budget (GB) bound the pending queue with 429 backpressure
+        self.admission_mode = 'flag'
+        self.available_admission_modes = list(ADMISSION_MODES)
+        self.max_pending = None  # None: unbounded
+        self.pending_ram_budget = None
+        self.admission = AdmissionController()
+        # Per-tenant usage and dominant shares, kept current by _record(); weights and
+        # quotas only take effect under the 'drf' queue policy
+        self.fair_share = FairShareScheduler()
         self.system_logs = deque(maxlen=100)
 
+        # Durable state (see state_store.py); None keeps everything in memory only
+        self.state_store = state_store
+        self.SNAPSHOT_INTERVAL = 60  # Seconds between snapshots...
+        self.SNAPSHOT_RECORDS = 50000  # ...or sooner once this many transitions are logged
+        self.last_snapshot_time = time.time()
+        self._recovering = False
+        self.state_version = 0  # Bumped on every state transition; keys cached metrics snapshots
+        if self.state_store is not None:
+            self.recover()
+
+        # Benchmarks and tools drive the scheduler directly without the background loop
+        if start_monitor:
+            self.monitor_thread.start()
+            self.warm_pool.start()
+
     def set_metrics_callback(self, cb):
         self.metrics_callback = cb
         
@@ -322,69 +868,487 @@ class ResourceManager:
                 })
             return cloudlets
 
-    def add_vm(self, vm):
+    def query_cloudlets(self, params, positions=False):
+        """One page of cloudlets matching the query params (see query.py); raises QueryError."""
+        with self.lock:
+            return run_query(self.cloudlet_index, CLOUDLET_QUERY, params, positions)
+
+    def query_vms(self, params, positions=False):
+        """One page of VMs matching the query params (see query.py); raises QueryError."""
+        with self.lock:
+            return run_query(self.vm_index, VM_QUERY, params, positions)
+
+    def _cpu_available(self, cpu):
+        return self.cpu_limit is None or self.accounting.total.capacity['cpu'] + cpu <= self.cpu_limit
+
+    def add_vm(self, vm, allocate=True):
         with self.lock:
-            pages = self.memory_manager.allocate_pages(vm.ram_capacity, vm.id)
-            if not pages:
+            if not self._cpu_available(vm.cpu_capacity):
+                print(f"Failed to add VM {vm.id}: Host CPU capacity exhausted")
+                return False
+            # VMs claimed from the warm pool already hold their pages
+            if not vm.memory.reserved_count and not vm.reserve_memory(self.memory_manager):
                 print(f"Failed to add VM {vm.id}: Insufficient memory pages")
                 return False
-            vm.memory_pages = pages
             self.vms.append(vm)
-            self._allocate_cloudlets()
-            print(f"Added VM {vm.id} with {len(pages)} memory pages")
+            self.placement_engine.add_vm(vm)
+            self.accounting.add_vm(vm)
+            vm.usage_listeners.append(self._reslice)
+            self._record('vm', vm)
+            if allocate:
+                self._allocate_cloudlets()
+            print(f"Added VM {vm.id} with {vm.memory.reserved_count} memory pages")
             return True
 
-    def submit_cloudlet(self, cloudlet):
+    def _new_vm(self, flavor_name):
+        """Build an unregistered VM of a catalog flavor (used by the warm pool)."""
+        flavor = get_flavor(flavor_name)
+        if flavor is None:
+            return None
+        return VM(cpu=flavor.cpu, ram=flavor.ram, storage=flavor.storage,
+                  bandwidth=flavor.bandwidth, gpu=flavor.gpu, flavor=flavor.name,
+                  cpu_overcommit=self.cpu_overcommit, gpu_overcommit=self.gpu_overcommit)
+
+    def _provision_vm(self, flavor):
+        """
+        Add a VM of the given flavor to the fleet, claiming a warm one if the
+        pool has it. Returns (vm, warm) or (None, False) when memory or host CPU is short.
+        """
+        if not self._cpu_available(flavor.cpu):
+            return None, False
+        # A warm VM of a larger flavor beats waiting for a cold one, if the host has the CPU for it
+        larger = sorted((f for f in FLAVOR_CATALOG if f.name != flavor.name
+                         and all(f.capacity() >= flavor.capacity()) and self._cpu_available(f.cpu)),
+                        key=lambda f: (f.ram, f.cpu))
+        vm = self.warm_pool.claim(flavor.name, [f.name for f in larger])
+        if vm is not None:
+            vm.last_activity = time.time()
+            if self.add_vm(vm, allocate=False):
+                return vm, True
+            vm.release_memory(self.memory_manager)  # Not in the fleet, so nothing else would free its pages
+            return None, False
+        vm = self._new_vm(flavor.name)
+        pages_needed = (vm.ram_capacity + self.memory_manager.PAGE_SIZE - 1) // self.memory_manager.PAGE_SIZE
+        if self.memory_manager.free_count < pages_needed:
+            # Real demand outranks idle warm capacity
+            self.warm_pool.release(pages_needed)
+        if self.add_vm(vm, allocate=False):
+            return vm, False
+        return None, False
+
+    def _unregister_vm(self, vm):
+        """Remove a VM from the fleet and the placement engine (memory is freed by the caller)."""
+        self.vms.remove(vm)
+        self.placement_engine.remove_vm(vm)
+        self.accounting.remove_vm(vm)
+        if self._reslice in vm.usage_listeners:
+            vm.usage_listeners.remove(self._reslice)
+        self.time_slicer.forget(vm.id)
+        self._record('vm_removed', vm)
+
+    # --- DURABLE STATE ---
+
+    def _record(self, kind, obj):
+        """Log a state transition to the state store (callers hold self.lock)."""
+        self.state_version += 1
+        if kind == 'cloudlet':
+            self.cloudlet_index.update(obj)
+            self.victim_index.update(obj)
+            self.admission.backlog.update(obj)
+            self.fair_share.update(obj)
+            for listener in self.cloudlet_listeners:
+                listener(obj)
+        elif kind == 'cloudlet_removed':
+            self.cloudlet_index.remove(obj.id)
+            self.victim_index.remove(obj.id)
+            self.admission.backlog.remove(obj.id)
+            self.fair_share.remove(obj.id)
+        elif kind == 'vm':
+            self.vm_index.update(obj)
+        elif kind == 'vm_removed':
+            self.vm_index.remove(obj.id)
+        if self.state_store is None or self._recovering:
+            return
+        payload = obj.to_record() if kind in ('vm', 'cloudlet') else {'id': obj.id}
+        self.state_store.append(kind, payload)
+
+    def snapshot(self):
+        """Write a compact snapshot of all VMs and cloudlets and truncate the log."""
+        if self.state_store is None:
+            return 0
         with self.lock:
+            # Transitions are only logged under self.lock, so this state matches seq exactly
+            seq = self.state_store.seq
+            state = {
+                'vms': {vm.id: vm.to_record() for vm in self.vms},
+                'cloudlets': {cl.id: cl.to_record() for cl in self.cloudlets},
+            }
+        size = self.state_store.snapshot(state, seq)
+        self.last_snapshot_time = time.time()
+        self.log(f"[STATE] Snapshot at seq {seq}: {len(state['vms'])} VMs, "
+                 f"{len(state['cloudlets'])} cloudlets, {size / 1024:.1f} KiB")
+        return size
+
+    def _maybe_snapshot(self):
+        store = self.state_store
+        if store is None or store.records_since_snapshot() == 0:
+            return
+        if (time.time() - self.last_snapshot_time > self.SNAPSHOT_INTERVAL
+                or store.records_since_snapshot() >= self.SNAPSHOT_RECORDS):
+            self.snapshot()
+
+    def recover(self):
+        """
+        Rebuild VMs, cloudlets and the pending queue from the state store.
+
+        Memory pages are re-reserved for every VM and running cloudlet. Running
+        cloudlets resume on their VM with the runtime they had left when the last
+        transition was logged (time the manager was down does not count as
+        execution); those whose VM is gone go back to the pending queue.
+        """
+        state, last_ts = self.state_store.load()
+        if not state['vms'] and not state['cloudlets']:
+            return
+        downtime = time.time() - last_ts if last_ts else 0.0
+        resumed = requeued = 0
+        changed = []  # Cloudlets whose recovered state differs from the log
+        with self.lock:
+            self._recovering = True
+            try:
+                for record in state['vms'].values():
+                    self.add_vm(VM.from_record(record), allocate=False)
+                vms_by_id = {vm.id: vm for vm in self.vms}
+
+                records = sorted(state['cloudlets'].values(), key=lambda r: r['creation_time'])
+                for record in records:
+                    cloudlet = Cloudlet.from_record(record)
+                    self.cloudlets.append(cloudlet)
+                    if cloudlet.status == CloudletStatus.COMPLETED and cloudlet.start_time and cloudlet.completion_time:
+                        # The runtime history outlives restarts
+                        self.runtime_estimator.observe(
+                            cloudlet, cloudlet.executed + cloudlet.completion_time - cloudlet.start_time)
+                    self._record('cloudlet', cloudlet)  # Indexes it; nothing is logged while recovering
+                    if cloudlet.status == CloudletStatus.ACTIVE:
+                        vm = vms_by_id.get(cloudlet.vm_id)
+                        if cloudlet.start_time is not None:
+                            cloudlet.start_time += downtime
+                        changed.append(cloudlet)
+                        if vm is not None and vm.allocate(cloudlet):
+                            self._schedule_completion(cloudlet)
+                            self._touch_cloudlet(cloudlet, vm)
+                            resumed += 1
+                            continue
+                        cloudlet.status = CloudletStatus.WAITING
+                        cloudlet.vm_id = None
+                        cloudlet.start_time = None
+                        requeued += 1
+                    if cloudlet.status in [CloudletStatus.WAITING, CloudletStatus.PENDING]:
+                        self.pending_queue.append(cloudlet)
+            finally:
+                self._recovering = False
+            # Shifted start times and requeues must survive another restart
+            for cloudlet in changed:
+                self._record('cloudlet', cloudlet)
+        stats = self.state_store.stats
+        self.log(f"[RECOVERY] Restored {len(self.vms)} VMs and {len(self.cloudlets)} cloudlets "
+                 f"({resumed} resumed, {requeued} requeued, {len(self.pending_queue)} pending) "
+                 f"in {stats['last_recovery_seconds']:.2f}s, {stats['last_recovery_replayed']} records replayed")
+
+    def submit_cloudlet(self, cloudlet, vm_id=None):
+        """
+        Queue a cloudlet; vm_id starts it on that VM right away if it still fits
+        (cluster placement). Raises AdmissionError if admission control turns it away.
+        """
+        with self.lock:
+            cloudlet.estimated_time = self.runtime_estimator.estimate(cloudlet)
+            self._admit(cloudlet, time.time())
             self.cloudlets.append(cloudlet)
-            self.pending_queue.append(cloudlet)
             cloudlet.status = CloudletStatus.WAITING
-            # Immediately try to allocate after submission
-            self._allocate_cloudlets()
+            self._record('cloudlet', cloudlet)
+            vm = next((v for v in self.vms if v.id == vm_id), None) if vm_id else None
+            if (vm is not None and not (vm.isolation_level == 'STRICT' and vm.cloudlets)
+                    and vm.allocate(cloudlet)):
+                self._start_cloudlet(cloudlet, vm)
+                return
+            self.pending_queue.append(cloudlet)
+            # Immediately try to allocate after submission; batch mode lets bursts
+            # accumulate and packs them together on the next monitor tick
+            if self.placement_mode != 'batch':
+                self._allocate_cloudlets()
+
+    def _admit(self, cloudlet, now):
+        """Apply backpressure and deadline feasibility to a new cloudlet (callers hold self.lock)."""
+        try:
+            self.admission.throttle(cloudlet, len(self.pending_queue), self.max_pending,
+                                    self.pending_ram_budget, now)
+            if self.admission_mode != 'off':
+                self.admission.admit(cloudlet, self._predict_wait(cloudlet, now), cloudlet.estimated_time,
+                                     self.admission_mode, now)
+        except AdmissionError as e:
+            self.log(f"[ADMISSION] {cloudlet.name} turned away ({e.status}): {e}")
+            raise
+        if cloudlet.admission == 'infeasible':
+            self.log(f"[ADMISSION] {cloudlet.name} flagged: predicted to start at "
+                     f"+{cloudlet.predicted_start - now:.1f}s and miss its deadline")
+
+    def _predict_wait(self, cloudlet, now):
+        """Seconds the cloudlet should wait for a VM behind the running work and the queue ahead of it."""
+        if not self.pending_queue and self.placement_engine.candidates(cloudlet):
+            return 0.0
+        admission = self.admission
+        estimates = self.runtime_estimator.version
+        fifo = self.queue_policy == 'fifo'
+        # Under FIFO the last replay still holds if the only transition since was its
+        # cloudlet joining the queue, which is the one _record() after this prediction
+        replay = admission.cached((self.state_version, estimates)) if fifo else None
+        if replay is None:
+            free, strict, busy, rows = self.placement_engine.snapshot()
+            remaining = self.runtime_estimator.remaining
+            running = []
+            for vm in self.vms:
+                row = rows.get(vm.id)
+                for cloudlet_id in (vm.cloudlets if row is not None else ()):
+                    other = self.cloudlet_index.get(cloudlet_id)
+                    if other is not None:
+                        left = remaining(other, other.estimated_time, now)
+                        running.append((left / other.share if left is not None else None, row,
+                                        demand_vector(other)))
+            ahead = list(self.pending_queue)
+            if self.queue_policy == 'drf':
+                # Other tenants may go first or after; its own tenant's queue gives a lower bound
+                ahead = [cl for cl in ahead if cl.tenant == cloudlet.tenant]
+            elif not fifo:
+                # It will be ordered in among the queue rather than join the back
+                key = self._queue_key(cloudlet, now)
+                ahead = sorted((cl for cl in ahead if self._queue_key(cl, now) <= key),
+                               key=lambda cl: self._queue_key(cl, now))
+            ahead = [(remaining(cl, cl.estimated_time, now), cl) for cl in ahead]
+            replay = admission.replay(free, strict, busy, running, ahead, now)
+        return admission.predict_wait(cloudlet, replay, cloudlet.estimated_time, now,
+                                      keep=(self.state_version + 1, estimates) if fifo else None)
 
     def _monitor(self):
         while True:
             self._attempt_vm_consolidation()
-            self._allocate_cloudlets()
+            self._allocate_cloudlets(provision=True)
             self._scale_vms()
             self._check_deadlines()
+            self._touch_working_sets()
             if time.time() - self.last_consolidation_time > 30:  # Consolidate every 30 seconds
-                self.memory_manager.consolidate()
+                with self.lock:
+                    # Under the scheduler lock so no placement sees a half-renumbered reservation
+                    moved = self.memory_manager.consolidate()
+                    for vm in self.vms:
+                        with vm.lock:
+                            vm.memory.remap(moved)
+                    self.state_version += 1  # Pages were renumbered
                 self.last_consolidation_time = time.time()
+            if time.time() - self.last_audit_time > self.AUDIT_INTERVAL:
+                self.audit_accounting()
             if self.metrics_callback:
                 self.metrics_callback()
+            self._maybe_snapshot()
             time.sleep(1)
 
-    def _allocate_cloudlets(self):
+    def _allocate_cloudlets(self, provision=False):
+        """
+        Place pending cloudlets. In batch mode, provision=True also lets the
+        batch placer open new VMs sized to the pending set.
+        """
         with self.lock:
+            if self.placement_mode == 'batch':
+                self._allocate_cloudlets_batch(provision)
+                return
+
+            if self.queue_policy == 'drf':
+                self._allocate_fair()
+                return
+            if self.queue_policy != 'fifo':
+                self._order_queue()
             # Process pending queue first
             while self.pending_queue:
                 cloudlet = self.pending_queue[0]
+                if cloudlet.status not in QUEUED_STATES:
+                    self.pending_queue.popleft()  # Failed or deleted while queued
+                    continue
                 vm = self._find_vm_for_cloudlet(cloudlet)
                 if not vm:
                     break  # No suitable VM found
                 
-                if vm.allocate(cloudlet, self.memory_manager):
-                    cloudlet.status = CloudletStatus.ACTIVE
-                    cloudlet.vm_id = vm.id
-                    cloudlet.start_time = time.time()
+                if vm.allocate(cloudlet):
                     self.pending_queue.popleft()
-                    
-                    # Start a timer for automatic completion
-                    if cloudlet.execution_time > 0:
-                        cloudlet._completion_timer = threading.Timer(
-                            cloudlet.execution_time,
-                            self.complete_cloudlet,
-                            args=(cloudlet.id,)
-                        )
-                        cloudlet._completion_timer.daemon = True
-                        cloudlet._completion_timer.start()
-                        self.log(f" [STARTED] {cloudlet.name} on VM {vm.id} (will complete in {cloudlet.execution_time:.1f}s)")
-                    else:
-                        self.log(f" [ALLOCATED] {cloudlet.name} to VM {vm.id}")
+                    self._start_cloudlet(cloudlet, vm)
                 else:
                     break  # Couldn't allocate, will try again later
 
+    def _allocate_fair(self):
+        """Start waiting cloudlets tenant by tenant, lowest weighted dominant share first (callers hold self.lock)."""
+        self.fair_share.set_capacity(self.accounting.totals()[0])
+
+        def start(cloudlet):
+            if cloudlet.status not in QUEUED_STATES:
+                return False
+            vm = self._find_vm_for_cloudlet(cloudlet)
+            if vm is None or not vm.allocate(cloudlet):
+                return False
+            self.pending_queue.remove(cloudlet)
+            self._start_cloudlet(cloudlet, vm)
+            return True
+
+        self.fair_share.schedule(start)
+
+    def set_tenant(self, tenant, weight=None, quota=None):
+        """Set a tenant's fair-share weight and/or per-resource quota; raises ValueError on bad values."""
+        with self.lock:
+            settings = self.fair_share.configure(tenant, weight, quota)
+            if self.queue_policy == 'drf':
+                self._allocate_cloudlets()  # A raised quota or weight may let its work start now
+            return settings
+
+    def tenant_usage(self):
+        """Per-tenant usage, dominant shares and settings."""
+        with self.lock:
+            self.fair_share.set_capacity(self.accounting.totals()[0])
+            return self.fair_share.metrics()
+
+    def _order_queue(self):
+        """Sort the pending queue for the SJF and SRPT policies (the sort is stable, so ties stay FIFO)."""
+        estimator = self.runtime_estimator
+        if estimator.version != self._estimates_version:
+            # The estimator learned from a completion since the queue was last ordered
+            for cloudlet in self.pending_queue:
+                cloudlet.estimated_time = estimator.estimate(cloudlet)
+            self._estimates_version = estimator.version
+        now = time.time()
+        self.pending_queue = PendingQueue(sorted(self.pending_queue, key=lambda cl: self._queue_key(cl, now)))
+
+    def _queue_key(self, cloudlet, now):
+        """
+        Cloudlets that can only just finish by their deadline (or already cannot)
+        go first, least slack first; the rest shortest estimated runtime first.
+        """
+        left = cloudlet.estimated_time
+        if left is not None and self.queue_policy == 'srpt':
+            left = max(0.0, left - cloudlet.executed)
+        slack = cloudlet.deadline - now - (left or 0.0)
+        if slack < self.URGENT_SLACK:
+            return (0, slack)
+        return (1, math.inf if left is None else left)
+
+    def _start_cloudlet(self, cloudlet, vm):
+        """Mark an allocated cloudlet active and start its completion timer."""
+        cloudlet.status = CloudletStatus.ACTIVE
+        cloudlet.vm_id = vm.id
+        cloudlet.start_time = time.time()
+        cloudlet.set_share(self.time_slicer.share(vm.id, cloudlet), cloudlet.start_time)
+        cloudlet.estimated_time = self.runtime_estimator.estimate(cloudlet)
+        if not cloudlet.preemptions:
+            # A late start is a miss even if the monitor never saw it pending past its deadline
+            self._count_deadline(cloudlet, 'met' if cloudlet.start_time <= cloudlet.deadline else 'missed')
+        if cloudlet.execution_time:
+            # Memory off the VM's home NUMA node slows the rest of the run down
+            with vm.lock:
+                pages = vm.memory.pages_of(cloudlet.id)
+            cloudlet.stall_time += self.memory_manager.topology.penalty(
+                pages, vm.numa_node, max(0.0, cloudlet.execution_time - cloudlet.executed))
+        self._record('cloudlet', cloudlet)
+
+        if self._schedule_completion(cloudlet):
+            self.log(f" [STARTED] {cloudlet.name} on VM {vm.id} "
+                     f"(will complete in {cloudlet.remaining_execution_time():.1f}s)")
+        else:
+            self.log(f" [ALLOCATED] {cloudlet.name} to VM {vm.id}")
+        self._touch_cloudlet(cloudlet, vm)
+
+    def _schedule_completion(self, cloudlet):
+        """Start a timer that completes the cloudlet when its remaining runtime runs out."""
+        remaining = cloudlet.remaining_execution_time()
+        if remaining is None:
+            return False
+        cloudlet._completion_timer = threading.Timer(
+            remaining,
+            self.complete_cloudlet,
+            args=(cloudlet.id,)
+        )
+        cloudlet._completion_timer.daemon = True
+        cloudlet._completion_timer.start()
+        return True
+
+    def _reslice(self, vm, delta, count_delta):
+        """
+        VM usage listener: when an allocate/deallocate changes how contended the
+        VM's cores or GPUs are, re-time every cloudlet running on it at its new
+        rate. Called under the VM lock, so it only reads the VM.
+        """
+        if not self.time_slicer.update(vm):
+            return
+        now = time.time()
+        for cloudlet_id in vm.cloudlets:
+            cloudlet = self.cloudlet_index.get(cloudlet_id)
+            if cloudlet is None or cloudlet.status != CloudletStatus.ACTIVE or cloudlet.start_time is None:
+                continue
+            share = self.time_slicer.share(vm.id, cloudlet)
+            if share == cloudlet.share:
+                continue
+            cloudlet.set_share(share, now)
+            if cloudlet._completion_timer:
+                cloudlet._completion_timer.cancel()
+                self._schedule_completion(cloudlet)
+            self._record('cloudlet', cloudlet)
+
+    def _touch_cloudlet(self, cloudlet, vm):
+        """Touch a running cloudlet's pages and add any swap stall to its remaining runtime."""
+        stall = self.memory_manager.touch(vm.memory.pages_of(cloudlet.id))
+        if stall <= 0:
+            return
+        cloudlet.stall_time += stall
+        if cloudlet._completion_timer:
+            cloudlet._completion_timer.cancel()
+            self._schedule_completion(cloudlet)
+        self._record('cloudlet', cloudlet)
+
+    def _touch_working_sets(self):
+        """One tick of page accesses by every running cloudlet (overcommitted hosts only)."""
+        if not self.memory_manager.overcommitted:
+            return
+        with self.lock:
+            for vm in self.vms:
+                for cloudlet_id in list(vm.memory.owned):
+                    cloudlet = self.cloudlet_index.get(cloudlet_id)
+                    if cloudlet is not None and cloudlet.status == CloudletStatus.ACTIVE:
+                        self._touch_cloudlet(cloudlet, vm)
+
+    def _allocate_cloudlets_batch(self, provision):
+        """Pack the whole pending set with the batch placer and apply the plan."""
+        if not self.pending_queue:
+            return
+        plan = self.batch_placer.plan(
+            list(self.pending_queue),
+            self.placement_engine,
+            self.memory_manager.free_count,
+            self.memory_manager.PAGE_SIZE,
+            allow_new_vms=provision
+        )
+
+        new_vms = []
+        for flavor in plan.new_vms:
+            vm, warm = self._provision_vm(flavor)
+            if vm is not None:
+                self.log(f"[BATCH] Provisioned {flavor.name} VM {vm.id}{' (warm)' if warm else ''} for pending cloudlets")
+            new_vms.append(vm)
+
+        placed = set()
+        assignments = plan.assignments + [(cl, new_vms[k]) for cl, k in plan.new_vm_assignments]
+        for cloudlet, vm in assignments:
+            if vm is not None and vm.allocate(cloudlet):
+                self._start_cloudlet(cloudlet, vm)
+                placed.add(cloudlet.id)
+
+        if placed:
+            self.pending_queue = PendingQueue(cl for cl in self.pending_queue if cl.id not in placed)
+            self.log(f"[BATCH] Placed {len(placed)} cloudlets ({len(plan.new_vms)} new VMs) "
+                     f"in {plan.elapsed * 1000:.1f}ms{' (time budget hit)' if plan.timed_out else ''}")
+
     def _find_vm_for_cloudlet(self, cloudlet):
         """
         Find a suitable VM for the cloudlet using the current load balancing algorithm.
@@ -396,230 +1360,105 @@ class ResourceManager:
             VM object if a suitable VM is found, None otherwise
         """
         algorithm = self.load_balancing_algorithm
-        is_gpu_only = (cloudlet.cpu == 0 and cloudlet.ram == 0 and 
-                      cloudlet.storage == 0 and cloudlet.bandwidth == 0 and 
-                      cloudlet.gpu > 0)
-        
+
         self.log(f"Finding VM for cloudlet {cloudlet.name} (GPU: {cloudlet.gpu}, "
                 f"CPU: {cloudlet.cpu}, RAM: {cloudlet.ram}, "
                 f"Storage: {cloudlet.storage}, Bandwidth: {cloudlet.bandwidth})")
-        
-        # First, try to find a VM that can handle the cloudlet's requirements
-        candidates = []
-        for vm in self.vms:
-            if vm.status == VMStatus.TERMINATED:
-                continue
 
-            # Security Filter: Strict isolation
-            if vm.isolation_level == "STRICT" and vm.cloudlets:
-                continue
+        # Scored policies pick the best VM in one vectorized pass over all VMs;
+        # best_fit (also the fallback for unknown names) is normalized weighted slack
+        if algorithm not in ('round_robin', 'weighted_round_robin'):
+            policy = {
+                'least_loaded': 'least_loaded',
+                'dominant_fit': 'dominant_fit',
+                'cosine_alignment': 'cosine_alignment',
+            }.get(algorithm, 'weighted_slack')
+            vm = self.placement_engine.select(cloudlet, policy)
+            if not vm:
+                self.log(f"No suitable VM found for cloudlet {cloudlet.name} (CPU: {cloudlet.cpu}, RAM: {cloudlet.ram}, GPU: {cloudlet.gpu})")
+            return vm
+
+        # Feasibility (capacity, GPU and strict isolation) is evaluated by the engine
+        candidates = self.placement_engine.candidates(cloudlet)
 
-            # For GPU-only cloudlets, only check GPU capacity
-            if is_gpu_only:
-                if vm.gpu_capacity - vm.gpu_used >= cloudlet.gpu:
-                    candidates.append(vm)
-                continue
-                
-            # For regular cloudlets, check all requirements
-            if cloudlet.gpu > 0 and vm.gpu_capacity <= 0:
-                continue  # Skip VMs without GPU capacity if GPU is needed
-                
-            if vm.can_allocate(cloudlet.cpu, cloudlet.ram, cloudlet.storage, 
-                            cloudlet.bandwidth, cloudlet.gpu, self.memory_manager):
-                candidates.append(vm)
-        
         if not candidates:
             self.log(f"No suitable VM found for cloudlet {cloudlet.name} (CPU: {cloudlet.cpu}, RAM: {cloudlet.ram}, GPU: {cloudlet.gpu})")
             return None
             
         self.log(f"Found {len(candidates)} candidate VMs for cloudlet {cloudlet.name} (GPU: {cloudlet.gpu} required)")
             
-        if algorithm == 'round_robin':
-            # Simple round-robin distribution
-            if not hasattr(self, '_last_vm_index'):
-                self._last_vm_index = -1
-            self._last_vm_index = (self._last_vm_index + 1) % len(candidates)
-            return candidates[self._last_vm_index]
-            
-        elif algorithm == 'least_loaded':
-            # Select VM with the least resource utilization
-            def get_utilization(vm):
-                cpu_util = vm.cpu_used / vm.cpu_capacity if vm.cpu_capacity > 0 else 0
-                ram_util = vm.ram_used / vm.ram_capacity if vm.ram_capacity > 0 else 0
-                # Weighted sum of utilizations (can be adjusted based on priority)
-                return 0.6 * cpu_util + 0.3 * ram_util + 0.1 * (vm.storage_used / vm.storage_capacity if vm.storage_capacity > 0 else 0)
-                
-            return min(candidates, key=get_utilization)
-            
-        elif algorithm == 'weighted_round_robin':
+        if algorithm == 'weighted_round_robin':
             # Round-robin but weighted by VM capacity
             if not hasattr(self, '_weighted_index'):
                 self._weighted_index = 0
-                self._weights = [vm.cpu_capacity + vm.ram_capacity for vm in candidates]
-                self._total_weight = sum(self._weights)
-                
+            # Weights follow the current candidate set, which changes as VMs fill up
+            weights = [vm.cpu_capacity + vm.ram_capacity for vm in candidates]
+            total_weight = sum(weights)
+            if total_weight <= 0:
+                return candidates[0]
+
             selected = None
             while not selected:
                 self._weighted_index = (self._weighted_index + 1) % len(candidates)
-                if random.random() < (self._weights[self._weighted_index] / self._total_weight):
+                if random.random() < (weights[self._weighted_index] / total_weight):
                     selected = candidates[self._weighted_index]
             return selected
-            
-        else:  # best_fit (default)
-            # Original best-fit implementation
-            return min(candidates, key=lambda vm: (vm.cpu_used + vm.ram_used + vm.storage_used))
 
-    def _calculate_adaptive_cooldown(self, deltas):
-        """
-        Dynamic cooldown: higher spikes = faster scaling (min 3s, max BASE_COOLDOWN)
-        """
-        max_delta = max(deltas.values(), default=0)
-        severity = min(max_delta, 1.0)  # Cap at 1.0 (100%)
-        cooldown = self.BASE_COOLDOWN * (1 - severity)
-        return max(cooldown, 3)
+        # round_robin: simple round-robin distribution
+        if not hasattr(self, '_last_vm_index'):
+            self._last_vm_index = -1
+        self._last_vm_index = (self._last_vm_index + 1) % len(candidates)
+        return candidates[self._last_vm_index]
 
-    def _scale_vms(self):
-        """Auto-scale VMs based on resource utilization"""
-        if time.time() - self.last_scaling_time < self.SCALING_COOLDOWN:
-            return  # Prevent too frequent scaling
-
-        with self.lock:
-            # If there are no VMs and pending cloudlets, create a VM immediately
-            if not self.vms and self.pending_queue:
-                cloudlet = self.pending_queue[0]
-                # Create a VM with enough resources to accommodate the cloudlet
-                new_vm = VM(
-                    cpu=cloudlet.cpu,
-                    ram=cloudlet.ram,
-                    storage=cloudlet.storage,
-                    bandwidth=cloudlet.bandwidth,
-                    gpu=cloudlet.gpu
-                )
-                self.add_vm(new_vm)
-                print(f"Auto-scaling: Created initial VM {new_vm.id} for cloudlet {cloudlet.id}")
-                self.last_scaling_time = time.time()
-                return
+    def _utilization(self):
+        """Cluster-wide capacity and utilization (as fractions) per resource."""
+        total, used = self.accounting.totals()
+        return total, utilization(total, used)
 
-            # Total and used resources
-            total = {
-                'cpu': sum(vm.cpu_capacity for vm in self.vms),
-                'ram': sum(vm.ram_capacity for vm in self.vms),
-                'storage': sum(vm.storage_capacity for vm in self.vms),
-                'bandwidth': sum(vm.bandwidth_capacity for vm in self.vms),
-                'gpu': sum(vm.gpu_capacity for vm in self.vms)
-            }
-            used = {
-                'cpu': sum(vm.cpu_used for vm in self.vms),
-                'ram': sum(vm.ram_used for vm in self.vms),
-                'storage': sum(vm.storage_used for vm in self.vms),
-                'bandwidth': sum(vm.bandwidth_used for vm in self.vms),
-                'gpu': sum(vm.gpu_used for vm in self.vms)
-            }
-            utilization = {
-                key: (used[key] / total[key]) if total[key] > 0 else 0
-                for key in total
-            }
+    def utilization(self):
+        """Cluster-wide utilization per resource in percent, without building full metrics."""
+        return {key: value * 100 for key, value in self.accounting.utilization().items()}
 
-            now = time.time()
-
-            # Calculate overall resource utilization
-            total_cpu = sum(vm.cpu_capacity for vm in self.vms)
-            total_ram = sum(vm.ram_capacity for vm in self.vms)
-            total_storage = sum(vm.storage_capacity for vm in self.vms)
-            
-            used_cpu = sum(vm.cpu_used for vm in self.vms)
-            used_ram = sum(vm.ram_used for vm in self.vms)
-            used_storage = sum(vm.storage_used for vm in self.vms)
-            
-            if total_cpu == 0 or total_ram == 0 or total_storage == 0:
-                return  # Prevent division by zero
-
-            cpu_utilization = used_cpu / total_cpu
-            ram_utilization = used_ram / total_ram
-            storage_utilization = used_storage / total_storage
-            
-            # Calculate average utilization
-            avg_utilization = (cpu_utilization + ram_utilization + storage_utilization) / 3
-            
-            # Calculate how far each resource is from its threshold
-            spike_deltas = {
-                key: max(0, utilization[key] - self.THRESHOLDS[key]['up'])
-                for key in self.THRESHOLDS
-            }
-            dip_deltas = {
-                key: max(0, self.THRESHOLDS[key]['down'] - utilization[key])
-                for key in self.THRESHOLDS
-            }
+    def audit_accounting(self):
+        """Check the running totals against the VMs and correct any drift."""
+        with self.lock:
+            drift = self.accounting.audit(self.vms)
+        self.last_audit_time = time.time()
+        if drift:
+            self.log(f"[ACCOUNTING] Drift corrected: {'; '.join(drift)}")
+        return drift
 
-            # Determine if any resource needs scaling up/down
-            should_scale_up = any(spike_deltas.values())
-            should_scale_down = any(dip_deltas.values())
+    def _scale_vms(self):
+        """Ask the scaling controller for a decision and apply it"""
+        with self.lock:
+            total, utilization = self._utilization()
+            controller = self.scaling_controller
+            decision = controller.decide(utilization, len(self.vms), len(self.pending_queue))
+            self.last_adaptive_cooldown = decision.cooldown  # <- for dashboard visibility
 
-            # Apply adaptive cooldown
-            adaptive_cooldown = self._calculate_adaptive_cooldown(spike_deltas if should_scale_up else dip_deltas)
-            self.last_adaptive_cooldown = adaptive_cooldown  # <- for dashboard visibility
-            
-            if should_scale_up:
-                if not self.pending_queue and avg_utilization < 0.8:
-                    return
-                self._scale_up()
-                self.last_scaling_time = now
+            if decision.action == 'scale_up':
+                extra = None
+                if decision.inputs['forecast']:
+                    targets = {key: limits['up'] for key, limits in self.THRESHOLDS.items()}
+                    extra = forecast_demand(decision.inputs['forecast'], total, targets)
+                added = self._scale_up(extra=extra, max_vms=decision.count)
+                controller.record(decision, len(added))
+            elif decision.action == 'scale_down':
+                controller.record(decision, 1 if self._scale_down() else 0)
 
-            elif should_scale_down:
-                self._scale_down()
-                self.last_scaling_time = now
+            if decision.action != 'hold':
+                self.last_scaling_time = decision.timestamp
+                self.log(f"[AUTO-SCALER] {decision.action} x{decision.applied}/{decision.count}: {decision.reason} "
+                         f"| queue={decision.inputs['queue_depth']} vms={decision.inputs['vm_count']}")
 
             # Log current utilization
             self._log_scaling_event(
                 'utilization',
                 utilization=utilization,
-                spike_deltas={
-                    key: max(0, utilization[key] - self.THRESHOLDS[key]['up'])
-                    for key in self.THRESHOLDS
-                },
-                dip_deltas={
-                    key: max(0, self.THRESHOLDS[key]['down'] - utilization[key])
-                    for key in self.THRESHOLDS
-                },
-                cooldown=getattr(self, 'last_adaptive_cooldown', self.BASE_COOLDOWN)
+                decision=decision.to_dict(),
+                cooldown=self.last_adaptive_cooldown
             )
 
-            if now - self.last_scaling_time < adaptive_cooldown:
-                return  # Still in cooldown
-
-            # Scale up if utilization is high
-            if avg_utilization > self.SCALING_UP_THRESHOLD:
-                # Create a VM with medium configuration
-                new_vm = VM(
-                    cpu=4,
-                    ram=8,
-                    storage=100,
-                    bandwidth=1000,
-                    gpu=1
-                )
-                self.add_vm(new_vm)
-                print(f"Auto-scaling: Created new VM {new_vm.id} due to high utilization")
-                self.last_scaling_time = time.time()
-            
-            # Scale down if utilization is low
-            elif avg_utilization < self.SCALING_DOWN_THRESHOLD:
-                # Remove idle VMs
-                current_time = time.time()
-                for vm in self.vms[:]:  # Create a copy to safely remove items
-                    if vm.status == VMStatus.IDLE and \
-                       (current_time - vm.last_activity) > self.IDLE_TIME_THRESHOLD:
-                        self.vms.remove(vm)
-                        self.memory_manager.deallocate_pages(vm.memory_pages)
-                        self._log_scaling_event(
-                            'scale_down', 
-                            vm_id=vm.id,
-                            cooldown=self.last_adaptive_cooldown,
-                            timestamp=current_time
-                        )
-                        print(f"Auto-scaling: Removed idle VM {vm.id}")
-                        self.last_scaling_time = time.time()
-                        break  # Remove one VM at a time to prevent aggressive scaling down
-
     def _log_scaling_event(self, event_type, vm_id=None, **kwargs):
         """Log scaling events to be sent to the dashboard"""
         timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
@@ -647,59 +1486,83 @@ class ResourceManager:
             self.system_logs = self.system_logs[-1000:]
         return event
 
-    def _scale_up(self):
-        """Create a new VM for scaling up"""
-        # Check if any pending cloudlets need GPU
-        needs_gpu = any(cl.gpu > 0 for cl in self.pending_queue)
-        
-        # If we have pending GPU cloudlets, create a VM with GPU capacity
-        if needs_gpu:
-            new_vm = VM(
-                cpu=4,
-                ram=8,
-                storage=100,
-                bandwidth=1000,
-                gpu=1  # Add GPU capacity
-            )
-            self.log(f"Creating new VM with GPU capacity for pending GPU cloudlets")
-        else:
-            # For non-GPU cloudlets, create a regular VM
-            new_vm = VM(
-                cpu=4,
-                ram=8,
-                storage=100,
-                bandwidth=1000,
-                gpu=0
-            )
-            self.log("Creating new regular VM")
-        self.add_vm(new_vm)
-        self._log_scaling_event(
-            'scale_up', 
-            vm_id=new_vm.id,
-            cooldown=self.last_adaptive_cooldown,
-            timestamp=time.time()
+    def _scale_up(self, extra=None, max_vms=None):
+        """
+        Provision VMs sized to the pending queue plus any forecast headroom.
+
+        extra is additional capacity per resource (see flavors.forecast_demand).
+        Returns the VMs that were added.
+        """
+        max_vms = self.MAX_VMS_PER_SCALE if max_vms is None else max_vms
+        flavors = self.sizing_planner.plan(
+            self.pending_queue,
+            self.placement_engine,
+            self.memory_manager.free_count,
+            self.memory_manager.PAGE_SIZE,
+            max_vms=max_vms,
+            extra=extra
         )
-        self.log(f"Scaled up: Created new VM {new_vm.id}")
-        self.log(f"[AUTO-SCALER] Scaling Up at {time.strftime('%X')} | Cooldown: {self.last_adaptive_cooldown:.1f}s")
+        if not flavors and max_vms > 0 and not self.pending_queue:
+            # Utilization is high but there is no demand shape to size against
+            flavors = [get_flavor(DEFAULT_FLAVOR)]
+
+        added = self._provision_oversized(max_vms - len(flavors))
+        for flavor in flavors:
+            new_vm, warm = self._provision_vm(flavor)
+            if new_vm is None:
+                self.log(f"[AUTO-SCALER] Could not add {flavor.name} VM: insufficient host capacity")
+                continue
+            added.append(new_vm)
+            self._log_scaling_event(
+                'scale_up', 
+                vm_id=new_vm.id,
+                flavor=flavor.name,
+                warm=warm,
+                cooldown=self.last_adaptive_cooldown,
+                timestamp=time.time()
+            )
+            self.log(f"Scaled up: {'Claimed warm' if warm else 'Created new'} {flavor.name} VM {new_vm.id}")
+        if added:
+            self._allocate_cloudlets()
+            mix = ", ".join(vm.flavor for vm in added)
+            self.log(f"[AUTO-SCALER] Scaling Up at {time.strftime('%X')} with {len(added)} VMs ({mix}) | Cooldown: {self.last_adaptive_cooldown:.1f}s")
+        return added
+
+    def _provision_oversized(self, max_vms):
+        """
+        Add a VM sized to each pending cloudlet that fits no catalog flavor and no
+        VM in the fleet; a catalog VM could never host it. Returns the VMs added.
+        """
+        added = []
+        for cloudlet in list(self.pending_queue):
+            if len(added) >= max_vms:
+                break
+            demand = demand_vector(cloudlet)
+            if any(all(f.capacity() >= demand) for f in FLAVOR_CATALOG) or self.placement_engine.could_host(cloudlet):
+                continue
+            vm = VM(cpu=cloudlet.cpu, ram=cloudlet.ram, storage=cloudlet.storage, bandwidth=cloudlet.bandwidth,
+                    gpu=cloudlet.gpu, cpu_overcommit=self.cpu_overcommit, gpu_overcommit=self.gpu_overcommit)
+            if not self.add_vm(vm, allocate=False):
+                self.log(f"[AUTO-SCALER] {cloudlet.name} is unplaceable: it fits no flavor and the host "
+                         f"cannot fit a VM sized to it")
+                continue
+            added.append(vm)
+            self._log_scaling_event('scale_up', vm_id=vm.id, flavor=vm.flavor, warm=False,
+                                    cooldown=self.last_adaptive_cooldown, timestamp=time.time())
+            self.log(f"Scaled up: Created custom VM {vm.id} sized to {cloudlet.name}, which fits no flavor")
+        return added
 
     def _scale_down(self):
-        """Remove idle VMs"""
+        """Remove one idle VM; returns True if a VM was removed"""
         current_time = time.time()
         for vm in self.vms[:]:  # Create a copy to safely remove items
             if vm.status == VMStatus.IDLE and \
                (current_time - vm.last_activity) > self.IDLE_TIME_THRESHOLD:
                 vm_id = vm.id
-                
-                # Find and deallocate all pages associated with this VM
-                pages_to_deallocate = []
-                for page, vm_id_in_page in self.memory_manager.page_to_vm.items():
-                    if vm_id_in_page == vm_id:
-                        pages_to_deallocate.append(page)
-                
-                self.memory_manager.deallocate_pages(pages_to_deallocate)
-                
+                vm.release_memory(self.memory_manager)
+
                 # Remove VM from list
-                self.vms.remove(vm)
+                self._unregister_vm(vm)
                 
                 self._log_scaling_event(
                     'scale_down', 
@@ -709,91 +1572,213 @@ class ResourceManager:
                 )
                 self.log(f"Scaled down: Removed idle VM {vm_id}")
                 self.log(f"[AUTO-SCALER] Scaling Down at {time.strftime('%X')} | Cooldown: {self.last_adaptive_cooldown:.1f}s")
-                break  # Remove one VM at a time to prevent aggressive scaling down
+                return True  # Remove one VM at a time to prevent aggressive scaling down
+        return False
 
     def _check_deadlines(self):
+        with self.lock:
+            now = time.time()
+            for cloudlet in self.cloudlets:
+                if cloudlet.status in [CloudletStatus.WAITING, CloudletStatus.PENDING]:
+                    if cloudlet.preemptions:
+                        continue  # Counted when it first started; it only waits to resume
+                    time_left = cloudlet.deadline - now
+
+                    # Check if deadline is missed
+                    if time_left <= 0:
+                        cloudlet.status = CloudletStatus.FAILED
+                        cloudlet.completion_time = now
+                        self._record('cloudlet', cloudlet)
+                        self._count_deadline(cloudlet, 'missed')
+                        # A failed cloudlet never starts, so its miss is the only time it is counted
+                        self.pending_queue.discard(cloudlet)
+                        self.log(f"[DEADLINE MISSED] {cloudlet.name} failed - missed deadline")
+                        continue
+
+                    # Escalate based on urgency
+                    priority = cloudlet.sla_priority
+                    if time_left < 5:
+                        cloudlet.sla_priority = 3  # Critical
+                        self.log(f"[SLA ESCALATED] {cloudlet.name} escalated to Priority 3 (deadline in {time_left:.1f}s)")
+                    elif time_left < 15:
+                        cloudlet.sla_priority = max(cloudlet.sla_priority, 2)
+                        self.log(f"[SLA WARNING] {cloudlet.name} elevated to Priority 2 (deadline in {time_left:.1f}s)")
+                    if cloudlet.sla_priority != priority:
+                        self._record('cloudlet', cloudlet)
+            if self.preemption_enabled:
+                self._place_critical()
+                if self.queue_policy == 'srpt':
+                    self._preempt_for_shortest()
+
+    def _count_deadline(self, cloudlet, outcome):
+        counts = self.deadline_stats.setdefault(cloudlet.sla_priority, {'met': 0, 'missed': 0})
+        counts[outcome] += 1
+
+    def _place_critical(self):
+        """
+        Start pending critical cloudlets, most urgent first, ahead of the queue,
+        and preempt lower-priority running work for those that fit nowhere.
+        """
+        critical = sorted((cl for cl in self.pending_queue
+                           if cl.sla_priority >= self.PREEMPT_PRIORITY and cl.status in QUEUED_STATES),
+                          key=lambda cl: cl.deadline)
+        for cloudlet in critical:
+            vm = self._find_vm_for_cloudlet(cloudlet)
+            if vm is not None and vm.allocate(cloudlet):
+                self.pending_queue.remove(cloudlet)
+                self.preemption_stats['promoted'] += 1
+                self._start_cloudlet(cloudlet, vm)
+            elif not self._preempt(cloudlet):
+                self.preemption_stats['failed'] += 1
+
+    def _preempt_for_shortest(self):
+        """
+        SRPT: when the pending cloudlet with the least estimated runtime left fits
+        nowhere, suspend running work of no higher priority that has SRPT_MARGIN
+        times as much left.
+        """
+        if self.placement_mode == 'batch' or not self.pending_queue:
+            return
+        self._order_queue()
+        head = self.pending_queue[0]
+        if head.estimated_time is None or self.placement_engine.candidates(head):
+            return
         now = time.time()
-        for cloudlet in self.cloudlets:
-            if cloudlet.status in [CloudletStatus.WAITING, CloudletStatus.PENDING]:
-                time_left = cloudlet.deadline - now
-
-                # Check if deadline is missed
-                if time_left <= 0:
-                    cloudlet.status = CloudletStatus.FAILED
-                    cloudlet.completion_time = now
-                    self.log(f"[DEADLINE MISSED] {cloudlet.name} failed - missed deadline")
-                    continue
+        left = self.runtime_estimator.remaining(head, head.estimated_time, now)
+        if not left:
+            return  # Already ran past its estimate: nothing to compare against
+
+        def longer(victim):
+            rest = self.runtime_estimator.remaining(victim, victim.estimated_time, now)
+            return rest is not None and rest > self.SRPT_MARGIN * left
 
-                # Escalate based on urgency
-                if time_left < 5:
-                    cloudlet.sla_priority = 3  # Critical
-                    self.log(f"[SLA ESCALATED] {cloudlet.name} escalated to Priority 3 (deadline in {time_left:.1f}s)")
-                elif time_left < 15:
-                    cloudlet.sla_priority = max(cloudlet.sla_priority, 2)
-                    self.log(f"[SLA WARNING] {cloudlet.name} elevated to Priority 2 (deadline in {time_left:.1f}s)")
+        if self._preempt(head, priority=head.sla_priority + 1, eligible=longer):
+            self.preemption_stats['srpt'] += 1
+
+    def _preempt(self, cloudlet, priority=None, eligible=None):
+        """
+        Suspend the planner's victims and start the cloudlet in their place. By
+        default victims run below the cloudlet's priority; see PreemptionPlanner.plan.
+        """
+        if cloudlet.status not in QUEUED_STATES:
+            return False
+        plan = self.preemption_planner.plan(cloudlet, self.victim_index, self.vm_index, self.cloudlet_index,
+                                            priority=priority, eligible=eligible)
+        if plan is None:
+            return False
+        vm = plan.vm
+        for victim in plan.victims:
+            vm.deallocate(victim)
+        if not vm.allocate(cloudlet):
+            # Rollback: the freed room was not enough (memory pages); victims keep running
+            for victim in plan.victims:
+                vm.allocate(victim)
+            return False
+        now = time.time()
+        for victim in plan.victims:
+            self._suspend(victim, now)
+        self.pending_queue.remove(cloudlet)
+        # Victims resume ahead of newer work, in the order they were queued
+        self.pending_queue.extendleft(reversed(plan.victims))
+        self.preemption_stats['preemptions'] += 1
+        self.preemption_stats['victims'] += len(plan.victims)
+        self.log(f"[PREEMPTED] {', '.join(v.name for v in plan.victims)} on VM {vm.id} for {cloudlet.name}")
+        self._start_cloudlet(cloudlet, vm)
+        return True
+
+    def _suspend(self, cloudlet, now):
+        """Stop a running cloudlet, keeping the runtime it has left, and mark it waiting."""
+        if cloudlet._completion_timer:
+            cloudlet._completion_timer.cancel()
+            cloudlet._completion_timer = None
+        if cloudlet.start_time is not None:
+            cloudlet.set_share(1.0, now)
+            cloudlet.executed += now - cloudlet.start_time
+        cloudlet.status = CloudletStatus.WAITING
+        cloudlet.vm_id = None
+        cloudlet.start_time = None
+        cloudlet.preemptions += 1
+        self._record('cloudlet', cloudlet)
 
     def _attempt_vm_consolidation(self):
-        migrated_cloudlets = set()  # Track cloudlets already migrated in this cycle
-
-        for vm in self.vms[:]:  # Copy the list to safely remove VMs
-            if vm.status == VMStatus.RUNNING and len(vm.cloudlets) <= 2:
-                movable = list(vm.cloudlets)
-
-                for cloudlet_id in movable:
-                    if cloudlet_id in migrated_cloudlets:
-                        continue  # Skip if already migrated this cycle
-
-                    cloudlet = next((cl for cl in self.cloudlets if cl.id == cloudlet_id), None)
-                    if cloudlet:
-                        target_vm = self._find_vm_for_cloudlet(cloudlet)
-                        if target_vm and target_vm.id != vm.id:
-                            # Deallocate from source VM
-                            vm.deallocate(cloudlet, self.memory_manager)
-
-                            # Try allocating on target VM
-                            success = target_vm.allocate(cloudlet, self.memory_manager)
-                            if success:
-                                cloudlet.vm_id = target_vm.id
-                                cloudlet.start_time = time.time()  # Optional: restart timer if needed
-                                migrated_cloudlets.add(cloudlet.id)
-                                self.log(f"[MIGRATION] {cloudlet.name} migrated from VM {vm.id} to VM {target_vm.id}")
-                            else:
-                                # Rollback: re-allocate on original VM if migration fails
-                                vm.allocate(cloudlet, self.memory_manager)
-                                self.log(f"[ROLLBACK] {cloudlet.name} migration to VM {target_vm.id} failed. Rolled back to VM {vm.id}")
-
-                # If original VM is now empty, remove it
-                if not vm.cloudlets:
-                    self.vms.remove(vm)
-                    self.memory_manager.deallocate_pages(vm.memory_pages)
-                    vm.memory_pages.clear()
-                    self.log(f"[CONSOLIDATION] Removed underutilized VM {vm.id}")
-                
+        """
+        Apply one consolidation cycle from the planner. Moved cloudlets keep their
+        start time and completion timer, so their remaining runtime is unchanged.
+        """
+        with self.lock:
+            now = time.time()
+            by_id = {cl.id: cl for cl in self.cloudlets if cl.status == CloudletStatus.ACTIVE}
+            plan = self.consolidation_planner.plan(
+                self.vms, by_id, now,
+                page_size=self.memory_manager.PAGE_SIZE,
+                min_vms=self.scaling_controller.min_vms
+            )
+            if not plan.migrations:
+                return
+            self.consolidation_stats['cycles'] += 1
+
+            failed = set()
+            for move in plan.migrations:
+                cloudlet, source, target = move.cloudlet, move.source, move.target
+                source.deallocate(cloudlet)
+                if target.allocate(cloudlet):
+                    cloudlet.vm_id = target.id
+                    cloudlet.last_migration_time = now
+                    cloudlet.migrations += 1
+                    self._record('cloudlet', cloudlet)
+                    self._touch_cloudlet(cloudlet, target)
+                    self.consolidation_stats['migrations'] += 1
+                    self.consolidation_stats['pages_moved'] += move.pages
+                    self.log(f"[MIGRATION] {cloudlet.name} migrated from VM {source.id} to VM {target.id}")
+                else:
+                    # Rollback: re-allocate on original VM if migration fails
+                    source.allocate(cloudlet)
+                    failed.add(source.id)
+                    self.consolidation_stats['rollbacks'] += 1
+                    self.log(f"[ROLLBACK] {cloudlet.name} migration to VM {target.id} failed. Rolled back to VM {source.id}")
+
+            for vm in plan.emptied:
+                if vm.id in failed or vm.cloudlets or vm not in self.vms:
+                    continue
+                self._unregister_vm(vm)
+                vm.release_memory(self.memory_manager)
+                self.consolidation_stats['vms_released'] += 1
+                self.log(f"[CONSOLIDATION] Removed underutilized VM {vm.id}")
+            self.consolidation_stats['last_plan'] = plan.to_dict()
+            self.log(f"[CONSOLIDATION] {len(plan.migrations)} migrations, {plan.pages} pages, "
+                     f"~{plan.saved_vm_seconds:.0f} VM-seconds saved")
+
     def complete_cloudlet(self, cloudlet_id):
         with self.lock:
-            for cloudlet in self.cloudlets:
-                if cloudlet.id == cloudlet_id and cloudlet.status == CloudletStatus.ACTIVE:
-                    # Cancel any pending timer if it exists
-                    if hasattr(cloudlet, '_completion_timer') and cloudlet._completion_timer:
-                        cloudlet._completion_timer.cancel()
-                    
-                    cloudlet.status = CloudletStatus.COMPLETED
-                    cloudlet.completion_time = time.time()
-                    
-                    # Log completion
-                    if cloudlet.start_time:
-                        actual_duration = cloudlet.completion_time - cloudlet.start_time
-                        self.log(f"[COMPLETED] {cloudlet.name} in {actual_duration:.2f}s on VM {cloudlet.vm_id}")
-                    
-                    # Deallocate resources
-                    for vm in self.vms:
-                        if vm.id == cloudlet.vm_id:
-                            vm.deallocate(cloudlet, self.memory_manager)
-                            break
-                    
-                    # Trigger allocation of pending cloudlets
-                    self._allocate_cloudlets()
-                    return True
+            cloudlet = self.cloudlet_index.get(cloudlet_id)
+            if cloudlet is not None and cloudlet.status == CloudletStatus.ACTIVE:
+                # Cancel any pending timer if it exists
+                if hasattr(cloudlet, '_completion_timer') and cloudlet._completion_timer:
+                    cloudlet._completion_timer.cancel()
+                
+                cloudlet.status = CloudletStatus.COMPLETED
+                cloudlet.completion_time = time.time()
+                cloudlet.set_share(1.0, cloudlet.completion_time)
+                self.time_slicer.record_completion(cloudlet)
+                self.admission.record_completion(cloudlet.completion_time)
+                if cloudlet.start_time:
+                    self.runtime_estimator.observe(
+                        cloudlet, cloudlet.executed + cloudlet.completion_time - cloudlet.start_time)
+                self._record('cloudlet', cloudlet)
+                
+                # Log completion
+                if cloudlet.start_time:
+                    actual_duration = cloudlet.completion_time - cloudlet.start_time
+                    self.log(f"[COMPLETED] {cloudlet.name} in {actual_duration:.2f}s on VM {cloudlet.vm_id}")
+                
+                # Deallocate resources
+                vm = self.vm_index.get(cloudlet.vm_id)
+                if vm is not None:
+                    vm.deallocate(cloudlet)
+                
+                # Trigger allocation of pending cloudlets
+                self._allocate_cloudlets()
+                return True
             return False
 
     def delete_cloudlet(self, cloudlet_id):
@@ -804,12 +1789,12 @@ class ResourceManager:
                     if cl.status == CloudletStatus.ACTIVE and cl.vm_id:
                         for vm in self.vms:
                             if vm.id == cl.vm_id:
-                                vm.deallocate(cl, self.memory_manager)
+                                vm.deallocate(cl)
                                 break
                     # Remove from queues
-                    if cl in self.pending_queue:
-                        self.pending_queue.remove(cl)
+                    self.pending_queue.discard(cl)
                     self.cloudlets.remove(cl)
+                    self._record('cloudlet_removed', cl)
                     self._allocate_cloudlets()
                     return True
             return False
@@ -824,20 +1809,36 @@ class ResourceManager:
                     if running:
                         return False  # Indicate error: VM has running cloudlets
                     
-                    # Find all pages associated with this VM
-                    pages_to_deallocate = []
-                    for page, vm_id_in_page in self.memory_manager.page_to_vm.items():
-                        if vm_id_in_page == vm_id:
-                            pages_to_deallocate.append(page)
-                    
-                    # Deallocate all pages associated with this VM
-                    self.memory_manager.deallocate_pages(pages_to_deallocate)
-                    
+                    # Give the VM's whole reservation back to the global pool
+                    vm.release_memory(self.memory_manager)
+
                     # Remove VM from list
-                    self.vms.remove(vm)
+                    self._unregister_vm(vm)
                     return True
             return False
 
+    def resize_vm(self, vm_id, ram):
+        """
+        Change a VM's RAM capacity, growing or shrinking its page reservation in
+        the global pool. Fails if the pool is short or running cloudlets hold the
+        memory being given back.
+        """
+        with self.lock:
+            vm = self.vm_index.get(vm_id)
+            if vm is None:
+                return False
+            # Capacity totals follow the VM, so take it out of the accounting while it changes
+            self.accounting.remove_vm(vm)
+            resized = vm.resize_memory(ram, self.memory_manager)
+            self.accounting.add_vm(vm)
+            if not resized:
+                return False
+            self.placement_engine.update_capacity(vm)
+            self._record('vm', vm)
+            self.log(f"[RESIZE] VM {vm.id} now has {ram} GB RAM ({vm.memory.reserved_count} pages)")
+            self._allocate_cloudlets()
+            return True
+
     def log(self, message: str):
         print(message)  # for console
         if self.metrics_callback:
@@ -848,24 +1849,13 @@ class ResourceManager:
 
     def get_metrics(self):
         with self.lock:
-            total_cpu = sum(vm.cpu_capacity for vm in self.vms)
-            total_ram = sum(vm.ram_capacity for vm in self.vms)
-            total_storage = sum(vm.storage_capacity for vm in self.vms)
-            
-            used_cpu = sum(vm.cpu_used for vm in self.vms)
-            used_ram = sum(vm.ram_used for vm in self.vms)
-            used_storage = sum(vm.storage_used for vm in self.vms)
-            
-            if total_cpu == 0 or total_ram == 0 or total_storage == 0:
+            now = time.time()
+            total, used = self.accounting.totals()
+            fractions = utilization(total, used)
+            if total['cpu'] == 0 or total['ram'] == 0 or total['storage'] == 0:
                 avg_utilization = 0
-                cpu_utilization = 0
-                ram_utilization = 0
-                storage_utilization = 0
             else:
-                cpu_utilization = used_cpu / total_cpu
-                ram_utilization = used_ram / total_ram
-                storage_utilization = used_storage / total_storage
-                avg_utilization = (cpu_utilization + ram_utilization + storage_utilization) / 3
+                avg_utilization = (fractions['cpu'] + fractions['ram'] + fractions['storage']) / 3
 
             scaling_status = "Stable"
             if avg_utilization > self.SCALING_UP_THRESHOLD or self.pending_queue:
@@ -873,67 +1863,45 @@ class ResourceManager:
             elif avg_utilization < self.SCALING_DOWN_THRESHOLD:
                 scaling_status = "Scaling Down"
 
-            vms_data = [
-                {
-                    'id': vm.id,
-                    'cpu_capacity': vm.cpu_capacity,
-                    'ram_capacity': vm.ram_capacity,
-                    'storage_capacity': vm.storage_capacity,
-                    'bandwidth_capacity': vm.bandwidth_capacity,
-                    'gpu_capacity': vm.gpu_capacity,
-                    'cpu_used': vm.cpu_used,
-                    'ram_used': vm.ram_used,
-                    'storage_used': vm.storage_used,
-                    'bandwidth_used': vm.bandwidth_used,
-                    'gpu_used': vm.gpu_used,
-                    'status': vm.status.name,
-                    'last_activity': vm.last_activity,
-                    'memory_pages': vm.memory_pages,
-                    "firewall_enabled": vm.firewall_enabled,
-                    "isolation_level": vm.isolation_level,
-                }
-                for vm in self.vms
-            ]
+            vms_data = [vm.to_dict() for vm in self.vms]
             
             # Get memory metrics including fragmentation
-            memory_metrics = self.memory_manager.get_memory_metrics(vms_data)
+            memory_metrics = self.memory_manager.get_memory_metrics(self.vms)
 
             return {
                 'vms': vms_data,
-                'cloudlets': [
-                    {
-                        'id': cl.id,
-                        'name': cl.name,
-                        'cpu': cl.cpu,
-                        'ram': cl.ram,
-                        'storage': cl.storage,
-                        'bandwidth': cl.bandwidth,
-                        'gpu': cl.gpu,
-                        'sla_priority': cl.sla_priority,
-                        'deadline': cl.deadline,
-                        'status': cl.status.name,
-                        'vm_id': cl.vm_id,
-                        'creation_time': cl.creation_time,
-                        'start_time': cl.start_time,
-                        'completion_time': cl.completion_time,
-                        'execution_time': cl.execution_time,
-                        'time_critical': ((cl.deadline - time.time()) < 10) if cl.status in [CloudletStatus.WAITING, CloudletStatus.PENDING, CloudletStatus.ACTIVE] else False,
-                    }
-                    for cl in self.cloudlets
-                ],
+                'cloudlets': [cl.to_dict(now) for cl in self.cloudlets],
                 'scaling_status': scaling_status,
                 'utilization': {
-                    'cpu': cpu_utilization * 100 if total_cpu > 0 else 0,
-                    'ram': ram_utilization * 100 if total_ram > 0 else 0,
-                    'storage': storage_utilization * 100 if total_storage > 0 else 0,
+                    **{key: value * 100 for key, value in fractions.items()},
                     'average': avg_utilization * 100
                 },
+                'accounting': self.accounting.metrics(),
                 'memory': memory_metrics,
+                'warm_pool': self.warm_pool.metrics(),
+                'consolidation': dict(self.consolidation_stats),
+                'preemption': {'enabled': self.preemption_enabled, **self.preemption_stats,
+                               'deadlines': deadline_summary(self.deadline_stats)},
+                'timeslice': self.time_slicer.metrics(self.vms),
+                'runtime': {
+                    'queue_policy': self.queue_policy,
+                    # Pending cloudlets whose estimated runtime no longer fits before their deadline
+                    'at_risk': sum(1 for cl in self.pending_queue if cl.estimated_time is not None
+                                   and now + cl.estimated_time - cl.executed > cl.deadline),
+                    **self.runtime_estimator.metrics(),
+                },
+                'tenants': self.tenant_usage(),
+                'admission': {'mode': self.admission_mode, 'max_pending': self.max_pending,
+                              'pending_ram_budget': self.pending_ram_budget,
+                              'pending': len(self.pending_queue), **self.admission.metrics(now)},
+                'state_store': self.state_store.metrics() if self.state_store is not None else None,
+                'generated_at': time.time(),  # Lets clients measure broadcast lag
                 'auto_scaling': True,
                 'scaling': {
                     'status': scaling_status,
                     'last_scaled_at': self.last_scaling_time,
                     'adaptive_cooldown': getattr(self, 'last_adaptive_cooldown', self.BASE_COOLDOWN),
-                    'next_possible_scale': self.last_scaling_time + getattr(self, 'last_adaptive_cooldown', self.BASE_COOLDOWN)
+                    'next_possible_scale': self.last_scaling_time + getattr(self, 'last_adaptive_cooldown', self.BASE_COOLDOWN),
+                    'last_decision': self.scaling_controller.decisions[-1].to_dict() if self.scaling_controller.decisions else None
                 }
             }
\ No newline at end of file
@@ -0,0 +1,221 @@
+import heapq
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+from placement import RESOURCES, demand_vector
+
+DEFAULT_TENANT = 'default'
+
+
+class Tenant:
+    """One tenant's running usage, waiting cloudlets and fair-share settings."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.weight = 1.0
+        self.quota: Dict[str, float] = {}  # Resource -> most the tenant may hold at once
+        self.limit = np.full(len(RESOURCES), np.inf)  # The quota as a vector
+        self.usage = np.zeros(len(RESOURCES))  # Demand of its running cloudlets
+        self.running = 0
+        self.waiting = OrderedDict()  # Cloudlet ID -> cloudlet, oldest first (resumed ones at the front)
+        self.share = 0.0  # Dominant share: the largest fraction of any fleet resource it holds
+        self.dominant: Optional[str] = None  # ...and which resource that is
+        self.entry = 0  # Sequence number of its live heap entry; older ones are stale
+
+    def idle(self) -> bool:
+        return not self.running and not self.waiting and self.weight == 1.0 and not self.quota
+
+    def to_dict(self) -> dict:
+        return {
+            'weight': self.weight,
+            'quota': dict(self.quota),
+            'usage': dict(zip(RESOURCES, self.usage.tolist())),
+            'running': self.running,
+            'waiting': len(self.waiting),
+            'dominant_share': self.share,
+            'dominant_resource': self.dominant,
+        }
+
+
+class FairShareScheduler:
+    """
+    Dominant Resource Fairness across tenants.
+
+    A tenant's dominant share is the largest fraction of any fleet resource
+    (CPU, RAM, storage, bandwidth, GPU) its running cloudlets hold, so a
+    tenant of GPU jobs and one of memory jobs are compared on what each uses
+    most. Under the 'drf' queue policy every placement goes to the oldest
+    waiting cloudlet of the tenant with the lowest dominant share divided by
+    its weight; a tenant whose next cloudlet fits nowhere, or would take it
+    over its quota, is passed over until the next pass.
+
+    The ResourceManager keeps it current from _record(), like the victim
+    index: starting or stopping a cloudlet changes one tenant's usage and
+    share, which re-keys that tenant in a heap of tenants with waiting work.
+    Stale heap entries are skipped when popped, so picking the next tenant
+    is O(log tenants). The shares are only all recomputed when the fleet's
+    capacity changes.
+    """
+
+    def __init__(self):
+        self.tenants: Dict[str, Tenant] = {}
+        self.capacity = np.zeros(len(RESOURCES))  # Fleet capacity the shares are fractions of
+        self.heap = []  # (dominant share / weight, seq, tenant name) of tenants with waiting cloudlets
+        self.where: Dict[str, tuple] = {}  # Cloudlet ID -> (tenant name, 'running' or 'waiting', demand if running)
+        self.seq = 0
+        self.decisions = 0  # Cloudlets started by fair-share passes
+
+    def tenant(self, name: str) -> Tenant:
+        tenant = self.tenants.get(name)
+        if tenant is None:
+            tenant = self.tenants[name] = Tenant(name)
+        return tenant
+
+    def configure(self, name: str, weight: Optional[float] = None, quota: Optional[Dict[str, float]] = None) -> dict:
+        """Set a tenant's weight and/or quota (an empty quota lifts it); returns its settings."""
+        if weight is not None and not weight > 0:
+            raise ValueError("weight must be positive")
+        if quota is not None:
+            unknown = set(quota) - set(RESOURCES)
+            if unknown:
+                raise ValueError(f"unknown quota resources: {', '.join(sorted(unknown))}")
+            if any(not amount >= 0 for amount in quota.values()):
+                raise ValueError("quota amounts must be non-negative")
+        tenant = self.tenant(name)
+        if weight is not None:
+            tenant.weight = float(weight)
+        if quota is not None:
+            tenant.quota = {r: float(quota[r]) for r in RESOURCES if r in quota}
+            tenant.limit = np.array([tenant.quota.get(r, np.inf) for r in RESOURCES])
+        if tenant.waiting:
+            self._push(tenant)
+        return {'tenant': name, 'weight': tenant.weight, 'quota': dict(tenant.quota)}
+
+    def set_capacity(self, capacity: Dict[str, float]) -> None:
+        """Track the fleet's capacity; when VMs were added, removed or resized, recompute every share."""
+        capacity = np.array([capacity[r] for r in RESOURCES], dtype=float)
+        if np.array_equal(capacity, self.capacity):
+            return
+        self.capacity = capacity
+        self.heap = []
+        for tenant in self.tenants.values():
+            self._reshare(tenant)
+
+    def update(self, cloudlet) -> None:
+        status = cloudlet.status.name
+        state = 'running' if status == 'ACTIVE' else 'waiting' if status in ('WAITING', 'PENDING') else None
+        old = self.where.get(cloudlet.id)
+        if old is not None and old[:2] == (cloudlet.tenant, state):
+            return
+        if old is not None:
+            self.remove(cloudlet.id)
+        if state is None:
+            return
+        tenant = self.tenant(cloudlet.tenant)
+        demand = demand_vector(cloudlet) if state == 'running' else None
+        self.where[cloudlet.id] = (tenant.name, state, demand)
+        if state == 'running':
+            tenant.usage += demand
+            tenant.running += 1
+            self._reshare(tenant)
+        else:
+            tenant.waiting[cloudlet.id] = cloudlet
+            if cloudlet.preemptions:
+                tenant.waiting.move_to_end(cloudlet.id, last=False)  # Resumes first, as in the pending queue
+            if len(tenant.waiting) == 1:
+                self._push(tenant)
+
+    def remove(self, cloudlet_id: str) -> None:
+        old = self.where.pop(cloudlet_id, None)
+        if old is None:
+            return
+        name, state, demand = old
+        tenant = self.tenants[name]
+        if state == 'running':
+            tenant.usage -= demand
+            tenant.running -= 1
+            self._reshare(tenant)
+        else:
+            del tenant.waiting[cloudlet_id]
+        if tenant.idle():
+            del self.tenants[name]
+
+    def _reshare(self, tenant: Tenant) -> None:
+        fractions = np.divide(tenant.usage, self.capacity, out=np.zeros(len(RESOURCES)), where=self.capacity > 0)
+        i = int(np.argmax(fractions))
+        tenant.share = float(fractions[i])
+        tenant.dominant = RESOURCES[i] if tenant.share > 0 else None
+        if tenant.waiting:
+            self._push(tenant)
+
+    def _push(self, tenant: Tenant) -> None:
+        self.seq += 1
+        tenant.entry = self.seq
+        heapq.heappush(self.heap, (tenant.share / tenant.weight, self.seq, tenant.name))
+        if len(self.heap) > 2 * len(self.tenants) + 64:
+            # Outside the 'drf' policy nothing pops, so drop the stale entries now and then
+            self.heap = [entry for entry in self.heap if self._live(entry)]
+            heapq.heapify(self.heap)
+
+    def _live(self, entry) -> bool:
+        tenant = self.tenants.get(entry[2])
+        return tenant is not None and tenant.entry == entry[1] and bool(tenant.waiting)
+
+    def schedule(self, start: Callable) -> int:
+        """
+        One fair-share pass: offer the oldest waiting cloudlet of the tenant with
+        the lowest weighted dominant share to start(cloudlet), which places it
+        and returns True or returns False if it fits nowhere. Repeats until no
+        tenant's next cloudlet can start; returns how many did.
+        """
+        passed = []
+        started = 0
+        while self.heap:
+            entry = heapq.heappop(self.heap)
+            if not self._live(entry):
+                continue
+            tenant = self.tenants[entry[2]]
+            cloudlet = next(iter(tenant.waiting.values()))
+            if np.any(tenant.usage + demand_vector(cloudlet) > tenant.limit) or not start(cloudlet):
+                passed.append(tenant)
+                continue
+            # start() recorded the cloudlet running, which re-keyed the tenant by its new share
+            started += 1
+        self.decisions += started
+        for tenant in passed:
+            if tenant.waiting and tenant.name in self.tenants:
+                self._push(tenant)
+        return started
+
+    def metrics(self) -> dict:
+        return {
+            'capacity': dict(zip(RESOURCES, self.capacity.tolist())),
+            'decisions': self.decisions,
+            'tenants': {name: tenant.to_dict() for name, tenant in sorted(self.tenants.items())},
+        }
+
+
+def merge_metrics(parts: Iterable[dict]) -> dict:
+    """Sum per-tenant usage over several partitions and recompute the dominant shares fleet-wide."""
+    capacity = dict.fromkeys(RESOURCES, 0.0)
+    decisions = 0
+    tenants: Dict[str, dict] = {}
+    for part in parts:
+        decisions += part['decisions']
+        for resource, amount in part['capacity'].items():
+            capacity[resource] += amount
+        for name, stats in part['tenants'].items():
+            into = tenants.setdefault(name, {'weight': stats['weight'], 'quota': stats['quota'],
+                                             'usage': dict.fromkeys(RESOURCES, 0.0), 'running': 0, 'waiting': 0})
+            into['running'] += stats['running']
+            into['waiting'] += stats['waiting']
+            for resource, amount in stats['usage'].items():
+                into['usage'][resource] += amount
+    for stats in tenants.values():
+        fractions = {r: stats['usage'][r] / capacity[r] if capacity[r] else 0.0 for r in RESOURCES}
+        dominant = max(RESOURCES, key=fractions.get)
+        stats['dominant_share'] = fractions[dominant]
+        stats['dominant_resource'] = dominant if fractions[dominant] > 0 else None
+    return {'capacity': capacity, 'decisions': decisions, 'tenants': dict(sorted(tenants.items()))}
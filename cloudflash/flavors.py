@@ -0,0 +1,114 @@
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from placement import RESOURCES
+
+
+class VMFlavor:
+    """A named VM size the autoscaler can provision."""
+
+    def __init__(self, name, cpu, ram, storage, bandwidth=1000, gpu=0):
+        self.name = name
+        self.cpu = cpu
+        self.ram = ram
+        self.storage = storage
+        self.bandwidth = bandwidth
+        self.gpu = gpu
+
+    def capacity(self) -> np.ndarray:
+        return np.array([self.cpu, self.ram, self.storage, self.bandwidth, self.gpu], dtype=float)
+
+    def to_dict(self) -> dict:
+        return {'name': self.name, 'cpu': self.cpu, 'ram': self.ram, 'storage': self.storage,
+                'bandwidth': self.bandwidth, 'gpu': self.gpu}
+
+    def __repr__(self):
+        return f"VMFlavor({self.name})"
+
+
+FLAVOR_CATALOG: List[VMFlavor] = [
+    VMFlavor('small', cpu=2, ram=4, storage=50, bandwidth=500),
+    VMFlavor('medium', cpu=4, ram=8, storage=100, bandwidth=1000),
+    VMFlavor('large', cpu=8, ram=16, storage=200, bandwidth=2000),
+    VMFlavor('xlarge', cpu=16, ram=64, storage=500, bandwidth=5000),
+    VMFlavor('gpu-medium', cpu=4, ram=16, storage=100, bandwidth=1000, gpu=1),
+    VMFlavor('gpu-large', cpu=8, ram=32, storage=250, bandwidth=2000, gpu=2),
+]
+
+# Flavor used when scaling is needed but there is no demand shape to size against
+DEFAULT_FLAVOR = 'medium'
+
+
+def get_flavor(name: str, catalog: Optional[List[VMFlavor]] = None) -> Optional[VMFlavor]:
+    return next((f for f in (catalog or FLAVOR_CATALOG) if f.name == name), None)
+
+
+class DemandItem:
+    """Cloudlet-shaped demand that is not a real cloudlet (e.g. forecast headroom)."""
+
+    def __init__(self, cpu=0, ram=0, storage=0, bandwidth=0, gpu=0, sla_priority=0, new_vm_only=True):
+        self.cpu = cpu
+        self.ram = ram
+        self.storage = storage
+        self.bandwidth = bandwidth
+        self.gpu = gpu
+        self.sla_priority = sla_priority
+        self.new_vm_only = new_vm_only  # Never packed into existing free capacity
+
+
+def forecast_demand(predicted: Dict[str, float], totals: Dict[str, float],
+                    targets: Dict[str, float]) -> Dict[str, float]:
+    """
+    Extra capacity needed so that predicted utilization stays under target.
+
+    predicted holds utilization percentages per resource (as produced by the
+    predictive scaler), totals the current fleet capacity and targets the
+    scale-up thresholds as fractions.
+    """
+    extra = {}
+    for key in RESOURCES:
+        if key not in predicted or key not in targets:
+            continue
+        used = predicted[key] / 100.0 * totals.get(key, 0)
+        needed = used / targets[key] - totals.get(key, 0) if targets[key] > 0 else 0
+        if needed > 0:
+            extra[key] = needed
+    return extra
+
+
+class SizingPlanner:
+    """
+    Chooses the smallest mix of flavors that covers pending demand plus
+    forecast headroom, within the free memory-page budget.
+
+    Pending cloudlets that fit on existing VMs need no new capacity, so the
+    plan is produced by the batch placer packing the pending set (and the
+    forecast, split into flavor-sized chunks) over the current fleet with
+    new VMs drawn from the flavor catalog.
+    """
+
+    def __init__(self, placer, catalog: Optional[List[VMFlavor]] = None):
+        self.placer = placer
+        self.catalog = catalog or FLAVOR_CATALOG
+
+    def _forecast_items(self, extra: Dict[str, float]) -> List[DemandItem]:
+        if not extra:
+            return []
+        vector = np.array([extra.get(r, 0.0) for r in RESOURCES])
+        largest = np.max([f.capacity() for f in self.catalog], axis=0)
+        ratio = np.where(largest > 0, vector / np.where(largest > 0, largest, 1), 0)
+        chunks = max(1, math.ceil(float(ratio.max())))
+        chunk = vector / chunks
+        # Round up so the chunks together never cover less than the forecast
+        return [DemandItem(*[math.ceil(v) for v in chunk]) for _ in range(chunks)]
+
+    def plan(self, pending, engine, free_pages: int, page_size: int = 1,
+             max_vms: int = 10, extra: Optional[Dict[str, float]] = None) -> List[VMFlavor]:
+        items = list(pending) + self._forecast_items(extra or {})
+        if not items or max_vms <= 0:
+            return []
+        plan = self.placer.plan(items, engine, free_pages, page_size,
+                                allow_new_vms=True, max_new_vms=max_vms)
+        return plan.new_vms
@@ -0,0 +1,342 @@
+"""
+HTTP / Socket.IO load generator for a running CloudFlash server.
+
+Submits cloudlets over REST with a configurable arrival process while a
+growing number of simulated dashboard clients stay subscribed to
+`metrics_update`, and probes `GET /api/metrics` latency at the same time.
+
+Usage:
+    python loadtest.py --spawn                               # start app.py and test it
+    python loadtest.py --url http://localhost:5000 --rate 200 --subscribers 0,10,100
+    python loadtest.py --arrival burst --burst-size 50 --duration 30 --output load.json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+
+try:
+    import socketio
+except ImportError:  # pragma: no cover - subscribers are skipped without python-socketio
+    socketio = None
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - server CPU is not reported without psutil
+    psutil = None
+
+ARRIVAL_PROCESSES = ['constant', 'poisson', 'burst']
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def latency_summary(samples, prefix):
+    return {
+        f'{prefix}_p50_ms': percentile(samples, 50) * 1000,
+        f'{prefix}_p95_ms': percentile(samples, 95) * 1000,
+        f'{prefix}_p99_ms': percentile(samples, 99) * 1000,
+    }
+
+
+def arrival_gaps(process, rate, burst_size, rng):
+    """Yield the delay before each submission (or burst) for the arrival process."""
+    while True:
+        if process == 'poisson':
+            yield rng.expovariate(rate), 1
+        elif process == 'burst':
+            yield burst_size / rate, burst_size
+        else:  # constant
+            yield 1.0 / rate, 1
+
+
+def cloudlet_payload(rng):
+    return {
+        'name': f"load-{rng.randrange(1 << 30):x}",
+        'cpu': rng.randint(1, 2),
+        'ram': rng.randint(1, 2),
+        'storage': rng.randint(5, 20),
+        'bandwidth': rng.randint(50, 100),
+        'gpu': 1 if rng.random() < 0.1 else 0,
+        'sla_priority': rng.randint(1, 3),
+        'deadline': 120,
+        'execution_time': rng.uniform(1, 10),
+    }
+
+# --- LOAD COMPONENTS ---
+
+class Subscriber:
+    """A simulated dashboard client that records when each broadcast arrives."""
+
+    def __init__(self, url):
+        self.url = url
+        self.client = socketio.Client(reconnection=False)
+        self.receipts = []  # (generated_at, received_at)
+        self.client.on('metrics_update', self._on_metrics)
+
+    def _on_metrics(self, metrics):
+        received = time.time()
+        if isinstance(metrics, dict) and metrics.get('generated_at'):
+            self.receipts.append((metrics['generated_at'], received))
+
+    def connect(self):
+        self.client.connect(self.url, wait_timeout=10)
+
+    def disconnect(self):
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass
+
+
+class CpuSampler(threading.Thread):
+    """Samples the server process CPU usage (including shard workers) once per second."""
+
+    def __init__(self, pid):
+        super().__init__(daemon=True)
+        self.process = psutil.Process(pid)
+        self.samples = []
+        self.stop_event = threading.Event()
+
+    def _processes(self):
+        try:
+            return [self.process] + self.process.children(recursive=True)
+        except psutil.Error:
+            return [self.process]
+
+    def run(self):
+        tracked = {p.pid: p for p in self._processes()}
+        for p in tracked.values():
+            p.cpu_percent(interval=None)
+        while not self.stop_event.wait(1.0):
+            total = 0.0
+            for p in self._processes():
+                p = tracked.setdefault(p.pid, p)
+                try:
+                    total += p.cpu_percent(interval=None)
+                except psutil.Error:
+                    continue
+            if not self.process.is_running():
+                break
+            self.samples.append(total)
+
+
+class LoadTest:
+    def __init__(self, url, rate, arrival, burst_size, workers, probe_rate, seed):
+        self.url = url.rstrip('/')
+        self.rate = rate
+        self.arrival = arrival
+        self.burst_size = burst_size
+        self.workers = workers
+        self.probe_rate = probe_rate
+        self.rng = random.Random(seed)
+        self._local = threading.local()
+
+    def _session(self):
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _submit(self, payload, results):
+        t0 = time.perf_counter()
+        try:
+            resp = self._session().post(f"{self.url}/api/cloudlets", json=payload, timeout=30)
+            results.append((time.perf_counter() - t0, resp.status_code))
+        except requests.RequestException:
+            results.append((time.perf_counter() - t0, None))
+
+    def _probe_metrics(self, stop_event, samples):
+        session = requests.Session()
+        while not stop_event.is_set():
+            t0 = time.perf_counter()
+            try:
+                session.get(f"{self.url}/api/metrics", timeout=30).raise_for_status()
+                samples.append(time.perf_counter() - t0)
+            except requests.RequestException:
+                pass
+            stop_event.wait(1.0 / self.probe_rate)
+
+    def run_stage(self, n_subscribers, duration, server_pid=None):
+        subscribers = []
+        if n_subscribers and socketio is None:
+            print("python-socketio is not installed; running without subscribers")
+        elif n_subscribers:
+            for _ in range(n_subscribers):
+                sub = Subscriber(self.url)
+                sub.connect()
+                subscribers.append(sub)
+
+        sampler = CpuSampler(server_pid) if server_pid and psutil else None
+        if sampler:
+            sampler.start()
+
+        submit_results = []
+        probe_samples = []
+        stop_event = threading.Event()
+        probe = threading.Thread(target=self._probe_metrics, args=(stop_event, probe_samples), daemon=True)
+        probe.start()
+
+        start = time.perf_counter()
+        next_at = start
+        gaps = arrival_gaps(self.arrival, self.rate, self.burst_size, self.rng)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                gap, count = next(gaps)
+                next_at += gap
+                if next_at - start > duration:
+                    break
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                for _ in range(count):
+                    pool.submit(self._submit, cloudlet_payload(self.rng), submit_results)
+        elapsed = time.perf_counter() - start
+
+        stop_event.set()
+        probe.join()
+        if sampler:
+            sampler.stop_event.set()
+            sampler.join()
+        for sub in subscribers:
+            sub.disconnect()
+
+        ok = [lat for lat, status in submit_results if status == 201]
+        result = {
+            'subscribers': n_subscribers,
+            'duration_s': elapsed,
+            'submitted': len(submit_results),
+            'accepted': len(ok),
+            'errors': len(submit_results) - len(ok),
+            'throughput_per_sec': len(ok) / elapsed if elapsed > 0 else 0.0,
+        }
+        result.update(latency_summary(ok, 'submit'))
+        result.update(latency_summary(probe_samples, 'metrics'))
+        result.update(self._fanout_summary(subscribers))
+        if sampler and sampler.samples:
+            result['server_cpu_avg'] = sum(sampler.samples) / len(sampler.samples)
+            result['server_cpu_max'] = max(sampler.samples)
+        return result
+
+    @staticmethod
+    def _fanout_summary(subscribers):
+        """Lag from payload generation to receipt, and spread across subscribers."""
+        lags = []
+        by_broadcast = {}
+        for sub in subscribers:
+            for generated_at, received in sub.receipts:
+                lags.append(received - generated_at)
+                by_broadcast.setdefault(generated_at, []).append(received)
+        spreads = [max(times) - min(times) for times in by_broadcast.values() if len(times) > 1]
+        summary = latency_summary(lags, 'fanout_lag')
+        summary.update(latency_summary(spreads, 'fanout_spread'))
+        summary['broadcasts'] = len(by_broadcast)
+        return summary
+
+# --- SERVER HELPERS ---
+
+def spawn_server(port, shards=1, server='flask'):
+    app_dir = Path(__file__).parent
+    env = dict(os.environ, CLOUDFLASH_SHARDS=str(shards))
+    command = ['app.py'] if server == 'flask' else ['asgi_app.py', '--host', '127.0.0.1', '--port', str(port)]
+    proc = subprocess.Popen([sys.executable, *command], cwd=str(app_dir), env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{command[0]} exited with code {proc.returncode}")
+        try:
+            if requests.get(f"{url}/health", timeout=1).ok:
+                return proc
+        except requests.RequestException:
+            time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError(f"Timed out waiting for {command[0]} to start")
+
+
+def find_server_pid(url):
+    """Find the PID listening on the URL's port, if psutil can see it."""
+    if psutil is None:
+        return None
+    port = urlparse(url).port or 80
+    try:
+        for conn in psutil.net_connections(kind='tcp'):
+            if conn.status == psutil.CONN_LISTEN and conn.laddr and conn.laddr.port == port:
+                return conn.pid
+    except (psutil.AccessDenied, PermissionError):
+        pass
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CloudFlash HTTP/Socket.IO load test")
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--spawn', action='store_true', help="Start app.py locally for the run")
+    parser.add_argument('--shards', type=int, default=1,
+                        help="With --spawn, run app.py with this many ResourceManager shards")
+    parser.add_argument('--server', choices=['flask', 'asgi'], default='flask',
+                        help="With --spawn, serve with Flask-SocketIO threads or the asyncio ASGI gateway")
+    parser.add_argument('--server-pid', type=int, help="PID of the server for CPU sampling")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds per stage")
+    parser.add_argument('--rate', type=float, default=50.0, help="Mean cloudlet submissions per second")
+    parser.add_argument('--arrival', choices=ARRIVAL_PROCESSES, default='poisson')
+    parser.add_argument('--burst-size', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=16, help="Concurrent REST clients")
+    parser.add_argument('--subscribers', default='0,10,50',
+                        help="Comma-separated Socket.IO subscriber counts, one stage each")
+    parser.add_argument('--probe-rate', type=float, default=5.0, help="GET /api/metrics per second")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn:
+        server = spawn_server(urlparse(args.url).port or 5000, args.shards, args.server)
+        pid = server.pid
+    else:
+        pid = args.server_pid or find_server_pid(args.url)
+
+    test = LoadTest(args.url, args.rate, args.arrival, args.burst_size,
+                    args.workers, args.probe_rate, args.seed)
+    stages = []
+    try:
+        for n in [int(v) for v in args.subscribers.split(',') if v]:
+            result = test.run_stage(n, args.duration, server_pid=pid)
+            stages.append(result)
+            print(f"subscribers={n:<5} throughput={result['throughput_per_sec']:.1f}/s "
+                  f"submit p50/p99={result['submit_p50_ms']:.1f}/{result['submit_p99_ms']:.1f}ms "
+                  f"metrics p50/p99={result['metrics_p50_ms']:.1f}/{result['metrics_p99_ms']:.1f}ms "
+                  f"fan-out lag p99={result['fanout_lag_p99_ms']:.1f}ms "
+                  f"cpu avg={result.get('server_cpu_avg', 0):.0f}% errors={result['errors']}")
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {'url': args.url, 'arrival': args.arrival, 'rate': args.rate, 'shards': args.shards,
+                         'server': args.server, 'workers': args.workers, 'cpu_count': os.cpu_count(), 'timestamp': time.time()},
+                'stages': stages,
+            }, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
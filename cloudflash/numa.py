@@ -0,0 +1,157 @@
+import threading
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional
+
+
+class NumaNode:
+    """One NUMA node of a host: a contiguous range of pages and a share of its vCPUs."""
+
+    def __init__(self, node_id: int, first_page: int, pages: int, cores: Optional[float] = None):
+        self.id = node_id
+        self.first_page = first_page
+        self.pages = pages
+        self.cores = cores  # vCPUs on this node (None: unbounded)
+        self.cores_used = 0.0
+
+    @property
+    def page_range(self) -> range:
+        return range(self.first_page, self.first_page + self.pages)
+
+    @property
+    def cores_free(self) -> float:
+        return float('inf') if self.cores is None else self.cores - self.cores_used
+
+
+class Topology:
+    """
+    NUMA layout of a host: the page space and the vCPUs split across nodes.
+
+    A VM gets a home node when it reserves memory, chosen so that both its
+    RAM and its vCPUs fit there (most free memory first). Its pages come from
+    the home node and its vCPUs are bound there, spilling onto other nodes only
+    when the home node runs short. A cloudlet whose pages sit off its VM's
+    home node runs slower: remote_penalty is the extra runtime, as a fraction,
+    of a cloudlet whose memory is all remote.
+    """
+
+    def __init__(self, total_pages: int, nodes: int = 1, align: int = 1,
+                 cores: Optional[float] = None, remote_penalty: float = 0.5):
+        nodes = max(1, min(int(nodes), total_pages or 1))
+        # Node boundaries fall on align pages (a huge page) where the host is large enough
+        per_node = total_pages // nodes
+        if per_node >= align:
+            per_node -= per_node % align
+        self.nodes: List[NumaNode] = []
+        for i in range(nodes):
+            first = i * per_node
+            pages = total_pages - first if i == nodes - 1 else per_node
+            self.nodes.append(NumaNode(i, first, pages))
+        self._firsts = [node.first_page for node in self.nodes]
+        self.remote_penalty = remote_penalty
+        self.prefer_local = True  # False places pages first-fit across nodes (the flat layout)
+        self.bindings: Dict[str, Dict[int, float]] = {}  # VM ID -> node -> vCPUs bound there
+        self.lock = threading.Lock()
+        self.set_cores(cores)
+
+    def set_cores(self, cores: Optional[float]) -> None:
+        """Split the host's vCPUs evenly across the nodes (None: unbounded)."""
+        with self.lock:
+            for node in self.nodes:
+                node.cores = None if cores is None else cores / len(self.nodes)
+
+    def node_of(self, page: int) -> int:
+        return bisect_right(self._firsts, page) - 1
+
+    def choose_node(self, pages: int, cpu: float, free_pages: List[int]) -> int:
+        """Home node for a new VM: one with room for its pages and vCPUs, most free pages first."""
+        with self.lock:
+            if not self.prefer_local:
+                return 0
+            fits = [node.id for node in self.nodes
+                    if free_pages[node.id] >= pages and node.cores_free >= cpu]
+            candidates = fits or [node.id for node in self.nodes]
+            return max(candidates, key=lambda n: (free_pages[n], self.nodes[n].cores_free, -n))
+
+    def bind(self, vm_id: str, cpu: float, home: int) -> Dict[int, float]:
+        """Bind a VM's vCPUs to its home node, spilling what does not fit onto the nodes with most free vCPUs."""
+        with self.lock:
+            binding = {}
+            order = [home] + sorted((n.id for n in self.nodes if n.id != home),
+                                    key=lambda n: -self.nodes[n].cores_free)
+            left = cpu
+            for n in order:
+                take = min(left, max(0.0, self.nodes[n].cores_free))
+                if take > 0:
+                    binding[n] = take
+                    left -= take
+                if left <= 0:
+                    break
+            if left > 0:
+                # Overcommitted vCPUs stay on the home node
+                binding[home] = binding.get(home, 0.0) + left
+            for n, cores in binding.items():
+                self.nodes[n].cores_used += cores
+            self.bindings[vm_id] = binding
+            return binding
+
+    def unbind(self, vm_id: str) -> None:
+        with self.lock:
+            for n, cores in self.bindings.pop(vm_id, {}).items():
+                self.nodes[n].cores_used -= cores
+
+    def remote_share(self, pages: Iterable[int], home: Optional[int]) -> float:
+        """Share of pages that live off the home node."""
+        pages = list(pages)
+        if home is None or not pages or len(self.nodes) == 1:
+            return 0.0
+        return sum(1 for page in pages if self.node_of(page) != home) / len(pages)
+
+    def penalty(self, pages: Iterable[int], home: Optional[int], seconds: float) -> float:
+        """Extra runtime of a cloudlet running for seconds with pages on a VM homed at home."""
+        return seconds * self.remote_share(pages, home) * self.remote_penalty
+
+    def metrics(self, vms: Iterable, free_pages: List[int]) -> dict:
+        """Per-node capacity and locality: the share of cloudlet pages on their VM's home node."""
+        stats = [{'id': node.id, 'pages': node.pages, 'free_pages': free_pages[node.id],
+                  'cores': node.cores, 'cores_used': node.cores_used, 'vms': 0,
+                  'local_pages': 0, 'remote_pages': 0, 'reserved_local': 0, 'reserved_remote': 0}
+                 for node in self.nodes]
+        for vm in vms:
+            if vm.numa_node is None:
+                continue
+            node = stats[vm.numa_node]
+            node['vms'] += 1
+            with vm.lock:
+                for start, count in vm.memory.blocks:
+                    key = 'reserved_local' if self.node_of(start) == vm.numa_node else 'reserved_remote'
+                    node[key] += count
+                for owner in vm.memory.owned:
+                    for page in vm.memory.pages_of(owner):
+                        node['local_pages' if self.node_of(page) == vm.numa_node else 'remote_pages'] += 1
+        return summarize(stats, self.remote_penalty)
+
+
+def summarize(nodes: List[dict], remote_penalty: float) -> dict:
+    """Add locality ratios to per-node counters (shared with the partition routers)."""
+    local = remote = 0
+    for node in nodes:
+        used = node['local_pages'] + node['remote_pages']
+        node['locality'] = node['local_pages'] / used if used else 1.0
+        reserved = node['reserved_local'] + node['reserved_remote']
+        node['reservation_locality'] = node['reserved_local'] / reserved if reserved else 1.0
+        local += node['local_pages']
+        remote += node['remote_pages']
+    return {
+        'nodes': nodes,
+        'locality': local / (local + remote) if local + remote else 1.0,
+        'remote_penalty': remote_penalty,
+    }
+
+
+def merge_metrics(parts: List[dict]) -> dict:
+    """Concatenate Topology.metrics() of several partitions; node IDs gain the partition as a prefix."""
+    nodes = []
+    for part_id, metrics in parts:
+        for node in metrics['nodes']:
+            nodes.append({**node, 'id': f"{part_id}:{node['id']}"})
+    return summarize(nodes, parts[0][1]['remote_penalty'] if parts else 0.0)
@@ -0,0 +1,178 @@
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Resource dimensions, in the column order used by every array in this module
+RESOURCES = ('cpu', 'ram', 'storage', 'bandwidth', 'gpu')
+
+# Relative importance of each resource for the weighted policies
+DEFAULT_WEIGHTS = {'cpu': 0.35, 'ram': 0.30, 'storage': 0.10, 'bandwidth': 0.10, 'gpu': 0.15}
+
+POLICIES = ('dominant_fit', 'cosine_alignment', 'weighted_slack', 'least_loaded')
+
+
+def demand_vector(cloudlet) -> np.ndarray:
+    return np.array([cloudlet.cpu, cloudlet.ram, cloudlet.storage,
+                     cloudlet.bandwidth, cloudlet.gpu], dtype=float)
+
+
+def capacity_vector(vm) -> np.ndarray:
+    # CPU and GPU up to the VM's overcommit ratios: demand beyond the cores is time-sliced
+    return np.array([vm.cpu_allocatable, vm.ram_capacity, vm.storage_capacity,
+                     vm.bandwidth_capacity, vm.gpu_allocatable], dtype=float)
+
+
+def usage_vector(vm) -> np.ndarray:
+    return np.array([vm.cpu_used, vm.ram_used, vm.storage_used,
+                     vm.bandwidth_used, vm.gpu_used], dtype=float)
+
+
+class PlacementEngine:
+    """
+    Vectorized VM scoring for cloudlet placement.
+
+    VM capacity and usage are kept as (VMs x 5) arrays that are updated
+    incrementally through VM usage listeners, so feasibility and scoring for
+    a cloudlet is a single NumPy pass over all VMs instead of a Python loop.
+    Rows follow the order in which VMs were registered.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, initial_rows: int = 64):
+        weights = weights or DEFAULT_WEIGHTS
+        self.weights = np.array([weights.get(r, 0.0) for r in RESOURCES], dtype=float)
+        self.capacity = np.zeros((initial_rows, len(RESOURCES)))
+        self.used = np.zeros((initial_rows, len(RESOURCES)))
+        self.cloudlet_count = np.zeros(initial_rows, dtype=np.int64)
+        self.strict = np.zeros(initial_rows, dtype=bool)
+        self.vms: List = []  # Row -> VM
+        self.row_of: Dict[str, int] = {}  # VM ID -> row
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.vms)
+
+    def _grow(self):
+        rows = max(1, len(self.capacity)) * 2
+        for name in ('capacity', 'used'):
+            grown = np.zeros((rows, len(RESOURCES)))
+            grown[:len(self.vms)] = getattr(self, name)[:len(self.vms)]
+            setattr(self, name, grown)
+        count = np.zeros(rows, dtype=np.int64)
+        count[:len(self.vms)] = self.cloudlet_count[:len(self.vms)]
+        self.cloudlet_count = count
+        strict = np.zeros(rows, dtype=bool)
+        strict[:len(self.vms)] = self.strict[:len(self.vms)]
+        self.strict = strict
+
+    def add_vm(self, vm) -> None:
+        with self.lock:
+            if vm.id in self.row_of:
+                return
+            if len(self.vms) == len(self.capacity):
+                self._grow()
+            row = len(self.vms)
+            self.capacity[row] = capacity_vector(vm)
+            self.used[row] = usage_vector(vm)
+            self.cloudlet_count[row] = len(vm.cloudlets)
+            self.strict[row] = vm.isolation_level == 'STRICT'
+            self.vms.append(vm)
+            self.row_of[vm.id] = row
+        vm.usage_listeners.append(self.on_usage)
+
+    def remove_vm(self, vm) -> None:
+        with self.lock:
+            row = self.row_of.pop(vm.id, None)
+            if row is None:
+                return
+            n = len(self.vms)
+            # Shift later rows up so row order keeps matching registration order
+            for arr in (self.capacity, self.used, self.cloudlet_count, self.strict):
+                arr[row:n - 1] = arr[row + 1:n]
+                arr[n - 1] = 0
+            del self.vms[row]
+            for i in range(row, n - 1):
+                self.row_of[self.vms[i].id] = i
+        if self.on_usage in vm.usage_listeners:
+            vm.usage_listeners.remove(self.on_usage)
+
+    def update_capacity(self, vm) -> None:
+        """Refresh a VM's capacity row after it was resized."""
+        with self.lock:
+            row = self.row_of.get(vm.id)
+            if row is not None:
+                self.capacity[row] = capacity_vector(vm)
+
+    def on_usage(self, vm, delta, count_delta) -> None:
+        """VM usage listener: apply an allocate/deallocate delta to the VM's row."""
+        with self.lock:
+            row = self.row_of.get(vm.id)
+            if row is None:
+                return
+            self.used[row] += delta
+            self.cloudlet_count[row] += count_delta
+
+    def feasible(self, demand: np.ndarray) -> np.ndarray:
+        """Boolean mask of VMs that can host the demand."""
+        n = len(self.vms)
+        free = self.capacity[:n] - self.used[:n]
+        mask = np.all(free >= demand, axis=1)
+        # Security filter: strict isolation VMs host a single cloudlet at a time
+        mask &= ~(self.strict[:n] & (self.cloudlet_count[:n] > 0))
+        return mask
+
+    def scores(self, demand: np.ndarray, policy: str) -> np.ndarray:
+        """Cost of placing the demand on each VM for the policy (lower is better)."""
+        n = len(self.vms)
+        cap = self.capacity[:n]
+        free = cap - self.used[:n]
+        has = cap > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if policy == 'dominant_fit':
+                # Prefer the VM where the cloudlet takes the largest share of the
+                # bottleneck resource that VM has left (tightest dominant fit)
+                share = np.where(free > 0, demand / np.where(free > 0, free, 1), 0.0)
+                return -share.max(axis=1)
+            if policy == 'cosine_alignment':
+                # Align the demand shape with the VM's remaining capacity shape
+                d = np.where(has, demand / np.where(has, cap, 1), 0.0)
+                f = np.where(has, free / np.where(has, cap, 1), 0.0)
+                norms = np.linalg.norm(d, axis=1) * np.linalg.norm(f, axis=1)
+                cos = np.where(norms > 0, (d * f).sum(axis=1) / np.where(norms > 0, norms, 1), 0.0)
+                return -cos
+            if policy == 'least_loaded':
+                util = np.where(has, self.used[:n] / np.where(has, cap, 1), 0.0)
+                return util @ self.weights
+            # weighted_slack: normalized leftover capacity after placement (best fit)
+            slack = np.where(has, (free - demand) / np.where(has, cap, 1), 0.0)
+            return slack @ self.weights
+
+    def candidates(self, cloudlet) -> List:
+        with self.lock:
+            mask = self.feasible(demand_vector(cloudlet))
+            return [self.vms[i] for i in np.flatnonzero(mask)]
+
+    def could_host(self, cloudlet) -> bool:
+        """Whether any VM is large enough for the cloudlet once its current work is done."""
+        with self.lock:
+            n = len(self.vms)
+            return bool(np.all(self.capacity[:n] >= demand_vector(cloudlet), axis=1).any())
+
+    def snapshot(self):
+        """Copies of the free capacity, strict flags and cloudlet counts, plus the row of each VM ID."""
+        with self.lock:
+            n = len(self.vms)
+            return (self.capacity[:n] - self.used[:n], self.strict[:n].copy(),
+                    self.cloudlet_count[:n].copy(), dict(self.row_of))
+
+    def select(self, cloudlet, policy: str = 'weighted_slack'):
+        """Return the best feasible VM for the cloudlet under the policy, or None."""
+        demand = demand_vector(cloudlet)
+        with self.lock:
+            if not self.vms:
+                return None
+            mask = self.feasible(demand)
+            if not mask.any():
+                return None
+            cost = np.where(mask, self.scores(demand, policy), np.inf)
+            return self.vms[int(np.argmin(cost))]
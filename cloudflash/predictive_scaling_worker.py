@@ -1,7 +1,6 @@
 import threading
 import time
 from predictive_scaling import ResourcePredictor
-from core import VM
 
 class PredictiveScaler:
     def __init__(self, manager):
@@ -9,15 +8,14 @@ class PredictiveScaler:
         self.predictor = ResourcePredictor()
         self.interval = 40  # seconds
         self.history = []
-        self.max_predictive_vms = 5
 
     def collect_data(self):
-        metrics = self.manager.get_metrics()
+        utilization = self.manager.utilization()  # Running totals; no full metrics build
         self.history.append({
-            'cpu': metrics['utilization']['cpu'],
-            'ram': metrics['utilization']['ram'],
-            'storage': metrics['utilization']['storage'],
-            'bandwidth': sum(vm['bandwidth_used'] for vm in metrics['vms']) / sum(vm['bandwidth_capacity'] for vm in metrics['vms']) * 100 if metrics['vms'] else 0,
+            'cpu': utilization['cpu'],
+            'ram': utilization['ram'],
+            'storage': utilization['storage'],
+            'bandwidth': utilization['bandwidth'],
             'timestamp': time.time()
         })
 
@@ -38,22 +36,14 @@ class PredictiveScaler:
             f"[PREDICTIVE-SCALER] CPU: {predicted_cpu:.1f}%, RAM: {predicted_ram:.1f}%, Storage: {predicted_storage:.1f}%, Bandwidth: {predicted_bandwidth:.1f}%"
         )
 
-        # Check total VMs before scaling
-        current_vm_count = len(self.manager.get_vms())
-        if current_vm_count >= self.max_predictive_vms:
-            self.manager.log(f"[PREDICTIVE-SCALER] Max VM cap ({self.max_predictive_vms}) reached. Skipping scale-up.")
-            return
-
-        if (
-            predicted_cpu > 80 or 
-            predicted_ram > 75 or 
-            predicted_storage > 85 or 
-            predicted_bandwidth > 80
-        ):
-            if len(self.manager.vms) < self.max_predictive_vms:
-                new_vm = VM(cpu=4, ram=8, storage=100, bandwidth=1000, gpu=1)
-                self.manager.add_vm(new_vm)
-                self.manager.log(f"[PREDICTIVE-SCALER] Scaled up with new VM {new_vm.id}")
+        # The scaling controller owns bounds, hysteresis and rate limiting; the
+        # forecast is one of its inputs rather than a separate scale-up path
+        self.manager.scaling_controller.submit_forecast({
+            'cpu': predicted_cpu,
+            'ram': predicted_ram,
+            'storage': predicted_storage,
+            'bandwidth': predicted_bandwidth
+        })
 
     def start(self):
         def run():
@@ -0,0 +1,157 @@
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from placement import capacity_vector, demand_vector, usage_vector
+
+
+class VictimIndex:
+    """
+    Running cloudlets by SLA priority and VM, the only ones preemption may
+    suspend. The ResourceManager keeps it current from _record(), so finding
+    the lower-priority work on each VM never scans the cloudlet list.
+    """
+
+    def __init__(self):
+        self.by_priority: Dict[int, Dict[str, set]] = {}  # Priority -> VM ID -> running cloudlet IDs
+        self.where: Dict[str, tuple] = {}  # Cloudlet ID -> (priority, VM ID)
+
+    def update(self, cloudlet) -> None:
+        running = cloudlet.status.name == 'ACTIVE' and cloudlet.vm_id is not None
+        key = (cloudlet.sla_priority, cloudlet.vm_id) if running else None
+        old = self.where.get(cloudlet.id)
+        if old == key:
+            return
+        if old is not None:
+            self.remove(cloudlet.id)
+        if key is not None:
+            self.by_priority.setdefault(key[0], {}).setdefault(key[1], set()).add(cloudlet.id)
+            self.where[cloudlet.id] = key
+
+    def remove(self, cloudlet_id: str) -> None:
+        key = self.where.pop(cloudlet_id, None)
+        if key is None:
+            return
+        priority, vm_id = key
+        vms = self.by_priority[priority]
+        vms[vm_id].discard(cloudlet_id)
+        if not vms[vm_id]:
+            del vms[vm_id]
+            if not vms:
+                del self.by_priority[priority]
+
+    def below(self, priority: int) -> Dict[str, List[str]]:
+        """VM ID -> IDs of the cloudlets running there with a priority below the given one."""
+        found: Dict[str, List[str]] = {}
+        for level, vms in self.by_priority.items():
+            if level < priority:
+                for vm_id, cloudlet_ids in vms.items():
+                    found.setdefault(vm_id, []).extend(cloudlet_ids)
+        return found
+
+
+class PreemptionPlan:
+    """Running cloudlets to suspend on one VM so a critical cloudlet can start there."""
+
+    def __init__(self, vm, victims):
+        self.vm = vm
+        self.victims = victims
+
+    def cost(self):
+        # Fewest victims, then the least important ones, then the ones with the most work left
+        return (len(self.victims), sum(v.sla_priority for v in self.victims),
+                -sum(v.remaining_execution_time() or 0.0 for v in self.victims))
+
+
+class PreemptionPlanner:
+    """
+    Picks a minimal set of lower-priority victims for a critical cloudlet
+    that fits on no VM as things stand.
+
+    Only VMs the VictimIndex lists as running lower-priority work are looked
+    at. On each, victims are taken lowest priority first, and among equals
+    the one covering most of the remaining shortfall (normalized by the VM's
+    capacity), until the critical cloudlet fits; a last pass drops any victim
+    the rest already make room without. A strict-isolation VM only qualifies
+    if every cloudlet on it can be suspended. The cheapest VM's plan wins.
+    """
+
+    def plan(self, cloudlet, index: VictimIndex, vms, cloudlets, priority: Optional[int] = None,
+             eligible: Optional[Callable] = None) -> Optional[PreemptionPlan]:
+        """
+        Cheapest plan for the cloudlet, or None. Victims run below priority (the
+        cloudlet's own by default); eligible, if given, further filters them.
+        """
+        demand = demand_vector(cloudlet)
+        best = None
+        for vm_id, victim_ids in index.below(cloudlet.sla_priority if priority is None else priority).items():
+            vm = vms.get(vm_id)
+            if vm is None:
+                continue
+            victims = [v for v in (cloudlets.get(cid) for cid in victim_ids)
+                       if v is not None and (eligible is None or eligible(v))]
+            if vm.isolation_level == 'STRICT':
+                if len(victims) != len(vm.cloudlets):
+                    continue
+                chosen = victims
+            else:
+                chosen = self._victims(vm, demand, victims)
+            if chosen is None or not np.all(capacity_vector(vm) >= demand):
+                continue
+            candidate = PreemptionPlan(vm, chosen)
+            if best is None or candidate.cost() < best.cost():
+                best = candidate
+        return best
+
+    def _victims(self, vm, demand, victims) -> Optional[List]:
+        capacity = capacity_vector(vm)
+        scale = np.where(capacity > 0, capacity, 1.0)
+        short = np.maximum(demand - (capacity - usage_vector(vm)), 0.0)
+        if not short.any():
+            # Fits on the raw numbers but not in the VM's memory pages: free RAM
+            short[1] = max(demand[1], 1e-9)
+        pool = list(victims)
+        chosen = []
+        left = short.copy()
+        while left.any() and pool:
+            def gain(v):
+                return float((np.minimum(demand_vector(v), left) / scale).sum())
+            victim = min(pool, key=lambda v: (v.sla_priority, -gain(v)))
+            pool.remove(victim)
+            if gain(victim) <= 0:
+                continue
+            chosen.append(victim)
+            left = np.maximum(left - demand_vector(victim), 0.0)
+        if left.any():
+            return None
+        for victim in reversed(list(chosen)):
+            rest = [v for v in chosen if v is not victim]
+            freed = sum((demand_vector(v) for v in rest), np.zeros_like(short))
+            if np.all(freed >= short):
+                chosen = rest
+        return chosen
+
+
+def deadline_summary(stats: Dict[int, dict]) -> Dict[str, dict]:
+    """Start deadlines met and missed per SLA priority, with the miss rate."""
+    summary = {}
+    for priority, counts in sorted(stats.items()):
+        total = counts['met'] + counts['missed']
+        summary[str(priority)] = {**counts, 'miss_rate': counts['missed'] / total if total else 0.0}
+    return summary
+
+
+def merge_metrics(parts: Iterable[dict]) -> dict:
+    """Sum the preemption metrics of several partitions into one."""
+    merged = {'enabled': False, 'preemptions': 0, 'victims': 0, 'promoted': 0, 'failed': 0, 'srpt': 0}
+    deadlines: Dict[int, dict] = {}
+    for part in parts:
+        merged['enabled'] = merged['enabled'] or part['enabled']
+        for key in ('preemptions', 'victims', 'promoted', 'failed', 'srpt'):
+            merged[key] += part[key]
+        for priority, counts in part['deadlines'].items():
+            into = deadlines.setdefault(int(priority), {'met': 0, 'missed': 0})
+            into['met'] += counts['met']
+            into['missed'] += counts['missed']
+    merged['deadlines'] = deadline_summary(deadlines)
+    return merged
@@ -0,0 +1,345 @@
+import base64
+import binascii
+import heapq
+import json
+import time
+from bisect import bisect_left, bisect_right, insort
+from enum import Enum
+from itertools import islice
+from operator import attrgetter
+from typing import Dict
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+RESOURCES = ('cpu', 'ram', 'storage', 'bandwidth', 'gpu')
+
+
+class QueryError(ValueError):
+    """A malformed filter, sort, projection or cursor (the message goes back to the client)."""
+
+
+def _plain(value):
+    return value.name if isinstance(value, Enum) else value
+
+
+# --- INDEX ---
+
+class RowIndex:
+    """
+    Live VMs or cloudlets in insertion order, with posting lists on a few
+    fields that queries filter by equality.
+
+    Every row gets a sequence number when first indexed; the order list and
+    each posting list hold sequence numbers in ascending order, so a scan
+    resumes after a cursor with one bisect and walks only the rows of the
+    smallest matching posting list. The ResourceManager keeps the index
+    current from _record(), under its own lock.
+    """
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)  # Attributes with posting lists
+        self.rows = {}  # seq -> object
+        self.seq_of = {}  # object id -> seq
+        self.keys = {}  # seq -> indexed field values
+        self.order = []  # Live seqs, ascending
+        self.postings = {field: {} for field in self.fields}  # field -> value -> ascending seqs
+        self.next_seq = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, object_id):
+        seq = self.seq_of.get(object_id)
+        return self.rows[seq] if seq is not None else None
+
+    def update(self, obj):
+        """Index a new row, or move an indexed one between posting lists."""
+        key = tuple(_plain(getattr(obj, field)) for field in self.fields)
+        seq = self.seq_of.get(obj.id)
+        if seq is None:
+            seq = self.next_seq
+            self.next_seq += 1
+            self.seq_of[obj.id] = seq
+            self.order.append(seq)
+            # A new seq is the largest one, so appending keeps the lists sorted
+            for field, value in zip(self.fields, key):
+                self.postings[field].setdefault(value, []).append(seq)
+        else:
+            old = self.keys[seq]
+            for field, was, now in zip(self.fields, old, key):
+                if was != now:
+                    self._unpost(field, was, seq)
+                    insort(self.postings[field].setdefault(now, []), seq)
+        self.rows[seq] = obj
+        self.keys[seq] = key
+
+    def remove(self, object_id):
+        seq = self.seq_of.pop(object_id, None)
+        if seq is None:
+            return
+        del self.rows[seq]
+        for field, value in zip(self.fields, self.keys.pop(seq)):
+            self._unpost(field, value, seq)
+        del self.order[bisect_left(self.order, seq)]
+
+    def _unpost(self, field, value, seq):
+        seqs = self.postings[field][value]
+        del seqs[bisect_left(seqs, seq)]
+        if not seqs:
+            del self.postings[field][value]
+
+    def scan(self, equals: Dict[str, set], after: int = -1):
+        """
+        (seq, object) pairs in seq order after the given seq whose indexed
+        fields match equals (field -> accepted values). Walks the union of
+        the smallest field's posting lists and checks the other fields on
+        the stored keys.
+        """
+        sources = [self.order]
+        smallest = None
+        for field, values in equals.items():
+            lists = [self.postings[field][v] for v in values if v in self.postings[field]]
+            size = sum(len(seqs) for seqs in lists)
+            if smallest is None or size < smallest:
+                smallest, sources = size, lists
+        streams = [islice(seqs, bisect_right(seqs, after), None) for seqs in sources]
+        merged = streams[0] if len(streams) == 1 else heapq.merge(*streams)
+        checks = [(self.fields.index(field), values) for field, values in equals.items()]
+        for seq in merged:
+            key = self.keys[seq]
+            if all(key[pos] in values for pos, values in checks):
+                yield seq, self.rows[seq]
+
+
+# --- QUERY SPECS ---
+
+class QuerySpec:
+    """Filters, sort keys and fields one collection accepts in a query."""
+
+    def __init__(self, indexed, matches, ranges, times, sortable, fields, row):
+        self.indexed = indexed  # Param -> (index field, value parser); comma-separated values OR
+        self.matches = matches  # Param -> (value parser, getter) for unindexed equality filters
+        self.ranges = ranges  # Name -> getter, filtered with min_<name> / max_<name>
+        self.times = times  # Prefix -> getter, filtered with <prefix>_after / <prefix>_before
+        self.sortable = sortable  # Sort key -> getter
+        self.fields = fields  # Projectable row fields
+        self.row = row  # (object, now) -> row dict
+
+
+def _status(value):
+    return value.upper()
+
+
+def _free(res):
+    # Free CPU and GPU count up to the VM's overcommit ratio, as placement does
+    capacity = attrgetter(f'{res}_allocatable' if res in ('cpu', 'gpu') else f'{res}_capacity')
+    used = attrgetter(f'{res}_used')
+    return lambda vm: capacity(vm) - used(vm)
+
+
+def _cloudlet_count(vm):
+    return len(vm.cloudlets)
+
+
+CLOUDLET_QUERY = QuerySpec(
+    indexed={
+        'status': ('status', _status),
+        'vm_id': ('vm_id', str),
+        'priority': ('sla_priority', int),
+        'tenant': ('tenant', str),
+    },
+    matches={},
+    ranges={name: attrgetter(name) for name in RESOURCES + ('execution_time', 'stall_time')},
+    times={
+        'created': attrgetter('creation_time'),
+        'started': attrgetter('start_time'),
+        'completed': attrgetter('completion_time'),
+        'deadline': attrgetter('deadline'),
+    },
+    sortable={name: attrgetter(name) for name in RESOURCES + (
+        'creation_time', 'start_time', 'completion_time', 'deadline', 'sla_priority', 'execution_time',
+        'stall_time', 'slice_time', 'estimated_time', 'predicted_start', 'name')},
+    fields=('id', 'name', 'cpu', 'ram', 'storage', 'bandwidth', 'gpu', 'sla_priority', 'tenant', 'deadline',
+            'status', 'vm_id', 'creation_time', 'start_time', 'completion_time', 'execution_time',
+            'stall_time', 'slice_time', 'share', 'estimated_time', 'predicted_start', 'admission',
+            'preemptions', 'time_critical'),
+    row=lambda cl, now: cl.to_dict(now),
+)
+
+VM_QUERY = QuerySpec(
+    indexed={
+        'flavor': ('flavor', str),
+        'isolation': ('isolation_level', _status),
+    },
+    matches={
+        # VM status flips on every allocation, outside _record(), so it is checked on the row
+        'status': (_status, lambda vm: vm.status.name),
+    },
+    ranges={
+        **{res: attrgetter(f'{res}_capacity') for res in RESOURCES},
+        **{f'free_{res}': _free(res) for res in RESOURCES},
+        'cloudlets': _cloudlet_count,
+    },
+    times={
+        'active': attrgetter('last_activity'),
+    },
+    sortable={
+        **{f'{res}_{kind}': attrgetter(f'{res}_{kind}') for res in RESOURCES for kind in ('capacity', 'used')},
+        **{f'free_{res}': _free(res) for res in RESOURCES},
+        'cloudlets': _cloudlet_count,
+        'last_activity': attrgetter('last_activity'),
+        'flavor': attrgetter('flavor'),
+    },
+    fields=('id', 'flavor', 'cpu_capacity', 'ram_capacity', 'storage_capacity', 'bandwidth_capacity',
+            'gpu_capacity', 'cpu_used', 'ram_used', 'storage_used', 'bandwidth_used', 'gpu_used',
+            'cpu_overcommit', 'gpu_overcommit', 'status', 'last_activity', 'memory_blocks', 'numa_node', 'firewall_enabled', 'isolation_level'),
+    row=lambda vm, now: vm.to_dict(),
+)
+
+
+# --- PARSING ---
+
+def encode_cursor(state) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str):
+    try:
+        return json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (binascii.Error, ValueError):
+        raise QueryError("Malformed cursor")
+
+
+def _number(param, text):
+    try:
+        return float(text)
+    except ValueError:
+        raise QueryError(f"{param} must be a number")
+
+
+class Query:
+    """One parsed query: index filters, row predicates, sort, page position and projection."""
+
+    def __init__(self, spec: QuerySpec, params: Dict[str, str]):
+        self.equals = {}  # Index field -> accepted values
+        self.predicates = []
+        self.limit = DEFAULT_LIMIT
+        self.sort = None  # Sort key, or None for insertion order
+        self.descending = False
+        self.fields = None
+        self.cursor = None  # Raw cursor state
+
+        for param, text in params.items():
+            if param in ('limit', 'cursor', 'sort', 'fields'):
+                continue
+            if param in spec.indexed:
+                field, parse = spec.indexed[param]
+                self.equals[field] = self._values(param, text, parse)
+            elif param in spec.matches:
+                parse, getter = spec.matches[param]
+                self._add(getter, lambda v, accepted=self._values(param, text, parse): v in accepted)
+            elif param.startswith(('min_', 'max_')) and param[4:] in spec.ranges:
+                bound, getter = _number(param, text), spec.ranges[param[4:]]
+                if param.startswith('min_'):
+                    self._add(getter, lambda v, bound=bound: v >= bound)
+                else:
+                    self._add(getter, lambda v, bound=bound: v <= bound)
+            elif param.rpartition('_')[2] in ('after', 'before') and param.rpartition('_')[0] in spec.times:
+                prefix, _, edge = param.rpartition('_')
+                bound, getter = _number(param, text), spec.times[prefix]
+                if edge == 'after':
+                    self._add(getter, lambda v, bound=bound: v is not None and v >= bound)
+                else:
+                    self._add(getter, lambda v, bound=bound: v is not None and v < bound)
+            else:
+                raise QueryError(f"Unknown query parameter: {param}")
+
+        if 'limit' in params:
+            try:
+                self.limit = int(params['limit'])
+            except ValueError:
+                raise QueryError("limit must be an integer")
+            if not 1 <= self.limit <= MAX_LIMIT:
+                raise QueryError(f"limit must be between 1 and {MAX_LIMIT}")
+        if params.get('sort'):
+            self.descending = params['sort'].startswith('-')
+            self.sort = params['sort'].lstrip('-+')
+            if self.sort not in spec.sortable:
+                raise QueryError(f"Cannot sort by {self.sort}; sortable: {', '.join(sorted(spec.sortable))}")
+            self.sort_getter = spec.sortable[self.sort]
+        if params.get('fields'):
+            self.fields = [f for f in params['fields'].split(',') if f]
+            unknown = [f for f in self.fields if f not in spec.fields]
+            if unknown:
+                raise QueryError(f"Unknown fields: {', '.join(unknown)}")
+        if params.get('cursor'):
+            self.cursor = decode_cursor(params['cursor'])
+            if (not isinstance(self.cursor, dict) or self.cursor.get('o') != self.order
+                    or not {'k', 's'} <= self.cursor.keys()):
+                raise QueryError("Cursor does not belong to this sort order")
+
+    @staticmethod
+    def _values(param, text, parse):
+        try:
+            return {parse(v) for v in text.split(',') if v}
+        except ValueError:
+            raise QueryError(f"Invalid value for {param}: {text}")
+
+    def _add(self, getter, test):
+        self.predicates.append(lambda obj: test(getter(obj)))
+
+    @property
+    def order(self) -> str:
+        return ('-' if self.descending else '') + (self.sort or 'seq')
+
+    def sort_key(self, obj):
+        value = _plain(self.sort_getter(obj))
+        # Unset values (e.g. start_time of queued cloudlets) sort after every set one
+        return [1, 0] if value is None else [0, value]
+
+
+# --- EXECUTION ---
+
+def run_query(index: RowIndex, spec: QuerySpec, params: Dict[str, str], positions: bool = False) -> dict:
+    """
+    One page of the rows matching params, in the requested order:
+    {'items': [...], 'next_cursor': token or None}.
+
+    Insertion order reads only as far as the page goes; a sort order has to
+    rank every matching row (but never the non-matching ones). With
+    positions, each item's [sort key, seq] is returned too, which is what
+    routers merge partition pages by.
+    """
+    query = Query(spec, params)
+    after = query.cursor
+    start = after['s'] if after and query.sort is None else -1
+    matching = ((seq, obj) for seq, obj in index.scan(query.equals, start)
+                if all(test(obj) for test in query.predicates))
+
+    if query.sort is None:
+        page = [(None, seq, obj) for seq, obj in islice(matching, query.limit + 1)]
+    else:
+        ranked = sorted((query.sort_key(obj), seq, obj) for seq, obj in matching)
+        marks = [(key, seq) for key, seq, _ in ranked]
+        if query.descending:
+            end = bisect_left(marks, (after['k'], after['s'])) if after else len(ranked)
+            page = ranked[max(0, end - query.limit - 1):end][::-1]
+        else:
+            start = bisect_right(marks, (after['k'], after['s'])) if after else 0
+            page = ranked[start:start + query.limit + 1]
+
+    more = len(page) > query.limit
+    page = page[:query.limit]
+    now = time.time()
+    items = []
+    for _, _, obj in page:
+        row = spec.row(obj, now)
+        items.append({f: row[f] for f in query.fields} if query.fields else row)
+    result = {
+        'items': items,
+        'next_cursor': encode_cursor({'o': query.order, 'k': page[-1][0], 's': page[-1][1]}) if more else None,
+    }
+    if positions:
+        result['positions'] = [[key, seq] for key, seq, _ in page]
+        result['order'] = query.order
+    return result
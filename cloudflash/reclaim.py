@@ -0,0 +1,169 @@
+from collections import deque
+from typing import Dict, Iterable, List
+
+
+class SwapTier:
+    """
+    Simulated swap device behind an overcommitted MemoryManager. Evicted pages
+    are written here in the background; a running cloudlet that touches one of
+    them stalls for read_latency while it is faulted back in.
+    """
+
+    def __init__(self, read_latency: float = 0.5, write_latency: float = 0.25):
+        self.read_latency = read_latency  # Seconds to fault one page back in (charged to the cloudlet)
+        self.write_latency = write_latency  # Seconds to write one page out (background writeback)
+        self.swapped = set()  # Global page numbers currently held on swap
+        self.pages_in = 0
+        self.pages_out = 0
+        self.write_seconds = 0.0
+
+    def swap_out(self, page: int) -> None:
+        self.swapped.add(page)
+        self.pages_out += 1
+        self.write_seconds += self.write_latency
+
+    def read(self, page: int) -> float:
+        """Read a swapped page without taking it off swap; returns the stall in seconds."""
+        self.pages_in += 1
+        return self.read_latency
+
+    def swap_in(self, page: int) -> float:
+        """Bring a page back into memory; returns the stall in seconds."""
+        self.swapped.discard(page)
+        return self.read(page)
+
+
+class ReclaimEngine:
+    """
+    Decides which allocated pages of an overcommitted host are resident in
+    its physical frames and which live on the swap tier.
+
+    Pages take a frame the first time they are touched. When a touch finds
+    every frame taken, a WSClock hand sweeps the page table: resident pages
+    whose page_last_used is older than cold_after are evicted to swap, and if
+    a whole sweep finds none, the least recently used page seen goes instead.
+    The MemoryManager calls every method under its own lock.
+    """
+
+    def __init__(self, memory_manager, frames: int, swap: SwapTier = None,
+                 cold_after: float = 5.0, working_set_window: float = 10.0, rate_window: float = 60.0):
+        self.memory = memory_manager
+        self.frames = frames  # Physical pages; the rest of the page space is backed by swap
+        self.swap = swap or SwapTier()
+        self.cold_after = cold_after  # Seconds without a touch before a page may be reclaimed
+        self.working_set_window = working_set_window  # Pages touched this recently form the working set
+        self.rate_window = rate_window  # Seconds of evictions the reclaim rate is averaged over
+        self.resident = bytearray(memory_manager.total_pages)
+        self.resident_count = 0
+        self.hand = 0
+        self.evictions = deque()  # Eviction timestamps within rate_window
+        self.reclaimed = 0
+        self.fallbacks = 0  # Evictions of a still-warm page because no cold one was left
+        self.minor_faults = 0  # First touches (zero-filled, no swap read)
+        self.major_faults = 0  # Touches that read the page back from swap
+        self.stall_seconds = 0.0
+
+    def touch(self, pages: Iterable[int], now: float) -> float:
+        """Mark pages used at now, faulting in any that are not resident. Returns the stall in seconds."""
+        stall = 0.0
+        last_used = self.memory.page_last_used
+        pages = list(pages)
+        for page in pages:
+            # Touched pages are hot before any eviction, so the sweep skips the rest of this batch
+            last_used[page] = now
+        for page in pages:
+            if self.resident[page]:
+                continue
+            swapped = page in self.swap.swapped
+            if self.resident_count >= self.frames and not self._evict(now):
+                # Every frame is hot this tick: a swapped page is read from swap on each touch
+                if swapped:
+                    stall += self.swap.read(page)
+                    self.major_faults += 1
+                continue
+            if swapped:
+                stall += self.swap.swap_in(page)
+                self.major_faults += 1
+            else:
+                self.minor_faults += 1
+            self.resident[page] = 1
+            self.resident_count += 1
+        self.stall_seconds += stall
+        return stall
+
+    def _evict(self, now: float) -> bool:
+        """Free one frame with the clock hand; False if nothing could be evicted."""
+        last_used = self.memory.page_last_used
+        n = len(self.resident)
+        oldest = None
+        for _ in range(n):
+            page = self.hand
+            self.hand = (self.hand + 1) % n
+            if not self.resident[page]:
+                continue
+            if now - last_used[page] >= self.cold_after:
+                self._swap_out(page, now)
+                return True
+            if last_used[page] < now and (oldest is None or last_used[page] < last_used[oldest]):
+                oldest = page
+        if oldest is None:
+            return False
+        self.fallbacks += 1
+        self._swap_out(oldest, now)
+        return True
+
+    def _swap_out(self, page: int, now: float) -> None:
+        self.resident[page] = 0
+        self.resident_count -= 1
+        self.swap.swap_out(page)
+        self.reclaimed += 1
+        self.evictions.append(now)
+
+    def drop(self, page: int) -> None:
+        """A page went back to the free pool: release its frame or swap slot."""
+        if self.resident[page]:
+            self.resident[page] = 0
+            self.resident_count -= 1
+        self.swap.swapped.discard(page)
+
+    def remap(self, moved: Dict[int, int]) -> None:
+        """Carry residency across a consolidation (old page -> new page; blocks may swap places)."""
+        before = bytes(self.resident)
+        for old in moved:
+            self.resident[old] = 0
+        for old, new in moved.items():
+            self.resident[new] = before[old]
+        self.swap.swapped = {moved.get(page, page) for page in self.swap.swapped}
+
+    def working_set(self, now: float) -> int:
+        last_used = self.memory.page_last_used
+        return sum(1 for page, resident in enumerate(self.resident)
+                   if resident and now - last_used[page] < self.working_set_window)
+
+    def metrics(self, now: float) -> dict:
+        while self.evictions and now - self.evictions[0] > self.rate_window:
+            self.evictions.popleft()
+        return {
+            'physical_pages': self.frames,
+            'resident_pages': self.resident_count,
+            'swapped_pages': len(self.swap.swapped),
+            'working_set_pages': self.working_set(now),
+            'reclaim_rate': len(self.evictions) / self.rate_window,  # Pages per second
+            'pages_reclaimed': self.reclaimed,
+            'lru_fallbacks': self.fallbacks,
+            'minor_faults': self.minor_faults,
+            'major_faults': self.major_faults,
+            'swap_pages_in': self.swap.pages_in,
+            'swap_pages_out': self.swap.pages_out,
+            'swap_write_seconds': self.swap.write_seconds,
+            'stall_seconds': self.stall_seconds,
+        }
+
+
+def merge_metrics(parts: List[dict]) -> dict:
+    """Sum ReclaimEngine.metrics() of several partitions into one."""
+    merged = {}
+    for part in parts:
+        for key, value in part.items():
+            merged[key] = merged.get(key, 0) + value
+    return merged
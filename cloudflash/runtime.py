@@ -0,0 +1,176 @@
+import math
+import re
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+# Upper bounds of the relative estimation error buckets: |estimate - observed| / observed
+ERROR_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, math.inf)
+
+# A trailing counter or generated ID: 'etl-17' and 'etl-18' (or 'Cloudlet-1a2b3c4d') share a prefix
+_SUFFIX = re.compile(r'([-_. ]+[0-9a-f]{8}|[-_. ]*\d+)$')
+
+
+def name_prefix(name: Optional[str]) -> str:
+    return _SUFFIX.sub('', name or '')
+
+
+def bucket(value: float) -> int:
+    """Power-of-two size class of a demand (0 for none): 1 for (0.5, 1], 2 for (1, 2], ..."""
+    return math.frexp(value)[1] if value > 0 else 0
+
+
+def _quantile(values: List[float], q: float) -> float:
+    """q quantile of sorted values, interpolating between neighbours."""
+    pos = q * (len(values) - 1)
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+class _Samples:
+    """Recent observations of one shape, with sorted copies cached until the next one."""
+
+    def __init__(self, window: int):
+        self.runtimes = deque(maxlen=window)  # Observed runtimes in seconds
+        self.ratios = deque(maxlen=window)  # Observed over declared runtime, for cloudlets that declared one
+        self.count = 0
+        self._sorted = {}
+
+    def add(self, runtime: float, declared: Optional[float]) -> None:
+        self.runtimes.append(runtime)
+        if declared:
+            self.ratios.append(runtime / declared)
+        self.count += 1
+        self._sorted.clear()
+
+    def quantile(self, kind: str, q: float) -> Optional[float]:
+        values = self._sorted.get(kind)
+        if values is None:
+            values = self._sorted[kind] = sorted(getattr(self, kind))
+        return _quantile(values, q) if values else None
+
+
+class RuntimeEstimator:
+    """
+    Learns cloudlet runtime distributions online from completed cloudlets.
+
+    Cloudlets are grouped into shapes: power-of-two CPU, RAM and GPU classes
+    plus the name prefix. Each shape keeps a window of observed runtimes
+    (completion minus start, plus time run before any preemption) and of the
+    observed/declared ratio. A cloudlet that declares an execution_time is
+    estimated as that times the shape's ratio, which learns stalls and
+    slowdowns the user could not know about; one without is estimated from
+    the shape's runtimes. Shapes with fewer than min_samples observations fall
+    back to the same classes under any name, then to the declared runtime.
+
+    Every completion also scores the estimate the cloudlet was started with,
+    and the declared runtime, into relative error histograms.
+    """
+
+    def __init__(self, window: int = 64, min_samples: int = 3, quantile: float = 0.5):
+        self.window = window
+        self.min_samples = min_samples
+        self.quantile = quantile  # Quantile of the shape's distribution used as the estimate
+        self.shapes: Dict[tuple, _Samples] = {}  # (cpu, ram, gpu class, name prefix) -> samples
+        self.classes: Dict[tuple, _Samples] = {}  # (cpu, ram, gpu class) -> samples under any name
+        self.errors = {source: [0] * len(ERROR_BUCKETS) for source in ('estimate', 'declared')}
+        self.error_sums = {'estimate': 0.0, 'declared': 0.0}
+        self.observed = 0
+        self.version = 0  # Bumped on every observation, so callers know when to re-estimate
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def shape(cloudlet) -> tuple:
+        return bucket(cloudlet.cpu), bucket(cloudlet.ram), bucket(cloudlet.gpu), name_prefix(cloudlet.name)
+
+    def _samples(self, shape: tuple) -> Optional[_Samples]:
+        for table, key in ((self.shapes, shape), (self.classes, shape[:3])):
+            samples = table.get(key)
+            if samples is not None and samples.count >= self.min_samples:
+                return samples
+        return None
+
+    def estimate(self, cloudlet, q: Optional[float] = None) -> Optional[float]:
+        """Predicted runtime in seconds, or None when there is neither history nor a declared runtime."""
+        declared = cloudlet.execution_time if cloudlet.execution_time > 0 else None
+        with self.lock:
+            samples = self._samples(self.shape(cloudlet))
+            if samples is None:
+                return declared
+            q = self.quantile if q is None else q
+            if declared is not None:
+                ratio = samples.quantile('ratios', q)
+                return declared * ratio if ratio is not None else declared
+            return samples.quantile('runtimes', q)
+
+    @staticmethod
+    def remaining(cloudlet, estimate: Optional[float], now: float) -> Optional[float]:
+        """Estimated runtime left: the estimate less what the cloudlet has already run."""
+        if estimate is None:
+            return None
+        ran = cloudlet.executed + (now - cloudlet.start_time if cloudlet.start_time is not None else 0.0)
+        return max(0.0, estimate - ran)
+
+    def observe(self, cloudlet, runtime: float) -> None:
+        """Learn from a cloudlet that completed after running for runtime seconds."""
+        if runtime <= 0:
+            return
+        declared = cloudlet.execution_time if cloudlet.execution_time > 0 else None
+        shape = self.shape(cloudlet)
+        with self.lock:
+            self.observed += 1
+            self.version += 1
+            if cloudlet.estimated_time is not None:
+                self._score('estimate', cloudlet.estimated_time, runtime)
+            if declared is not None:
+                self._score('declared', declared, runtime)
+            for table, key in ((self.shapes, shape), (self.classes, shape[:3])):
+                samples = table.get(key)
+                if samples is None:
+                    samples = table[key] = _Samples(self.window)
+                samples.add(runtime, declared)
+
+    def _score(self, source: str, estimate: float, runtime: float) -> None:
+        error = abs(estimate - runtime) / runtime
+        self.error_sums[source] += error
+        counts = self.errors[source]
+        for i, bound in enumerate(ERROR_BUCKETS):
+            if error <= bound:
+                counts[i] += 1
+                break
+
+    def metrics(self) -> dict:
+        with self.lock:
+            return summarize({
+                'observed': self.observed,
+                'shapes': len(self.shapes),
+                'errors': {source: {'buckets': list(counts), 'sum': self.error_sums[source]}
+                           for source, counts in self.errors.items()},
+            })
+
+
+def summarize(stats: dict) -> dict:
+    """Add counts and mean errors to the error histograms (shared with the partition routers)."""
+    for histogram in stats['errors'].values():
+        histogram['count'] = sum(histogram['buckets'])
+        histogram['mean_error'] = histogram['sum'] / histogram['count'] if histogram['count'] else 0.0
+    stats['bounds'] = [str(bound) if bound != math.inf else '+Inf' for bound in ERROR_BUCKETS]
+    return stats
+
+
+def merge_metrics(parts: Iterable[dict]) -> dict:
+    """Sum the runtime metrics of several partitions (shape counts may overlap)."""
+    merged = {'queue_policy': None, 'at_risk': 0, 'observed': 0, 'shapes': 0,
+              'errors': {source: {'buckets': [0] * len(ERROR_BUCKETS), 'sum': 0.0}
+                         for source in ('estimate', 'declared')}}
+    for part in parts:
+        merged['queue_policy'] = merged['queue_policy'] or part['queue_policy']
+        merged['at_risk'] += part['at_risk']
+        merged['observed'] += part['observed']
+        merged['shapes'] += part['shapes']
+        for source, histogram in part['errors'].items():
+            into = merged['errors'][source]
+            into['buckets'] = [a + b for a, b in zip(into['buckets'], histogram['buckets'])]
+            into['sum'] += histogram['sum']
+    return summarize(merged)
@@ -0,0 +1,137 @@
+import json
+import threading
+import time
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - binary metrics are offered only with msgpack
+    msgpack = None
+
+# Formats a Socket.IO client may ask for in its connect auth ({'encoding': ...})
+FORMATS = ['json', 'msgpack'] if msgpack is not None else ['json']
+
+
+def dumps(obj) -> bytes:
+    """Compact JSON as UTF-8 bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+class Encoded:
+    """A payload already serialized to JSON, spliced as-is into Socket.IO packets."""
+
+    __slots__ = ('data', '_text')
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.data.decode()
+        return self._text
+
+
+class PacketJSON:
+    """
+    json stand-in for the Socket.IO packet encoder (pass as json= to the
+    server): Encoded arguments are spliced into the packet instead of being
+    serialized again for every emit.
+    """
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        if isinstance(obj, list) and any(isinstance(item, Encoded) for item in obj):
+            return '[' + ','.join(item.text if isinstance(item, Encoded) else json.dumps(item, **kwargs)
+                                  for item in obj) + ']'
+        return json.dumps(obj, **kwargs)
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return json.loads(s, **kwargs)
+
+
+def client_format(auth) -> str:
+    """Encoding a connecting Socket.IO client asked for, if this server offers it."""
+    requested = auth.get('encoding') if isinstance(auth, dict) else None
+    return requested if requested in FORMATS else 'json'
+
+
+class _Snapshot:
+    """One get_metrics() result and its encodings."""
+
+    def __init__(self, version, built_at, metrics):
+        self.version = version
+        self.built_at = built_at
+        self.metrics = metrics
+        self.encoded = {}  # (format, key) -> Encoded JSON or msgpack bytes
+        self.lock = threading.Lock()  # Encodes each (format, key) once
+
+
+class SnapshotCache:
+    """
+    get_metrics() built once per state version and encoded once per format.
+
+    The manager's state_version changes on every scheduler state transition,
+    so readers between transitions share one snapshot and its bytes. Some
+    fields are derived from the clock (deadline urgency, cooldowns) or change
+    without a transition (warm pool counters), so a snapshot is also rebuilt
+    once it is max_age seconds old. Managers without a state_version
+    (sharded and cluster routers) are refreshed on max_age alone.
+
+    No lock is held while get_metrics() runs: the manager logs (and so
+    reaches this cache through the metrics callback) while holding its own
+    lock. Snapshots are shared, so callers must not mutate them.
+    """
+
+    def __init__(self, manager, max_age: float = 1.0):
+        self.manager = manager
+        self.max_age = max_age
+        self.current = None
+        self.stats = {'builds': 0, 'encodes': 0, 'hits': 0}
+
+    def _snapshot(self) -> _Snapshot:
+        version = getattr(self.manager, 'state_version', None)
+        now = time.monotonic()
+        snap = self.current
+        if (snap is not None and now - snap.built_at < self.max_age
+                and (version is None or version == snap.version)):
+            return snap
+        # Read the version first: a transition during the build leaves this snapshot stale
+        snap = _Snapshot(version, now, self.manager.get_metrics())
+        self.current = snap
+        self.stats['builds'] += 1
+        return snap
+
+    def snapshot(self) -> dict:
+        return self._snapshot().metrics
+
+    def payload(self, fmt: str = 'json', key: str = None):
+        """
+        The current snapshot (or its key section) encoded as fmt: Encoded
+        JSON, or msgpack bytes.
+        """
+        snap = self._snapshot()
+        with snap.lock:
+            cached = snap.encoded.get((fmt, key))
+            if cached is not None:
+                self.stats['hits'] += 1
+                return cached
+            obj = snap.metrics if key is None else snap.metrics[key]
+            if fmt == 'msgpack':
+                cached = msgpack.packb(obj, use_bin_type=True)
+            else:
+                cached = Encoded(dumps(obj))
+            snap.encoded[(fmt, key)] = cached
+            self.stats['encodes'] += 1
+            return cached
+
+    def json_bytes(self, key: str = None) -> bytes:
+        return self.payload('json', key).data
@@ -0,0 +1,631 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from core import ResourceManager, VM, Cloudlet, CloudletStatus
+from accounting import merge_metrics, utilization
+from placement import demand_vector
+from reclaim import merge_metrics as merge_reclaim
+from numa import merge_metrics as merge_numa
+from preemption import merge_metrics as merge_preemption
+from timeslice import merge_metrics as merge_timeslice
+from runtime import merge_metrics as merge_runtime
+from admission import AdmissionError, merge_metrics as merge_admission
+from fairshare import merge_metrics as merge_tenants
+from query import CLOUDLET_QUERY, VM_QUERY, Query, QueryError, decode_cursor, encode_cursor
+from state_store import StateStore
+
+# fork keeps the parent's imports and does not re-run the app module in the
+# shards; other platforms fall back to spawn
+_START_METHOD = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+# --- SHARD PROCESS ---
+
+FINISHED = (CloudletStatus.COMPLETED, CloudletStatus.FAILED)
+
+
+def partition_summary(manager) -> dict:
+    """Free capacity per VM (strict VMs that are busy excluded) for routing in the router."""
+    engine = manager.placement_engine
+    with engine.lock:
+        n = len(engine.vms)
+        free = engine.capacity[:n] - engine.used[:n]
+        open_rows = ~(engine.strict[:n] & (engine.cloudlet_count[:n] > 0))
+        free = free[open_rows].tolist()
+        vm_ids = [vm.id for vm, row_open in zip(engine.vms, open_rows) if row_open]
+    return {
+        'free': free,
+        'vm_ids': vm_ids,  # VM of each free row
+        'free_pages': manager.memory_manager.free_count,
+        'pending': len(manager.pending_queue),
+        'vms': n,
+    }
+
+
+def manager_handlers(manager) -> dict:
+    """Requests a partition serves for its router, by op name."""
+
+    def submit(record, vm_id=None):
+        cloudlet = Cloudlet.from_record(record)
+        cloudlet.status = CloudletStatus.WAITING
+        try:
+            manager.submit_cloudlet(cloudlet, vm_id)
+        except AdmissionError as e:
+            return {'rejected': e.to_dict()}  # Not a failure of the partition: the router re-raises it
+        return {'status': cloudlet.status.name, 'vm_id': cloudlet.vm_id,
+                'predicted_start': cloudlet.predicted_start, 'admission': cloudlet.admission}
+
+    def set_tenant(tenant, weight=None, quota=None):
+        try:
+            return manager.set_tenant(tenant, weight, quota)
+        except ValueError as e:
+            return {'invalid': str(e)}  # A bad request, not a failure of the partition
+
+    def configure(settings):
+        with manager.lock:
+            for key in ('load_balancing_algorithm', 'placement_mode', 'preemption_enabled', 'queue_policy',
+                        'admission_mode', 'max_pending', 'pending_ram_budget'):
+                if key in settings:
+                    setattr(manager, key, settings[key])
+
+    def settings():
+        return {
+            'available_algorithms': manager.available_algorithms,
+            'available_placement_modes': manager.available_placement_modes,
+            'available_queue_policies': manager.available_queue_policies,
+            'available_admission_modes': manager.available_admission_modes,
+            'load_balancing_algorithm': manager.load_balancing_algorithm,
+            'placement_mode': manager.placement_mode,
+            'preemption_enabled': manager.preemption_enabled,
+            'queue_policy': manager.queue_policy,
+            'admission_mode': manager.admission_mode,
+            'max_pending': manager.max_pending,
+            'pending_ram_budget': manager.pending_ram_budget,
+        }
+
+    return {
+        'submit': submit,
+        'add_vm': lambda record: manager.add_vm(VM.from_record(record)),
+        'complete_cloudlet': manager.complete_cloudlet,
+        'delete_cloudlet': manager.delete_cloudlet,
+        'delete_vm': manager.delete_vm,
+        'resize_vm': manager.resize_vm,
+        'get_metrics': manager.get_metrics,
+        'get_vms': manager.get_vms,
+        'accounting': manager.accounting.metrics,
+        'query_cloudlets': manager.query_cloudlets,
+        'query_vms': manager.query_vms,
+        'recent_decisions': manager.scaling_controller.recent_decisions,
+        'submit_forecast': manager.scaling_controller.submit_forecast,
+        'configure': configure,
+        'settings': settings,
+        'set_tenant': set_tenant,
+        'tenant_usage': manager.tenant_usage,
+        'summary': lambda: None,
+    }
+
+
+def _shard_main(shard_id, conn, events, total_memory, state_path):
+    """Run one ResourceManager shard and serve router requests over conn."""
+    store = StateStore(state_path) if state_path else None
+    manager = ResourceManager(start_monitor=False, state_store=store, total_memory=total_memory)
+    manager.log = lambda message: events.put((shard_id, message))
+    manager.set_metrics_callback(lambda log=None: events.put((shard_id, log)))
+
+    def report_finished(cloudlet):
+        # So the router can forget which shard owned it
+        if cloudlet.status in FINISHED:
+            events.put((shard_id, ('finished', cloudlet.id)))
+
+    manager.cloudlet_listeners.append(report_finished)
+    manager.monitor_thread.start()
+    manager.warm_pool.start()
+    handlers = manager_handlers(manager)
+
+    while True:
+        try:
+            op, args = conn.recv()
+        except (EOFError, OSError):
+            break
+        if op == 'stop':
+            if store is not None:
+                store.close()
+            conn.send((True, None, None))
+            break
+        try:
+            result = handlers[op](*args)
+            conn.send((True, result, partition_summary(manager)))
+        except Exception as e:
+            conn.send((False, f"{type(e).__name__}: {e}", None))
+
+
+class ShardError(RuntimeError):
+    pass
+
+
+def apply_submit_result(cloudlet, result: dict) -> None:
+    """Copy a partition's answer to 'submit' onto the router's cloudlet; re-raises an admission rejection."""
+    if 'rejected' in result:
+        raise AdmissionError.from_dict(result['rejected'])
+    cloudlet.vm_id = result['vm_id']
+    cloudlet.status = CloudletStatus[result['status']]
+    cloudlet.predicted_start = result['predicted_start']
+    cloudlet.admission = result['admission']
+
+
+class _Shard:
+    """Router-side handle of one shard process."""
+
+    def __init__(self, shard_id, ctx, events, total_memory, state_path):
+        self.id = shard_id
+        self.page_base = shard_id * total_memory  # Offset of this shard's pages in the global page space
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_shard_main, daemon=True,
+                                   args=(shard_id, child, events, total_memory, state_path))
+        self.process.start()
+        self.lock = threading.Lock()  # One request in flight per shard
+        self.summary = {'free': [], 'vm_ids': [], 'free_pages': total_memory, 'pending': 0, 'vms': 0}
+        self.free = np.zeros((0, 5))
+
+    def call(self, op, *args):
+        with self.lock:
+            self.conn.send((op, args))
+            ok, result, summary = self.conn.recv()
+        if not ok:
+            raise ShardError(f"shard {self.id}: {result}")
+        if summary is not None:
+            self.summary = summary
+            self.free = np.asarray(summary['free'], dtype=float).reshape(-1, 5)
+        return result
+
+
+# --- ROUTER ---
+
+class _FanoutScalingController:
+    """The parts of ScalingController the app and predictive scaler use, fanned out to partitions."""
+
+    def __init__(self, router):
+        self.router = router
+
+    def recent_decisions(self, limit: int = 50):
+        decisions = []
+        for part, result in self.router._broadcast('recent_decisions', limit):
+            for decision in result:
+                decision[self.router.part_key] = part.id
+                decisions.append(decision)
+        decisions.sort(key=lambda d: d['timestamp'])
+        return decisions[-limit:]
+
+    def submit_forecast(self, predicted: Dict[str, float]) -> None:
+        self.router._broadcast('submit_forecast', predicted)
+
+
+class PartitionRouter:
+    """
+    The ResourceManager API used by the Flask app, over several partitions
+    that each run a ResourceManager of their own (shards here, hosts in
+    cluster.py). Partition handles expose id, page_base, summary, free and
+    call(op, *args). Subclasses decide where cloudlets and VMs go; reads are
+    aggregated into one global view, cached for metrics_ttl seconds so
+    per-request dashboard pushes do not fan out to every partition each time.
+    """
+
+    part_key = 'shard'  # Tag on VMs, cloudlets and decisions naming their partition
+
+    def __init__(self, parts, metrics_ttl: float = 0.5):
+        self.parts = parts
+        self.pool = ThreadPoolExecutor(max_workers=max(4, len(parts)))
+        self.lock = threading.Lock()  # Guards routing state
+        self.cloudlet_part = {}
+        self.vm_part = {}
+        self.next_part = 0
+        self.metrics_ttl = metrics_ttl
+        self._metrics_cache = None
+        self._metrics_time = 0.0
+        self.metrics_callback = None
+        self.scaling_controller = _FanoutScalingController(self)
+
+        settings = self.parts[0].call('settings')
+        self.available_algorithms = settings['available_algorithms']
+        self.available_placement_modes = settings['available_placement_modes']
+        self.available_queue_policies = settings['available_queue_policies']
+        self.available_admission_modes = settings['available_admission_modes']
+        self._settings = {key: settings[key] for key in (
+            'load_balancing_algorithm', 'placement_mode', 'preemption_enabled', 'queue_policy',
+            'admission_mode', 'max_pending', 'pending_ram_budget')}
+
+    # --- SETTINGS ---
+
+    @property
+    def load_balancing_algorithm(self):
+        return self._settings['load_balancing_algorithm']
+
+    @load_balancing_algorithm.setter
+    def load_balancing_algorithm(self, value):
+        self._settings['load_balancing_algorithm'] = value
+        self._broadcast('configure', {'load_balancing_algorithm': value})
+
+    @property
+    def placement_mode(self):
+        return self._settings['placement_mode']
+
+    @placement_mode.setter
+    def placement_mode(self, value):
+        self._settings['placement_mode'] = value
+        self._broadcast('configure', {'placement_mode': value})
+
+    @property
+    def preemption_enabled(self):
+        return self._settings['preemption_enabled']
+
+    @preemption_enabled.setter
+    def preemption_enabled(self, value):
+        self._settings['preemption_enabled'] = value
+        self._broadcast('configure', {'preemption_enabled': value})
+
+    @property
+    def queue_policy(self):
+        return self._settings['queue_policy']
+
+    @queue_policy.setter
+    def queue_policy(self, value):
+        self._settings['queue_policy'] = value
+        self._broadcast('configure', {'queue_policy': value})
+
+    # Admission limits apply per partition
+    @property
+    def admission_mode(self):
+        return self._settings['admission_mode']
+
+    @admission_mode.setter
+    def admission_mode(self, value):
+        self._settings['admission_mode'] = value
+        self._broadcast('configure', {'admission_mode': value})
+
+    @property
+    def max_pending(self):
+        return self._settings['max_pending']
+
+    @max_pending.setter
+    def max_pending(self, value):
+        self._settings['max_pending'] = value
+        self._broadcast('configure', {'max_pending': value})
+
+    @property
+    def pending_ram_budget(self):
+        return self._settings['pending_ram_budget']
+
+    @pending_ram_budget.setter
+    def pending_ram_budget(self, value):
+        self._settings['pending_ram_budget'] = value
+        self._broadcast('configure', {'pending_ram_budget': value})
+
+    # --- EVENTS ---
+
+    def set_metrics_callback(self, cb):
+        self.metrics_callback = cb
+
+    def log(self, message: str):
+        print(message)
+        if self.metrics_callback:
+            try:
+                self.metrics_callback(log=message)
+            except Exception as e:
+                print(f"Failed to emit log: {e}")
+
+    # --- ROUTING ---
+
+    def _live_parts(self):
+        return self.parts
+
+    def _broadcast(self, op, *args):
+        """Call op on every live partition in parallel; returns (partition, result) pairs."""
+        futures = [(part, self.pool.submit(part.call, op, *args)) for part in self._live_parts()]
+        return [(part, future.result()) for part, future in futures]
+
+    def _owner(self, table, key, op, *args):
+        """Call op on the partition that owns key, or on every partition if it is unknown."""
+        part = table.get(key)
+        if part is not None:
+            return part.call(op, *args)
+        return any(result for _, result in self._broadcast(op, *args))
+
+    # --- RESOURCE MANAGER API ---
+
+    def complete_cloudlet(self, cloudlet_id):
+        return self._owner(self.cloudlet_part, cloudlet_id, 'complete_cloudlet', cloudlet_id)
+
+    def _forget_cloudlet(self, cloudlet_id, part):
+        """Drop the owner of a cloudlet that finished or was turned away, unless it moved elsewhere since."""
+        with self.lock:
+            if self.cloudlet_part.get(cloudlet_id) is part:
+                del self.cloudlet_part[cloudlet_id]
+
+    def delete_cloudlet(self, cloudlet_id):
+        result = self._owner(self.cloudlet_part, cloudlet_id, 'delete_cloudlet', cloudlet_id)
+        self.cloudlet_part.pop(cloudlet_id, None)
+        return result
+
+    def delete_vm(self, vm_id):
+        result = self._owner(self.vm_part, vm_id, 'delete_vm', vm_id)
+        if result:
+            self.vm_part.pop(vm_id, None)
+        return result
+
+    def resize_vm(self, vm_id, ram):
+        return self._owner(self.vm_part, vm_id, 'resize_vm', vm_id, ram)
+
+    def get_vms(self):
+        vms = []
+        for part, result in self._broadcast('get_vms'):
+            for vm in result:
+                vm[self.part_key] = part.id
+                vms.append(vm)
+        return vms
+
+    def set_tenant(self, tenant, weight=None, quota=None):
+        """Set a tenant's weight and quota on every partition (quotas apply per partition)."""
+        results = self._broadcast('set_tenant', tenant, weight, quota)
+        invalid = next((r['invalid'] for _, r in results if 'invalid' in r), None)
+        if invalid is not None:
+            raise ValueError(invalid)
+        return results[0][1] if results else {'tenant': tenant, 'weight': weight, 'quota': quota or {}}
+
+    def tenant_usage(self):
+        return merge_tenants(usage for _, usage in self._broadcast('tenant_usage'))
+
+    def query_cloudlets(self, params):
+        return self._query('query_cloudlets', CLOUDLET_QUERY, params)
+
+    def query_vms(self, params):
+        return self._query('query_vms', VM_QUERY, params)
+
+    def _query(self, op, spec, params):
+        """
+        Merge one page from every partition. The cursor holds each
+        partition's own cursor (None once it is exhausted); insertion order
+        interleaves partitions by their local sequence numbers.
+        """
+        params = dict(params)
+        token = params.pop('cursor', None)
+        query = Query(spec, params)  # Rejects bad params before fanning out
+        cursors = {}
+        if token:
+            state = decode_cursor(token)
+            if not isinstance(state, dict) or state.get('o') != query.order or not isinstance(state.get('p'), dict):
+                raise QueryError("Cursor does not belong to this sort order")
+            cursors = state['p']
+        futures = []
+        for part in self._live_parts():
+            cursor = cursors.get(str(part.id), '')
+            if cursor is not None:
+                part_params = {**params, 'cursor': cursor} if cursor else params
+                futures.append((part, self.pool.submit(part.call, op, part_params, True)))
+
+        results = [(part, future.result()) for part, future in futures]
+        rows = []
+        for n, (part, result) in enumerate(results):
+            for item, (key, seq) in zip(result['items'], result['positions']):
+                item[self.part_key] = part.id
+                if 'memory_blocks' in item:
+                    item['memory_blocks'] = [[start + part.page_base, count] for start, count in item['memory_blocks']]
+                rows.append(((key if key is not None else [], seq, n), key, item))
+        rows.sort(key=lambda row: row[0], reverse=query.descending)
+        page, rest = rows[:query.limit], rows[query.limit:]
+
+        # Resume each partition after the last of its rows on this page
+        for n, (part, result) in enumerate(results):
+            taken = [(key, order[1]) for order, key, _ in page if order[2] == n]
+            if taken:
+                more = result['next_cursor'] is not None or any(order[2] == n for order, _, _ in rest)
+                key, seq = taken[-1]
+                cursors[str(part.id)] = encode_cursor({'o': query.order, 'k': key, 's': seq}) if more else None
+            elif not result['items']:
+                cursors[str(part.id)] = None
+            else:
+                cursors.setdefault(str(part.id), '')
+        return {
+            'items': [item for _, _, item in page],
+            'next_cursor': (encode_cursor({'o': query.order, 'p': cursors})
+                            if any(cursor is not None for cursor in cursors.values()) else None),
+        }
+
+    def utilization(self):
+        accounting = merge_metrics(result for _, result in self._broadcast('accounting'))
+        return {key: value * 100 for key, value in utilization(accounting['capacity'], accounting['used']).items()}
+
+    def get_metrics(self):
+        now = time.time()
+        if self._metrics_cache is not None and now - self._metrics_time < self.metrics_ttl:
+            return self._metrics_cache
+        metrics = self._aggregate(self._broadcast('get_metrics'))
+        self._metrics_cache, self._metrics_time = metrics, now
+        return metrics
+
+    def _part_info(self, part) -> dict:
+        """Partition-specific fields for the per-partition metrics list."""
+        return {}
+
+    def _aggregate(self, results) -> dict:
+        vms, cloudlets, parts = [], [], []
+        memory = {'total_pages': 0, 'free_pages': 0, 'allocated_pages': 0, 'metadata_entries': 0,
+                  'fragmentation': 0.0, 'page_classes': {}}
+        pool = {'pooled': {}, 'hits': 0, 'misses': 0, 'refills': 0}
+        consolidation = {'cycles': 0, 'migrations': 0, 'rollbacks': 0, 'vms_released': 0, 'pages_moved': 0}
+        decisions = []
+        for part, m in results:
+            for vm in m['vms']:
+                vm[self.part_key] = part.id
+                vm['memory_blocks'] = [[start + part.page_base, count] for start, count in vm['memory_blocks']]
+                vms.append(vm)
+            for cl in m['cloudlets']:
+                cl[self.part_key] = part.id
+                cloudlets.append(cl)
+            for key in ('total_pages', 'free_pages', 'allocated_pages', 'metadata_entries'):
+                memory[key] += m['memory'][key]
+            # Fragmentation is a share of the partition's pages; weight it by partition size
+            memory['fragmentation'] += m['memory']['fragmentation'] * m['memory']['total_pages']
+            for name, stats in m['memory']['page_classes'].items():
+                merged = memory['page_classes'].setdefault(name, {})
+                for key, value in stats.items():
+                    # The stranded share of free pages is weighted by the partition's free pages
+                    weight = m['memory']['free_pages'] if key == 'external_fragmentation' else 1
+                    merged[key] = merged.get(key, 0) + value * weight
+            for name, count in m['warm_pool']['pooled'].items():
+                pool['pooled'][name] = pool['pooled'].get(name, 0) + count
+            for key in ('hits', 'misses', 'refills'):
+                pool[key] += m['warm_pool'][key]
+            for key in consolidation:
+                consolidation[key] += m['consolidation'][key]
+            if m['scaling']['last_decision']:
+                decisions.append(m['scaling']['last_decision'])
+            parts.append({
+                'id': part.id,
+                **self._part_info(part),
+                'vms': len(m['vms']),
+                'cloudlets': len(m['cloudlets']),
+                'pending': part.summary['pending'],
+                'free_pages': m['memory']['free_pages'],
+                'scaling_status': m['scaling_status'],
+            })
+        if memory['total_pages']:
+            memory['fragmentation'] /= memory['total_pages']
+        huge = memory['page_classes'].get('16G')
+        if huge:
+            huge['external_fragmentation'] = (huge['external_fragmentation'] / memory['free_pages']
+                                              if memory['free_pages'] else 0.0)
+        reclaim = [m['memory']['reclaim'] for _, m in results if m['memory'].get('reclaim')]
+        memory['reclaim'] = merge_reclaim(reclaim) if reclaim else None
+        memory['numa'] = merge_numa([(part.id, m['memory']['numa']) for part, m in results])
+        claims = pool['hits'] + pool['misses']
+        pool['hit_rate'] = pool['hits'] / claims if claims else 0.0
+
+        accounting = merge_metrics(m['accounting'] for _, m in results)
+        usage = {key: value * 100 for key, value in utilization(accounting['capacity'], accounting['used']).items()}
+        basic = ('cpu', 'ram', 'storage')
+        usage['average'] = sum(usage[key] for key in basic) / 3 if all(accounting['capacity'][key] for key in basic) else 0
+
+        statuses = [p['scaling_status'] for p in parts]
+        scaling_status = next((st for st in ('Scaling Up', 'Scaling Down') if st in statuses), 'Stable')
+        last_decision = max(decisions, key=lambda d: d['timestamp']) if decisions else None
+        first = results[0][1]
+        return {
+            'vms': vms,
+            'cloudlets': cloudlets,
+            'scaling_status': scaling_status,
+            'utilization': usage,
+            'accounting': accounting,
+            'memory': memory,
+            'warm_pool': pool,
+            'consolidation': consolidation,
+            'preemption': merge_preemption(m['preemption'] for _, m in results),
+            'timeslice': merge_timeslice([m['timeslice'] for _, m in results]),
+            'runtime': merge_runtime(m['runtime'] for _, m in results),
+            'tenants': merge_tenants(m['tenants'] for _, m in results),
+            'admission': merge_admission(m['admission'] for _, m in results),
+            'state_store': [m['state_store'] for _, m in results],
+            self.part_key + 's': parts,
+            'generated_at': time.time(),
+            'auto_scaling': True,
+            'scaling': {
+                'status': scaling_status,
+                'last_scaled_at': max(m['scaling']['last_scaled_at'] for _, m in results),
+                'adaptive_cooldown': first['scaling']['adaptive_cooldown'],
+                'next_possible_scale': min(m['scaling']['next_possible_scale'] for _, m in results),
+                'last_decision': last_decision,
+            },
+        }
+
+
+class ShardedResourceManager(PartitionRouter):
+    """
+    N ResourceManager shards in worker processes behind a router.
+
+    Each shard owns a partition of the VMs and total_memory pages of its own,
+    and runs its own monitor loop (allocation, scaling, consolidation).
+    Cloudlets go to a shard with a VM that can host them (fewest pending
+    first), falling back to the shard with the shortest backlog so its
+    autoscaler can provision.
+    """
+
+    def __init__(self, n_shards: int = 2, total_memory: int = 1024, state_path: Optional[str] = None,
+                 metrics_ttl: float = 0.5):
+        ctx = multiprocessing.get_context(_START_METHOD)
+        self.n_shards = n_shards
+        self.events = ctx.Queue()
+        per_shard = total_memory // n_shards
+        self.shards: List[_Shard] = [
+            _Shard(i, ctx, self.events, per_shard, f"{state_path}.shard{i}" if state_path else None)
+            for i in range(n_shards)
+        ]
+        super().__init__(self.shards, metrics_ttl)
+        threading.Thread(target=self._pump_events, daemon=True).start()
+
+    def _pump_events(self):
+        """Forward shard logs; coalesce every shard's monitor tick into one metrics push per second."""
+        last_push = 0.0
+        while True:
+            shard_id, message = self.events.get()
+            if isinstance(message, tuple):
+                self._forget_cloudlet(message[1], self.shards[shard_id])
+            elif message is not None:
+                self.log(f"[shard {shard_id}] {message}")
+            elif self.metrics_callback and time.time() - last_push >= 1.0:
+                last_push = time.time()
+                try:
+                    self.metrics_callback()
+                except Exception as e:
+                    print(f"Failed to emit metrics: {e}")
+
+    def _route(self, cloudlet) -> _Shard:
+        demand = demand_vector(cloudlet)
+        with self.lock:
+            feasible = [s for s in self.shards
+                        if len(s.free) and np.all(s.free >= demand, axis=1).any()]
+            if feasible:
+                shard = min(feasible, key=lambda s: (s.summary['pending'],
+                                                     (s.id - self.next_part) % self.n_shards))
+                # Reserve the capacity locally until the shard's next summary arrives
+                rows = np.flatnonzero(np.all(shard.free >= demand, axis=1))
+                shard.free[rows[0]] -= demand
+            else:
+                # Nothing fits anywhere: queue it where the backlog is shortest so that
+                # shard's autoscaler provisions for it
+                shard = min(self.shards, key=lambda s: (s.summary['pending'], -s.summary['free_pages']))
+                shard.summary['pending'] += 1
+            self.next_part = (shard.id + 1) % self.n_shards
+            return shard
+
+    def submit_cloudlet(self, cloudlet):
+        shard = self._route(cloudlet)
+        # Owned before the call, so a 'finished' event that beats the reply still finds it
+        self.cloudlet_part[cloudlet.id] = shard
+        try:
+            apply_submit_result(cloudlet, shard.call('submit', cloudlet.to_record()))
+        except Exception:
+            self._forget_cloudlet(cloudlet.id, shard)
+            raise
+
+    def add_vm(self, vm, allocate=True):
+        shard = max(self.shards, key=lambda s: s.summary['free_pages'])
+        if shard.call('add_vm', vm.to_record()):
+            self.vm_part[vm.id] = shard
+            return True
+        return False
+
+    def _part_info(self, shard) -> dict:
+        return {'pid': shard.process.pid, 'alive': shard.process.is_alive()}
+
+    def close(self):
+        for shard in self.shards:
+            try:
+                shard.call('stop')
+            except (ShardError, EOFError, OSError):
+                pass
+            shard.process.join(timeout=5)
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,191 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import deque
+
+
+# --- STATE RECORDS ---
+# Every state transition is logged as (kind, payload):
+#   'vm' / 'cloudlet'                  upsert the full record (see VM.to_record / Cloudlet.to_record)
+#   'vm_removed' / 'cloudlet_removed'  drop the record with payload['id']
+# Memory pages are not logged: they are re-reserved for the recovered VMs and cloudlets.
+
+def empty_state() -> dict:
+    return {'vms': {}, 'cloudlets': {}}
+
+
+def apply_record(state: dict, kind: str, payload: dict) -> None:
+    if kind == 'vm':
+        state['vms'][payload['id']] = payload
+    elif kind == 'vm_removed':
+        state['vms'].pop(payload['id'], None)
+    elif kind == 'cloudlet':
+        state['cloudlets'][payload['id']] = payload
+    elif kind == 'cloudlet_removed':
+        state['cloudlets'].pop(payload['id'], None)
+
+
+def _encode(obj) -> str:
+    return json.dumps(obj, separators=(',', ':'))
+
+
+# --- STATE STORE ---
+
+class StateStore:
+    """
+    Durable scheduler state in a local SQLite database.
+
+    State transitions are appended to a write-ahead log table. A background
+    writer encodes and group-commits whatever has accumulated every
+    commit_interval seconds (or once max_batch records are waiting), so
+    callers never wait on encoding or disk. Snapshots store the whole state compressed and truncate the
+    log up to the snapshot's sequence number. Recovery loads the latest
+    snapshot and replays only the records logged after it.
+    """
+
+    def __init__(self, path: str, commit_interval: float = 0.05, max_batch: int = 5000):
+        self.path = path
+        self.commit_interval = commit_interval  # Seconds between group commits
+        self.max_batch = max_batch  # Records that trigger an early commit
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # Lets snapshots hand the space of truncated log records back to the filesystem
+        self.conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS wal ('
+                          'seq INTEGER PRIMARY KEY, ts REAL NOT NULL, kind TEXT NOT NULL, payload TEXT NOT NULL)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS snapshots ('
+                          'seq INTEGER PRIMARY KEY, ts REAL NOT NULL, state BLOB NOT NULL)')
+        self.conn.commit()
+
+        row = self.conn.execute('SELECT MAX(seq) FROM (SELECT seq FROM wal UNION ALL SELECT seq FROM snapshots)').fetchone()
+        self.seq = row[0] or 0
+        self.buffer = []
+        self.cond = threading.Condition()
+        self.db_lock = threading.Lock()  # Serializes commits, snapshots and reads
+        self.closed = False
+        self.stats = {
+            'records': 0,
+            'commits': 0,
+            'bytes_logged': 0,
+            'snapshots': 0,
+            'last_snapshot_bytes': 0,
+            'last_snapshot_seq': 0,
+            'last_recovery_seconds': 0.0,
+            'last_recovery_replayed': 0,
+        }
+        self.commit_latencies = deque(maxlen=500)  # Seconds per group commit
+        self.writer = threading.Thread(target=self._writer, daemon=True)
+        self.writer.start()
+
+    def append(self, kind: str, payload: dict) -> int:
+        """
+        Queue a state transition for the next group commit. Returns its sequence
+        number. The payload must not be mutated afterwards (records are fresh dicts).
+        """
+        with self.cond:
+            self.seq += 1
+            self.buffer.append((self.seq, time.time(), kind, payload))
+            if len(self.buffer) >= self.max_batch:
+                self.cond.notify()
+            return self.seq
+
+    def _writer(self):
+        while True:
+            with self.cond:
+                if not self.buffer and not self.closed:
+                    self.cond.wait(self.commit_interval)
+                if self.closed and not self.buffer:
+                    return
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit everything appended so far."""
+        with self.db_lock:
+            with self.cond:
+                batch, self.buffer = self.buffer, []
+            if not batch:
+                return
+            start = time.perf_counter()
+            rows = [(seq, ts, kind, _encode(payload)) for seq, ts, kind, payload in batch]
+            self.conn.executemany('INSERT INTO wal (seq, ts, kind, payload) VALUES (?, ?, ?, ?)', rows)
+            self.conn.commit()
+            self.commit_latencies.append(time.perf_counter() - start)
+            self.stats['records'] += len(rows)
+            self.stats['commits'] += 1
+            self.stats['bytes_logged'] += sum(len(row[3]) + len(row[2]) for row in rows)
+
+    def snapshot(self, state: dict, seq: int) -> int:
+        """
+        Persist a full state that reflects every record up to seq, then drop
+        those records and older snapshots. Returns the compressed size in bytes.
+        """
+        blob = zlib.compress(_encode(state).encode(), 1)
+        self.flush()
+        with self.db_lock:
+            self.conn.execute('INSERT OR REPLACE INTO snapshots (seq, ts, state) VALUES (?, ?, ?)',
+                              (seq, time.time(), blob))
+            self.conn.execute('DELETE FROM wal WHERE seq <= ?', (seq,))
+            self.conn.execute('DELETE FROM snapshots WHERE seq < ?', (seq,))
+            self.conn.commit()
+            # executescript steps the pragma to completion (execute frees a single page)
+            self.conn.executescript('PRAGMA incremental_vacuum;')
+            self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.stats['snapshots'] += 1
+        self.stats['last_snapshot_bytes'] = len(blob)
+        self.stats['last_snapshot_seq'] = seq
+        return len(blob)
+
+    def records_since_snapshot(self) -> int:
+        return self.seq - self.stats['last_snapshot_seq']
+
+    def load(self):
+        """
+        Rebuild state from the latest snapshot plus the log after it.
+        Returns (state, last_ts) where last_ts is the time of the newest record.
+        """
+        start = time.perf_counter()
+        self.flush()
+        with self.db_lock:
+            row = self.conn.execute('SELECT seq, ts, state FROM snapshots ORDER BY seq DESC LIMIT 1').fetchone()
+            if row:
+                snap_seq, last_ts = row[0], row[1]
+                state = json.loads(zlib.decompress(row[2]))
+            else:
+                snap_seq, last_ts, state = 0, None, empty_state()
+            replayed = 0
+            for _, ts, kind, payload in self.conn.execute(
+                    'SELECT seq, ts, kind, payload FROM wal WHERE seq > ? ORDER BY seq', (snap_seq,)):
+                apply_record(state, kind, json.loads(payload))
+                last_ts = ts
+                replayed += 1
+        self.stats['last_snapshot_seq'] = max(self.stats['last_snapshot_seq'], snap_seq)
+        self.stats['last_recovery_seconds'] = time.perf_counter() - start
+        self.stats['last_recovery_replayed'] = replayed
+        return state, last_ts
+
+    def disk_bytes(self) -> int:
+        return sum(os.path.getsize(p) for p in (self.path, self.path + '-wal') if os.path.exists(p))
+
+    def metrics(self) -> dict:
+        latencies = list(self.commit_latencies)
+        return {
+            **self.stats,
+            'seq': self.seq,
+            'pending': len(self.buffer),
+            'disk_bytes': self.disk_bytes(),
+            'commit_latency_ms_avg': (sum(latencies) / len(latencies) * 1000) if latencies else 0.0,
+        }
+
+    def close(self) -> None:
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        self.writer.join(timeout=5)
+        self.flush()
+        with self.db_lock:
+            self.conn.close()
+
@@ -1,11 +1,297 @@
 let vmChart, cloudletChart, slaChart;
-let logLines = [];
+let vmTable, cloudletTable;
+const LOG_LIMIT = 50;
+let pendingLogs = [];
+
+// --- Frame Scheduling ---
+// Socket pushes, log lines and scrolling only queue work; it runs once per animation frame
+const frameTasks = new Set();
+let frameRequested = false;
+
+function scheduleFrame(task) {
+    frameTasks.add(task);
+    if (frameRequested) return;
+    frameRequested = true;
+    requestAnimationFrame(() => {
+        frameRequested = false;
+        const tasks = [...frameTasks];
+        frameTasks.clear();
+        tasks.forEach(run => run());
+    });
+}
+
+let latestMetrics = null;
+
+function renderLatestMetrics() {
+    updateCharts(latestMetrics);
+}
+
+function scheduleMetrics(metrics) {
+    // Pushes that arrive within one frame collapse into a single render of the newest
+    latestMetrics = metrics;
+    scheduleFrame(renderLatestMetrics);
+}
+
+function escapeHtml(value) {
+    return String(value).replace(/[&<>"']/g, c => ({ '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' }[c]));
+}
 
 function addLog(msg) {
     const now = new Date().toLocaleTimeString();
-    logLines.unshift(`[${now}] ${msg}`);
-    if (logLines.length > 50) logLines = logLines.slice(0, 50);
-    document.getElementById('systemLog').innerHTML = logLines.join('<br>');
+    pendingLogs.push(`[${now}] ${msg}`);
+    if (pendingLogs.length > LOG_LIMIT) pendingLogs = pendingLogs.slice(-LOG_LIMIT);
+    scheduleFrame(flushLogs);
+}
+
+function flushLogs() {
+    const log = document.getElementById('systemLog');
+    if (!log) return;
+    // Newest first: prepend this frame's lines and drop the oldest
+    const fragment = document.createDocumentFragment();
+    for (let i = pendingLogs.length - 1; i >= 0; i--) {
+        const line = document.createElement('div');
+        line.textContent = pendingLogs[i];
+        fragment.appendChild(line);
+    }
+    pendingLogs = [];
+    log.insertBefore(fragment, log.firstChild);
+    while (log.childElementCount > LOG_LIMIT) log.lastElementChild.remove();
+}
+
+// --- Virtualized Tables ---
+// Only the rows in view (plus a margin) are in the DOM, between two spacer rows that
+// stand in for the rest. Rows are keyed by id and reused, and a cell is rewritten only
+// when its HTML differs from what it shows, so a push with 10k cloudlets touches ~30 rows.
+class VirtualTable {
+    constructor(tableId, rowHeight, renderCells, rowClass = () => '') {
+        this.table = document.getElementById(tableId);
+        this.body = this.table.querySelector('tbody');
+        this.viewport = this.table.closest('.table-viewport');
+        this.rowHeight = rowHeight;
+        this.renderCells = renderCells; // item -> HTML of each cell
+        this.rowClass = rowClass;
+        this.columns = this.table.querySelectorAll('thead th').length;
+        this.items = [];
+        this.rows = new Map(); // item id -> <tr> in the DOM
+        this.spareRows = [];
+        this.topSpacer = this.spacer();
+        this.bottomSpacer = this.spacer();
+        this.body.replaceChildren(this.topSpacer, this.bottomSpacer);
+        this.render = this.render.bind(this);
+        this.viewport.addEventListener('scroll', () => scheduleFrame(this.render), { passive: true });
+        window.addEventListener('resize', () => scheduleFrame(this.render));
+    }
+
+    spacer() {
+        const tr = document.createElement('tr');
+        tr.className = 'spacer';
+        const td = document.createElement('td');
+        td.colSpan = this.columns;
+        tr.appendChild(td);
+        return tr;
+    }
+
+    setItems(items) {
+        this.items = items;
+        this.render();
+    }
+
+    render() {
+        const overscan = 10;
+        const top = this.viewport.scrollTop;
+        const height = this.viewport.clientHeight || 400;
+        const first = Math.max(0, Math.floor(top / this.rowHeight) - overscan);
+        const last = Math.min(this.items.length, Math.ceil((top + height) / this.rowHeight) + overscan);
+        const visible = this.items.slice(first, last);
+
+        // Recycle rows whose item scrolled out of view or is gone
+        const keep = new Set(visible.map(item => item.id));
+        for (const [key, tr] of this.rows) {
+            if (!keep.has(key)) {
+                this.rows.delete(key);
+                tr.remove();
+                this.spareRows.push(tr);
+            }
+        }
+        // Visible rows go in order after the top spacer; rows already in place stay put
+        let previous = this.topSpacer;
+        for (const item of visible) {
+            let tr = this.rows.get(item.id);
+            if (!tr) {
+                tr = this.spareRows.pop() || this.newRow();
+                this.rows.set(item.id, tr);
+            }
+            this.patch(tr, item);
+            if (previous.nextSibling !== tr) this.body.insertBefore(tr, previous.nextSibling);
+            previous = tr;
+        }
+        this.topSpacer.firstChild.style.height = `${first * this.rowHeight}px`;
+        this.bottomSpacer.firstChild.style.height = `${(this.items.length - last) * this.rowHeight}px`;
+    }
+
+    newRow() {
+        const tr = document.createElement('tr');
+        tr.style.height = `${this.rowHeight}px`;
+        tr.cellHtml = [];
+        for (let i = 0; i < this.columns; i++) tr.appendChild(document.createElement('td'));
+        return tr;
+    }
+
+    patch(tr, item) {
+        this.renderCells(item).forEach((html, i) => {
+            if (tr.cellHtml[i] !== html) {
+                tr.cells[i].innerHTML = html;
+                tr.cellHtml[i] = html;
+            }
+        });
+        const className = this.rowClass(item);
+        if (tr.className !== className) tr.className = className;
+    }
+}
+
+function capitalize(word) {
+    return word.charAt(0).toUpperCase() + word.slice(1).toLowerCase();
+}
+
+function vmCells(vm) {
+    return [
+        `<span title="${vm.id}">${vm.id.slice(0,8)}</span>`,
+        vm.cpu_capacity,
+        vm.ram_capacity,
+        vm.storage_capacity,
+        vm.bandwidth_capacity,
+        vm.gpu_capacity,
+        capitalize(vm.status),
+        `<span class="badge ${vm.firewall_enabled ? 'secure' : 'insecure'}">${vm.firewall_enabled ? 'Firewall' : 'No Firewall'}</span><br>` +
+        `<span class="badge ${vm.isolation_level === 'STRICT' ? 'strict' : 'standard'}">${capitalize(vm.isolation_level)}</span>`,
+        `<button onclick="deleteVmById('${vm.id}')" style="color:#fff;background:#e53935;border:none;padding:2px 8px;border-radius:4px;cursor:pointer;">Delete</button>`
+    ].map(String);
+}
+
+function progressCell(cl) {
+    if (cl.status === 'COMPLETED') {
+        // For completed cloudlets, show full green bar
+        return '<div class="progress-bar-container"><div class="progress-bar" style="width: 100%; background: #4CAF50;"></div></div>';
+    }
+    if (cl.status === 'FAILED') {
+        // For failed cloudlets, show full red bar
+        return '<div class="progress-bar-container"><div class="progress-bar" style="width: 100%; background: #f44336;"></div></div>';
+    }
+    if (cl.status !== 'ACTIVE' || !cl.start_time) {
+        return '<div class="progress-bar-container"><div class="progress-bar" style="width: 0%; background: #9e9e9e;"></div></div>';
+    }
+    const now = Date.now() / 1000; // Current time in seconds
+    // Get execution time from cloudlet (default to 30s if not provided)
+    const executionTime = parseFloat(cl.execution_time) || 30;
+    // Calculate progress based on time elapsed since start
+    const elapsed = Math.max(0, now - parseFloat(cl.start_time));
+    const progress = Math.round(Math.min(100, (elapsed / executionTime) * 100));
+    const timeLeft = Math.max(0, executionTime - elapsed);
+    // Get SLA priority (default to 2 if not provided)
+    const slaPriority = parseInt(cl.sla_priority) || 2;
+    // Calculate time percentage remaining
+    const timePercentage = ((executionTime - elapsed) / executionTime) * 100;
+
+    // Determine color based on SLA priority and time remaining
+    let color = '#4CAF50'; // Default green
+    if (timePercentage < 20) {
+        color = slaPriority >= 3 ? '#f44336' : '#ff9800'; // Red for high priority, orange for others
+    } else if (timePercentage < 50) {
+        color = slaPriority >= 2 ? '#ff9800' : '#4CAF50'; // Orange for medium/high, green for low
+    }
+    return `<div class="progress-bar-container" title="${progress}% complete (${timeLeft.toFixed(1)}s remaining)">` +
+        `<div class="progress-bar" style="width: ${progress}%; background: ${color};">` +
+        `<span class="progress-text">${progress}%</span></div></div>`;
+}
+
+function cloudletCells(cl) {
+    let actions = `<button onclick="deleteCloudletById('${cl.id}')" style="color:#fff;background:#e53935;border:none;padding:2px 8px;border-radius:4px;cursor:pointer;">Delete</button>`;
+    if (cl.status === 'ACTIVE') {
+        actions = `<button onclick="completeCloudletById('${cl.id}')" style="color:#fff;background:#43a047;border:none;padding:2px 8px;margin-right:6px;border-radius:4px;cursor:pointer;">Complete</button>` + actions;
+    }
+    return [
+        escapeHtml(cl.name),
+        cl.vm_id ? cl.vm_id.slice(0,8) : 'N/A',
+        cl.cpu,
+        cl.ram,
+        cl.storage,
+        cl.bandwidth,
+        cl.gpu,
+        capitalize(cl.status),
+        progressCell(cl),
+        actions
+    ].map(String);
+}
+
+function cloudletRowClass(cl) {
+    return cl.time_critical && cl.status !== 'COMPLETED' ? 'time-critical' : '';
+}
+
+// --- Memory Page Map ---
+// One canvas cell per page (or per run of pages on large hosts) instead of one element each
+const MEMORY_COLORS = { free: '#4caf50', used: '#f44336', fragmented: '#ff9800' };
+
+function drawMemoryMap(canvas, totalPages, vms) {
+    const width = canvas.clientWidth || 300;
+    const height = canvas.clientHeight || 120;
+    const ratio = window.devicePixelRatio || 1;
+    if (canvas.width !== Math.round(width * ratio) || canvas.height !== Math.round(height * ratio)) {
+        canvas.width = Math.round(width * ratio);
+        canvas.height = Math.round(height * ratio);
+    }
+    const ctx = canvas.getContext('2d');
+    ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+    ctx.clearRect(0, 0, width, height);
+    canvas.layout = null;
+    if (!totalPages) return;
+
+    const used = new Uint8Array(totalPages);
+    vms.forEach(vm => (vm.memory_blocks || []).forEach(([start, count]) => {
+        used.fill(1, Math.min(start, totalPages), Math.min(start + count, totalPages));
+    }));
+    // Largest square cell that fits every page; below 3px, cells cover runs of pages
+    let cell = Math.floor(Math.sqrt((width * height) / totalPages));
+    let pagesPerCell = 1;
+    if (cell < 3) {
+        cell = 3;
+        pagesPerCell = Math.ceil(totalPages / (Math.floor(width / cell) * Math.floor(height / cell)));
+    }
+    const columns = Math.max(1, Math.floor(width / cell));
+    const cells = Math.ceil(totalPages / pagesPerCell);
+    const states = new Array(cells);
+    for (let i = 0; i < cells; i++) {
+        let count = 0;
+        const end = Math.min(totalPages, (i + 1) * pagesPerCell);
+        for (let page = i * pagesPerCell; page < end; page++) count += used[page];
+        states[i] = count === 0 ? 'free' : (count === end - i * pagesPerCell ? 'used' : 'fragmented');
+    }
+    // One fill style change per state rather than per cell
+    const gap = cell > 4 ? 1 : 0;
+    for (const state of Object.keys(MEMORY_COLORS)) {
+        ctx.fillStyle = MEMORY_COLORS[state];
+        for (let i = 0; i < cells; i++) {
+            if (states[i] === state) {
+                ctx.fillRect((i % columns) * cell, Math.floor(i / columns) * cell, cell - gap, cell - gap);
+            }
+        }
+    }
+    canvas.layout = { cell, columns, pagesPerCell, totalPages, states };
+}
+
+function describeMemoryCell(event) {
+    const canvas = event.target;
+    const layout = canvas.layout;
+    if (!layout) return;
+    const rect = canvas.getBoundingClientRect();
+    const index = Math.floor((event.clientY - rect.top) / layout.cell) * layout.columns
+        + Math.floor((event.clientX - rect.left) / layout.cell);
+    if (index < 0 || index >= layout.states.length) {
+        canvas.title = '';
+        return;
+    }
+    const start = index * layout.pagesPerCell;
+    const end = Math.min((index + 1) * layout.pagesPerCell, layout.totalPages);
+    canvas.title = `Pages ${start+1}-${end}: ${capitalize(layout.states[index])}`;
 }
 
 function showSuccessPopup(msg) {
@@ -200,74 +486,7 @@ function updateCharts(metrics) {
         // Update memory map visualization
         const memoryMap = document.getElementById('memoryMap');
         if (memoryMap) {
-            // Clear existing visualization
-            memoryMap.innerHTML = '';
-            
-            // Create a simplified visualization (max 100 blocks for performance)
-            const maxBlocks = 100;
-            const scale = Math.max(1, Math.ceil(totalPages / maxBlocks));
-            const displayPages = Math.min(maxBlocks, totalPages);
-            
-            for (let i = 0; i < displayPages; i++) {
-                const page = document.createElement('div');
-                page.className = 'memory-page';
-                
-                // Determine if this block represents used or free memory
-                const startPage = i * scale;
-                const endPage = Math.min((i + 1) * scale, totalPages);
-                const freeInThisBlock = Math.max(0, Math.min(freePages - startPage, endPage - startPage));
-                const usedInThisBlock = (endPage - startPage) - freeInThisBlock;
-                
-                if (usedInThisBlock > 0 && freeInThisBlock > 0) {
-                    // Partially used block (fragmented)
-                    page.classList.add('fragmented');
-                    page.title = `Pages ${startPage+1}-${endPage}: ${usedInThisBlock} used, ${freeInThisBlock} free`;
-                } else if (usedInThisBlock > 0) {
-                    // Fully used block
-                    page.classList.add('used');
-                    page.title = `Pages ${startPage+1}-${endPage}: Used`;
-                } else {
-                    // Free block
-                    page.classList.add('free');
-                    page.title = `Pages ${startPage+1}-${endPage}: Free`;
-                }
-                
-                memoryMap.appendChild(page);
-            }
-            
-            // Add legend if there's enough space
-            if (!document.getElementById('memoryLegend')) {
-                const legend = document.createElement('div');
-                legend.id = 'memoryLegend';
-                legend.style.display = 'flex';
-                legend.style.justifyContent = 'center';
-                legend.style.gap = '12px';
-                legend.style.marginTop = '12px';
-                legend.style.fontSize = '12px';
-                
-                const addLegendItem = (color, label) => {
-                    const item = document.createElement('div');
-                    item.style.display = 'flex';
-                    item.style.alignItems = 'center';
-                    item.style.gap = '4px';
-                    
-                    const swatch = document.createElement('div');
-                    swatch.style.width = '12px';
-                    swatch.style.height = '12px';
-                    swatch.style.borderRadius = '2px';
-                    swatch.style.backgroundColor = color;
-                    
-                    item.appendChild(swatch);
-                    item.appendChild(document.createTextNode(label));
-                    return item;
-                };
-                
-                legend.appendChild(addLegendItem('#4caf50', 'Free'));
-                legend.appendChild(addLegendItem('#f44336', 'Used'));
-                legend.appendChild(addLegendItem('#ff9800', 'Fragmented'));
-                
-                memoryMap.parentNode.insertBefore(legend, memoryMap.nextSibling);
-            }
+            drawMemoryMap(memoryMap, totalPages, metrics.vms || []);
         }
     }
 
@@ -372,7 +591,7 @@ function updateCharts(metrics) {
         vmChart.data.datasets[2].data = storage;
         vmChart.data.datasets[3].data = bandwidth;
         vmChart.data.datasets[4].data = gpu;
-        vmChart.update();
+        vmChart.update('none');  // No tween: pushes arrive every second
     }
 
     // Cloudlet Status - Initialize with default values if cloudlets is not defined
@@ -398,7 +617,7 @@ function updateCharts(metrics) {
         });
     } else {
         cloudletChart.data.datasets[0].data = Object.values(statusCounts);
-        cloudletChart.update();
+        cloudletChart.update('none');  // No tween: pushes arrive every second
     }
 
     // SLA Compliance (percentage of completed cloudlets before deadline)
@@ -415,128 +634,30 @@ function updateCharts(metrics) {
         });
     } else {
         slaChart.data.datasets[0].data = [slaMet, slaMissed];
-        slaChart.update();
-    }
-
-    // Update VM Table
-    const vmTableBody = document.getElementById('vmTable')?.querySelector('tbody');
-    if (vmTableBody) {
-        vmTableBody.innerHTML = '';
-    metrics.vms.forEach(vm => {
-        vmTableBody.innerHTML += `
-            <tr>
-                <td><span title="${vm.id}">${vm.id.slice(0,8)}</span></td>
-                <td>${vm.cpu_capacity}</td>
-                <td>${vm.ram_capacity}</td>
-                <td>${vm.storage_capacity}</td>
-                <td>${vm.bandwidth_capacity}</td>
-                <td>${vm.gpu_capacity}</td>
-                <td>${vm.status.charAt(0).toUpperCase() + vm.status.slice(1).toLowerCase()}</td>
-                <td>
-                    <span class="badge ${vm.firewall_enabled ? 'secure' : 'insecure'}">
-                        ${vm.firewall_enabled ? 'Firewall' : 'No Firewall'}
-                    </span><br>
-                    <span class="badge ${vm.isolation_level === 'STRICT' ? 'strict' : 'standard'}">
-                        ${vm.isolation_level.toLowerCase().replace(/^\w/, c => c.toUpperCase())}
-                    </span>
-                </td>
-                <td><button onclick="deleteVmById('${vm.id}')" style="color:#fff;background:#e53935;border:none;padding:2px 8px;border-radius:4px;cursor:pointer;">Delete</button></td>
-            </tr>
-        `;
-    });
+        slaChart.update('none');  // No tween: pushes arrive every second
     }
 
-    // Update Cloudlet Table
-    const cloudletTableBody = document.getElementById('cloudletTable')?.querySelector('tbody');
-    if (cloudletTableBody) {
-        cloudletTableBody.innerHTML = '';
-    metrics.cloudlets.forEach(cl => {
-        let actions = `<button onclick="deleteCloudletById('${cl.id}')" style="color:#fff;background:#e53935;border:none;padding:2px 8px;border-radius:4px;cursor:pointer;">Delete</button>`;
-        if (cl.status === 'ACTIVE') {
-            actions = `<button onclick="completeCloudletById('${cl.id}')" style="color:#fff;background:#43a047;border:none;padding:2px 8px;margin-right:6px;border-radius:4px;cursor:pointer;">Complete</button>` + actions;
-        }
-        
-        // Calculate progress and determine color based on SLA priority and time remaining
-        let progressBar = '';
-        let progressText = '';
-        
-        if (cl.status === 'COMPLETED') {
-            // For completed cloudlets, show full green bar
-            progressBar = '<div class="progress-bar-container"><div class="progress-bar" style="width: 100%; background: #4CAF50;"></div></div>';
-            progressText = '100%';
-        } else if (cl.status === 'FAILED') {
-            // For failed cloudlets, show full red bar
-            progressBar = '<div class="progress-bar-container"><div class="progress-bar" style="width: 100%; background: #f44336;"></div></div>';
-            progressText = 'FAILED';
-        } else if (cl.status === 'ACTIVE' && cl.start_time) {
-            const now = Date.now() / 1000; // Current time in seconds
-            const startTime = parseFloat(cl.start_time);
-            let progress = 0;
-            let timeLeft = 0;
-            let color = '#4CAF50'; // Default green
-            
-            // Get execution time from cloudlet (default to 30s if not provided)
-            const executionTime = parseFloat(cl.execution_time) || 30;
-            
-            // Calculate progress based on time elapsed since start
-            const elapsed = Math.max(0, now - startTime);
-            progress = Math.min(100, (elapsed / executionTime) * 100);
-            timeLeft = Math.max(0, executionTime - elapsed);
-            
-            // Get SLA priority (default to 2 if not provided)
-            const slaPriority = parseInt(cl.sla_priority) || 2;
-            
-            // Calculate time percentage remaining
-            const timePercentage = ((executionTime - elapsed) / executionTime) * 100;
-            
-            // Determine color based on SLA priority and time remaining
-            if (timePercentage < 20) {
-                color = slaPriority >= 3 ? '#f44336' : '#ff9800'; // Red for high priority, orange for others
-            } else if (timePercentage < 50) {
-                color = slaPriority >= 2 ? '#ff9800' : '#4CAF50'; // Orange for medium/high, green for low
-            }
-            
-            progressBar = `
-                <div class="progress-bar-container" title="${Math.round(progress)}% complete (${timeLeft.toFixed(1)}s remaining)">
-                    <div class="progress-bar" style="width: ${progress}%; background: ${color};">
-                        <span class="progress-text">${Math.round(progress)}%</span>
-                    </div>
-                </div>
-            `;
-            progressText = `${Math.round(progress)}%`;
-        } else {
-            progressBar = '<div class="progress-bar-container"><div class="progress-bar" style="width: 0%; background: #9e9e9e;"></div></div>';
-            progressText = '0%';
-        }
-        
-        cloudletTableBody.innerHTML += `
-            <tr style="${cl.time_critical && cl.status !== 'COMPLETED' ? 'color: red; font-weight: bold; text-shadow: 0 0 3px red;' : ''}">
-                <td>${cl.name}</td>
-                <td>${cl.vm_id ? cl.vm_id.slice(0,8) : 'N/A'}</td>
-                <td>${cl.cpu}</td>
-                <td>${cl.ram}</td>
-                <td>${cl.storage}</td>
-                <td>${cl.bandwidth}</td>
-                <td>${cl.gpu}</td>
-                <td>${cl.status.charAt(0).toUpperCase() + cl.status.slice(1).toLowerCase()}</td>
-                <td>${progressBar}</td>
-                <td>${actions}</td>
-            </tr>
-        `;
-    });
+    // Update VM and Cloudlet tables (only the rows in view are rendered)
+    if (!vmTable && document.getElementById('vmTable')) {
+        vmTable = new VirtualTable('vmTable', 64, vmCells);
+    }
+    if (!cloudletTable && document.getElementById('cloudletTable')) {
+        cloudletTable = new VirtualTable('cloudletTable', 48, cloudletCells, cloudletRowClass);
     }
+    vmTable?.setItems(vms);
+    cloudletTable?.setItems(cloudlets);
 
     // Show auto-scaling status
     let autoscale = metrics.auto_scaling ? 'Enabled' : 'Disabled';
-    document.getElementById('autoscaleStatus')?.remove();
+    let statusDiv = document.getElementById('autoscaleStatus');
     const dash = document.querySelector('.dashboard');
-    if (dash) {
-        const statusDiv = document.createElement('div');
+    if (!statusDiv && dash) {
+        statusDiv = document.createElement('div');
         statusDiv.id = 'autoscaleStatus';
         statusDiv.style = 'text-align:center;margin:12px 0;font-weight:bold;color:#1976d2;';
-        statusDiv.innerText = `Auto-Scaling: ${autoscale}`;
         dash.prepend(statusDiv);
     }
+    if (statusDiv) statusDiv.innerText = `Auto-Scaling: ${autoscale}`;
 }
 
 // --- Load Balancing Functions ---
@@ -608,16 +729,6 @@ function initLoadBalancing() {
     }
 }
 
-// --- Socket.IO Real-Time Updates ---
-const socket = io();
-socket.on('metrics_update', (metrics) => {
-    updateCharts(metrics);
-});
-
-socket.on('system_log', ({ log }) => {
-    addLog(log);
-});
-
 function applyPreset() {
     const preset = document.getElementById('vmPreset').value;
     if (preset === 'small') {
@@ -690,6 +801,8 @@ function initializeApp() {
     try {
         console.log('Initializing application...');
         
+        document.getElementById('memoryMap')?.addEventListener('mousemove', describeMemoryCell);
+
         // Initialize load balancing UI
         const lbInitSuccess = initLoadBalancing();
         console.log('Load balancing initialization:', lbInitSuccess ? 'success' : 'elements not found');
@@ -719,9 +832,8 @@ function initializeApp() {
                 return response.json();
             })
             .then(metrics => {
-                console.log('Received initial metrics:', metrics);
                 if (metrics) {
-                    updateCharts(metrics);
+                    scheduleMetrics(metrics);
                 }
             })
             .catch(error => {
@@ -734,10 +846,7 @@ function initializeApp() {
             console.log('Connected to server via Socket.IO');
         });
         
-        socket.on('metrics_update', (metrics) => {
-            console.log('Received metrics update:', metrics);
-            updateCharts(metrics);
-        });
+        socket.on('metrics_update', scheduleMetrics);
         
         socket.on('system_log', ({ log }) => {
             addLog(log);
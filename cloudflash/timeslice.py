@@ -0,0 +1,97 @@
+from typing import Dict, Iterable, List, Tuple
+
+
+class TimeSlicer:
+    """
+    Time-sliced CPU and GPU sharing on overcommitted VMs.
+
+    A VM with a cpu_overcommit (gpu_overcommit) ratio above 1 admits cloudlets
+    until their vCPU (GPU slice) demands add up to that multiple of its cores
+    (GPUs). While demand exceeds the physical cores, the hypervisor time-slices
+    them in proportion to demand: every cloudlet on the VM runs at the rate
+    capacity / used, and a cloudlet using both a CPU and a GPU share runs at
+    the slower of the two. The ResourceManager asks for the VM's rates after
+    every allocate/deallocate and re-times the running cloudlets whose rate
+    changed, so execution time stretches with contention.
+    """
+
+    def __init__(self):
+        self.rates: Dict[str, Tuple[float, float]] = {}  # VM ID -> (CPU rate, GPU rate), when below 1
+        self.sliced_seconds = 0.0  # Runtime lost to time slicing by completed cloudlets
+        self.work_seconds = 0.0  # Execution time of completed cloudlets
+        self.sliced_cloudlets = 0  # Completed cloudlets that ran below full speed at some point
+        self.completed = 0
+
+    @staticmethod
+    def vm_rates(vm) -> Tuple[float, float]:
+        """Share of its demand each cloudlet on the VM gets, for CPU and for GPU."""
+        cpu = vm.cpu_capacity / vm.cpu_used if vm.cpu_used > vm.cpu_capacity else 1.0
+        gpu = vm.gpu_capacity / vm.gpu_used if vm.gpu_used > vm.gpu_capacity else 1.0
+        return cpu, gpu
+
+    def update(self, vm) -> bool:
+        """Record the VM's current rates; True if they changed since the last call."""
+        rates = self.vm_rates(vm)
+        if rates == self.rates.get(vm.id, (1.0, 1.0)):
+            return False
+        if rates == (1.0, 1.0):
+            del self.rates[vm.id]
+        else:
+            self.rates[vm.id] = rates
+        return True
+
+    def forget(self, vm_id: str) -> None:
+        self.rates.pop(vm_id, None)
+
+    def share(self, vm_id: str, cloudlet) -> float:
+        """Rate, as a fraction of full speed, at which the cloudlet runs on the VM."""
+        cpu, gpu = self.rates.get(vm_id, (1.0, 1.0))
+        return min(cpu if cloudlet.cpu > 0 else 1.0, gpu if cloudlet.gpu > 0 else 1.0)
+
+    def record_completion(self, cloudlet) -> None:
+        self.completed += 1
+        self.work_seconds += cloudlet.execution_time
+        self.sliced_seconds += cloudlet.slice_time
+        if cloudlet.slice_time > 0:
+            self.sliced_cloudlets += 1
+
+    def metrics(self, vms: Iterable) -> dict:
+        vms = list(vms)
+        return summarize({
+            'vms': len(vms),
+            'overcommitted_vms': sum(1 for vm in vms if vm.cpu_overcommit > 1 or vm.gpu_overcommit > 1),
+            'contended_vms': len(self.rates),
+            'min_cpu_rate': min((cpu for cpu, _ in self.rates.values()), default=1.0),
+            'min_gpu_rate': min((gpu for _, gpu in self.rates.values()), default=1.0),
+            'cpu_demand': sum(vm.cpu_used for vm in vms),
+            'cpu_cores': sum(vm.cpu_capacity for vm in vms),
+            'gpu_demand': sum(vm.gpu_used for vm in vms),
+            'gpus': sum(vm.gpu_capacity for vm in vms),
+            'completed': self.completed,
+            'sliced_cloudlets': self.sliced_cloudlets,
+            'work_seconds': self.work_seconds,
+            'sliced_seconds': self.sliced_seconds,
+        })
+
+
+def summarize(stats: dict) -> dict:
+    """Add the density and slowdown ratios to the summed counters (shared with the partition routers)."""
+    stats['cpu_density'] = stats['cpu_demand'] / stats['cpu_cores'] if stats['cpu_cores'] else 0.0
+    stats['gpu_density'] = stats['gpu_demand'] / stats['gpus'] if stats['gpus'] else 0.0
+    work = stats['work_seconds']
+    stats['slowdown'] = (work + stats['sliced_seconds']) / work if work else 1.0
+    return stats
+
+
+def merge_metrics(parts: List[dict]) -> dict:
+    """Combine TimeSlicer.metrics() of several partitions into one."""
+    merged = {}
+    for part in parts:
+        for key, value in part.items():
+            if key in ('cpu_density', 'gpu_density', 'slowdown'):
+                continue
+            if key.startswith('min_'):
+                merged[key] = min(merged.get(key, 1.0), value)
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return summarize(merged) if merged else merged
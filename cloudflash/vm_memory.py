@@ -0,0 +1,190 @@
+import math
+from bisect import insort
+from typing import Dict, List, Optional, Tuple
+
+SMALL_PAGES_PER_PAGE = 4  # 256 MB small pages per 1 GB base page
+
+
+class LocalPageAllocator:
+    """
+    The second level of the memory hierarchy: the blocks a VM reserved from
+    the MemoryManager when it joined the fleet, carved up among its cloudlets.
+
+    A cloudlet gets a whole base page for every full page of RAM it asks for
+    and 256 MB small pages for the rest. Small pages come from a slab: a base
+    page split into SMALL_PAGES_PER_PAGE slots, filled fullest-first and
+    returned whole to the free list once its last slot is freed. A 0.5 GB
+    cloudlet therefore holds two small pages instead of wasting half a page.
+
+    Cloudlet placement only ever touches this allocator, so it never takes the
+    global memory lock and never consumes global pages beyond the VM's own
+    reservation. Pages are tracked per cloudlet, so a deallocation returns
+    exactly the pages that cloudlet was given. Only reserve() and shrink()
+    (VM provisioning and resize) move pages between the VM and the global pool.
+
+    On a NUMA host, pages on the VM's home node are handed out first and
+    given back last.
+
+    The allocator has no lock of its own: the VM calls it under vm.lock.
+    """
+
+    def __init__(self, page_size: int = 1):
+        self.page_size = page_size
+        self.blocks: List[Tuple[int, int]] = []  # Reserved (first page, pages) blocks, sorted
+        self.reserved_count = 0  # Base pages across the blocks
+        self.free: List[int] = []  # Reserved base pages no cloudlet uses, sorted
+        self.slabs: Dict[int, List[int]] = {}  # Base page split into small pages -> its free slots
+        self.free_slots = 0
+        self.owned: Dict[str, tuple] = {}  # Cloudlet ID -> (base pages, small pages as page * 4 + slot, ram)
+        self.home: Optional[range] = None  # Pages of the VM's home NUMA node
+
+    def _remote(self, page: int) -> bool:
+        return self.home is not None and page not in self.home
+
+    def pages_for(self, ram) -> int:
+        """Base pages a reservation of ram needs."""
+        return math.ceil(ram / self.page_size - 1e-9) if ram > 0 else 0
+
+    def split(self, ram) -> Tuple[int, int]:
+        """(base pages, small pages) a cloudlet asking for ram is given."""
+        if ram <= 0:
+            return 0, 0
+        whole = int(ram // self.page_size)
+        small = math.ceil((ram - whole * self.page_size) * SMALL_PAGES_PER_PAGE / self.page_size - 1e-9)
+        if small >= SMALL_PAGES_PER_PAGE:
+            return whole + 1, 0
+        return whole, small
+
+    @property
+    def free_count(self) -> int:
+        return len(self.free)
+
+    @property
+    def used_count(self) -> int:
+        """Base pages holding cloudlet memory, whole or split into small pages."""
+        return self.reserved_count - len(self.free)
+
+    @property
+    def small_pages_used(self) -> int:
+        return len(self.slabs) * SMALL_PAGES_PER_PAGE - self.free_slots
+
+    def waste(self) -> float:
+        """Memory handed to cloudlets beyond what they asked for (small-page rounding)."""
+        small = self.page_size / SMALL_PAGES_PER_PAGE
+        return sum(len(pages) * self.page_size + len(smalls) * small - ram
+                   for pages, smalls, ram in self.owned.values())
+
+    def pages_of(self, owner: str) -> List[int]:
+        """Base pages holding owner's memory."""
+        entry = self.owned.get(owner)
+        if entry is None:
+            return []
+        pages, smalls, _ = entry
+        return sorted(set(pages).union(s // SMALL_PAGES_PER_PAGE for s in smalls))
+
+    def reserve(self, blocks) -> None:
+        """Add blocks taken from the global pool to the reservation."""
+        added = []
+        for start, count in blocks:
+            insort(self.blocks, (start, count))
+            self.reserved_count += count
+            added.extend(range(start, start + count))
+        self.free = sorted(self.free + added)
+
+    def shrink(self, count: int) -> Optional[List[int]]:
+        """
+        Take count free base pages (the highest-numbered) out of the reservation
+        so they can go back to the global pool. None if fewer than count are
+        free. The caller refreshes blocks from the pool, which splits them.
+        """
+        if count > len(self.free):
+            return None
+        if count <= 0:
+            return []
+        # Remote pages go back first, then the highest-numbered
+        released = sorted(self.free, key=lambda p: (not self._remote(p), -p))[:count]
+        taken = set(released)
+        self.free = [page for page in self.free if page not in taken]
+        self.reserved_count -= count
+        return released
+
+    def clear(self) -> List[Tuple[int, int]]:
+        """Drop the whole reservation and every cloudlet's pages; returns the reserved blocks."""
+        released = self.blocks
+        self.blocks, self.free, self.slabs, self.owned = [], [], {}, {}
+        self.reserved_count = self.free_slots = 0
+        return released
+
+    def fits(self, ram) -> bool:
+        whole, small = self.split(ram)
+        if whole > len(self.free):
+            return False
+        return small <= self.free_slots + (len(self.free) - whole) * SMALL_PAGES_PER_PAGE
+
+    def allocate(self, owner: str, ram) -> Optional[List[int]]:
+        """Give owner the pages for ram. Returns the base pages it now uses, or None if the reservation is short."""
+        if not self.fits(ram):
+            return None
+        whole, small = self.split(ram)
+        pages = []
+        if whole:
+            # Home-node pages first (the free list is sorted, so this is a stable partition)
+            pages = sorted(self.free, key=self._remote)[:whole]
+            taken = set(pages)
+            self.free = [page for page in self.free if page not in taken]
+        smalls = []
+        while len(smalls) < small:
+            partial = [page for page, slots in self.slabs.items() if slots]
+            if partial:
+                # Fill the fullest slab first so the emptier ones can drain back to whole pages
+                page = min(partial, key=lambda p: (self._remote(p), len(self.slabs[p]), p))
+            else:
+                page = min(self.free, key=lambda p: (self._remote(p), p))
+                self.free.remove(page)
+                self.slabs[page] = list(range(SMALL_PAGES_PER_PAGE))
+                self.free_slots += SMALL_PAGES_PER_PAGE
+            slots = self.slabs[page]
+            take = min(small - len(smalls), len(slots))
+            smalls.extend(page * SMALL_PAGES_PER_PAGE + slot for slot in slots[:take])
+            del slots[:take]
+            self.free_slots -= take
+        if pages or smalls:
+            self.owned[owner] = (pages, smalls, ram)
+        return self.pages_of(owner)
+
+    def release(self, owner: str) -> List[int]:
+        """Return exactly the pages owner was given; returns the base pages it used."""
+        used = self.pages_of(owner)
+        entry = self.owned.pop(owner, None)
+        if entry is None:
+            return used
+        pages, smalls, _ = entry
+        for page in pages:
+            insort(self.free, page)
+        for small in smalls:
+            page, slot = divmod(small, SMALL_PAGES_PER_PAGE)
+            insort(self.slabs[page], slot)
+            self.free_slots += 1
+            if len(self.slabs[page]) == SMALL_PAGES_PER_PAGE:
+                del self.slabs[page]
+                self.free_slots -= SMALL_PAGES_PER_PAGE
+                insort(self.free, page)
+        return used
+
+    def remap(self, moved: Dict[int, int]) -> None:
+        """Follow a MemoryManager.consolidate() that moved reserved blocks (old page -> new page)."""
+        if not moved or not any(start in moved for start, _ in self.blocks):
+            return
+
+        def new(page):
+            return moved.get(page, page)
+
+        self.blocks = sorted((new(start), count) for start, count in self.blocks)
+        self.free = sorted(new(page) for page in self.free)
+        self.slabs = {new(page): slots for page, slots in self.slabs.items()}
+        self.owned = {
+            owner: ([new(page) for page in pages],
+                    [new(s // SMALL_PAGES_PER_PAGE) * SMALL_PAGES_PER_PAGE + s % SMALL_PAGES_PER_PAGE for s in smalls],
+                    ram)
+            for owner, (pages, smalls, ram) in self.owned.items()
+        }
@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+
+class WarmPool:
+    """
+    Pre-provisioned idle VMs per flavor with their memory pages already reserved.
+
+    A scale-up claims a VM from the pool instantly; a background worker refills
+    the pool. Refills only take the MemoryManager lock for the page reservation
+    and the pool's own lock to publish the VM, never the scheduler lock.
+    """
+
+    def __init__(self, memory_manager, vm_factory: Callable, targets: Optional[Dict[str, int]] = None,
+                 refill_interval: float = 1.0):
+        self.memory_manager = memory_manager
+        self.vm_factory = vm_factory  # flavor name -> unregistered VM
+        self.targets = dict(targets or {})  # flavor name -> VMs to keep warm
+        self.refill_interval = refill_interval
+        self.pools: Dict[str, deque] = {name: deque() for name in self.targets}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+        self.refill_latencies = deque(maxlen=500)  # Seconds per refilled VM
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refill()
+            self._wake.wait(self.refill_interval)
+            self._wake.clear()
+
+    def set_target(self, flavor_name: str, count: int) -> None:
+        with self.lock:
+            self.targets[flavor_name] = max(0, count)
+            self.pools.setdefault(flavor_name, deque())
+        self._wake.set()
+
+    def claim(self, flavor_name: str, substitutes=()):
+        """
+        Take a warm VM of the flavor, or else of the first substitute flavor
+        (e.g. larger ones) that has one. Returns None on a miss. Wakes the refill worker.
+        """
+        with self.lock:
+            vm = None
+            for name in (flavor_name, *substitutes):
+                pool = self.pools.get(name)
+                if pool:
+                    vm = pool.popleft()
+                    break
+            if vm is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        self._wake.set()
+        if vm is not None:
+            # Consolidation may have renumbered the reserved blocks while the VM sat idle
+            vm.memory.clear()
+            vm.memory.reserve(self.memory_manager.blocks_of(vm.id))
+        return vm
+
+    def refill(self) -> int:
+        """Top every flavor up to its target. Returns the number of VMs added."""
+        added = 0
+        with self.lock:
+            deficits = {name: target - len(self.pools.get(name, ()))
+                        for name, target in self.targets.items()}
+        for name, deficit in deficits.items():
+            for _ in range(max(0, deficit)):
+                start = time.perf_counter()
+                vm = self.vm_factory(name)
+                if vm is None:
+                    break
+                if not vm.reserve_memory(self.memory_manager):
+                    return added  # Out of memory; try again on the next cycle
+                with self.lock:
+                    self.pools.setdefault(name, deque()).append(vm)
+                    self.refills += 1
+                    self.refill_latencies.append(time.perf_counter() - start)
+                added += 1
+        return added
+
+    def release(self, pages_needed: int) -> int:
+        """Give pooled VMs' pages back until pages_needed are free. Returns VMs released."""
+        released = 0
+        while self.memory_manager.free_count < pages_needed:
+            with self.lock:
+                pool = max(self.pools.values(), key=len, default=None)
+                vm = pool.pop() if pool else None
+            if vm is None:
+                break
+            vm.release_memory(self.memory_manager)
+            released += 1
+        return released
+
+    def drain(self) -> None:
+        with self.lock:
+            vms = [vm for pool in self.pools.values() for vm in pool]
+            for pool in self.pools.values():
+                pool.clear()
+        for vm in vms:
+            vm.release_memory(self.memory_manager)
+
+    def metrics(self) -> dict:
+        with self.lock:
+            claims = self.hits + self.misses
+            latencies = sorted(self.refill_latencies)
+            return {
+                'pooled': {name: len(pool) for name, pool in self.pools.items()},
+                'targets': dict(self.targets),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / claims if claims else 0.0,
+                'refills': self.refills,
+                'refill_latency_ms_avg': (sum(latencies) / len(latencies) * 1000) if latencies else 0.0,
+                'refill_latency_ms_p99': latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000 if latencies else 0.0,
+            }
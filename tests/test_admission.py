@@ -0,0 +1,162 @@
+import time
+
+import numpy as np
+import pytest
+
+from admission import AdmissionController, AdmissionError, Replay
+from core import Cloudlet, CloudletStatus, ResourceManager, VM
+
+
+def cloudlet(cpu=1, ram=1, deadline=60, execution_time=5.0):
+    return Cloudlet(cpu=cpu, ram=ram, storage=1, sla_priority=1, deadline=deadline, execution_time=execution_time)
+
+
+def completions(controller, count, every, end):
+    for i in range(count):
+        controller.record_completion(end - (count - 1 - i) * every)
+
+
+# --- 429: backpressure ---
+
+def test_queue_depth_limit_is_a_429_with_the_default_retry_after_before_any_completion():
+    controller = AdmissionController()
+    controller.throttle(cloudlet(), pending=7, max_pending=8, ram_budget=None, now=100.0)  # Below the limit
+    with pytest.raises(AdmissionError) as raised:
+        controller.throttle(cloudlet(), pending=8, max_pending=8, ram_budget=None, now=100.0)
+    assert raised.value.status == 429
+    assert raised.value.retry_after == controller.DEFAULT_RETRY_AFTER == 5
+    assert controller.stats['throttled'] == 1
+
+
+def test_retry_after_is_the_time_to_drain_the_excess_at_the_recent_completion_rate():
+    controller = AdmissionController()
+    completions(controller, 11, every=1.0, end=100.0)  # 11 completions over 10s
+    assert controller.drain_rate(100.0) == pytest.approx(1.1)
+    with pytest.raises(AdmissionError) as raised:
+        controller.throttle(cloudlet(), pending=10, max_pending=8, ram_budget=None, now=100.0)
+    # Three cloudlets over the limit (10 - 8 + 1) at 1.1/s: ceil(2.73) seconds
+    assert raised.value.retry_after == 3
+
+
+def test_retry_after_is_clamped_to_one_second_and_the_maximum():
+    controller = AdmissionController()
+    completions(controller, 100, every=0.01, end=100.0)  # ~100/s
+    assert controller.retry_after(1, 100.0) == 1
+    slow = AdmissionController()
+    completions(slow, 2, every=50.0, end=100.0)  # 2 per 50s
+    assert slow.retry_after(1000, 100.0) == slow.MAX_RETRY_AFTER == 300
+
+
+def test_pending_ram_budget_expresses_the_overrun_in_average_cloudlets():
+    controller = AdmissionController()
+    completions(controller, 5, every=1.0, end=100.0)  # 5 over 4s: 1.25/s
+    for _ in range(4):
+        controller.backlog.update(cloudlet(ram=4))
+    assert controller.backlog.ram == 16
+    controller.throttle(cloudlet(ram=4), pending=4, max_pending=None, ram_budget=20, now=100.0)
+    with pytest.raises(AdmissionError) as raised:
+        controller.throttle(cloudlet(ram=10), pending=4, max_pending=None, ram_budget=20, now=100.0)
+    # 16 + 10 - 20 = 6GB over, at 4GB per queued cloudlet: 1.5 cloudlets, 1.2s
+    assert raised.value.status == 429
+    assert raised.value.retry_after == 2
+    assert 'RAM pending' in str(raised.value)
+
+
+def test_backlog_forgets_cloudlets_that_leave_the_queue():
+    controller = AdmissionController()
+    queued = cloudlet(ram=6)
+    controller.backlog.update(queued)
+    queued.status = CloudletStatus.ACTIVE
+    controller.backlog.update(queued)
+    assert controller.backlog.ram == 0
+
+
+# --- 422: deadline feasibility ---
+
+def test_replay_predicts_the_start_behind_running_work():
+    free = np.array([[0.0, 4.0, 10.0, 1000.0, 0.0]])
+    running = [(30.0, 0, np.array([4.0, 4.0, 0.0, 0.0, 0.0]))]  # Holds every CPU for 30s more
+    controller = AdmissionController()
+    replay = Replay(free, np.zeros(1, dtype=bool), np.ones(1, dtype=np.int64), running, now=100.0)
+    assert controller.predict_wait(cloudlet(cpu=2), replay, 5.0, now=100.0) == pytest.approx(30.0)
+    # The second starts alongside the first once the CPUs free up
+    assert controller.predict_wait(cloudlet(cpu=2), replay, 5.0, now=100.0) == pytest.approx(30.0)
+    assert controller.predict_wait(cloudlet(cpu=2), replay, 5.0, now=100.0) == pytest.approx(35.0)
+
+
+def test_infeasible_deadline_is_a_422_in_reject_mode_and_flagged_otherwise():
+    now = time.time()
+    late = cloudlet(deadline=20)
+    controller = AdmissionController()
+    with pytest.raises(AdmissionError) as raised:
+        controller.admit(late, wait=18.0, runtime=5.0, mode='reject', now=now)
+    assert raised.value.status == 422
+    assert raised.value.retry_after is None
+    assert raised.value.predicted_start == pytest.approx(now + 18.0)
+    assert controller.stats['rejected'] == 1
+
+    controller.admit(late, wait=18.0, runtime=5.0, mode='flag', now=now)
+    assert late.admission == 'infeasible'
+    assert controller.stats['flagged'] == 1
+
+    fine = cloudlet(deadline=60)
+    controller.admit(fine, wait=18.0, runtime=5.0, mode='reject', now=now)
+    assert fine.admission == 'accepted'
+
+
+def test_unknown_wait_is_never_rejected():
+    controller = AdmissionController()
+    urgent = cloudlet(deadline=1)
+    controller.admit(urgent, wait=None, runtime=5.0, mode='reject', now=time.time())
+    assert urgent.admission == 'accepted'
+    assert urgent.predicted_start is None
+
+
+def test_error_round_trips_through_a_partition_reply():
+    error = AdmissionError("Pending queue full", 429, retry_after=7)
+    copy = AdmissionError.from_dict(error.to_dict())
+    assert (str(copy), copy.status, copy.retry_after, copy.predicted_start) == ("Pending queue full", 429, 7, None)
+
+
+# --- Through the ResourceManager ---
+
+@pytest.fixture
+def manager():
+    manager = ResourceManager(start_monitor=False)
+    manager.warm_pool.targets = {}
+    manager.log = lambda message: None
+    yield manager
+    for cl in manager.cloudlets:
+        if cl._completion_timer:
+            cl._completion_timer.cancel()
+
+
+def test_manager_rejects_a_cloudlet_that_cannot_start_before_its_deadline(manager):
+    manager.admission_mode = 'reject'
+    manager.add_vm(VM(cpu=4, ram=8, storage=100, bandwidth=1000))
+    busy = cloudlet(cpu=4, execution_time=30.0)
+    manager.submit_cloudlet(busy)
+    assert busy.status == CloudletStatus.ACTIVE
+
+    with pytest.raises(AdmissionError) as raised:
+        manager.submit_cloudlet(cloudlet(cpu=4, deadline=20))
+    assert raised.value.status == 422
+    assert raised.value.predicted_start == pytest.approx(busy.start_time + 30.0, abs=0.5)
+
+    queued = cloudlet(cpu=4, deadline=60)
+    manager.submit_cloudlet(queued)
+    assert queued.admission == 'accepted'
+    assert queued.predicted_start == pytest.approx(busy.start_time + 30.0, abs=0.5)
+    assert len(manager.pending_queue) == 1
+
+
+def test_manager_throttles_at_max_pending_even_with_admission_off(manager):
+    manager.admission_mode = 'off'
+    manager.max_pending = 2
+    for _ in range(2):
+        manager.submit_cloudlet(cloudlet())  # No VMs: both queue
+    with pytest.raises(AdmissionError) as raised:
+        manager.submit_cloudlet(cloudlet())
+    assert raised.value.status == 429
+    assert raised.value.retry_after == 5
+    assert len(manager.pending_queue) == 2
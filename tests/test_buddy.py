@@ -0,0 +1,97 @@
+import random
+
+from buddy import BuddyAllocator
+
+
+def free_blocks(buddy):
+    return sorted((start, order) for order, starts in enumerate(buddy.free) for start in starts)
+
+
+def check_invariants(buddy):
+    pages = set()
+    for start, order in free_blocks(buddy):
+        assert (start - buddy.base) % (1 << order) == 0, "free block is not aligned to its order"
+        block = set(range(start, start + (1 << order)))
+        assert not pages & block, "free blocks overlap"
+        pages |= block
+    assert buddy.free_count == len(pages)
+    assert all(buddy.base <= page < buddy.base + buddy.total_pages for page in pages)
+
+
+def test_seeds_largest_aligned_blocks():
+    buddy = BuddyAllocator(total_pages=22, max_order=3, base=100)
+    # 22 = 8 + 8 + 4 + 2, each aligned relative to the base
+    assert free_blocks(buddy) == [(100, 3), (108, 3), (116, 2), (120, 1)]
+    assert buddy.free_count == 22
+    assert buddy.tail_start() == 116
+    check_invariants(buddy)
+
+
+def test_take_splits_the_lowest_smallest_block():
+    buddy = BuddyAllocator(total_pages=16, max_order=3)
+    assert buddy.take(0) == 0
+    # The first 8-page block split into 1 + 1 (taken) + 2 + 4
+    assert free_blocks(buddy) == [(1, 0), (2, 1), (4, 2), (8, 3)]
+    assert buddy.free_count == 15
+    # The next single page comes from the leftover order-0 block, not a new split
+    assert buddy.take(0) == 1
+    assert buddy.take(1) == 2
+    assert free_blocks(buddy) == [(4, 2), (8, 3)]
+    check_invariants(buddy)
+
+
+def test_give_merges_with_free_buddies_only():
+    buddy = BuddyAllocator(total_pages=8, max_order=3)
+    a, b, c = buddy.take(0), buddy.take(0), buddy.take(1)
+    assert (a, b, c) == (0, 1, 2)
+    buddy.give(b, 0)
+    # Page 0 is still taken, so page 1 stays a single free page
+    assert free_blocks(buddy) == [(1, 0), (4, 2)]
+    buddy.give(a, 0)
+    # 0 + 1 merge into an order-1 block; its buddy (2) is taken, so it stops there
+    assert free_blocks(buddy) == [(0, 1), (4, 2)]
+    buddy.give(c, 1)
+    assert free_blocks(buddy) == [(0, 3)]
+    assert buddy.free_count == 8
+    check_invariants(buddy)
+
+
+def test_never_merges_past_max_order():
+    buddy = BuddyAllocator(total_pages=16, max_order=2)
+    blocks = [buddy.take(2) for _ in range(4)]
+    assert blocks == [0, 4, 8, 12]
+    assert buddy.take(0) is None
+    for start in blocks:
+        buddy.give(start, 2)
+    assert free_blocks(buddy) == [(0, 2), (4, 2), (8, 2), (12, 2)]
+    check_invariants(buddy)
+
+
+def test_take_fails_when_no_block_is_large_enough():
+    buddy = BuddyAllocator(total_pages=6, max_order=3)
+    # 6 pages seed as 4 + 2: nothing of order 3 exists even though 6 pages are free
+    assert buddy.take(3) is None
+    assert buddy.free_count == 6
+    assert buddy.take(2) == 0
+    assert buddy.take(2) is None
+    check_invariants(buddy)
+
+
+def test_random_take_give_keeps_invariants_and_fully_coalesces():
+    rng = random.Random(7)
+    buddy = BuddyAllocator(total_pages=1000, max_order=6, base=24)
+    seeded = free_blocks(buddy)
+    taken = []
+    for _ in range(2000):
+        if taken and rng.random() < 0.45:
+            buddy.give(*taken.pop(rng.randrange(len(taken))))
+        else:
+            order = rng.randint(0, 6)
+            start = buddy.take(order)
+            if start is not None:
+                taken.append((start, order))
+        check_invariants(buddy)
+        assert buddy.free_count + sum(1 << order for _, order in taken) == 1000
+    for start, order in taken:
+        buddy.give(start, order)
+    assert free_blocks(buddy) == seeded
@@ -0,0 +1,160 @@
+import pytest
+
+from core import Cloudlet, CloudletStatus
+from fairshare import FairShareScheduler, merge_metrics
+
+CAPACITY = {'cpu': 10, 'ram': 100, 'storage': 1000, 'bandwidth': 10000, 'gpu': 2}
+
+
+def job(tenant, cpu=1, ram=1, gpu=0):
+    return Cloudlet(cpu=cpu, ram=ram, storage=1, sla_priority=1, deadline=60, bandwidth=1, gpu=gpu,
+                    tenant=tenant)
+
+
+def submit(scheduler, *cloudlets):
+    for cloudlet in cloudlets:
+        scheduler.update(cloudlet)
+    return list(cloudlets)
+
+
+class Fleet:
+    """start() for schedule(): places cloudlets while CPUs are left, recording the order."""
+
+    def __init__(self, scheduler, cpus):
+        self.scheduler = scheduler
+        self.cpus = cpus
+        self.started = []
+
+    def start(self, cloudlet):
+        if cloudlet.cpu > self.cpus:
+            return False
+        self.cpus -= cloudlet.cpu
+        cloudlet.status = CloudletStatus.ACTIVE
+        self.scheduler.update(cloudlet)
+        self.started.append(cloudlet.tenant)
+        return True
+
+    def finish(self, cloudlet):
+        self.cpus += cloudlet.cpu
+        cloudlet.status = CloudletStatus.COMPLETED
+        self.scheduler.update(cloudlet)
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = FairShareScheduler()
+    scheduler.set_capacity(CAPACITY)
+    return scheduler
+
+
+def test_lowest_dominant_share_goes_first(scheduler):
+    # a's jobs take 10% of the CPUs, b's 30% of the RAM (and 10% of the CPUs):
+    # each tenant is measured on its own bottleneck
+    submit(scheduler, *[job('a', cpu=1) for _ in range(5)], *[job('b', cpu=1, ram=30) for _ in range(3)])
+    fleet = Fleet(scheduler, cpus=6)
+    assert scheduler.schedule(fleet.start) == 6
+    # Ties go to the tenant re-keyed first
+    assert fleet.started == ['a', 'b', 'a', 'a', 'b', 'a']
+    shares = {name: t.share for name, t in scheduler.tenants.items()}
+    assert shares == pytest.approx({'a': 0.4, 'b': 0.6})
+    assert scheduler.tenants['a'].dominant == 'cpu' and scheduler.tenants['b'].dominant == 'ram'
+
+
+def test_weight_change_re_keys_a_waiting_tenant(scheduler):
+    running = submit(scheduler, job('a', cpu=2), job('b', cpu=1))
+    for cloudlet in running:
+        cloudlet.status = CloudletStatus.ACTIVE
+        scheduler.update(cloudlet)
+    submit(scheduler, job('a'), job('b'))
+    # Equal weights: b (0.1) goes before a (0.2)
+    scheduler.configure('a', weight=4)  # a's key becomes 0.2 / 4 = 0.05
+    fleet = Fleet(scheduler, cpus=1)
+    scheduler.schedule(fleet.start)
+    assert fleet.started == ['a']
+    assert scheduler.configure('a') == {'tenant': 'a', 'weight': 4.0, 'quota': {}}
+
+
+def test_quota_passes_a_tenant_over_until_it_is_lifted(scheduler):
+    scheduler.configure('a', quota={'cpu': 2})
+    submit(scheduler, *[job('a') for _ in range(4)], job('b', cpu=3))
+    fleet = Fleet(scheduler, cpus=10)
+    assert scheduler.schedule(fleet.start) == 3
+    assert sorted(fleet.started) == ['a', 'a', 'b']
+    assert scheduler.tenants['a'].usage[0] == 2
+    assert len(scheduler.tenants['a'].waiting) == 2
+
+    scheduler.configure('a', quota={})  # Lifting the quota puts a back in the heap
+    assert scheduler.schedule(fleet.start) == 2
+    assert fleet.started[3:] == ['a', 'a']
+
+
+def test_passed_over_tenant_is_offered_again_on_the_next_pass(scheduler):
+    big = submit(scheduler, job('a', cpu=4))[0]
+    blocker = submit(scheduler, job('b', cpu=8))[0]
+    fleet = Fleet(scheduler, cpus=8)
+    scheduler.schedule(fleet.start)
+    assert fleet.started == ['a']  # b's 8-CPU job does not fit next to it
+    fleet.finish(big)
+    scheduler.schedule(fleet.start)
+    assert fleet.started == ['a', 'b']
+    assert blocker.id not in scheduler.tenants['b'].waiting
+
+
+def test_preempted_cloudlets_resume_before_newer_ones(scheduler):
+    newer = submit(scheduler, job('a'))[0]
+    resumed = job('a')
+    resumed.preemptions = 1
+    scheduler.update(resumed)
+    assert list(scheduler.tenants['a'].waiting) == [resumed.id, newer.id]
+
+
+def test_capacity_change_recomputes_every_share(scheduler):
+    cloudlet = submit(scheduler, job('a', cpu=5))[0]
+    cloudlet.status = CloudletStatus.ACTIVE
+    scheduler.update(cloudlet)
+    assert scheduler.tenants['a'].share == pytest.approx(0.5)
+    scheduler.set_capacity({**CAPACITY, 'cpu': 20})
+    assert scheduler.tenants['a'].share == pytest.approx(0.25)
+
+
+def test_finished_work_releases_usage_and_idle_tenants_are_dropped(scheduler):
+    cloudlet = submit(scheduler, job('a', cpu=3, gpu=1))[0]
+    cloudlet.status = CloudletStatus.ACTIVE
+    scheduler.update(cloudlet)
+    assert scheduler.tenants['a'].share == pytest.approx(0.5)
+    assert scheduler.tenants['a'].dominant == 'gpu'
+    cloudlet.status = CloudletStatus.COMPLETED
+    scheduler.update(cloudlet)
+    assert 'a' not in scheduler.tenants
+    assert scheduler.where == {}
+
+
+def test_stale_heap_entries_are_compacted(scheduler):
+    submit(scheduler, job('a'))
+    for weight in range(1, 500):
+        scheduler.configure('a', weight=weight)
+    assert len(scheduler.heap) <= 2 * len(scheduler.tenants) + 64
+
+
+def test_invalid_settings_are_rejected(scheduler):
+    with pytest.raises(ValueError):
+        scheduler.configure('a', weight=0)
+    with pytest.raises(ValueError):
+        scheduler.configure('a', quota={'disk': 1})
+    with pytest.raises(ValueError):
+        scheduler.configure('a', quota={'cpu': -1})
+    assert 'a' not in scheduler.tenants
+
+
+def test_merged_metrics_recompute_shares_over_the_whole_fleet(scheduler):
+    other = FairShareScheduler()
+    other.set_capacity(CAPACITY)
+    for part in (scheduler, other):
+        cloudlet = submit(part, job('a', cpu=5))[0]
+        cloudlet.status = CloudletStatus.ACTIVE
+        part.update(cloudlet)
+    merged = merge_metrics([scheduler.metrics(), other.metrics()])
+    assert merged['capacity']['cpu'] == 20
+    assert merged['tenants']['a']['usage']['cpu'] == 10
+    assert merged['tenants']['a']['running'] == 2
+    assert merged['tenants']['a']['dominant_share'] == pytest.approx(0.5)
@@ -0,0 +1,47 @@
+import pytest
+
+from core import Cloudlet, PendingQueue
+
+
+def cloudlets(n):
+    return [Cloudlet(cpu=1, ram=1, storage=1, sla_priority=1, deadline=60, name=f'c{i}') for i in range(n)]
+
+
+def test_behaves_like_the_deque_it_replaced():
+    a, b, c, d = cloudlets(4)
+    queue = PendingQueue([a, b])
+    queue.append(c)
+    queue.extendleft(reversed([d]))
+    assert list(queue) == [d, a, b, c]
+    assert (queue[0], queue[-1], queue[2]) == (d, c, b)
+    assert queue.popleft() is d
+    assert len(queue) == 3 and a in queue and d not in queue
+
+
+def test_removes_from_anywhere_and_keeps_the_order():
+    items = cloudlets(5)
+    queue = PendingQueue(items)
+    queue.remove(items[3])
+    queue.discard(items[0])
+    queue.discard(items[0])  # Already gone: no error
+    assert list(queue) == [items[1], items[2], items[4]]
+    with pytest.raises(ValueError):
+        queue.remove(items[3])
+
+
+def test_requeued_cloudlet_moves_instead_of_duplicating():
+    a, b = cloudlets(2)
+    queue = PendingQueue([a, b])
+    queue.appendleft(b)
+    assert list(queue) == [b, a]
+    queue.append(b)
+    assert list(queue) == [a, b]
+
+
+def test_empty_queue_raises_like_a_deque():
+    queue = PendingQueue()
+    assert not queue
+    with pytest.raises(IndexError):
+        queue[0]
+    with pytest.raises(IndexError):
+        queue.popleft()
@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from core import Cloudlet, CloudletStatus, ResourceManager, VM
+
+
+@pytest.fixture
+def manager():
+    manager = ResourceManager(start_monitor=False)
+    manager.warm_pool.targets = {}
+    manager.log = lambda message: None
+    manager.preemption_enabled = True
+    manager.add_vm(VM(cpu=4, ram=8, storage=100, bandwidth=1000))
+    yield manager
+    for cl in manager.cloudlets:
+        if cl._completion_timer:
+            cl._completion_timer.cancel()
+
+
+def job(name, priority, deadline=60, execution_time=30.0):
+    return Cloudlet(cpu=4, ram=1, storage=1, sla_priority=priority, deadline=deadline, name=name,
+                    execution_time=execution_time)
+
+
+def test_critical_cloudlet_preempts_lower_priority_work(manager):
+    low, crit = job('low', 1), job('crit', 3)
+    manager.submit_cloudlet(low)
+    manager.submit_cloudlet(crit)
+    manager._check_deadlines()
+    assert crit.status == CloudletStatus.ACTIVE
+    assert low.status == CloudletStatus.WAITING and low.preemptions == 1
+    assert list(manager.pending_queue) == [low]
+    assert manager.deadline_stats == {1: {'met': 1, 'missed': 0}, 3: {'met': 1, 'missed': 0}}
+
+
+def test_failed_cloudlet_never_preempts_or_starts(manager):
+    low, crit = job('low', 1), job('crit', 3)
+    manager.submit_cloudlet(low)
+    manager.submit_cloudlet(crit)
+    crit.deadline = time.time() - 1
+    manager._check_deadlines()
+    assert crit.status == CloudletStatus.FAILED
+    assert low.status == CloudletStatus.ACTIVE and low.preemptions == 0
+    assert len(manager.pending_queue) == 0
+
+    low_vm = low.vm_id
+    manager.complete_cloudlet(low.id)  # Frees the VM: the failed cloudlet must still not start
+    assert crit.status == CloudletStatus.FAILED
+    assert manager.vm_index.get(low_vm).cpu_used == 0
+    # Each cloudlet is counted exactly once
+    assert manager.deadline_stats == {1: {'met': 1, 'missed': 0}, 3: {'met': 0, 'missed': 1}}
+
+
+def test_late_start_before_the_monitor_sweep_counts_one_miss(manager):
+    low, late = job('low', 1, execution_time=0.05), job('late', 1)
+    manager.submit_cloudlet(low)
+    manager.submit_cloudlet(late)
+    late.deadline = time.time() - 1  # Passed while queued, before any deadline sweep
+    manager.complete_cloudlet(low.id)
+    assert late.status == CloudletStatus.ACTIVE
+    manager._check_deadlines()
+    assert manager.deadline_stats == {1: {'met': 1, 'missed': 1}}
@@ -0,0 +1,111 @@
+import pytest
+
+from core import Cloudlet, CloudletStatus
+from query import CLOUDLET_QUERY, QueryError, RowIndex, encode_cursor, run_query
+
+FIELDS = ('status', 'vm_id', 'sla_priority', 'tenant')
+
+
+def make_index(n, cpu=lambda i: i % 4 + 1):
+    index = RowIndex(FIELDS)
+    cloudlets = []
+    for i in range(n):
+        cloudlet = Cloudlet(cpu=cpu(i), ram=1, storage=1, sla_priority=1, deadline=60, name=f'c{i:02d}')
+        index.update(cloudlet)
+        cloudlets.append(cloudlet)
+    return index, cloudlets
+
+
+def page(index, **params):
+    params.setdefault('fields', 'name')
+    result = run_query(index, CLOUDLET_QUERY, {k: str(v) for k, v in params.items()})
+    return [item['name'] for item in result['items']], result['next_cursor']
+
+
+def walk(index, mutate=None, **params):
+    """Read every page, calling mutate(page number) between pages; returns the names seen."""
+    seen, cursor, n = [], None, 0
+    while True:
+        names, cursor = page(index, **params, **({'cursor': cursor} if cursor else {}))
+        seen += names
+        if cursor is None:
+            return seen
+        if mutate:
+            mutate(n)
+        n += 1
+
+
+def test_insertion_order_pages_resume_after_inserts_and_deletes():
+    index, cloudlets = make_index(10)
+
+    def mutate(n):
+        if n == 0:
+            index.remove(cloudlets[3].id)  # Already read
+            index.remove(cloudlets[6].id)  # Not read yet
+            extra = Cloudlet(cpu=1, ram=1, storage=1, sla_priority=1, deadline=60, name='new')
+            index.update(extra)
+
+    seen = walk(index, mutate, limit=4)
+    assert seen == ['c00', 'c01', 'c02', 'c03', 'c04', 'c05', 'c07', 'c08', 'c09', 'new']
+
+
+def test_cursor_survives_deletion_of_its_own_row():
+    index, cloudlets = make_index(6)
+    names, cursor = page(index, limit=3)
+    assert names == ['c00', 'c01', 'c02']
+    index.remove(cloudlets[2].id)
+    assert page(index, limit=3, cursor=cursor) == (['c03', 'c04', 'c05'], None)
+
+
+def test_filtered_pages_keep_position_when_rows_change_status():
+    index, cloudlets = make_index(8)
+    for cloudlet in cloudlets[::2]:
+        cloudlet.status = CloudletStatus.ACTIVE
+        index.update(cloudlet)
+
+    def mutate(n):
+        if n == 0:
+            # c00 leaves the filter behind the cursor, c05 joins it ahead of it
+            cloudlets[0].status = CloudletStatus.COMPLETED
+            cloudlets[5].status = CloudletStatus.ACTIVE
+            index.update(cloudlets[0])
+            index.update(cloudlets[5])
+
+    assert walk(index, mutate, status='active', limit=2) == ['c00', 'c02', 'c04', 'c05', 'c06']
+
+
+def test_sorted_pages_resume_by_key_then_seq():
+    index, cloudlets = make_index(8)  # cpu 1 2 3 4 1 2 3 4
+
+    def mutate(n):
+        if n == 0:
+            index.update(Cloudlet(cpu=1, ram=1, storage=1, sla_priority=1, deadline=60, name='low'))
+            index.update(Cloudlet(cpu=4, ram=1, storage=1, sla_priority=1, deadline=60, name='high'))
+            index.remove(cloudlets[7].id)
+
+    # Ties on cpu go by insertion; 'low' sorts before the cursor and is never returned
+    assert walk(index, mutate, sort='cpu', limit=3) == ['c00', 'c04', 'c01', 'c05', 'c02', 'c06', 'c03', 'high']
+
+
+def test_descending_pages_resume_before_the_cursor():
+    index, cloudlets = make_index(6)  # cpu 1 2 3 4 1 2
+
+    def mutate(n):
+        if n == 0:
+            index.remove(cloudlets[5].id)  # The cursor's own row
+            index.remove(cloudlets[1].id)  # Not read yet
+            index.update(Cloudlet(cpu=2, ram=1, storage=1, sla_priority=1, deadline=60, name='mid'))
+
+    # ('mid', cpu 2) is newer than c05, so it ranks above the cursor in descending order
+    assert walk(index, mutate, sort='-cpu', limit=3) == ['c03', 'c02', 'c05', 'c04', 'c00']
+
+
+def test_cursor_from_another_order_or_garbage_is_rejected():
+    index, _ = make_index(4)
+    _, cursor = page(index, sort='cpu', limit=2)
+    with pytest.raises(QueryError):
+        page(index, sort='-cpu', limit=2, cursor=cursor)
+    with pytest.raises(QueryError):
+        page(index, limit=2, cursor='@@not-a-cursor@@')
+    with pytest.raises(QueryError):
+        page(index, limit=2, cursor=encode_cursor({'o': 'seq'}))
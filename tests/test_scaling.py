@@ -0,0 +1,48 @@
+import pytest
+
+from core import Cloudlet, CloudletStatus, ResourceManager, VM
+
+
+@pytest.fixture
+def manager():
+    manager = ResourceManager(start_monitor=False)
+    manager.warm_pool.targets = {}
+    manager.log = lambda message: None
+    manager.add_vm(VM(cpu=4, ram=8, storage=100, bandwidth=1000, flavor='medium'))
+    return manager
+
+
+def oversized():
+    # More CPU than the largest flavor (xlarge, 16)
+    return Cloudlet(cpu=32, ram=8, storage=10, sla_priority=1, deadline=600, execution_time=0)
+
+
+def test_oversized_cloudlet_gets_one_vm_sized_to_it(manager):
+    big = oversized()
+    manager.submit_cloudlet(big)
+    added = manager._scale_up()
+    assert [(vm.flavor, vm.cpu_capacity) for vm in added] == [('custom', 32)]
+    assert big.status == CloudletStatus.ACTIVE and big.vm_id == added[0].id
+    assert len(manager.vms) == 2
+
+
+def test_oversized_cloudlet_does_not_grow_the_fleet_when_the_host_cannot_fit_it(manager):
+    manager.cpu_limit = 8
+    big = oversized()
+    manager.submit_cloudlet(big)
+    for _ in range(3):
+        assert manager._scale_up() == []
+    assert [vm.flavor for vm in manager.vms] == ['medium']
+    assert big.status == CloudletStatus.WAITING
+
+
+def test_oversized_cloudlet_waits_for_a_busy_vm_large_enough_for_it(manager):
+    first, second = oversized(), oversized()
+    manager.submit_cloudlet(first)
+    manager._scale_up()
+    manager.submit_cloudlet(second)
+    # The custom VM will host it once the first is done; a catalog VM never would
+    for _ in range(3):
+        assert manager._scale_up() == []
+    assert len(manager.vms) == 2
+    assert second.status == CloudletStatus.WAITING
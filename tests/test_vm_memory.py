@@ -0,0 +1,99 @@
+from core import MemoryManager, VM
+from vm_memory import SMALL_PAGES_PER_PAGE, LocalPageAllocator
+
+
+def check_consistent(memory):
+    """Every reserved page is free, a slab, or owned by exactly one cloudlet."""
+    reserved = [page for start, count in memory.blocks for page in range(start, start + count)]
+    assert len(reserved) == memory.reserved_count
+    owned_whole = [page for pages, _, _ in memory.owned.values() for page in pages]
+    assert sorted(memory.free + list(memory.slabs) + owned_whole) == sorted(reserved)
+    owned_smalls = [s for _, smalls, _ in memory.owned.values() for s in smalls]
+    assert len(owned_smalls) == len(set(owned_smalls))
+    assert all(s // SMALL_PAGES_PER_PAGE in memory.slabs for s in owned_smalls)
+    assert memory.free_slots == sum(len(slots) for slots in memory.slabs.values())
+
+
+def test_split_rounds_the_remainder_up_to_small_pages():
+    memory = LocalPageAllocator()
+    assert memory.split(0) == (0, 0)
+    assert memory.split(0.5) == (0, 2)
+    assert memory.split(2.25) == (2, 1)
+    assert memory.split(1.9) == (2, 0)  # Four small pages are a whole page
+
+
+def test_small_pages_share_a_slab_and_drain_back_whole():
+    memory = LocalPageAllocator()
+    memory.reserve([(8, 4)])
+    assert memory.allocate('a', 0.5) == [8]
+    assert memory.allocate('b', 0.25) == [8]  # Fills the partly used slab
+    assert memory.free == [9, 10, 11]
+    assert memory.small_pages_used == 3
+    check_consistent(memory)
+    memory.release('a')
+    assert memory.slabs == {8: [0, 1, 3]}
+    memory.release('b')
+    assert memory.slabs == {} and memory.free == [8, 9, 10, 11]
+    check_consistent(memory)
+
+
+def test_allocate_fails_without_touching_state_when_short():
+    memory = LocalPageAllocator()
+    memory.reserve([(0, 2)])
+    assert memory.allocate('a', 1.5) == [0, 1]
+    assert memory.allocate('b', 0.75) is None
+    assert 'b' not in memory.owned
+    assert memory.allocate('c', 0.5) == [1]  # Two slots left on the slab
+    check_consistent(memory)
+
+
+def test_clear_drops_the_reservation_and_returns_its_blocks():
+    memory = LocalPageAllocator()
+    memory.reserve([(16, 4), (4, 2)])
+    memory.allocate('a', 2.5)
+    assert memory.clear() == [(4, 2), (16, 4)]
+    assert (memory.blocks, memory.free, memory.slabs, memory.owned) == ([], [], {}, {})
+    assert memory.reserved_count == memory.free_slots == 0
+
+
+def test_reserve_clear_reserve_follows_consolidation_renumbering():
+    # The warm pool path: a VM reserves pages, sits idle while consolidation
+    # renumbers them, then is claimed and re-reads its blocks from the pool
+    manager = MemoryManager(total_memory=64)
+    first = VM(cpu=2, ram=16, storage=10, bandwidth=10)
+    idle = VM(cpu=2, ram=3, storage=10, bandwidth=10)
+    assert first.reserve_memory(manager) and idle.reserve_memory(manager)
+    assert idle.memory.blocks == [(16, 2), (18, 1)]
+    first.release_memory(manager)
+
+    moved = manager.consolidate()
+    assert moved  # The idle VM's blocks moved into the freed huge page
+    new_blocks = manager.blocks_of(idle.id)
+    assert new_blocks != idle.memory.blocks
+    assert sorted(p for s, c in new_blocks for p in range(s, s + c)) == sorted(moved[p] for p in range(16, 19))
+
+    idle.memory.clear()
+    idle.memory.reserve(manager.blocks_of(idle.id))
+    assert idle.memory.blocks == new_blocks
+    assert idle.memory.reserved_count == 3
+    pages = idle.memory.allocate('cl', 2.5)
+    assert set(pages) <= {p for s, c in new_blocks for p in range(s, s + c)}
+    check_consistent(idle.memory)
+
+    idle.memory.release('cl')
+    assert idle.memory.free == sorted(p for s, c in new_blocks for p in range(s, s + c))
+    idle.release_memory(manager)
+    assert manager.free_count == manager.total_pages
+
+
+def test_remap_follows_moved_pages_for_owned_memory():
+    memory = LocalPageAllocator()
+    memory.reserve([(20, 2)])
+    memory.allocate('a', 1.25)
+    memory.remap({20: 4, 21: 5})
+    assert memory.blocks == [(4, 2)]
+    assert memory.pages_of('a') == [4, 5]
+    assert memory.owned['a'][1] == [5 * SMALL_PAGES_PER_PAGE]
+    check_consistent(memory)
+    memory.release('a')
+    assert memory.free == [4, 5]